@@ -1,6 +1,12 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+import json
+import os
+import uuid
+from fastapi import APIRouter, Header, HTTPException, Response
+from fastapi.responses import StreamingResponse
 from datetime import datetime
-from typing import List
+from typing import List, Optional
+from loguru import logger
 
 from app.models import (
     ReservaInmediataRequest, 
@@ -8,66 +14,216 @@ from app.models import (
     ClaseConfig, 
     HealthResponse,
     ReservaProgramadaRequest,
-    ReservaProgramadaResponse
+    ReservaProgramadaResponse,
+    ReservaBatchRequest,
+    ReservaBatchResponse,
+    ReprogramarReservaRequest
 )
 from app.services.reservation_manager import ReservationManager
-from app.services.scheduled_reservation_manager import ScheduledReservationManager
+from app.services.idempotency_registry import RegistryFullError
+from app.services.immediate_queue import ImmediateReservationQueue, QueueFullError
+from app.services.result_store import ResultStoreFullError, StoredResult, result_store
+from app.services.job_events import job_event_bus
+from app.services.loop_monitor import loop_lag_monitor
+from app.services.opening_estimator import opening_estimator
+from app.services.direct_timing_controller import santiago_datetime, santiago_now
+from app.services.scheduled_jobs import (
+    JobConflictError,
+    JobNotFoundError,
+    JobValidationError,
+    build_job_response,
+    cancel_job,
+    get_job,
+    reschedule_job,
+    schedule_reservation
+)
 from app.services.config_manager import ConfigManager
 
 router = APIRouter()
 reservation_manager = ReservationManager()
-scheduled_reservation_manager = ScheduledReservationManager()
-
-# NOTA: Este diccionario solo previene duplicidad para una clase por día.
-# Si en el futuro se soportan múltiples reservas por día, este mecanismo debe ser ajustado.
-reservas_en_curso = {}
+immediate_queue = ImmediateReservationQueue(reservation_manager.execute_immediate_reservation)
 
 
 @router.post("/reservas/inmediata", response_model=ReservaResponse)
-async def reserva_inmediata(request: ReservaInmediataRequest):
+async def reserva_inmediata(request: ReservaInmediataRequest, response: Response, asincrono: bool = False):
     """
     Ejecuta una reserva inmediata para la clase especificada por nombre y fecha.
     Recibe el nombre de la clase y la fecha en formato "XX ##".
     Ejemplo: nombre_clase='17:00 CrossFit 17:00-18:00', fecha='JU 17'
+    
+    Pasa por una cola acotada (IMMEDIATE_QUEUE_MAXSIZE / IMMEDIATE_QUEUE_WORKERS);
+    si está llena responde 429 con Retry-After.
+    
+    Con ?asincrono=true responde 202 de inmediato con el id de la reserva;
+    el resultado se consulta en GET /reservas/{id}.
     """
+    if asincrono:
+        # Primero el registro: si el almacén está lleno no se encola nada
+        try:
+            entry = result_store.create(request.nombre_clase, request.fecha)
+        except ResultStoreFullError as e:
+            raise HTTPException(status_code=429, detail=f"{str(e)}. Reintentar más tarde.")
+        try:
+            future = immediate_queue.enqueue(request.nombre_clase, request.fecha)
+        except QueueFullError as e:
+            result_store.discard(entry.job_id)
+            raise _queue_full_exception(e)
+        
+        entry.task = asyncio.create_task(_complete_async_reservation(entry, future))
+        response.status_code = 202
+        response.headers["Location"] = f"/api/reservas/{entry.job_id}"
+        return _pending_reserva_response(entry)
+    
     try:
-        resultado = await reservation_manager.execute_immediate_reservation(
-            nombre_clase=request.nombre_clase,
-            fecha=request.fecha
+        resultado = await immediate_queue.submit(request.nombre_clase, request.fecha)
+    except QueueFullError as e:
+        raise _queue_full_exception(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error ejecutando reserva inmediata: {str(e)}")
+    
+    return _build_reserva_response(request.nombre_clase, request.fecha, resultado)
+
+
+@router.get("/reservas/{reserva_id}", response_model=ReservaResponse)
+async def estado_reserva_inmediata(reserva_id: str, response: Response, espera: float = 0):
+    """
+    Consulta el resultado de una reserva inmediata asíncrona.
+    Devuelve 200 con el resultado final, o 202 si sigue en curso.
+    
+    Con ?espera=N (segundos) mantiene la conexión hasta que termine o pase N
+    (long-polling, máximo RESULT_LONG_POLL_MAX_SECONDS).
+    """
+    max_wait = float(os.getenv("RESULT_LONG_POLL_MAX_SECONDS", "30"))
+    entry = await result_store.wait(reserva_id, timeout=min(max(espera, 0), max_wait))
+    if entry is None:
+        raise HTTPException(status_code=404, detail="No existe una reserva con ese id (o su resultado expiró).")
+    if entry.is_done:
+        return entry.response
+    response.status_code = 202
+    return _pending_reserva_response(entry)
+
+
+async def _complete_async_reservation(entry: StoredResult, future: asyncio.Future):
+    """Espera el resultado de la cola y lo guarda en el almacén de resultados"""
+    try:
+        resultado = await future
+    except Exception as e:
+        resultado = {
+            "success": False,
+            "message": f"Error ejecutando reserva inmediata: {str(e)}",
+            "error_type": "UNEXPECTED_ERROR"
+        }
+    result_store.complete(
+        entry.job_id,
+        _build_reserva_response(entry.nombre_clase, entry.fecha, resultado, reserva_id=entry.job_id)
+    )
+
+
+def _queue_full_exception(e: QueueFullError) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail={
+            "mensaje": "Cola de reservas inmediatas llena. Reintentar más tarde.",
+            "posicion_cola": e.position,
+            "retry_after_segundos": e.retry_after
+        },
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+
+def _pending_reserva_response(entry: StoredResult) -> ReservaResponse:
+    return ReservaResponse(
+        id=entry.job_id,
+        nombre_clase=entry.nombre_clase,
+        fecha=entry.fecha,
+        estado="en_proceso",
+        mensaje="Reserva en curso. Consultar GET /api/reservas/{id} para el resultado.",
+        fecha_hora_reserva=entry.fecha_creacion
+    )
+
+
+def _build_reserva_response(
+    nombre_clase: str,
+    fecha: str,
+    resultado: dict,
+    reserva_id: Optional[str] = None
+) -> ReservaResponse:
+    """Convierte el resultado del ReservationManager (vía cola) en ReservaResponse"""
+    exitosa = bool(resultado.get("success"))
+    return ReservaResponse(
+        id=reserva_id or str(uuid.uuid4()),
+        nombre_clase=nombre_clase,
+        fecha=fecha,
+        estado="exitosa" if exitosa else "fallida",
+        mensaje=resultado.get("message", "Reserva completada exitosamente" if exitosa else "Error en la reserva"),
+        fecha_hora_reserva=datetime.now(),
+        error_type=None if exitosa else resultado.get("error_type"),
+        posicion_cola=resultado.get("queue_position"),
+        tiempo_en_cola_segundos=resultado.get("queue_wait_seconds"),
+        tiempo_servicio_segundos=resultado.get("service_time_seconds"),
+        compartida=resultado.get("coalesced")
+    )
+
+
+@router.post("/reservas/batch", response_model=ReservaBatchResponse)
+async def reserva_batch(request: ReservaBatchRequest):
+    """
+    Ejecuta varias reservas inmediatas con un solo login.
+    Las fechas distintas se procesan en pestañas paralelas (límite configurable).
+
+    Ejemplo de uso:
+    {
+        "reservas": [
+            {"nombre_clase": "17:00 CrossFit 17:00-18:00", "fecha": "LU 21"},
+            {"nombre_clase": "18:00 CrossFit 18:00-19:00", "fecha": "MA 22"}
+        ],
+        "max_pestanas": 3
+    }
+    """
+    max_items = int(os.getenv("BATCH_MAX_ITEMS", "20"))
+    if not request.reservas:
+        raise HTTPException(status_code=400, detail="El lote debe incluir al menos una reserva.")
+    if len(request.reservas) > max_items:
+        raise HTTPException(status_code=400, detail=f"El lote no puede superar {max_items} reservas.")
+
+    try:
+        resultado = await reservation_manager.execute_batch_reservation(
+            [(item.nombre_clase, item.fecha) for item in request.reservas],
+            max_tabs=request.max_pestanas
         )
-        
-        # Convertir el resultado al formato esperado por ReservaResponse
-        if resultado.get("success"):
-            import uuid
-            
-            return ReservaResponse(
-                id=str(uuid.uuid4()),
-                nombre_clase=request.nombre_clase,
-                fecha=request.fecha,
-                estado="exitosa",  # Cambiado de "confirmada" a "exitosa"
-                mensaje=resultado.get("message", "Reserva completada exitosamente"),
-                fecha_hora_reserva=datetime.now()
-            )
-        else:
-            import uuid
-            
-            return ReservaResponse(
+
+        resultados = [
+            ReservaResponse(
                 id=str(uuid.uuid4()),
-                nombre_clase=request.nombre_clase,
-                fecha=request.fecha,
-                estado="fallida",  # Cambiado de "error" a "fallida"
-                mensaje=resultado.get("message", "Error en la reserva"),
-                fecha_hora_reserva=datetime.now()
+                nombre_clase=item.nombre_clase,
+                fecha=item.fecha,
+                estado="exitosa" if item_result["success"] else "fallida",
+                mensaje=item_result["message"],
+                fecha_hora_reserva=datetime.now(),
+                error_type=item_result.get("error_type")
             )
-            
+            for item, item_result in zip(request.reservas, resultado["results"])
+        ]
+        exitosas = sum(1 for r in resultados if r.estado == "exitosa")
+
+        return ReservaBatchResponse(
+            id=str(uuid.uuid4()),
+            total=len(resultados),
+            exitosas=exitosas,
+            fallidas=len(resultados) - exitosas,
+            resultados=resultados,
+            duracion_segundos=round(resultado.get("duration", 0.0), 3)
+        )
+
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error ejecutando reserva inmediata: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error ejecutando lote de reservas: {str(e)}")
 
 
 @router.post("/reservas/programada", response_model=ReservaProgramadaResponse)
 async def reserva_programada(request: ReservaProgramadaRequest):
     """
     Programa una reserva para ejecutarse en un momento exacto.
+    Si ya existe un job vigente para la misma clase, fecha y hora, devuelve su estado.
     
     Ejemplo de uso:
     {
@@ -78,47 +234,117 @@ async def reserva_programada(request: ReservaProgramadaRequest):
     }
     """
     try:
-        # Log de los parámetros enviados
-        import pprint
-        pprint.pprint({
-            'nombre_clase': request.nombre_clase,
-            'fecha_clase': request.fecha_clase,
-            'fecha_reserva': request.fecha_reserva,
-            'hora_reserva': request.hora_reserva,
-            'timezone': request.timezone
-        })
-        
-        # Ejecutar en background y devolver respuesta inmediata
-        import asyncio
-        
-        # Crear la tarea en background (fire and forget)
-        task = asyncio.create_task(
-            scheduled_reservation_manager.execute_scheduled_reservation(request)
+        logger.info(
+            f"📅 Programando reserva: {request.nombre_clase} ({request.fecha_clase}) "
+            f"para {request.fecha_reserva} {request.hora_reserva} {request.timezone}"
         )
         
-        # Para MVP, devolvemos respuesta inmediata
-        from datetime import datetime
-        import uuid
-        
-        return ReservaProgramadaResponse(
-            id=str(uuid.uuid4()),
-            clase_nombre=request.nombre_clase,
-            fecha_clase=request.fecha_clase,
-            fecha_reserva=request.fecha_reserva,
-            hora_reserva=request.hora_reserva,
-            estado="programada",
-            fecha_creacion=datetime.now(),
-            fecha_ejecucion_programada=datetime.now(),
-            fecha_ejecucion_real=None,
-            mensaje="Reserva programada iniciada correctamente. El proceso se ejecutará en background.",
-            tiempo_espera_segundos=0,
-            error_type=None
-        )
+        # Registrar y ejecutar en background (fire and forget, con handle en el registro)
+        response, _ = schedule_reservation(request)
+        return response
         
+    except RegistryFullError as e:
+        raise HTTPException(status_code=429, detail=f"{str(e)}. Reintentar cuando termine alguno.")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error programando reserva: {str(e)}")
 
 
+@router.get("/reservas/programada/{job_id}", response_model=ReservaProgramadaResponse)
+async def estado_reserva_programada(job_id: str):
+    """
+    Devuelve el estado actual de un job de reserva programada.
+    """
+    entry = get_job(job_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="No existe una reserva programada con ese id.")
+    return build_job_response(entry, f"Estado actual: {entry.estado.value}")
+
+
+@router.get("/reservas/programada/{job_id}/events")
+async def eventos_reserva_programada(job_id: str, last_event_id: Optional[int] = Header(None)):
+    """
+    Stream Server-Sent Events con las fases (programada, preparando, ejecutando,
+    exitosa/fallida/cancelada) y las muestras de tiempo del job.
+    Entrega primero el historial y termina al llegar a una fase terminal.
+    Soporta reanudación con el header Last-Event-ID.
+    """
+    if get_job(job_id) is None and not job_event_bus.has_job(job_id):
+        raise HTTPException(status_code=404, detail="No existe una reserva programada con ese id.")
+    
+    keepalive = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+    
+    async def stream():
+        events = job_event_bus.subscribe(job_id, after_seq=last_event_id or 0)
+        next_event = None
+        try:
+            while True:
+                if next_event is None:
+                    next_event = asyncio.ensure_future(events.__anext__())
+                done, _ = await asyncio.wait({next_event}, timeout=keepalive)
+                if not done:
+                    yield ": keep-alive\n\n"
+                    continue
+                try:
+                    event = next_event.result()
+                except StopAsyncIteration:
+                    return
+                next_event = None
+                yield f"id: {event.seq}\nevent: {event.tipo}\ndata: {json.dumps(event.to_dict(), default=str)}\n\n"
+        finally:
+            if next_event is not None:
+                next_event.cancel()
+                try:
+                    await next_event
+                except (asyncio.CancelledError, StopAsyncIteration):
+                    pass
+            await events.aclose()
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.delete("/reservas/programada/{job_id}", response_model=ReservaProgramadaResponse)
+async def cancelar_reserva_programada(job_id: str):
+    """
+    Cancela una reserva programada: interrumpe la espera, cierra el navegador
+    y libera el lease de ejecución.
+    """
+    try:
+        entry, elapsed_ms = await cancel_job(job_id)
+    except JobNotFoundError:
+        raise HTTPException(status_code=404, detail="No existe una reserva programada con ese id.")
+    except JobConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return build_job_response(entry, f"Reserva programada cancelada ({elapsed_ms:.1f} ms).")
+
+
+@router.post("/reservas/programada/{job_id}/reprogramar", response_model=ReservaProgramadaResponse)
+async def reprogramar_reserva_programada(job_id: str, request: ReprogramarReservaRequest):
+    """
+    Cambia el momento de ejecución de una reserva programada conservando su id.
+    Si el botón ya está armado y la clase no cambia, se reutiliza la sesión web.
+    
+    Ejemplo de uso:
+    {
+        "fecha_reserva": "2025-01-19",
+        "hora_reserva": "17:00:05"
+    }
+    """
+    try:
+        entry, session_reused = await reschedule_job(job_id, request)
+    except JobNotFoundError:
+        raise HTTPException(status_code=404, detail="No existe una reserva programada con ese id.")
+    except JobValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except JobConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    mensaje = "Reserva reprogramada reutilizando la sesión activa." if session_reused else "Reserva reprogramada."
+    return build_job_response(entry, mensaje)
+
+
 @router.get("/clases", response_model=List[ClaseConfig])
 async def listar_clases():
     """
@@ -142,6 +368,30 @@ async def health_check():
     )
 
 
+@router.get("/metricas/event-loop")
+async def metricas_event_loop():
+    """
+    Lag del event loop (percentiles en ms del último minuto y de los últimos 5s)
+    
+    Lo consulta cada reserva programada antes de T: con lag alto usa la espera
+    de precisión y rechaza reservas inmediatas nuevas hasta después del click.
+    """
+    loop_lag_monitor.ensure_started()
+    return loop_lag_monitor.snapshot()
+
+
+@router.get("/metricas/apertura")
+async def metricas_apertura():
+    """
+    Apertura estimada por clase y día (habilitación del botón respecto de hora_reserva, en ms)
+    
+    Cada reserva programada registra cuándo se habilitó el botón; la
+    estimación define el momento de disparo y la espera del click en la
+    próxima ejecución.
+    """
+    return opening_estimator.snapshot()
+
+
 @router.post("/ejecutar-reservas-hoy", response_model=ReservaProgramadaResponse)
 async def ejecutar_reservas_hoy():
     """
@@ -157,17 +407,8 @@ async def ejecutar_reservas_hoy():
     # PENDIENTE: Si se soportan múltiples reservas por día, revisar esta lógica
     fecha_reserva = params['fecha_reserva']
     hora_reserva = params['hora_reserva']
-    dt_reserva = datetime.strptime(f"{fecha_reserva} {hora_reserva}", "%Y-%m-%d %H:%M:%S")
-    if dt_reserva < datetime.now():
+    if santiago_datetime(fecha_reserva, hora_reserva) < santiago_now():
         raise HTTPException(status_code=409, detail="La hora de reserva ya pasó. No se ejecuta la reserva.")
-    key = (params['nombre_clase'], params['fecha_reserva'], params['hora_reserva'])
-    if key in reservas_en_curso:
-        raise HTTPException(status_code=409, detail="Ya hay una reserva programada en curso para este horario.")
-    # Log para depuración: mostrar reservas_en_curso antes y después
-    import pprint
-    pprint.pprint({'[ENDPOINT] reservas_en_curso antes': reservas_en_curso})
-    reservas_en_curso[key] = True
-    pprint.pprint({'[ENDPOINT] reservas_en_curso después': reservas_en_curso})
+    # Si ya hay un job vigente para este horario se devuelve su estado (sin duplicar)
     request = ReservaProgramadaRequest(**params)
-    # Llamada directa a la función de reserva programada
     return await reserva_programada(request)
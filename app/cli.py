@@ -0,0 +1,223 @@
+"""
+CLI - Ejecución de reservas sin levantar el servidor HTTP
+
+Pensado para cron o ejecuciones puntuales ("reservar la clase de hoy y salir"):
+no importa FastAPI, uvicorn ni los routers. Cada subcomando importa solo los
+servicios que necesita, imprime un resultado JSON en stdout (los logs van a
+stderr) y termina con un código de salida significativo.
+
+Uso:
+    python -m app.cli inmediata --clase "18:00 CrossFit 18:00-19:00" --fecha "LU 21"
+    python -m app.cli programada --clase "18:00 CrossFit 18:00-19:00" --fecha-clase "LU 21" \\
+        --fecha-reserva 2025-01-19 --hora-reserva 17:00:00
+    python -m app.cli hoy
+    python -m app.cli preparar --clase "18:00 CrossFit 18:00-19:00" --fecha "LU 21"
+
+Códigos de salida:
+    0  Reserva exitosa (o preparación completa en `preparar`)
+    1  La reserva o la preparación falló
+    2  Argumentos inválidos
+    3  No hay nada que hacer (sin clase activa para hoy)
+    4  La hora de reserva ya pasó
+    5  Configuración incompleta (credenciales)
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_NOTHING_TO_DO = 3
+EXIT_TOO_LATE = 4
+EXIT_CONFIG_ERROR = 5
+
+# error_type -> código de salida (el resto de errores es EXIT_FAILED)
+ERROR_EXIT_CODES = {
+    "TOO_LATE": EXIT_TOO_LATE,
+    "CREDENTIALS_ERROR": EXIT_CONFIG_ERROR,
+}
+
+Result = Tuple[Dict[str, Any], int]
+
+
+def _exit_code_for(success: bool, error_type: Optional[str]) -> int:
+    if success:
+        return EXIT_OK
+    return ERROR_EXIT_CODES.get(error_type, EXIT_FAILED)
+
+
+def _config_error(comando: str, error: Exception) -> Result:
+    return {
+        "comando": comando,
+        "success": False,
+        "message": str(error),
+        "error_type": "CREDENTIALS_ERROR"
+    }, EXIT_CONFIG_ERROR
+
+
+def _configure_logging():
+    """Logs a stderr para que stdout contenga solo el JSON del resultado"""
+    from .logging_config import configure_logging
+
+    configure_logging(sys.stderr)
+
+
+# ================================
+# SUBCOMANDOS
+# ================================
+
+async def run_inmediata(args: argparse.Namespace) -> Result:
+    """Reserva inmediata vía ReservationManager"""
+    from app.services.reservation_manager import ReservationManager
+
+    try:
+        manager = ReservationManager()
+    except ValueError as e:
+        return _config_error("inmediata", e)
+
+    result = await manager.execute_immediate_reservation(args.clase, args.fecha)
+    payload = {"comando": "inmediata", "clase": args.clase, "fecha": args.fecha, **result}
+    return payload, _exit_code_for(result["success"], result.get("error_type"))
+
+
+async def run_programada(args: argparse.Namespace) -> Result:
+    """Reserva programada vía ScheduledReservationManager (bloquea hasta T)"""
+    from app.models.reserva import ReservaProgramadaRequest
+
+    request = ReservaProgramadaRequest(
+        nombre_clase=args.clase,
+        fecha_clase=args.fecha_clase,
+        fecha_reserva=args.fecha_reserva,
+        hora_reserva=args.hora_reserva,
+        redundante=args.redundante,
+        margen_seguridad_ms=args.margen_ms,
+        margen_preparacion_segundos=args.margen_preparacion
+    )
+    return await _execute_scheduled(request, "programada")
+
+
+async def run_hoy(args: argparse.Namespace) -> Result:
+    """Reserva programada de hoy según config/clases.json"""
+    from app.services.config_manager import ConfigManager
+
+    params = ConfigManager().detectar_clase_para_hoy()
+    if not params:
+        return {
+            "comando": "hoy",
+            "success": False,
+            "message": "No hay clase activa para reservar hoy."
+        }, EXIT_NOTHING_TO_DO
+
+    from app.models.reserva import ReservaProgramadaRequest
+
+    return await _execute_scheduled(ReservaProgramadaRequest(**params), "hoy")
+
+
+async def run_preparar(args: argparse.Namespace) -> Result:
+    """Dry-run: navega hasta el botón de reserva sin hacer click y cierra el navegador"""
+    from app.services.preparation_service import PreparationService
+
+    try:
+        service = PreparationService()
+    except ValueError as e:
+        return _config_error("preparar", e)
+
+    try:
+        result = await service.prepare_reservation(args.clase, args.fecha)
+    finally:
+        await service._cleanup_browser()
+
+    payload = {
+        "comando": "preparar",
+        "clase": args.clase,
+        "fecha": args.fecha,
+        "success": result["success"],
+        "message": result["message"],
+        "button_ready": result.get("button_ready", False),
+        "preparation_time": result.get("preparation_time"),
+        "error_type": result.get("error_type")
+    }
+    return payload, _exit_code_for(result["success"], result.get("error_type"))
+
+
+async def _execute_scheduled(request, comando: str) -> Result:
+    from app.services.scheduled_reservation_manager import ScheduledReservationManager
+
+    try:
+        manager = ScheduledReservationManager()
+    except ValueError as e:
+        return _config_error(comando, e)
+
+    response = await manager.execute_scheduled_reservation(request)
+    success = response.error_type is None
+    payload = {"comando": comando, "success": success, **response.model_dump(mode="json")}
+    return payload, _exit_code_for(success, response.error_type)
+
+
+COMMANDS = {
+    "inmediata": run_inmediata,
+    "programada": run_programada,
+    "hoy": run_hoy,
+    "preparar": run_preparar,
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.cli",
+        description="Reservas CrossFit sin servidor HTTP (resultado JSON en stdout)"
+    )
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    inmediata = subparsers.add_parser("inmediata", help="Reservar ahora")
+    inmediata.add_argument("--clase", required=True, help='Nombre exacto, ej: "18:00 CrossFit 18:00-19:00"')
+    inmediata.add_argument("--fecha", required=True, help='Fecha de la clase, ej: "LU 21"')
+
+    programada = subparsers.add_parser("programada", help="Esperar hasta la hora indicada y reservar")
+    programada.add_argument("--clase", required=True)
+    programada.add_argument("--fecha-clase", required=True, help='Fecha de la clase, ej: "LU 21"')
+    programada.add_argument("--fecha-reserva", required=True, help="YYYY-MM-DD")
+    programada.add_argument("--hora-reserva", required=True, help="HH:MM:SS")
+    programada.add_argument("--redundante", action="store_true", help="Modo activo-activo")
+    programada.add_argument("--margen-ms", type=float, help="Margen de llegada después de T (compensación de latencia)")
+    programada.add_argument("--margen-preparacion", type=float, help="Segundos sobre el p99 de la preparación")
+
+    subparsers.add_parser("hoy", help="Reserva programada de hoy según la configuración")
+
+    preparar = subparsers.add_parser("preparar", help="Dry-run: preparar hasta el botón sin hacer click")
+    preparar.add_argument("--clase", required=True)
+    preparar.add_argument("--fecha", required=True)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    _configure_logging()
+
+    try:
+        payload, exit_code = asyncio.run(COMMANDS[args.comando](args))
+    except KeyboardInterrupt:
+        payload, exit_code = {"comando": args.comando, "success": False, "message": "Interrumpido"}, EXIT_FAILED
+    except Exception as e:
+        payload, exit_code = {
+            "comando": args.comando,
+            "success": False,
+            "message": f"Error inesperado: {str(e)}",
+            "error_type": "UNEXPECTED_ERROR"
+        }, EXIT_FAILED
+
+    payload["exit_code"] = exit_code
+    print(json.dumps(payload, ensure_ascii=False, default=str))
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
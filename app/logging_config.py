@@ -0,0 +1,138 @@
+"""
+Logging Config - Configuración central de loguru
+
+- Escritura en un hilo de fondo (enqueue=True): el event loop solo encola el
+  mensaje, la escritura a stdout ocurre fuera del camino del click
+- Salida JSON opcional (LOG_JSON=true) para ingesta estructurada
+- Ventana crítica: desde T-2s hasta terminar la verificación, los mensajes se
+  guardan en memoria y se escriben al salir de la ventana (con su hora,
+  módulo y línea originales), así el log no se interpone entre el timer y el click
+
+Uso:
+    from app.logging_config import configure_logging, critical_window
+    configure_logging()
+    with critical_window:
+        ...  # click
+"""
+
+import atexit
+import os
+import sys
+from typing import Any, Dict, List, Optional, TextIO
+
+from loguru import logger
+
+LOG_FORMAT = (
+    "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | "
+    "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
+)
+
+
+class CriticalWindow:
+    """
+    Filtro de loguru que retiene los mensajes mientras la ventana está activa
+
+    Admite anidamiento (varios jobs con click cercano): los mensajes se
+    escriben cuando sale el último.
+    """
+
+    def __init__(self, max_records: Optional[int] = None):
+        self.max_records = max_records or int(os.getenv("LOG_CRITICAL_BUFFER_MAX", "5000"))
+        self.dropped = 0
+        self._depth = 0
+        self._buffer: List[Dict[str, Any]] = []
+
+    @property
+    def active(self) -> bool:
+        return self._depth > 0
+
+    def filter(self, record: Dict[str, Any]) -> bool:
+        if self._depth == 0:
+            return True
+        if len(self._buffer) < self.max_records:
+            self._buffer.append(record)
+        else:
+            self.dropped += 1
+        return False
+
+    def enter(self):
+        self._depth += 1
+
+    def exit(self) -> int:
+        """Sale de la ventana; si era la última, escribe lo retenido. Devuelve cuántos mensajes escribió"""
+        if self._depth == 0:
+            return 0
+        self._depth -= 1
+        if self._depth > 0:
+            return 0
+        return self.flush()
+
+    def flush(self) -> int:
+        records, self._buffer = self._buffer, []
+        for record in records:
+            logger.patch(lambda r, original=record: r.update(
+                time=original["time"],
+                name=original["name"],
+                module=original["module"],
+                file=original["file"],
+                function=original["function"],
+                line=original["line"],
+                exception=original["exception"],
+                extra={**original["extra"], "buffered": True}
+            )).log(record["level"].name, record["message"])
+        if self.dropped:
+            logger.warning(f"⚠️ Ventana crítica: {self.dropped} mensajes descartados (buffer lleno)")
+            self.dropped = 0
+        return len(records)
+
+    def __enter__(self):
+        self.enter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.exit()
+        return False
+
+
+# Ventana compartida por todos los handlers configurados con configure_logging
+critical_window = CriticalWindow()
+
+
+def configure_logging(
+    sink: TextIO = sys.stdout,
+    level: Optional[str] = None,
+    json_output: Optional[bool] = None,
+    enqueue: Optional[bool] = None
+) -> int:
+    """
+    Reemplaza los handlers de loguru por uno no bloqueante
+
+    Args:
+        sink: Destino (stdout para el servidor, stderr para el CLI)
+        level: Nivel mínimo (por defecto LOG_LEVEL o INFO)
+        json_output: Un JSON por línea (por defecto LOG_JSON)
+        enqueue: Escribir desde un hilo de fondo (por defecto LOG_ENQUEUE, activado)
+
+    Returns:
+        id del handler de loguru
+    """
+    if json_output is None:
+        json_output = os.getenv("LOG_JSON", "false").lower() == "true"
+    if enqueue is None:
+        enqueue = os.getenv("LOG_ENQUEUE", "true").lower() == "true"
+
+    logger.remove()
+    handler_id = logger.add(
+        sink,
+        level=level or os.getenv("LOG_LEVEL", "INFO"),
+        format=LOG_FORMAT,
+        serialize=json_output,
+        colorize=False if json_output else None,
+        enqueue=enqueue,
+        filter=critical_window.filter
+    )
+    return handler_id
+
+
+# Vaciar la cola del hilo de fondo al terminar el proceso
+atexit.register(logger.remove)
@@ -13,13 +13,9 @@ sys.path.append(str(root_dir))
 # Cargar variables de entorno
 load_dotenv()
 
-# Configurar logging
-logger.remove()  # Remover el logger por defecto
-logger.add(
-    sys.stdout,
-    format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
-    level=os.getenv("LOG_LEVEL", "INFO")
-)
+# Configurar logging (escritura en hilo de fondo, JSON opcional con LOG_JSON=true)
+from app.logging_config import configure_logging
+configure_logging(sys.stdout)
 
 # Importar routers
 from app.api.reservas import router as reservas_router
@@ -53,11 +49,15 @@ async def startup_event():
     logger.info(f"👤 Usuario: {os.getenv('USERNAME')}")
     logger.info("✅ Aplicación iniciada correctamente")
 
+    # Medición continua del lag del event loop (GET /api/metricas/event-loop)
+    from app.services.loop_monitor import loop_lag_monitor
+    loop_lag_monitor.ensure_started()
+
     # --- Ejecución automática de reserva programada al iniciar el servidor ---
     from app.services.config_manager import ConfigManager
     from app.models import ReservaProgramadaRequest
-    from app.services.scheduled_reservation_manager import ScheduledReservationManager
-    import asyncio
+    from app.services.idempotency_registry import RegistryFullError
+    from app.services.scheduled_jobs import schedule_reservation
 
     logger.info("🔎 Verificando si corresponde ejecutar reserva programada al iniciar el servidor...")
     config_manager = ConfigManager()
@@ -65,23 +65,28 @@ async def startup_event():
     if params:
         logger.info(f"✅ Clase activa detectada para hoy: {params['nombre_clase']} - Ejecutando reserva programada...")
         request = ReservaProgramadaRequest(**params)
-        scheduled_manager = ScheduledReservationManager()
-        # Ejecutar en background (no bloquear el arranque)
-        asyncio.create_task(scheduled_manager.execute_scheduled_reservation(request))
+        # Ejecutar en background (no bloquear el arranque); el registro evita duplicados.
+        # warm_start: si T está cerca, navegador y login arrancan ya, en paralelo con FastAPI
+        try:
+            response, created = schedule_reservation(request, warm_start=True)
+        except RegistryFullError as e:
+            logger.error(f"[STARTUP] No se pudo registrar la reserva automática: {str(e)}")
+            return
+        if created:
+            logger.info(f"[STARTUP] Job registrado: {response.id}")
+        else:
+            logger.info(f"[STARTUP] Ya existía job {response.id} en estado {response.estado.value}")
     else:
         logger.info("⏭️  No hay clase activa para reservar hoy. No se ejecuta reserva automática.")
 
-    # --- Log para depuración: mostrar reservas en curso antes y después ---
-    from app.api.reservas import reservas_en_curso
-    logger.info(f"[STARTUP] reservas_en_curso antes: {reservas_en_curso}")
-    key = (params['nombre_clase'], params['fecha_reserva'], params['hora_reserva'])
-    reservas_en_curso[key] = True
-    logger.info(f"[STARTUP] reservas_en_curso después: {reservas_en_curso}")
-
 @app.on_event("shutdown")
 async def shutdown_event():
     """Evento de cierre de la aplicación"""
     logger.info("🛑 Cerrando aplicación...")
+    from app.api.reservas import immediate_queue
+    from app.services.loop_monitor import loop_lag_monitor
+    await immediate_queue.close()
+    await loop_lag_monitor.stop()
 
 @app.get("/")
 async def root():
@@ -2,10 +2,15 @@
 from .reserva import (
     EstadoReserva,
     EstadoReservaProgramada,
+    EstadoJob,
     ReservaInmediataRequest,
     ReservaProgramadaRequest,
+    ReprogramarReservaRequest,
     ReservaResponse,
     ReservaProgramadaResponse,
+    ReservaBatchItem,
+    ReservaBatchRequest,
+    ReservaBatchResponse,
     ClaseConfig,
     HealthResponse
 )
@@ -14,10 +19,15 @@ from .reserva import (
 __all__ = [
     "EstadoReserva",
     "EstadoReservaProgramada",
+    "EstadoJob",
     "ReservaInmediataRequest",
     "ReservaProgramadaRequest", 
+    "ReprogramarReservaRequest",
     "ReservaResponse",
     "ReservaProgramadaResponse",
+    "ReservaBatchItem",
+    "ReservaBatchRequest",
+    "ReservaBatchResponse",
     "ClaseConfig",
     "HealthResponse"
 ]
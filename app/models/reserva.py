@@ -1,5 +1,5 @@
 from pydantic import BaseModel, validator
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from enum import Enum
 
@@ -14,6 +14,15 @@ class EstadoReservaProgramada(str, Enum):
     EJECUTANDO = "ejecutando"           # Monitoreo de precisión hasta hora exacta
     EXITOSA = "exitosa"                 # Reserva completada exitosamente
     FALLIDA = "fallida"                 # Error en cualquier fase
+    CANCELADA = "cancelada"             # Cancelada por el usuario
+
+class EstadoJob(str, Enum):
+    PENDING = "pending"                 # Registrado, esperando preparación
+    PREPARING = "preparing"             # Navegación web en curso
+    ARMED = "armed"                     # Botón listo, esperando hora exacta
+    DONE = "done"                       # Finalizado con éxito
+    FAILED = "failed"                   # Finalizado con error (permite reintento)
+    CANCELLED = "cancelled"             # Cancelado por el usuario (permite reprogramar)
 
 class ReservaInmediataRequest(BaseModel):
     nombre_clase: str
@@ -25,7 +34,15 @@ class ReservaProgramadaRequest(BaseModel):
     fecha_reserva: str                   # "2025-01-19" (fecha cuando ejecutar la reserva)
     hora_reserva: str                    # "17:00:00" (hora exacta de ejecución)
     timezone: str = "America/Santiago"   # Zona horaria
+    redundante: bool = False             # Varios ejecutores compiten por el click (requiere ≥2 workers/máquinas con el mismo job)
+    margen_seguridad_ms: Optional[float] = None  # Llegada al servidor después de T (por defecto FIRING_SAFETY_MARGIN_MS)
+    margen_preparacion_segundos: Optional[float] = None  # Margen sobre el p99 de la preparación (por defecto PREP_LEAD_MARGIN_SECONDS)
     
+class ReprogramarReservaRequest(BaseModel):
+    fecha_reserva: str                   # Nueva fecha de ejecución "YYYY-MM-DD"
+    hora_reserva: str                    # Nueva hora exacta "HH:MM:SS"
+    fecha_clase: Optional[str] = None    # Nueva fecha de la clase (por defecto la misma)
+
 class ReservaResponse(BaseModel):
     id: str
     nombre_clase: str
@@ -33,6 +50,27 @@ class ReservaResponse(BaseModel):
     estado: EstadoReserva
     mensaje: str
     fecha_hora_reserva: datetime
+    error_type: Optional[str] = None
+    posicion_cola: Optional[int] = None              # Posición al encolar (1 = atendida de inmediato)
+    tiempo_en_cola_segundos: Optional[float] = None  # Espera hasta que un worker la tomó
+    tiempo_servicio_segundos: Optional[float] = None # Duración de la reserva en sí
+    compartida: Optional[bool] = None                # Se sumó a una reserva idéntica ya en curso
+
+class ReservaBatchItem(BaseModel):
+    nombre_clase: str                    # "17:00 CrossFit 17:00-18:00"
+    fecha: str                           # "JU 17"
+
+class ReservaBatchRequest(BaseModel):
+    reservas: List[ReservaBatchItem]
+    max_pestanas: Optional[int] = None   # Pestañas en paralelo (por defecto BATCH_MAX_TABS)
+
+class ReservaBatchResponse(BaseModel):
+    id: str
+    total: int
+    exitosas: int
+    fallidas: int
+    resultados: List[ReservaResponse]
+    duracion_segundos: float
     
 class ReservaProgramadaResponse(BaseModel):
     id: str
@@ -0,0 +1,34 @@
+"""
+Alerts - Avisos de fallas que todavía tienen arreglo
+
+Además del log y del stream de eventos del job, si ALERT_WEBHOOK_URL está
+configurada se envía un POST JSON ({"evento", "mensaje", "detalle"}). El envío
+nunca interrumpe el job: un webhook caído solo deja un warning.
+"""
+
+import os
+from typing import Any, Dict, Optional
+
+import httpx
+from loguru import logger
+
+
+async def send_alert(evento: str, mensaje: str, detalle: Optional[Dict[str, Any]] = None) -> bool:
+    """
+    Emite una alerta
+
+    Returns:
+        True si el webhook la recibió (False si no hay webhook o falló)
+    """
+    logger.error(f"🚨 {evento}: {mensaje}")
+    url = os.getenv("ALERT_WEBHOOK_URL")
+    if not url:
+        return False
+    try:
+        async with httpx.AsyncClient(timeout=float(os.getenv("ALERT_WEBHOOK_TIMEOUT_SECONDS", "5"))) as client:
+            response = await client.post(url, json={"evento": evento, "mensaje": mensaje, "detalle": detalle or {}})
+            response.raise_for_status()
+        return True
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo enviar la alerta {evento}: {e}")
+        return False
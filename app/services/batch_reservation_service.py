@@ -0,0 +1,220 @@
+"""
+Batch Reservation Service - Reservas múltiples en una sola sesión autenticada
+
+Este módulo ejecuta varias reservas inmediatas reutilizando un único navegador
+y un único login. Cada fecha distinta se atiende en su propia pestaña del mismo
+contexto (comparte cookies y almacenamiento de la sesión), con un límite
+configurable de pestañas en paralelo.
+
+Flujo:
+1. Lanzar navegador y hacer login una sola vez
+2. Agrupar las reservas por fecha (solo se navega a las fechas necesarias)
+3. Abrir una pestaña por fecha (máximo N en paralelo)
+4. En cada pestaña reservar secuencialmente las clases de esa fecha
+5. Devolver el resultado individual de cada reserva, en el orden recibido
+"""
+
+import asyncio
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from loguru import logger
+
+from .preparation_service import PreparationService
+
+
+class BatchReservationService:
+    """
+    Ejecuta un lote de reservas (nombre_clase, fecha) con un solo login
+
+    Reutiliza los pasos de navegación de PreparationService: una instancia
+    mantiene la sesión autenticada y cada pestaña usa su propia instancia
+    apuntando a una página nueva del mismo contexto.
+    """
+
+    def __init__(self, max_tabs: Optional[int] = None):
+        """Inicializa el servicio con el límite de pestañas en paralelo"""
+        self.max_tabs = max_tabs or int(os.getenv("BATCH_MAX_TABS", "3"))
+
+    async def execute_batch(
+        self,
+        reservas: List[Tuple[str, str]],
+        max_tabs: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Ejecuta todas las reservas del lote
+
+        Args:
+            reservas: Lista de tuplas (nombre_clase, fecha) con fecha "XX ##"
+            max_tabs: Límite de pestañas en paralelo (sobrescribe el por defecto)
+
+        Returns:
+            Dict con resultado del lote:
+            {
+                "success": bool,             # True si todas fueron exitosas
+                "results": List[dict],       # Un resultado por reserva, mismo orden
+                "login_time": float,
+                "duration": float
+            }
+        """
+        batch_start = datetime.now()
+        limit = max(1, max_tabs or self.max_tabs)
+        groups = self._group_by_fecha(reservas)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(reservas)
+
+        logger.info(f"📦 Iniciando lote de {len(reservas)} reservas en {len(groups)} fechas (máx {limit} pestañas)")
+
+        session = PreparationService()
+        login_time = 0.0
+
+        try:
+            # 1. Login único
+            login_start = datetime.now()
+            await session._launch_browser()
+            await session.page.goto(session.crossfit_url, wait_until='networkidle')
+            await session.page.wait_for_timeout(2000)
+            await session._perform_login()
+            login_time = (datetime.now() - login_start).total_seconds()
+            logger.info(f"🔐 Login único completado en {login_time:.2f}s")
+
+            # 2. Una pestaña por fecha, con límite de concurrencia
+            semaphore = asyncio.Semaphore(limit)
+            await asyncio.gather(*[
+                self._run_date_group(session, fecha, entries, semaphore, results)
+                for fecha, entries in groups.items()
+            ])
+
+        except Exception as e:
+            logger.error(f"❌ Error en sesión del lote: {str(e)}")
+            for index, (nombre_clase, fecha) in enumerate(reservas):
+                if results[index] is None:
+                    results[index] = self._item_result(
+                        nombre_clase, fecha, False,
+                        f"Error en sesión del lote: {str(e)}", "BATCH_SESSION_ERROR"
+                    )
+        finally:
+            await session._cleanup_browser()
+
+        duration = (datetime.now() - batch_start).total_seconds()
+        exitosas = sum(1 for result in results if result and result["success"])
+        logger.info(f"📦 Lote completado en {duration:.2f}s: {exitosas}/{len(reservas)} exitosas")
+
+        return {
+            "success": exitosas == len(reservas),
+            "results": results,
+            "login_time": login_time,
+            "duration": duration
+        }
+
+    # ================================
+    # MÉTODOS PRIVADOS
+    # ================================
+
+    @staticmethod
+    def _group_by_fecha(reservas: List[Tuple[str, str]]) -> Dict[str, List[Tuple[int, str]]]:
+        """Agrupa las reservas por fecha conservando su posición original"""
+        groups: Dict[str, List[Tuple[int, str]]] = {}
+        for index, (nombre_clase, fecha) in enumerate(reservas):
+            groups.setdefault(fecha.strip().upper(), []).append((index, nombre_clase))
+        return groups
+
+    async def _run_date_group(
+        self,
+        session: PreparationService,
+        fecha: str,
+        entries: List[Tuple[int, str]],
+        semaphore: asyncio.Semaphore,
+        results: List[Optional[Dict[str, Any]]]
+    ):
+        """Abre una pestaña, navega a la fecha y reserva sus clases en secuencia"""
+        async with semaphore:
+            page = await session.context.new_page()
+            tab = PreparationService()
+            tab.page = page
+
+            try:
+                logger.info(f"🗂️ Pestaña para {fecha}: {len(entries)} clases")
+                await page.goto(tab.crossfit_url, wait_until='networkidle')
+
+                # La sesión se comparte vía contexto; solo re-login si el sitio lo pide
+                if "home" not in page.url:
+                    await tab._perform_login()
+
+                await tab._navigate_to_classes()
+                await tab._select_date(fecha)
+            except Exception as e:
+                logger.error(f"❌ No se pudo abrir la fecha {fecha}: {str(e)}")
+                for index, nombre_clase in entries:
+                    results[index] = self._item_result(
+                        nombre_clase, fecha, False,
+                        f"Error navegando a la fecha {fecha}: {str(e)}", "NAVIGATION_ERROR"
+                    )
+                await self._close_page(page)
+                return
+
+            for index, nombre_clase in entries:
+                results[index] = await self._book_in_tab(tab, nombre_clase, fecha)
+
+            await self._close_page(page)
+
+    async def _book_in_tab(self, tab: PreparationService, nombre_clase: str, fecha: str) -> Dict[str, Any]:
+        """Reserva una clase en una pestaña que ya tiene la fecha seleccionada"""
+        try:
+            await tab._locate_class(nombre_clase)
+            button_result = await tab._prepare_reservation_button()
+
+            if not button_result["success"]:
+                if button_result.get("error_type") == "ALREADY_RESERVED":
+                    return self._item_result(
+                        nombre_clase, fecha, True,
+                        f"La clase {nombre_clase} ya estaba reservada previamente"
+                    )
+                return self._item_result(
+                    nombre_clase, fecha, False,
+                    button_result["message"], button_result.get("error_type")
+                )
+
+            await tab.page.click(tab.button_selector, timeout=2000)
+            verification = await tab._verify_reservation_success()
+
+            if verification["success"]:
+                logger.success(f"🎉 Reserva exitosa en lote: {nombre_clase} ({fecha})")
+            return self._item_result(
+                nombre_clase, fecha, verification["success"],
+                verification["message"], verification.get("error_type")
+            )
+
+        except Exception as e:
+            logger.error(f"❌ Error reservando {nombre_clase} ({fecha}): {str(e)}")
+            return self._item_result(nombre_clase, fecha, False, f"Error: {str(e)}", "UNEXPECTED_ERROR")
+        finally:
+            # Cerrar el modal para dejar la lista de clases lista para la siguiente
+            tab.button_selector = None
+            try:
+                await tab.page.keyboard.press("Escape")
+                await tab.page.wait_for_timeout(300)
+            except Exception:
+                pass
+
+    @staticmethod
+    async def _close_page(page):
+        try:
+            await page.close()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _item_result(
+        nombre_clase: str,
+        fecha: str,
+        success: bool,
+        message: str,
+        error_type: Optional[str] = None
+    ) -> Dict[str, Any]:
+        return {
+            "nombre_clase": nombre_clase,
+            "fecha": fecha,
+            "success": success,
+            "message": message,
+            "error_type": None if success else (error_type or "UNKNOWN_ERROR")
+        }
@@ -108,7 +108,10 @@ class ConfigManager:
                         'fecha_clase': fecha_clase,
                         'fecha_reserva': fecha_reserva_str,
                         'hora_reserva': hora_reserva,
-                        'timezone': 'America/Santiago'
+                        'timezone': 'America/Santiago',
+                        'redundante': clase.get('redundante', False),
+                        'margen_seguridad_ms': clase.get('margen_seguridad_ms'),
+                        'margen_preparacion_segundos': clase.get('margen_preparacion_segundos')
                     }
         return None
 
@@ -6,19 +6,59 @@ Utiliza cálculo directo sin ciclos complejos, maximizando la precisión tempora
 
 Características principales:
 - Cálculo directo de tiempos de preparación y ejecución
-- asyncio.sleep() para máxima precisión
-- Manejo de zona horaria Chile/Santiago
+- Fecha y hora de reserva interpretadas como hora de Chile/Santiago
+- Plazos anclados una sola vez al reloj monotónico (Deadline): un salto del
+  reloj de pared (NTP, cambio de hora) durante la espera no mueve el click
+- Esperas re-armadas por tramos contra el reloj monotónico
 - Validaciones de seguridad temporal
 """
 
 import asyncio
+import os
+import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Dict, Optional, Any
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
 import pytz
 import logging
 
 logger = logging.getLogger(__name__)
 
+SANTIAGO_TZ = pytz.timezone("America/Santiago")
+# Adelanto estándar de la preparación (T-1min)
+DEFAULT_PREP_LEAD_SECONDS = 60.0
+
+
+def santiago_datetime(fecha_reserva: str, hora_reserva: str) -> datetime:
+    """"YYYY-MM-DD", "HH:MM:SS" -> datetime con zona America/Santiago"""
+    naive = datetime.strptime(f"{fecha_reserva} {hora_reserva}", "%Y-%m-%d %H:%M:%S")
+    return SANTIAGO_TZ.localize(naive)
+
+
+def santiago_now() -> datetime:
+    return datetime.now(SANTIAGO_TZ)
+
+
+@dataclass(frozen=True)
+class Deadline:
+    """
+    Momento objetivo anclado al reloj monotónico
+
+    wall es la hora de Santiago que representa (para logs y respuestas);
+    mono_ns es el valor de time.monotonic_ns() en ese momento, calculado una
+    sola vez. Las esperas usan solo mono_ns.
+    """
+    wall: datetime
+    mono_ns: int
+
+    def shifted(self, seconds: float) -> "Deadline":
+        return Deadline(self.wall + timedelta(seconds=seconds), self.mono_ns + int(round(seconds * 1e9)))
+
+
+Target = Union[Deadline, datetime]
+# Plazo que puede cambiar durante la espera (re-anclado por el watchdog de deriva)
+DeadlineSource = Callable[[], Deadline]
+
 
 class DirectTimingController:
     """
@@ -31,30 +71,71 @@ class DirectTimingController:
     - Maneja zona horaria de Chile
     """
     
-    def __init__(self):
-        """Inicializa el controlador con configuración de Chile/Santiago"""
-        self.timezone = pytz.timezone("America/Santiago")
+    def __init__(
+        self,
+        wall_clock: Optional[Callable[[], datetime]] = None,
+        mono_clock: Callable[[], int] = time.monotonic_ns,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep
+    ):
+        """
+        Inicializa el controlador con configuración de Chile/Santiago
+
+        Args:
+            wall_clock: Hora de pared con zona (inyectable para simular saltos en tests)
+            mono_clock: Reloj monotónico en ns
+            sleep: Espera asíncrona en segundos
+        """
+        self.timezone = SANTIAGO_TZ
+        self._wall_clock = wall_clock or santiago_now
+        self._mono_clock = mono_clock
+        self._sleep = sleep
+        self.segment_seconds = float(os.getenv("TIMING_SLEEP_SEGMENT_SECONDS", "30"))
         logger.info("🕐 DirectTimingController inicializado con timezone: America/Santiago")
-    
+
+    def now(self) -> datetime:
+        """Hora actual de Santiago (con zona)"""
+        return self._wall_clock().astimezone(self.timezone)
+
+    def mono_ns(self) -> int:
+        """Lectura del reloj monotónico en ns"""
+        return self._mono_clock()
+
+    def anchor(self, wall: datetime) -> Deadline:
+        """Ancla una hora de pared al reloj monotónico (una lectura de cada reloj)"""
+        wall = self._localize(wall)
+        now_wall = self.now()
+        now_mono = self._mono_clock()
+        return Deadline(wall, now_mono + int(round((wall - now_wall).total_seconds() * 1e9)))
+
+    def seconds_until(self, target: Target) -> float:
+        """Segundos que faltan según el reloj monotónico (negativo si ya pasó)"""
+        return (self._as_deadline(target).mono_ns - self._mono_clock()) / 1e9
+
     def calculate_execution_times(
         self, 
         fecha_reserva_str: str, 
-        hora_reserva_str: str
+        hora_reserva_str: str,
+        prep_lead_seconds: float = DEFAULT_PREP_LEAD_SECONDS
     ) -> Dict[str, Any]:
         """
         Calcula los dos momentos críticos de ejecución: preparación y ejecución final
         
         Args:
-            fecha_reserva_str: Fecha en formato "YYYY-MM-DD" (ej: "2025-01-19")
-            hora_reserva_str: Hora en formato "HH:MM:SS" (ej: "17:00:00")
+            fecha_reserva_str: Fecha en formato "YYYY-MM-DD" (ej: "2025-01-19"), hora de Santiago
+            hora_reserva_str: Hora en formato "HH:MM:SS" (ej: "17:00:00"), hora de Santiago
+            prep_lead_seconds: Adelanto de la preparación respecto de T (por defecto 60s).
+                Si un adelanto mayor ya no cabe, la preparación empieza de inmediato
             
         Returns:
             Dict con información de timing:
             {
-                "preparation_datetime": datetime,    # Momento de preparación (T-1min)
-                "execution_datetime": datetime,      # Momento de ejecución (T+1ms)
+                "preparation_datetime": datetime,    # Momento de preparación (T-adelanto), Santiago
+                "execution_datetime": datetime,      # Momento de ejecución (T+1ms), Santiago
+                "preparation_deadline": Deadline,    # Preparación anclada al reloj monotónico
+                "execution_deadline": Deadline,      # Ejecución anclada al reloj monotónico
                 "wait_until_prep_seconds": float,    # Segundos hasta preparación
                 "wait_until_exec_seconds": float,    # Segundos hasta ejecución
+                "preparation_lead_seconds": float,   # Adelanto efectivo de la preparación
                 "is_valid": bool,                    # Si es ejecutable
                 "target_time": datetime,             # Tiempo objetivo
                 "validation_message": str            # Mensaje de validación
@@ -63,17 +144,20 @@ class DirectTimingController:
         logger.info(f"🧮 Calculando tiempos de ejecución: {fecha_reserva_str} {hora_reserva_str}")
         
         try:
-            # SOLUCIÓN SIMPLE: Usar datetime naive (sin timezone) para evitar problemas
-            now = datetime.now()
+            # Una sola lectura de cada reloj: todo el cálculo usa el mismo ancla
+            now = self.now()
+            now_mono = self._mono_clock()
             
-            # Crear datetime objetivo usando fecha y hora específicas
-            target_date = datetime.strptime(fecha_reserva_str, "%Y-%m-%d").date()
-            target_time = datetime.strptime(hora_reserva_str, "%H:%M:%S").time()
-            target_datetime = datetime.combine(target_date, target_time)
+            # Hora objetivo en Santiago (horario de verano incluido)
+            target_datetime = santiago_datetime(fecha_reserva_str, hora_reserva_str)
             
             # Calcular momentos críticos
-            # Preparación: 1 minuto antes del objetivo
-            prep_datetime = target_datetime - timedelta(minutes=1)
+            # Preparación: el adelanto antes del objetivo (1 minuto por defecto)
+            prep_datetime = target_datetime - timedelta(seconds=prep_lead_seconds)
+            standard_prep = target_datetime - timedelta(seconds=DEFAULT_PREP_LEAD_SECONDS)
+            if prep_datetime <= now < standard_prep:
+                # Un adelanto mayor que el estándar que ya no cabe: preparar ahora
+                prep_datetime = now + timedelta(milliseconds=1)
             # Ejecución: 1 milisegundo después del objetivo (para no ejecutar antes)
             exec_datetime = target_datetime + timedelta(milliseconds=1)
             
@@ -81,6 +165,9 @@ class DirectTimingController:
             wait_until_prep = (prep_datetime - now).total_seconds()
             wait_until_exec = (exec_datetime - now).total_seconds()
             
+            prep_deadline = Deadline(prep_datetime, now_mono + int(round(wait_until_prep * 1e9)))
+            exec_deadline = Deadline(exec_datetime, now_mono + int(round(wait_until_exec * 1e9)))
+            
             # Log para debugging
             logger.info(f"⏰ Hora actual: {now}")
             logger.info(f"🎯 Hora objetivo: {target_datetime}")
@@ -106,8 +193,11 @@ class DirectTimingController:
             result = {
                 "preparation_datetime": prep_datetime,
                 "execution_datetime": exec_datetime,
+                "preparation_deadline": prep_deadline,
+                "execution_deadline": exec_deadline,
                 "wait_until_prep_seconds": wait_until_prep,
                 "wait_until_exec_seconds": wait_until_exec,
+                "preparation_lead_seconds": (target_datetime - prep_datetime).total_seconds(),
                 "is_valid": is_valid,
                 "current_time": now,
                 "target_time": target_datetime,
@@ -122,10 +212,12 @@ class DirectTimingController:
             return {
                 "preparation_datetime": None,
                 "execution_datetime": None,
+                "preparation_deadline": None,
+                "execution_deadline": None,
                 "wait_until_prep_seconds": -1,
                 "wait_until_exec_seconds": -1,
                 "is_valid": False,
-                "current_time": datetime.now(self.timezone),
+                "current_time": self.now(),
                 "target_time": None,
                 "validation_message": f"Error en formato de fecha/hora: {str(e)}"
             }
@@ -134,33 +226,121 @@ class DirectTimingController:
             return {
                 "preparation_datetime": None,
                 "execution_datetime": None,
+                "preparation_deadline": None,
+                "execution_deadline": None,
                 "wait_until_prep_seconds": -1,
                 "wait_until_exec_seconds": -1,
                 "is_valid": False,
-                "current_time": datetime.now(self.timezone),
+                "current_time": self.now(),
                 "target_time": None,
                 "validation_message": f"Error inesperado: {str(e)}"
             }
     
-    async def sleep_until(self, target_datetime: datetime):
+    async def sleep_until(
+        self,
+        target: Union[Target, DeadlineSource],
+        wakeup: Optional[asyncio.Event] = None
+    ) -> Dict[str, Any]:
         """
-        Duerme hasta un momento exacto usando asyncio
-        MÁXIMA PRECISIÓN - Sin ciclos ni verificaciones
+        Duerme hasta un momento exacto usando el reloj monotónico
+        
+        La espera se re-arma por tramos (TIMING_SLEEP_SEGMENT_SECONDS) contra
+        time.monotonic_ns(): un salto del reloj de pared no la adelanta ni la
+        atrasa, y el último tramo termina justo en el plazo.
         
         Args:
-            target_datetime: Momento exacto hasta el cual dormir
+            target: Deadline, datetime (sin zona = hora de Santiago) que se ancla al
+                llamar, o función que devuelve el plazo vigente (se re-lee en cada tramo)
+            wakeup: Evento que corta el tramo en curso para re-leer el plazo
+            
+        Returns:
+            Dict con resultado:
+            {
+                "success": bool,              # False si el objetivo ya había pasado
+                "message": str,
+                "target_time": Target,        # El objetivo recibido
+                "actual_wake_time": datetime, # Hora de Santiago al despertar
+                "precision_ms": float,        # Atraso al despertar según el reloj monotónico
+                "segments": int               # Tramos de espera
+            }
         """
-        # Usar datetime naive para evitar problemas de timezone
-        now = datetime.now()
-        sleep_seconds = (target_datetime - now).total_seconds()
+        resolve = target if callable(target) else (lambda fixed=self._as_deadline(target): fixed)
+        deadline = resolve()
+        remaining_ns = deadline.mono_ns - self._mono_clock()
         
-        logger.info(f"😴 Durmiendo {sleep_seconds:.1f} segundos hasta {target_datetime}")
+        if remaining_ns <= 0:
+            logger.warning(f"⚠️ Tiempo objetivo ya pasó: {deadline.wall} ({-remaining_ns / 1e6:.1f}ms atrás)")
+            return self._sleep_result(target, deadline, False, f"Tiempo objetivo ya pasó: {deadline.wall}", 0)
         
-        if sleep_seconds > 0:
-            await asyncio.sleep(sleep_seconds)
-        else:
-            logger.warning(f"⚠️ Tiempo objetivo ya pasó: {target_datetime} vs actual: {now}")
-    
+        logger.info(f"😴 Durmiendo {remaining_ns / 1e9:.1f} segundos hasta {deadline.wall}")
+        
+        segments = 0
+        while remaining_ns > 0:
+            step = min(remaining_ns / 1e9, self.segment_seconds)
+            if wakeup is None:
+                await self._sleep(step)
+            else:
+                # El tramo termina antes si el plazo fue re-anclado
+                waiters = [asyncio.ensure_future(self._sleep(step)), asyncio.ensure_future(wakeup.wait())]
+                await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+                for waiter in waiters:
+                    waiter.cancel()
+                wakeup.clear()
+            segments += 1
+            deadline = resolve()
+            remaining_ns = deadline.mono_ns - self._mono_clock()
+        
+        return self._sleep_result(target, deadline, True, "Objetivo alcanzado", segments)
+
+    async def precise_sleep_until(self, target: Target, spin_seconds: float = 0.05) -> Dict[str, Any]:
+        """
+        Espera de precisión: sleep_until hasta spin_seconds antes y luego
+        espera activa sin ceder el loop
+
+        Para cuando el event loop tiene lag: si el timer despierta con hasta
+        spin_seconds de atraso, igual se llega a tiempo al objetivo, y ninguna
+        otra tarea puede intercalarse en el último tramo.
+
+        Args:
+            target: Momento exacto hasta el cual esperar
+            spin_seconds: Tramo final en espera activa
+        """
+        deadline = self._as_deadline(target)
+        remaining = (deadline.mono_ns - self._mono_clock()) / 1e9
+
+        logger.info(f"🎯 Espera de precisión {remaining:.3f}s hasta {deadline.wall} (activa los últimos {spin_seconds * 1000:.0f}ms)")
+
+        if remaining > spin_seconds:
+            await self.sleep_until(deadline.shifted(-spin_seconds))
+        while self._mono_clock() < deadline.mono_ns:
+            pass
+        return self._sleep_result(target, deadline, remaining > 0, "Objetivo alcanzado", 0)
+
+    def _localize(self, wall: datetime) -> datetime:
+        if wall.tzinfo is None:
+            return self.timezone.localize(wall)
+        return wall.astimezone(self.timezone)
+
+    def _as_deadline(self, target: Target) -> Deadline:
+        return target if isinstance(target, Deadline) else self.anchor(target)
+
+    def _sleep_result(self, target: Target, deadline: Deadline, success: bool, message: str, segments: int) -> Dict[str, Any]:
+        wake = self.now()
+        precision_ms = (self._mono_clock() - deadline.mono_ns) / 1e6
+        # Diferencia entre la hora de pared y el plazo: muestra saltos del reloj durante la espera
+        wall_offset_ms = (wake - deadline.wall).total_seconds() * 1000
+        if success and abs(wall_offset_ms - precision_ms) > 1000:
+            logger.warning(f"⏱️ El reloj de pared se movió {wall_offset_ms - precision_ms:+.0f}ms durante la espera")
+        return {
+            "success": success,
+            "message": message,
+            "target_time": deadline.wall if callable(target) else target,
+            "actual_wake_time": wake,
+            "precision_ms": round(precision_ms, 3),
+            "wall_offset_ms": round(wall_offset_ms, 3),
+            "segments": segments
+        }
+
     def validate_fecha_hora(
         self, 
         fecha_reserva: str, 
@@ -202,8 +382,8 @@ class DirectTimingController:
             
             # Si ambos formatos son válidos, crear datetime y validar lógica
             if fecha_obj and hora_obj:
-                parsed_datetime = datetime.combine(fecha_obj, hora_obj).replace(tzinfo=self.timezone)
-                now = datetime.now(self.timezone)
+                parsed_datetime = self.timezone.localize(datetime.combine(fecha_obj, hora_obj))
+                now = self.now()
                 
                 # Validar que sea fecha futura
                 if parsed_datetime <= now:
@@ -0,0 +1,268 @@
+"""
+Drift Watchdog - Vigilancia de deriva de reloj durante las esperas largas
+
+Mientras un job espera la preparación (hasta 24 horas), compara a intervalos:
+- reloj monotónico vs reloj de pared: detecta saltos (ajuste NTP, cambio manual)
+- reloj de pared vs hora estimada del servidor de reservas (header Date de
+  BOOKING_ENDPOINT_URL o CROSSFIT_URL, corregido por la mitad del RTT)
+
+Decisiones:
+- Salto del reloj de pared > DRIFT_REARM_THRESHOLD_MS confirmado por el
+  servidor (tras el salto la hora local coincide con la del servidor y antes
+  no): se re-anclan los plazos de preparación y ejecución a la hora corregida
+  y se despiertan las esperas para re-armarlas
+- Salto sin confirmación del servidor (slew/step NTP local, cambio manual o
+  revisión sin sonda): se registra y se mantienen los plazos monotónicos
+- El servidor discrepa del reloj local en más de DRIFT_FAIL_THRESHOLD_MS, o
+  el reloj saltó más de DRIFT_MAX_REARMS veces: la hora ya no es confiable y
+  el job falla con TIMING_DRIFT en vez de hacer click en un momento equivocado
+
+Además conserva las últimas estimaciones de la hora del servidor para
+corregir el disparo (server_offset_ms): intersecta sus intervalos de
+incertidumbre y aplica solo la parte del offset que queda confirmada.
+
+Cada revisión se publica como muestra de tiempo del job ("drift").
+"""
+
+import asyncio
+import email.utils
+import os
+import time
+from collections import deque
+from datetime import timedelta
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+import httpx
+from loguru import logger
+
+from .direct_timing_controller import Deadline, DirectTimingController
+
+
+class TimingDriftError(Exception):
+    """La hora local dejó de ser confiable para disparar el click"""
+
+
+class ServerTimeProbe:
+    """Estimación de la hora del servidor a partir del header HTTP Date"""
+
+    def __init__(self, url: Optional[str] = None, timeout: float = 5.0):
+        # El reloj que importa es el del servidor que recibe el click de reserva
+        self.url = url or os.getenv("BOOKING_ENDPOINT_URL") or os.getenv("CROSSFIT_URL")
+        self.timeout = timeout
+
+    async def estimate(self, controller: DirectTimingController) -> Optional[Dict[str, float]]:
+        """
+        Returns:
+            {"offset_ms": hora servidor - hora local, "uncertainty_ms": float, "rtt_ms": float}
+            o None si no se pudo estimar
+        """
+        if not self.url:
+            return None
+        try:
+            async with httpx.AsyncClient(timeout=self.timeout, follow_redirects=True) as client:
+                sent = time.perf_counter()
+                response = await client.head(self.url)
+                rtt = time.perf_counter() - sent
+            received_wall = controller.now()
+            date_header = response.headers.get("date")
+            if not date_header:
+                return None
+            server_time = email.utils.parsedate_to_datetime(date_header)
+        except Exception as e:
+            logger.debug(f"⚠️ No se pudo estimar la hora del servidor: {e}")
+            return None
+
+        # Date tiene resolución de 1s (truncado): se toma el centro del segundo
+        server_mid = server_time + timedelta(milliseconds=500)
+        local_mid = received_wall - timedelta(seconds=rtt / 2)
+        return {
+            "offset_ms": round((server_mid - local_mid).total_seconds() * 1000, 3),
+            "uncertainty_ms": round(500 + rtt * 1000 / 2, 3),
+            "rtt_ms": round(rtt * 1000, 3)
+        }
+
+
+class DriftWatchdog:
+    """Vigila los relojes y mantiene los plazos de un job"""
+
+    def __init__(
+        self,
+        controller: DirectTimingController,
+        deadlines: Dict[str, Deadline],
+        on_sample: Optional[Callable[[Dict[str, Any]], None]] = None,
+        probe: Optional[ServerTimeProbe] = None,
+        interval_seconds: Optional[float] = None,
+        rearm_threshold_ms: Optional[float] = None,
+        fail_threshold_ms: Optional[float] = None,
+        max_rearms: Optional[int] = None,
+        offset_samples: Optional[int] = None
+    ):
+        """
+        Args:
+            controller: Controlador de tiempos (relojes)
+            deadlines: Plazos por nombre ("preparation", "execution")
+            on_sample: Recibe cada revisión (telemetría del job)
+            probe: Estimador de la hora del servidor (None = sin comparación con el servidor)
+            interval_seconds: Período de revisión (DRIFT_CHECK_INTERVAL_SECONDS, 120)
+            rearm_threshold_ms: Salto que re-ancla los plazos (DRIFT_REARM_THRESHOLD_MS, 250)
+            fail_threshold_ms: Discrepancia con el servidor que hace fallar (DRIFT_FAIL_THRESHOLD_MS, 3000)
+            max_rearms: Saltos tolerados antes de fallar (DRIFT_MAX_REARMS, 3)
+            offset_samples: Estimaciones del servidor que se combinan (DRIFT_OFFSET_SAMPLES, 5)
+        """
+        self.controller = controller
+        self.deadlines = dict(deadlines)
+        self.on_sample = on_sample
+        self.probe = probe
+        self.interval_seconds = interval_seconds or float(os.getenv("DRIFT_CHECK_INTERVAL_SECONDS", "120"))
+        self.rearm_threshold_ms = (
+            rearm_threshold_ms if rearm_threshold_ms is not None
+            else float(os.getenv("DRIFT_REARM_THRESHOLD_MS", "250"))
+        )
+        self.fail_threshold_ms = (
+            fail_threshold_ms if fail_threshold_ms is not None
+            else float(os.getenv("DRIFT_FAIL_THRESHOLD_MS", "3000"))
+        )
+        self.max_rearms = max_rearms if max_rearms is not None else int(os.getenv("DRIFT_MAX_REARMS", "3"))
+
+        self.rearms = 0
+        self.failure: Optional[str] = None
+        # Intervalos [offset - incertidumbre, offset + incertidumbre] medidos contra
+        # el anclaje de los plazos, y cuánto se movió la pared desde ese anclaje
+        self._offset_intervals: Deque[Tuple[float, float]] = deque(
+            maxlen=offset_samples or int(os.getenv("DRIFT_OFFSET_SAMPLES", "5"))
+        )
+        self._unanchored_ms = 0.0
+        # Se activa al re-anclar o fallar: las esperas en curso se re-arman de inmediato
+        self.wakeup = asyncio.Event()
+        self._ref_wall = controller.now()
+        self._ref_mono = controller.mono_ns()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def deadline(self, name: str) -> Deadline:
+        """Plazo vigente; lanza TimingDriftError si la hora dejó de ser confiable"""
+        if self.failure:
+            raise TimingDriftError(self.failure)
+        return self.deadlines[name]
+
+    def source(self, name: str, offset_seconds: float = 0.0) -> Callable[[], Deadline]:
+        """Plazo re-leído en cada tramo de sleep_until"""
+        return lambda: self.deadline(name).shifted(offset_seconds)
+
+    def server_offset_ms(self) -> float:
+        """
+        Corrección de los plazos hacia la hora del servidor (servidor - local, ms)
+
+        Intersección de las últimas estimaciones; se devuelve el punto más
+        cercano a 0, así que con relojes sincronizados (dentro de la resolución
+        del header Date) no se corrige nada.
+        """
+        if not self._offset_intervals:
+            return 0.0
+        low = max(interval[0] for interval in self._offset_intervals)
+        high = min(interval[1] for interval in self._offset_intervals)
+        if low > high:
+            # Estimaciones incompatibles (deriva del reloj): solo la más reciente
+            low, high = self._offset_intervals[-1]
+        return round(min(max(0.0, low), high), 3)
+
+    def reschedule(self, name: str, deadline: Deadline):
+        """Cambia un plazo (p. ej. adelantar la preparación) y re-arma la espera en curso"""
+        self.deadlines[name] = deadline
+        self.wakeup.set()
+
+    async def check(self, probe_server: bool = True) -> Dict[str, Any]:
+        """Una revisión de los relojes; re-ancla o marca falla según corresponda"""
+        wall = self.controller.now()
+        mono = self.controller.mono_ns()
+        # Cuánto avanzó la pared de más (o de menos) respecto del monotónico
+        step_ms = ((wall - self._ref_wall).total_seconds() - (mono - self._ref_mono) / 1e9) * 1000
+        self._ref_wall, self._ref_mono = wall, mono
+        self._unanchored_ms += step_ms
+
+        server = await self.probe.estimate(self.controller) if (self.probe and probe_server) else None
+        if server:
+            anchored = server["offset_ms"] + self._unanchored_ms
+            self._offset_intervals.append((anchored - server["uncertainty_ms"], anchored + server["uncertainty_ms"]))
+        sample: Dict[str, Any] = {
+            "wall_step_ms": round(step_ms, 3),
+            "server_offset_ms": server["offset_ms"] if server else None,
+            "server_uncertainty_ms": server["uncertainty_ms"] if server else None,
+            "rearmed": False,
+            "rearms": self.rearms
+        }
+
+        if server and abs(server["offset_ms"]) > self.fail_threshold_ms + server["uncertainty_ms"]:
+            self._fail(
+                f"El reloj local difiere {server['offset_ms']:+.0f}ms de la hora del servidor "
+                f"(tolerancia {self.fail_threshold_ms:.0f}ms)"
+            )
+        elif abs(step_ms) > self.rearm_threshold_ms:
+            self.rearms += 1
+            if self.rearms > self.max_rearms:
+                self._fail(f"Reloj inestable: {self.rearms} saltos del reloj de pared (último {step_ms:+.0f}ms)")
+            elif self._server_confirms_step(server, step_ms):
+                self._rearm(wall, mono, step_ms)
+                sample["rearmed"] = True
+                # Plazos anclados a la pared actual: la medición de esta revisión ya está en ese marco
+                self._unanchored_ms = 0.0
+                self._offset_intervals.clear()
+                self._offset_intervals.append(
+                    (server["offset_ms"] - server["uncertainty_ms"], server["offset_ms"] + server["uncertainty_ms"])
+                )
+            else:
+                logger.warning(
+                    f"⏱️ Salto de reloj de {step_ms:+.0f}ms sin confirmación del servidor - "
+                    "se mantienen los plazos monotónicos"
+                )
+            sample["rearms"] = self.rearms
+
+        sample["server_correction_ms"] = self.server_offset_ms()
+        sample["failed"] = self.failure is not None
+        if self.on_sample:
+            self.on_sample(sample)
+        return sample
+
+    # ================================
+    # MÉTODOS PRIVADOS
+    # ================================
+
+    async def _run(self):
+        while not self.failure:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.check()
+            except Exception as e:
+                logger.warning(f"⚠️ Error en revisión de deriva: {e}")
+
+    @staticmethod
+    def _server_confirms_step(server: Optional[Dict[str, float]], step_ms: float) -> bool:
+        """
+        El servidor confirma el salto si la hora local ya coincide con la suya
+        (dentro de la incertidumbre del header Date) y sin el salto no coincidiría
+        """
+        if not server:
+            return False
+        tolerance = server["uncertainty_ms"]
+        return abs(server["offset_ms"]) <= tolerance and abs(server["offset_ms"] + step_ms) > tolerance
+
+    def _rearm(self, wall, mono: int, step_ms: float):
+        """Re-ancla los plazos a la hora de pared corregida"""
+        for name, deadline in self.deadlines.items():
+            remaining = (deadline.wall - wall).total_seconds()
+            self.deadlines[name] = Deadline(deadline.wall, mono + int(round(remaining * 1e9)))
+        logger.warning(f"⏱️ Salto de reloj de {step_ms:+.0f}ms - plazos re-anclados")
+        self.wakeup.set()
+
+    def _fail(self, message: str):
+        self.failure = message
+        logger.error(f"🧭 TIMING_DRIFT: {message}")
+        self.wakeup.set()
@@ -0,0 +1,481 @@
+"""
+Execution Lease - Exclusión mutua entre workers/máquinas para reservas programadas
+
+El registro de idempotencia vive en memoria de cada proceso, por lo que con
+varios workers de uvicorn (o varias máquinas) todos prepararían un navegador y
+harían click. Este módulo implementa un lease (arriendo con expiración) para que
+un único dueño ejecute la preparación y el click de cada job.
+
+Características principales:
+- Backend intercambiable (SQLite para workers de una misma máquina, memoria para un proceso)
+- Fencing token creciente por job: el click solo se ejecuta si el token sigue vigente
+- Heartbeat que renueva el lease mientras el dueño espera
+- Toma de control rápida: si el dueño muere, su lease expira en LEASE_TTL_SECONDS
+  y un worker en espera lo adquiere antes de la hora de preparación (pasada
+  esa hora ya no alcanza a preparar un navegador y el standby se retira)
+- Un job completado no se vuelve a ejecutar (ni tras reinicio del proceso)
+  durante LEASE_COMPLETED_RETENTION_SECONDS; pasado ese plazo la marca (y el
+  ganador redundante) se purga al adquirir, para permitir una nueva ejecución
+  legítima con la misma clave (p.ej. volver a reservar tras cancelar en el sitio)
+- Modo redundante opcional: N slots de lease por job (un ejecutor por slot) y un
+  registro de ganador compartido para que el perdedor se retire sin hacer click.
+  Cada ejecutor es otro proceso u otra máquina que recibe el mismo job (dentro
+  de un proceso el registro de idempotencia rechaza el duplicado): hacen falta
+  ≥2 workers con el backend SQLite compartido, si no corre un solo ejecutor
+
+Configuración (variables de entorno):
+- LEASE_BACKEND: "sqlite" (por defecto), "memory" o "none"
+- LEASE_DB_PATH: ruta del archivo SQLite compartido
+- LEASE_TTL_SECONDS: vida del lease sin renovación (por defecto 5)
+- LEASE_COMPLETED_RETENTION_SECONDS: vigencia de la marca de completado (por defecto 3600)
+- REDUNDANCY_EXECUTORS: ejecutores por job en modo redundante (por defecto 2)
+"""
+
+import asyncio
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import closing
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from loguru import logger
+
+from .direct_timing_controller import Deadline
+
+
+@dataclass
+class Lease:
+    """Lease adquirido sobre un job"""
+    job_key: str
+    owner: str
+    token: int                # Fencing token (crece con cada cambio de dueño)
+    expires_at: float         # Epoch (time.time) compartido entre procesos
+
+
+def completed_retention_seconds() -> float:
+    return float(os.getenv("LEASE_COMPLETED_RETENTION_SECONDS", "3600"))
+
+
+class LeaseBackend(ABC):
+    """Interfaz de almacenamiento de leases (operaciones atómicas y síncronas)"""
+
+    @abstractmethod
+    def try_acquire(self, job_key: str, owner: str, ttl: float) -> Optional[Lease]:
+        """Adquiere el lease si está libre, expirado o ya es del mismo dueño"""
+
+    @abstractmethod
+    def renew(self, lease: Lease, ttl: float) -> bool:
+        """Extiende el lease; False si se perdió (otro dueño o token distinto)"""
+
+    @abstractmethod
+    def release(self, lease: Lease, completed: bool = False) -> None:
+        """Libera el lease; completed=True bloquea nuevas ejecuciones del job durante la retención"""
+
+    @abstractmethod
+    def is_valid(self, lease: Lease) -> bool:
+        """Verificación de fencing: el lease sigue vigente con el mismo token"""
+
+    @abstractmethod
+    def is_completed(self, job_key: str) -> bool:
+        """Indica si algún dueño marcó el job como completado (dentro de la retención)"""
+
+    @abstractmethod
+    def claim_win(self, job_key: str, owner: str) -> str:
+        """Registra al ganador de un job redundante (el primero gana) y lo devuelve"""
+
+    @abstractmethod
+    def get_winner(self, job_key: str) -> Optional[str]:
+        """Ganador registrado de un job redundante, si existe"""
+
+    @abstractmethod
+    def holder(self, job_key: str) -> Optional[str]:
+        """Dueño del lease vigente (no expirado ni completado), si existe"""
+
+
+class InMemoryLeaseBackend(LeaseBackend):
+    """Backend en memoria (un solo proceso, útil para desarrollo y tests)"""
+
+    def __init__(self, clock=time.time, completed_retention: Optional[float] = None):
+        self._clock = clock
+        self.completed_retention = completed_retention if completed_retention is not None else completed_retention_seconds()
+        self._lock = threading.Lock()
+        self._rows: Dict[str, Dict] = {}
+        self._winners: Dict[str, Tuple[str, float]] = {}
+
+    def try_acquire(self, job_key: str, owner: str, ttl: float) -> Optional[Lease]:
+        with self._lock:
+            now = self._clock()
+            self._prune(now)
+            row = self._rows.get(job_key)
+            if row is None:
+                row = {"owner": owner, "token": 1, "expires_at": now + ttl, "completed": False, "completed_at": None}
+                self._rows[job_key] = row
+            elif row["completed"]:
+                return None
+            elif row["owner"] == owner:
+                row["expires_at"] = now + ttl
+            elif row["expires_at"] <= now:
+                row.update(owner=owner, token=row["token"] + 1, expires_at=now + ttl)
+            else:
+                return None
+            return Lease(job_key, owner, row["token"], row["expires_at"])
+
+    def renew(self, lease: Lease, ttl: float) -> bool:
+        with self._lock:
+            row = self._rows.get(lease.job_key)
+            if not self._matches(row, lease) or row["expires_at"] <= self._clock():
+                return False
+            row["expires_at"] = lease.expires_at = self._clock() + ttl
+            return True
+
+    def release(self, lease: Lease, completed: bool = False) -> None:
+        with self._lock:
+            row = self._rows.get(lease.job_key)
+            if self._matches(row, lease):
+                row["expires_at"] = 0
+                if completed:
+                    row.update(completed=True, completed_at=self._clock())
+
+    def is_valid(self, lease: Lease) -> bool:
+        with self._lock:
+            row = self._rows.get(lease.job_key)
+            return self._matches(row, lease) and row["expires_at"] > self._clock()
+
+    def is_completed(self, job_key: str) -> bool:
+        with self._lock:
+            row = self._rows.get(job_key)
+            return bool(row and row["completed"] and row["completed_at"] > self._cutoff(self._clock()))
+
+    def claim_win(self, job_key: str, owner: str) -> str:
+        with self._lock:
+            self._prune(self._clock())
+            return self._winners.setdefault(job_key, (owner, self._clock()))[0]
+
+    def get_winner(self, job_key: str) -> Optional[str]:
+        with self._lock:
+            winner = self._winners.get(job_key)
+            return winner[0] if winner and winner[1] > self._cutoff(self._clock()) else None
+
+    def holder(self, job_key: str) -> Optional[str]:
+        with self._lock:
+            row = self._rows.get(job_key)
+            if row and not row["completed"] and row["expires_at"] > self._clock():
+                return row["owner"]
+            return None
+
+    def _cutoff(self, now: float) -> float:
+        return now - self.completed_retention
+
+    def _prune(self, now: float):
+        """Purga las marcas de completado y los ganadores con más antigüedad que la retención"""
+        cutoff = self._cutoff(now)
+        for key in [k for k, row in self._rows.items() if row["completed"] and row["completed_at"] <= cutoff]:
+            del self._rows[key]
+        for key in [k for k, (_, recorded_at) in self._winners.items() if recorded_at <= cutoff]:
+            del self._winners[key]
+
+    @staticmethod
+    def _matches(row: Optional[Dict], lease: Lease) -> bool:
+        return bool(row and not row["completed"] and row["owner"] == lease.owner and row["token"] == lease.token)
+
+
+class SQLiteLeaseBackend(LeaseBackend):
+    """
+    Backend SQLite compartido por todos los workers de una máquina
+
+    Cada operación corre en su propia transacción BEGIN IMMEDIATE, que toma el
+    lock de escritura del archivo y hace atómica la lectura + actualización.
+    """
+
+    def __init__(self, db_path: str, clock=time.time, completed_retention: Optional[float] = None):
+        self.db_path = db_path
+        self._clock = clock
+        self.completed_retention = completed_retention if completed_retention is not None else completed_retention_seconds()
+        with closing(self._connect()) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS execution_leases (
+                    job_key TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    token INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    completed INTEGER NOT NULL DEFAULT 0,
+                    completed_at REAL
+                )
+            """)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(execution_leases)")}
+            if "completed_at" not in columns:
+                # Archivos creados antes de la retención: sus completados se purgan en el próximo acquire
+                conn.execute("ALTER TABLE execution_leases ADD COLUMN completed_at REAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_outcomes (
+                    job_key TEXT PRIMARY KEY,
+                    winner TEXT NOT NULL,
+                    recorded_at REAL NOT NULL
+                )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _transaction(self, fn):
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            result = fn(conn)
+            conn.execute("COMMIT")
+            return result
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _prune(self, conn: sqlite3.Connection, now: float):
+        """Purga las marcas de completado y los ganadores con más antigüedad que la retención"""
+        cutoff = now - self.completed_retention
+        conn.execute(
+            "DELETE FROM execution_leases WHERE completed = 1 AND COALESCE(completed_at, 0) <= ?", (cutoff,)
+        )
+        conn.execute("DELETE FROM job_outcomes WHERE recorded_at <= ?", (cutoff,))
+
+    def try_acquire(self, job_key: str, owner: str, ttl: float) -> Optional[Lease]:
+        def op(conn):
+            now = self._clock()
+            self._prune(conn, now)
+            row = conn.execute(
+                "SELECT owner, token, expires_at, completed FROM execution_leases WHERE job_key = ?",
+                (job_key,)
+            ).fetchone()
+            if row is None:
+                token = 1
+                conn.execute(
+                    "INSERT INTO execution_leases (job_key, owner, token, expires_at) VALUES (?, ?, ?, ?)",
+                    (job_key, owner, token, now + ttl)
+                )
+            else:
+                current_owner, token, expires_at, completed = row
+                if completed:
+                    return None
+                if current_owner != owner:
+                    if expires_at > now:
+                        return None
+                    token += 1
+                conn.execute(
+                    "UPDATE execution_leases SET owner = ?, token = ?, expires_at = ? WHERE job_key = ?",
+                    (owner, token, now + ttl, job_key)
+                )
+            return Lease(job_key, owner, token, now + ttl)
+
+        return self._transaction(op)
+
+    def renew(self, lease: Lease, ttl: float) -> bool:
+        def op(conn):
+            now = self._clock()
+            cursor = conn.execute(
+                "UPDATE execution_leases SET expires_at = ? "
+                "WHERE job_key = ? AND owner = ? AND token = ? AND completed = 0 AND expires_at > ?",
+                (now + ttl, lease.job_key, lease.owner, lease.token, now)
+            )
+            if cursor.rowcount == 1:
+                lease.expires_at = now + ttl
+                return True
+            return False
+
+        return self._transaction(op)
+
+    def release(self, lease: Lease, completed: bool = False) -> None:
+        def op(conn):
+            conn.execute(
+                "UPDATE execution_leases SET expires_at = 0, completed = ?, completed_at = ? "
+                "WHERE job_key = ? AND owner = ? AND token = ? AND completed = 0",
+                (1 if completed else 0, self._clock() if completed else None, lease.job_key, lease.owner, lease.token)
+            )
+
+        self._transaction(op)
+
+    def is_valid(self, lease: Lease) -> bool:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT 1 FROM execution_leases "
+                "WHERE job_key = ? AND owner = ? AND token = ? AND completed = 0 AND expires_at > ?",
+                (lease.job_key, lease.owner, lease.token, self._clock())
+            ).fetchone()
+        return row is not None
+
+    def is_completed(self, job_key: str) -> bool:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT 1 FROM execution_leases WHERE job_key = ? AND completed = 1 AND COALESCE(completed_at, 0) > ?",
+                (job_key, self._clock() - self.completed_retention)
+            ).fetchone()
+        return row is not None
+
+    def claim_win(self, job_key: str, owner: str) -> str:
+        def op(conn):
+            self._prune(conn, self._clock())
+            conn.execute(
+                "INSERT OR IGNORE INTO job_outcomes (job_key, winner, recorded_at) VALUES (?, ?, ?)",
+                (job_key, owner, self._clock())
+            )
+            return conn.execute("SELECT winner FROM job_outcomes WHERE job_key = ?", (job_key,)).fetchone()[0]
+
+        return self._transaction(op)
+
+    def get_winner(self, job_key: str) -> Optional[str]:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT winner FROM job_outcomes WHERE job_key = ? AND recorded_at > ?",
+                (job_key, self._clock() - self.completed_retention)
+            ).fetchone()
+        return row[0] if row else None
+
+    def holder(self, job_key: str) -> Optional[str]:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT owner FROM execution_leases WHERE job_key = ? AND completed = 0 AND expires_at > ?",
+                (job_key, self._clock())
+            ).fetchone()
+        return row[0] if row else None
+
+
+class ExecutionLeaseManager:
+    """
+    Coordinación asíncrona sobre un LeaseBackend
+
+    Las operaciones del backend se ejecutan en un hilo para no bloquear el event loop.
+    """
+
+    def __init__(self, backend: LeaseBackend, owner_id: Optional[str] = None, ttl_seconds: Optional[float] = None):
+        self.backend = backend
+        self.owner_id = owner_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.ttl_seconds = ttl_seconds or float(os.getenv("LEASE_TTL_SECONDS", "5"))
+
+    @staticmethod
+    def job_key(nombre_clase: str, fecha_reserva: str, hora_reserva: str) -> str:
+        return f"{nombre_clase}|{fecha_reserva}|{hora_reserva}"
+
+    @staticmethod
+    def slot_keys(job_key: str, executors: int) -> List[str]:
+        """
+        Claves de lease de un job: una sola en modo normal, una por ejecutor
+        en modo redundante (cada ejecutor es dueño exclusivo de su slot)
+        """
+        if executors <= 1:
+            return [job_key]
+        return [f"{job_key}#r{slot}" for slot in range(executors)]
+
+    async def acquire_any(self, job_keys: List[str]) -> Optional[Lease]:
+        """Adquiere el primer slot libre"""
+        for job_key in job_keys:
+            lease = await self.acquire(job_key)
+            if lease:
+                return lease
+        return None
+
+    async def wait_for_any_lease(self, job_keys: List[str], until: Deadline, base_key: Optional[str] = None) -> Optional[Lease]:
+        """
+        Igual que wait_for_lease pero sobre varios slots; termina también si
+        ya hay un ganador registrado para base_key (modo redundante)
+        """
+        poll_seconds = max(0.5, self.ttl_seconds / 3)
+        logger.info(f"⏸️ Todos los slots de {job_keys[0]} ocupados - esperando en standby")
+
+        while time.monotonic_ns() < until.mono_ns:
+            if base_key and await self.get_winner(base_key):
+                return None
+            for job_key in job_keys:
+                if await asyncio.to_thread(self.backend.is_completed, job_key):
+                    logger.info(f"✅ Job {job_key} completado por otro worker")
+                    return None
+            lease = await self.acquire_any(job_keys)
+            if lease:
+                logger.warning(f"🔁 Toma de control del slot {lease.job_key} (token {lease.token})")
+                return lease
+            await asyncio.sleep(min(poll_seconds, max(0.0, (until.mono_ns - time.monotonic_ns()) / 1e9)))
+
+        return None
+
+    async def claim_win(self, base_key: str) -> str:
+        """Registra a este worker como ganador (si nadie ganó antes) y devuelve el ganador"""
+        return await asyncio.to_thread(self.backend.claim_win, base_key, self.owner_id)
+
+    async def get_winner(self, base_key: str) -> Optional[str]:
+        return await asyncio.to_thread(self.backend.get_winner, base_key)
+
+    async def peer_holders(self, job_keys: List[str]) -> List[str]:
+        """Dueños vigentes de los slots que no son de este worker (modo redundante)"""
+        holders = [await asyncio.to_thread(self.backend.holder, job_key) for job_key in job_keys]
+        return [owner for owner in holders if owner and owner != self.owner_id]
+
+    async def acquire(self, job_key: str) -> Optional[Lease]:
+        lease = await asyncio.to_thread(self.backend.try_acquire, job_key, self.owner_id, self.ttl_seconds)
+        if lease:
+            logger.info(f"🔒 Lease adquirido para {job_key} (token {lease.token}, dueño {self.owner_id})")
+        return lease
+
+    async def wait_for_lease(self, job_key: str, until: Deadline) -> Optional[Lease]:
+        """
+        Espera en standby hasta adquirir el lease (el dueño murió o lo liberó)
+
+        Returns:
+            El lease adquirido, o None si el job se completó en otro worker o si
+            se alcanzó `until` (plazo monotónico, normalmente la hora de
+            preparación) sin obtenerlo
+        """
+        return await self.wait_for_any_lease([job_key], until)
+
+    async def is_completed(self, job_key: str) -> bool:
+        return await asyncio.to_thread(self.backend.is_completed, job_key)
+
+    async def validate(self, lease: Lease) -> bool:
+        """Verificación de fencing justo antes de acciones irreversibles (click)"""
+        return await asyncio.to_thread(self.backend.is_valid, lease)
+
+    async def release(self, lease: Lease, completed: bool = False):
+        try:
+            await asyncio.to_thread(self.backend.release, lease, completed)
+            logger.info(f"🔓 Lease liberado para {lease.job_key} (completado: {completed})")
+        except Exception as e:
+            logger.warning(f"⚠️ Error liberando lease {lease.job_key}: {str(e)}")
+
+    def start_heartbeat(self, lease: Lease) -> asyncio.Task:
+        """Renueva el lease periódicamente mientras el dueño espera o trabaja"""
+        return asyncio.create_task(self._heartbeat(lease))
+
+    async def _heartbeat(self, lease: Lease):
+        interval = max(0.5, self.ttl_seconds / 3)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                renewed = await asyncio.to_thread(self.backend.renew, lease, self.ttl_seconds)
+            except Exception as e:
+                logger.warning(f"⚠️ Error renovando lease {lease.job_key}: {str(e)}")
+                continue
+            if not renewed:
+                logger.error(f"❌ Lease perdido para {lease.job_key} (token {lease.token})")
+                return
+
+
+_lease_manager: Optional[ExecutionLeaseManager] = None
+
+
+def get_execution_lease_manager() -> Optional[ExecutionLeaseManager]:
+    """Devuelve el gestor de leases configurado (None si LEASE_BACKEND=none)"""
+    global _lease_manager
+    if _lease_manager is None:
+        backend_name = os.getenv("LEASE_BACKEND", "sqlite").lower()
+        if backend_name == "none":
+            return None
+        if backend_name == "memory":
+            backend: LeaseBackend = InMemoryLeaseBackend()
+        else:
+            backend = SQLiteLeaseBackend(os.getenv("LEASE_DB_PATH", "/tmp/crossfit_reservas_leases.db"))
+        _lease_manager = ExecutionLeaseManager(backend)
+        logger.info(f"🔐 Lease de ejecución con backend {backend_name} (dueño {_lease_manager.owner_id})")
+    return _lease_manager
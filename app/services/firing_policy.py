@@ -0,0 +1,139 @@
+"""
+Firing Policy - Disparo del click compensado por latencia
+
+El click se dispara en la hora local, pero la reserva cuenta cuando el
+servidor recibe el request: medio RTT más el costo local de despachar el
+click en Playwright, y T es la hora del servidor, no la local. La política
+mide ambos costos durante la preparación y adelanta el disparo en esa
+compensación más el offset del reloj del servidor, dejando un margen de
+seguridad después de T:
+
+    disparo = T_ejecución - (RTT/2 + despacho) + margen - offset_servidor
+
+Características principales:
+- RTT medido desde la página contra el endpoint de reserva (BOOKING_ENDPOINT_URL
+  o la raíz del sitio)
+- Offset del servidor (servidor - local) confirmado por el DriftWatchdog
+- Despacho medido con el click de prueba (warm_click_path)
+- Margen por clase (margen_seguridad_ms en config/clases.json) o
+  FIRING_SAFETY_MARGIN_MS
+- Después del click: llegada prevista (en hora del servidor) vs header Date
+  de la respuesta del request de reserva, para validar la compensación
+"""
+
+import email.utils
+import os
+import statistics
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from .direct_timing_controller import Deadline
+
+
+class FiringPolicy:
+    """Calcula el adelanto del disparo y valida la llegada prevista"""
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        default_margin_ms: Optional[float] = None,
+        max_lead_ms: Optional[float] = None
+    ):
+        """
+        Args:
+            enabled: Compensar la latencia (FIRING_COMPENSATION, true)
+            default_margin_ms: Margen después de T si la clase no define uno (FIRING_SAFETY_MARGIN_MS, 5)
+            max_lead_ms: Adelanto máximo, protege de una medición anómala (FIRING_MAX_LEAD_MS, 250)
+        """
+        self.enabled = (
+            enabled if enabled is not None
+            else os.getenv("FIRING_COMPENSATION", "true").lower() == "true"
+        )
+        self.default_margin_ms = (
+            default_margin_ms if default_margin_ms is not None
+            else float(os.getenv("FIRING_SAFETY_MARGIN_MS", "5"))
+        )
+        self.max_lead_ms = (
+            max_lead_ms if max_lead_ms is not None
+            else float(os.getenv("FIRING_MAX_LEAD_MS", "250"))
+        )
+
+    def plan(
+        self,
+        rtt_samples_ms: List[float],
+        dispatch_ms: Optional[float],
+        margin_ms: Optional[float] = None,
+        server_offset_ms: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Adelanto del disparo respecto del momento de ejecución
+
+        Args:
+            rtt_samples_ms: RTT medidos contra el sitio de reservas (se usa la mediana)
+            dispatch_ms: Duración del click de prueba (None si no se midió)
+            margin_ms: Margen de la clase (None = default_margin_ms)
+            server_offset_ms: Hora del servidor - hora local (DriftWatchdog.server_offset_ms)
+
+        Returns:
+            {"compensated": bool, "rtt_ms", "one_way_ms", "dispatch_ms", "margin_ms", "lead_ms",
+             "server_offset_ms"}
+        """
+        margin_ms = self.default_margin_ms if margin_ms is None else margin_ms
+        rtt_ms = statistics.median(rtt_samples_ms) if rtt_samples_ms else None
+        compensated = self.enabled and rtt_ms is not None and dispatch_ms is not None
+        one_way_ms = rtt_ms / 2 if rtt_ms is not None else 0.0
+        dispatch_ms = dispatch_ms or 0.0
+        lead_ms = one_way_ms + dispatch_ms - margin_ms if compensated else 0.0
+        return {
+            "compensated": compensated,
+            "rtt_ms": round(rtt_ms, 3) if rtt_ms is not None else None,
+            "one_way_ms": round(one_way_ms, 3),
+            "dispatch_ms": round(dispatch_ms, 3),
+            "margin_ms": margin_ms,
+            "lead_ms": round(min(max(lead_ms, 0.0), self.max_lead_ms), 3),
+            "server_offset_ms": round(server_offset_ms or 0.0, 3)
+        }
+
+    @staticmethod
+    def fire_deadline(execution_deadline: Deadline, plan: Dict[str, Any]) -> Deadline:
+        """Momento de disparo: el plazo de ejecución adelantado lead_ms y llevado a la hora del servidor"""
+        return execution_deadline.shifted(-(plan["lead_ms"] + plan.get("server_offset_ms", 0.0)) / 1000)
+
+    @staticmethod
+    def arrival_report(fired_at: datetime, plan: Dict[str, Any], server_date: Optional[str]) -> Dict[str, Any]:
+        """
+        Llegada prevista al servidor vs header Date de su respuesta
+
+        Date tiene resolución de 1 segundo (truncado): la predicción es
+        consistente si cae dentro del segundo que informa el servidor.
+
+        Args:
+            fired_at: Hora de pared del disparo
+            plan: Resultado de plan()
+            server_date: Header Date de la respuesta del request de reserva
+        """
+        # Llegada en hora del servidor
+        predicted = fired_at + timedelta(
+            milliseconds=plan["one_way_ms"] + plan["dispatch_ms"] + plan.get("server_offset_ms", 0.0)
+        )
+        report: Dict[str, Any] = {
+            "predicted_arrival": predicted.isoformat(),
+            "server_date": server_date,
+            "server_second_offset_ms": None,
+            "consistent": None
+        }
+        if not server_date:
+            return report
+        try:
+            server_second = email.utils.parsedate_to_datetime(server_date)
+        except (TypeError, ValueError):
+            return report
+        # Posición de la llegada prevista respecto del segundo informado (0-1000 = consistente)
+        offset_ms = (predicted - server_second).total_seconds() * 1000
+        report["server_second_offset_ms"] = round(offset_ms, 3)
+        report["consistent"] = 0 <= offset_ms < 1000
+        return report
+
+
+# Instancia compartida por el proceso
+firing_policy = FiringPolicy()
@@ -0,0 +1,177 @@
+"""
+Hot Standby - Segunda página armada en paralelo durante la espera previa a T
+
+Una sola página preparada es un punto único de falla: si navega a otra
+parte, pierde la sesión o se cae durante la espera, se pierde la clase. Con
+STANDBY_ENABLED se arma una segunda página sobre el mismo navegador:
+
+- STANDBY_ISOLATED_CONTEXT=false (defecto): mismo contexto, cookies
+  compartidas; cuesta una pestaña
+- STANDBY_ISOLATED_CONTEXT=true: contexto propio con login aparte; no
+  depende de la sesión de la página primaria
+
+Un heartbeat (STANDBY_HEARTBEAT_SECONDS) revisa ambas páginas con sondas
+baratas y mide el heap JS de la de respaldo; si supera STANDBY_MAX_MEMORY_MB
+se libera. En la revisión previa a T, si la primaria falla y la de respaldo
+está lista, se promueve (solo intercambio de referencias).
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Callable, Dict, Optional
+
+from loguru import logger
+
+from .preparation_service import PreparationService
+from .timeout_budget import UNLIMITED_BUDGET, TimeoutBudget
+
+
+class HotStandby:
+    """Página de respaldo armada junto a la primaria de un job"""
+
+    def __init__(
+        self,
+        primary: PreparationService,
+        isolated: Optional[bool] = None,
+        heartbeat_seconds: Optional[float] = None,
+        max_memory_mb: Optional[float] = None,
+        on_sample: Optional[Callable[[Dict[str, Any]], None]] = None
+    ):
+        """
+        Args:
+            primary: Sesión primaria ya preparada (su navegador se comparte)
+            isolated: Contexto propio para el respaldo (STANDBY_ISOLATED_CONTEXT, false)
+            heartbeat_seconds: Período del heartbeat (STANDBY_HEARTBEAT_SECONDS, 5)
+            max_memory_mb: Heap JS máximo del respaldo (STANDBY_MAX_MEMORY_MB, 200)
+            on_sample: Recibe cada heartbeat (telemetría del job)
+        """
+        self.primary = primary
+        self.isolated = (
+            isolated if isolated is not None
+            else os.getenv("STANDBY_ISOLATED_CONTEXT", "false").lower() == "true"
+        )
+        self.heartbeat_seconds = heartbeat_seconds or float(os.getenv("STANDBY_HEARTBEAT_SECONDS", "5"))
+        self.max_memory_mb = max_memory_mb or float(os.getenv("STANDBY_MAX_MEMORY_MB", "200"))
+        self.on_sample = on_sample
+
+        self.standby: Optional[PreparationService] = None
+        self.armed = False
+        self.memory_mb: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def arm(self, budget: TimeoutBudget = UNLIMITED_BUDGET) -> Dict[str, Any]:
+        """
+        Abre y prepara la página de respaldo hasta el botón; arranca el heartbeat
+
+        Returns:
+            {"success", "message", "isolated", "arm_time", "memory_mb"}
+        """
+        started = time.perf_counter()
+        logger.info(f"🛟 Armando página de respaldo (contexto {'aislado' if self.isolated else 'compartido'})...")
+        try:
+            self.standby = await self.primary.spawn_standby(self.isolated, budget)
+            result = await self.standby.prepare_reservation(
+                *self.primary.target, budget=budget, arm_disabled=self.primary.arm_disabled
+            )
+        except Exception as e:
+            result = {"success": False, "message": f"Error armando respaldo: {str(e)}"}
+
+        if result["success"]:
+            self.memory_mb = await self.standby.page_memory_mb()
+            if self._over_memory_bound():
+                result = {
+                    "success": False,
+                    "message": f"Respaldo descartado: {self.memory_mb:.0f}MB > {self.max_memory_mb:.0f}MB"
+                }
+
+        if result["success"]:
+            self.armed = True
+            self._task = asyncio.create_task(self._run())
+            logger.success(f"🛟 Página de respaldo armada ({self.memory_mb}MB de heap JS)")
+        else:
+            logger.warning(f"⚠️ Sin página de respaldo: {result['message']}")
+            await self.release()
+
+        return {
+            "success": result["success"],
+            "message": result["message"],
+            "isolated": self.isolated,
+            "arm_time": round(time.perf_counter() - started, 3),
+            "memory_mb": self.memory_mb
+        }
+
+    async def probe(self) -> Dict[str, Any]:
+        """Heartbeat: estado de ambas páginas y memoria del respaldo (libera si se pasa del tope)"""
+        primary = await self.primary.validate_button_ready()
+        sample: Dict[str, Any] = {
+            "primary_ready": primary["button_ready"],
+            "standby_ready": False,
+            "standby_memory_mb": None
+        }
+        if self.armed:
+            standby = await self.standby.validate_button_ready()
+            self.memory_mb = await self.standby.page_memory_mb()
+            sample["standby_ready"] = standby["button_ready"]
+            sample["standby_memory_mb"] = self.memory_mb
+            if self._over_memory_bound():
+                logger.warning(f"⚠️ Respaldo liberado: {self.memory_mb:.0f}MB > {self.max_memory_mb:.0f}MB")
+                await self._release_page()
+        if self.on_sample:
+            self.on_sample(sample)
+        return sample
+
+    async def check_and_promote(self) -> Dict[str, Any]:
+        """
+        Revisión previa a T: si la página primaria no está lista y el respaldo
+        sí, el respaldo pasa a ser la página primaria
+
+        Returns:
+            {"primary_ready", "standby_ready", "promoted"}
+        """
+        await self.stop()
+        primary = await self.primary.validate_button_ready()
+        report: Dict[str, Any] = {"primary_ready": primary["button_ready"], "standby_ready": None, "promoted": False}
+        if primary["button_ready"] or not self.armed:
+            return report
+
+        standby = await self.standby.validate_button_ready()
+        report["standby_ready"] = standby["button_ready"]
+        if standby["button_ready"]:
+            self.primary.adopt_standby(self.standby)
+            self.standby = None
+            self.armed = False
+            report["promoted"] = True
+        return report
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def release(self):
+        """Detiene el heartbeat y cierra la página de respaldo (nunca el navegador compartido)"""
+        await self.stop()
+        await self._release_page()
+
+    # ================================
+    # MÉTODOS PRIVADOS
+    # ================================
+
+    async def _run(self):
+        while self.armed:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                await self.probe()
+            except Exception as e:
+                logger.warning(f"⚠️ Error en heartbeat del respaldo: {e}")
+
+    async def _release_page(self):
+        self.armed = False
+        if self.standby is not None:
+            await self.standby._cleanup_browser()
+            self.standby = None
+
+    def _over_memory_bound(self) -> bool:
+        return self.memory_mb is not None and self.memory_mb > self.max_memory_mb
@@ -0,0 +1,231 @@
+"""
+Idempotency Registry - Registro de reservas programadas en curso con expiración
+
+Este módulo reemplaza el diccionario global `reservas_en_curso`, que nunca se
+limpiaba y bloqueaba reintentos legítimos hasta reiniciar el proceso.
+
+Características principales:
+- Un registro por clave (nombre_clase, fecha_reserva, hora_reserva)
+- Estados por job: pending, preparing, armed, done, failed, cancelled
+- Expiración por TTL (terminales y activos con TTL distinto)
+- Tamaño acotado: se expulsan los registros terminales más antiguos; si todos
+  están activos se rechaza el alta (RegistryFullError) en vez de olvidar un job
+  que sigue corriendo y aceptar su duplicado
+- Un job fallido o cancelado libera la clave para permitir reintentos inmediatos
+- Listeners notificados en cada registro y cambio de estado (stream de eventos)
+"""
+
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from loguru import logger
+
+from ..models.reserva import EstadoJob, ReservaProgramadaRequest
+
+JobKey = Tuple[str, str, str]
+# listener(entry, estado_anterior, info): estado_anterior es None al registrar
+RegistryListener = Callable[["RegistryEntry", Optional[EstadoJob], Dict[str, Any]], None]
+
+
+class RegistryFullError(Exception):
+    """El registro está lleno de jobs activos: no se puede registrar otro"""
+
+    def __init__(self, max_entries: int):
+        super().__init__(f"Registro lleno: {max_entries} jobs activos")
+        self.max_entries = max_entries
+
+
+@dataclass
+class RegistryEntry:
+    """Estado de un job registrado"""
+    key: JobKey
+    job_id: str
+    estado: EstadoJob
+    created_at: float
+    updated_at: float
+    fecha_creacion: datetime = field(default_factory=datetime.now)
+    request: Optional[ReservaProgramadaRequest] = None
+    info: Dict[str, Any] = field(default_factory=dict)
+    task: Optional[Any] = None            # asyncio.Task del job (si corre en este proceso)
+    manager: Optional[Any] = None         # ScheduledReservationManager dueño de la sesión web
+
+    @property
+    def is_terminal(self) -> bool:
+        return self.estado in IdempotencyRegistry.TERMINAL_STATES
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "nombre_clase": self.key[0],
+            "fecha_reserva": self.key[1],
+            "hora_reserva": self.key[2],
+            "estado": self.estado.value,
+            "fecha_creacion": self.fecha_creacion.isoformat(),
+            "info": dict(self.info)
+        }
+
+
+class IdempotencyRegistry:
+    """
+    Registro acotado con TTL para evitar reservas programadas duplicadas
+
+    Compartido por /reservas/programada, /ejecutar-reservas-hoy y la ejecución
+    automática al iniciar el servidor (ver `idempotency_registry` al final).
+    """
+
+    TERMINAL_STATES = {EstadoJob.DONE, EstadoJob.FAILED, EstadoJob.CANCELLED}
+    RETRYABLE_STATES = {EstadoJob.FAILED, EstadoJob.CANCELLED}
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = None,
+        active_ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            ttl_seconds: Vida de un registro terminal desde su última actualización
+            active_ttl_seconds: Vida máxima de un registro activo (protege contra jobs huérfanos)
+            max_entries: Cantidad máxima de registros
+            clock: Reloj monotónico (inyectable para tests)
+        """
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "3600"))
+        self.active_ttl_seconds = (
+            active_ttl_seconds if active_ttl_seconds is not None
+            else float(os.getenv("IDEMPOTENCY_ACTIVE_TTL_SECONDS", str(26 * 3600)))
+        )
+        self.max_entries = max_entries or int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "256"))
+        self._clock = clock
+        self._entries: "OrderedDict[JobKey, RegistryEntry]" = OrderedDict()
+        self._listeners: List[RegistryListener] = []
+
+    def add_listener(self, listener: RegistryListener):
+        """Registra un callback para cada alta y cambio de estado (no debe bloquear)"""
+        self._listeners.append(listener)
+
+    @staticmethod
+    def key_for(request: ReservaProgramadaRequest) -> JobKey:
+        """Clave de idempotencia de una reserva programada"""
+        return (request.nombre_clase, request.fecha_reserva, request.hora_reserva)
+
+    def register(
+        self,
+        key: JobKey,
+        job_id: str,
+        request: Optional[ReservaProgramadaRequest] = None
+    ) -> Tuple[RegistryEntry, bool]:
+        """
+        Registra un job nuevo si la clave está libre
+
+        Returns:
+            (entry, created): si la clave ya tenía un job vigente (no fallido ni cancelado),
+            devuelve ese registro y created=False
+
+        Raises:
+            RegistryFullError: si no cabe y todos los registros son de jobs activos
+        """
+        self._evict_expired()
+
+        existing = self._entries.get(key)
+        if existing and existing.estado not in self.RETRYABLE_STATES:
+            logger.info(f"🔁 Solicitud duplicada para {key}: job {existing.job_id} en estado {existing.estado.value}")
+            return existing, False
+
+        if existing:
+            logger.info(f"♻️ Reintento tras {existing.estado.value} para {key}: reemplazando job {existing.job_id}")
+            del self._entries[key]
+
+        self._make_room()
+        now = self._clock()
+        entry = RegistryEntry(
+            key=key,
+            job_id=job_id,
+            estado=EstadoJob.PENDING,
+            created_at=now,
+            updated_at=now,
+            request=request
+        )
+        self._entries[key] = entry
+        self._notify(entry, None, {})
+        return entry, True
+
+    def update_state(self, key: JobKey, estado: EstadoJob, job_id: Optional[str] = None, **info) -> Optional[RegistryEntry]:
+        """
+        Actualiza el estado de un job registrado
+
+        Si se indica job_id y no coincide con el registrado, no se modifica nada
+        (evita que un job reemplazado pise el estado de su reintento).
+        """
+        entry = self._entries.get(key)
+        if not entry or (job_id is not None and entry.job_id != job_id):
+            return None
+
+        previous = entry.estado
+        entry.estado = estado
+        entry.updated_at = self._clock()
+        entry.info.update(info)
+        self._entries.move_to_end(key)
+        self._notify(entry, previous, info)
+        return entry
+
+    def get(self, key: JobKey) -> Optional[RegistryEntry]:
+        self._evict_expired()
+        return self._entries.get(key)
+
+    def get_by_job_id(self, job_id: str) -> Optional[RegistryEntry]:
+        self._evict_expired()
+        for entry in self._entries.values():
+            if entry.job_id == job_id:
+                return entry
+        return None
+
+    def remove(self, key: JobKey) -> Optional[RegistryEntry]:
+        return self._entries.pop(key, None)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Lista serializable de los registros vigentes"""
+        self._evict_expired()
+        return [entry.to_dict() for entry in self._entries.values()]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ================================
+    # MÉTODOS PRIVADOS
+    # ================================
+
+    def _notify(self, entry: RegistryEntry, previous: Optional[EstadoJob], info: Dict[str, Any]):
+        for listener in self._listeners:
+            try:
+                listener(entry, previous, info)
+            except Exception as e:
+                logger.warning(f"⚠️ Error en listener del registro: {str(e)}")
+
+    def _is_expired(self, entry: RegistryEntry, now: float) -> bool:
+        ttl = self.ttl_seconds if entry.is_terminal else self.active_ttl_seconds
+        return now - entry.updated_at > ttl
+
+    def _evict_expired(self):
+        now = self._clock()
+        expired = [key for key, entry in self._entries.items() if self._is_expired(entry, now)]
+        for key in expired:
+            entry = self._entries.pop(key)
+            logger.debug(f"🧹 Registro expirado: {key} ({entry.estado.value})")
+
+    def _make_room(self):
+        """Deja lugar para un registro nuevo expulsando solo terminales"""
+        while len(self._entries) >= self.max_entries:
+            victim = next((key for key, entry in self._entries.items() if entry.is_terminal), None)
+            if victim is None:
+                # Un job activo expulsado seguiría corriendo y su duplicado se aceptaría
+                logger.warning(f"⚠️ Registro lleno de jobs activos ({self.max_entries}) - rechazando alta")
+                raise RegistryFullError(self.max_entries)
+            self._entries.pop(victim)
+
+
+# Instancia compartida por los endpoints y el arranque de la aplicación
+idempotency_registry = IdempotencyRegistry()
@@ -0,0 +1,251 @@
+"""
+Immediate Reservation Queue - Cola acotada para reservas inmediatas
+
+Cada reserva inmediata lanza un Chromium completo. Sin límite, diez requests
+concurrentes abren diez navegadores en una máquina de 1 GB y fallan todas
+juntas. Esta cola pone un número fijo de workers delante de
+ReservationManager.execute_immediate_reservation.
+
+Características principales:
+- Tamaño máximo configurable (IMMEDIATE_QUEUE_MAXSIZE) y workers (IMMEDIATE_QUEUE_WORKERS)
+- Rechazo inmediato cuando está llena (QueueFullError -> 429 con Retry-After)
+- Tiempo en cola y tiempo de servicio reportados por separado
+- Retry-After estimado con el promedio móvil del tiempo de servicio
+- Single-flight: solicitudes idénticas en curso (cuenta, clase, fecha) comparten
+  una sola ejecución y todas reciben el mismo resultado
+- Descarte de carga: mientras un job programado lo pide (lag del event loop
+  alto antes de T) se rechaza trabajo nuevo y los workers no inician reservas
+"""
+
+import asyncio
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from loguru import logger
+
+from .loop_monitor import LoopLagMonitor, loop_lag_monitor
+
+ReservationHandler = Callable[[str, str], Awaitable[Dict[str, Any]]]
+FlightKey = Tuple[str, str, str]
+
+
+class QueueFullError(Exception):
+    """La cola de reservas inmediatas está llena"""
+
+    def __init__(self, position: int, retry_after: int):
+        self.position = position
+        self.retry_after = retry_after
+        super().__init__(f"Cola llena (posición {position}, reintentar en {retry_after}s)")
+
+
+@dataclass
+class _QueueItem:
+    nombre_clase: str
+    fecha: str
+    position: int
+    enqueued_at: float
+    future: asyncio.Future = field(repr=False)
+
+
+class ImmediateReservationQueue:
+    """
+    Cola acotada con workers fijos para reservas inmediatas
+
+    Los workers se inician de forma perezosa en el event loop del primer submit.
+    """
+
+    def __init__(
+        self,
+        handler: ReservationHandler,
+        maxsize: Optional[int] = None,
+        workers: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+        account: Optional[str] = None,
+        load_monitor: Optional[LoopLagMonitor] = None
+    ):
+        """
+        Args:
+            handler: Corrutina (nombre_clase, fecha) -> dict de resultado
+            maxsize: Solicitudes en espera permitidas (sin contar las en servicio)
+            workers: Reservas ejecutándose en paralelo (navegadores simultáneos)
+            clock: Reloj monotónico (inyectable para tests)
+            account: Cuenta con la que reserva el handler (parte de la clave single-flight)
+            load_monitor: Monitor del event loop que indica cuándo descartar carga
+        """
+        self.handler = handler
+        self.maxsize = maxsize or int(os.getenv("IMMEDIATE_QUEUE_MAXSIZE", "5"))
+        self.workers = workers or int(os.getenv("IMMEDIATE_QUEUE_WORKERS", "1"))
+        self._clock = clock
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._in_flight = 0
+        self.account = account if account is not None else os.getenv("USERNAME", "")
+        # Ejecución compartida por clave (cuenta, clase, fecha) mientras no termina
+        self._flights: Dict[FlightKey, asyncio.Future] = {}
+        self.coalesced_total = 0
+        # Promedio móvil del tiempo de servicio (semilla: reserva típica de ~20s)
+        self._avg_service_seconds = float(os.getenv("IMMEDIATE_QUEUE_SERVICE_ESTIMATE_SECONDS", "20"))
+        self.load_monitor = load_monitor or loop_lag_monitor
+
+    async def submit(self, nombre_clase: str, fecha: str) -> Dict[str, Any]:
+        """
+        Encola una reserva y espera su resultado
+
+        Returns:
+            Resultado del handler más queue_position, queue_wait_seconds y service_time_seconds
+
+        Raises:
+            QueueFullError: si no hay lugar en la cola
+        """
+        return await self.enqueue(nombre_clase, fecha)
+
+    def enqueue(self, nombre_clase: str, fecha: str) -> asyncio.Future:
+        """
+        Encola una reserva sin esperarla (modo asíncrono 202)
+
+        Si ya hay una ejecución en curso para la misma cuenta, clase y fecha, no
+        se encola nada: el llamador se suma a esa ejecución (coalesced=True en el
+        resultado). Cada llamador recibe su propio Future, así que cancelar uno
+        no cancela la reserva compartida.
+
+        Returns:
+            Future con el mismo resultado que submit
+
+        Raises:
+            QueueFullError: si no hay lugar en la cola
+        """
+        self._ensure_workers()
+
+        key = self._flight_key(nombre_clase, fecha)
+        shared = self._flights.get(key)
+        if shared is not None:
+            self.coalesced_total += 1
+            logger.info(f"🔗 Reserva idéntica en curso para '{nombre_clase}' ({fecha}) - compartiendo resultado")
+            return self._caller_future(shared, coalesced=True)
+
+        position = self._queue.qsize() + self._in_flight + 1
+        shedding = self.load_monitor.shedding_remaining()
+        if shedding > 0:
+            logger.warning(f"🚧 Reserva inmediata rechazada: ejecución programada en curso (Retry-After {math.ceil(shedding)}s)")
+            raise QueueFullError(position, math.ceil(shedding))
+        if self._queue.full():
+            retry_after = self._retry_after()
+            logger.warning(f"🚦 Cola de reservas inmediatas llena - rechazando (Retry-After {retry_after}s)")
+            raise QueueFullError(position, retry_after)
+
+        item = _QueueItem(
+            nombre_clase=nombre_clase,
+            fecha=fecha,
+            position=position,
+            enqueued_at=self._clock(),
+            future=asyncio.get_running_loop().create_future()
+        )
+        self._queue.put_nowait(item)
+        self._flights[key] = item.future
+        item.future.add_done_callback(lambda _: self._flights.pop(key, None))
+        logger.info(f"📥 Reserva inmediata encolada en posición {position}: {nombre_clase}")
+        return self._caller_future(item.future, coalesced=False)
+
+    async def close(self):
+        """Detiene los workers; las reservas en servicio y en cola se cancelan"""
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        # Nadie las va a servir: sus llamadores (y seguidores single-flight) no deben quedar esperando
+        while self._queue is not None and not self._queue.empty():
+            item = self._queue.get_nowait()
+            item.future.cancel()
+            self._queue.task_done()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "in_flight": self._in_flight,
+            "maxsize": self.maxsize,
+            "workers": self.workers,
+            "avg_service_seconds": round(self._avg_service_seconds, 3),
+            "coalesced_total": self.coalesced_total
+        }
+
+    # ================================
+    # MÉTODOS PRIVADOS
+    # ================================
+
+    def _ensure_workers(self):
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._loop is not loop:
+            # Primer uso o nuevo event loop (ej: reinicio en tests): la cola queda ligada al loop
+            self._queue = asyncio.Queue(maxsize=self.maxsize)
+            self._loop = loop
+            self._worker_tasks = []
+        self._worker_tasks = [task for task in self._worker_tasks if not task.done()]
+        while len(self._worker_tasks) < self.workers:
+            self._worker_tasks.append(asyncio.create_task(self._worker()))
+
+    def _flight_key(self, nombre_clase: str, fecha: str) -> FlightKey:
+        return (self.account, nombre_clase.strip(), fecha.strip().upper())
+
+    @staticmethod
+    def _caller_future(shared: asyncio.Future, coalesced: bool) -> asyncio.Future:
+        """Future propio del llamador con una copia del resultado compartido"""
+        caller = shared.get_loop().create_future()
+
+        def _copy(done: asyncio.Future):
+            if caller.done():
+                return
+            if done.cancelled():
+                caller.cancel()
+            elif done.exception() is not None:
+                caller.set_exception(done.exception())
+            else:
+                caller.set_result({**done.result(), "coalesced": coalesced})
+
+        shared.add_done_callback(_copy)
+        return caller
+
+    def _retry_after(self) -> int:
+        """Segundos estimados hasta que un worker termine y se libere un lugar"""
+        return max(1, math.ceil(self._avg_service_seconds / self.workers))
+
+    async def _worker(self):
+        while True:
+            item = await self._queue.get()
+            try:
+                # No lanzar un navegador nuevo mientras un job programado está por hacer click
+                while (remaining := self.load_monitor.shedding_remaining()) > 0:
+                    await asyncio.sleep(remaining)
+                await self._serve(item)
+            finally:
+                # Worker cancelado (cierre) durante la espera o el servicio: resolver el future
+                if not item.future.done():
+                    item.future.cancel()
+                self._queue.task_done()
+
+    async def _serve(self, item: _QueueItem):
+        started = self._clock()
+        queue_wait = started - item.enqueued_at
+        self._in_flight += 1
+        try:
+            result = await self.handler(item.nombre_clase, item.fecha)
+        except Exception as e:
+            if not item.future.done():
+                item.future.set_exception(e)
+            return
+        finally:
+            self._in_flight -= 1
+
+        service_time = self._clock() - started
+        self._avg_service_seconds = 0.8 * self._avg_service_seconds + 0.2 * service_time
+        logger.info(f"⏱️ Reserva inmediata: {queue_wait:.2f}s en cola, {service_time:.2f}s de servicio")
+
+        if not item.future.done():
+            item.future.set_result({
+                **result,
+                "queue_position": item.position,
+                "queue_wait_seconds": queue_wait,
+                "service_time_seconds": service_time
+            })
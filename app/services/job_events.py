@@ -0,0 +1,155 @@
+"""
+Job Events - Bus de eventos de fases y tiempos de reservas programadas
+
+Registra cada transición de estado y cada muestra de tiempo de un job, y las
+reparte a los suscriptores en vivo (GET /reservas/programada/{id}/events, SSE).
+
+Características principales:
+- Se alimenta del registro de idempotencia (listener), por lo que cubre jobs
+  inline y en proceso dedicado sin cambios en los ejecutores
+- Historial acotado por job: un suscriptor tardío recibe lo ocurrido antes
+- Reanudación por número de secuencia (Last-Event-ID)
+- Colas de suscriptor acotadas: un cliente lento pierde los eventos más viejos,
+  nunca bloquea al job
+"""
+
+import asyncio
+import os
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set
+
+from loguru import logger
+
+from ..models.reserva import EstadoJob, EstadoReservaProgramada
+from .idempotency_registry import IdempotencyRegistry, RegistryEntry, idempotency_registry
+
+# Correspondencia entre el estado interno del job y el estado expuesto por la API
+ESTADO_JOB_A_RESERVA = {
+    EstadoJob.PENDING: EstadoReservaProgramada.PROGRAMADA,
+    EstadoJob.PREPARING: EstadoReservaProgramada.PREPARANDO,
+    EstadoJob.ARMED: EstadoReservaProgramada.EJECUTANDO,
+    EstadoJob.DONE: EstadoReservaProgramada.EXITOSA,
+    EstadoJob.FAILED: EstadoReservaProgramada.FALLIDA,
+    EstadoJob.CANCELLED: EstadoReservaProgramada.CANCELADA,
+}
+
+FASES_TERMINALES = {
+    EstadoReservaProgramada.EXITOSA.value,
+    EstadoReservaProgramada.FALLIDA.value,
+    EstadoReservaProgramada.CANCELADA.value,
+}
+
+
+@dataclass
+class JobEvent:
+    """Transición de fase ("phase") o muestra de tiempo ("timing") de un job"""
+    seq: int
+    job_id: str
+    tipo: str
+    fase: str
+    timestamp: datetime = field(default_factory=datetime.now)
+    data: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def is_terminal(self) -> bool:
+        return self.tipo == "phase" and self.fase in FASES_TERMINALES
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "seq": self.seq,
+            "job_id": self.job_id,
+            "tipo": self.tipo,
+            "fase": self.fase,
+            "timestamp": self.timestamp.isoformat(),
+            "data": self.data
+        }
+
+
+class JobEventBus:
+    """Historial y distribución en vivo de eventos por job"""
+
+    def __init__(
+        self,
+        max_events_per_job: Optional[int] = None,
+        max_jobs: Optional[int] = None,
+        subscriber_queue_size: int = 100
+    ):
+        self.max_events_per_job = max_events_per_job or int(os.getenv("JOB_EVENTS_MAX_PER_JOB", "200"))
+        self.max_jobs = max_jobs or int(os.getenv("JOB_EVENTS_MAX_JOBS", "128"))
+        self.subscriber_queue_size = subscriber_queue_size
+        self._history: "OrderedDict[str, Deque[JobEvent]]" = OrderedDict()
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._seq = 0
+
+    def publish(self, job_id: str, tipo: str, fase: str, **data) -> JobEvent:
+        self._seq += 1
+        event = JobEvent(seq=self._seq, job_id=job_id, tipo=tipo, fase=fase, data=data)
+
+        history = self._history.get(job_id)
+        if history is None:
+            history = deque(maxlen=self.max_events_per_job)
+            self._history[job_id] = history
+            while len(self._history) > self.max_jobs:
+                self._history.popitem(last=False)
+        else:
+            self._history.move_to_end(job_id)
+        history.append(event)
+
+        for queue in self._subscribers.get(job_id, ()):
+            if queue.full():
+                queue.get_nowait()  # cliente lento: descartar el evento más viejo
+            queue.put_nowait(event)
+        return event
+
+    def history(self, job_id: str, after_seq: int = 0) -> List[JobEvent]:
+        return [event for event in self._history.get(job_id, ()) if event.seq > after_seq]
+
+    def has_job(self, job_id: str) -> bool:
+        return job_id in self._history
+
+    async def subscribe(self, job_id: str, after_seq: int = 0) -> AsyncIterator[JobEvent]:
+        """
+        Entrega el historial posterior a after_seq y luego los eventos en vivo,
+        hasta la fase terminal del job
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.subscriber_queue_size)
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        try:
+            last_seq = after_seq
+            for event in self.history(job_id, after_seq):
+                last_seq = event.seq
+                yield event
+                if event.is_terminal:
+                    return
+            while True:
+                event = await queue.get()
+                if event.seq <= last_seq:
+                    continue
+                last_seq = event.seq
+                yield event
+                if event.is_terminal:
+                    return
+        finally:
+            subscribers = self._subscribers.get(job_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[job_id]
+
+    def on_registry_change(self, entry: RegistryEntry, previous: Optional[EstadoJob], info: Dict[str, Any]):
+        """Listener del registro: cambio de estado -> "phase", mismo estado -> "timing" """
+        tipo = "phase" if previous != entry.estado else "timing"
+        fase = ESTADO_JOB_A_RESERVA[entry.estado].value
+        self.publish(entry.job_id, tipo, fase, **info)
+        if tipo == "phase":
+            logger.debug(f"📡 Job {entry.job_id}: {fase}")
+
+    def attach(self, registry: IdempotencyRegistry):
+        registry.add_listener(self.on_registry_change)
+
+
+# Instancia compartida, alimentada por el registro de idempotencia de la aplicación
+job_event_bus = JobEventBus()
+job_event_bus.attach(idempotency_registry)
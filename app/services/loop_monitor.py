@@ -0,0 +1,135 @@
+"""
+Loop Monitor - Medición del lag del event loop
+
+Una tarea duerme intervalos fijos y mide cuánto tarde despierta: ese atraso es
+el tiempo que el loop estuvo ocupado con otro trabajo, el mismo atraso que
+sufriría el timer del click.
+
+Características principales:
+- Muestras en ventana acotada con percentiles (GET /api/metricas/event-loop)
+- Consulta por ventana de tiempo: lag de los últimos segundos antes de T y
+  alrededor del click
+- Descarte de carga: durante un intervalo marcado, la cola de reservas
+  inmediatas rechaza trabajo nuevo
+- Inicio perezoso, ligado al event loop en curso (servidor, CLI o proceso hijo)
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from loguru import logger
+
+from .sample_history import percentile
+
+
+class LoopLagMonitor:
+    """Muestreador del lag del event loop"""
+
+    def __init__(
+        self,
+        interval_seconds: Optional[float] = None,
+        max_samples: Optional[int] = None,
+        clock: Callable[[], float] = time.perf_counter
+    ):
+        """
+        Args:
+            interval_seconds: Período de muestreo (por defecto LOOP_LAG_INTERVAL_MS, 50ms)
+            max_samples: Muestras retenidas (por defecto LOOP_LAG_MAX_SAMPLES, 1200 = 1 min)
+            clock: Reloj monotónico (inyectable para tests)
+        """
+        self.interval_seconds = (
+            interval_seconds if interval_seconds is not None
+            else float(os.getenv("LOOP_LAG_INTERVAL_MS", "50")) / 1000
+        )
+        self.max_samples = max_samples or int(os.getenv("LOOP_LAG_MAX_SAMPLES", "1200"))
+        self._clock = clock
+        # (momento de la muestra, lag en ms)
+        self._samples: Deque[Tuple[float, float]] = deque(maxlen=self.max_samples)
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._shed_until = 0.0
+
+    def ensure_started(self):
+        """Inicia el muestreo en el event loop actual si no está corriendo"""
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        self._loop = loop
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def record(self, lag_ms: float, at: Optional[float] = None):
+        self._samples.append((self._clock() if at is None else at, lag_ms))
+
+    def stats(self, since: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Percentiles del lag en ms
+
+        Args:
+            since: Solo muestras posteriores a este momento del reloj monotónico
+        """
+        values = sorted(lag for at, lag in self._samples if since is None or at >= since)
+        if not values:
+            return {"samples": 0, "p50_ms": None, "p90_ms": None, "p99_ms": None, "max_ms": None}
+        return {
+            "samples": len(values),
+            "p50_ms": round(percentile(values, 50), 3),
+            "p90_ms": round(percentile(values, 90), 3),
+            "p99_ms": round(percentile(values, 99), 3),
+            "max_ms": round(values[-1], 3)
+        }
+
+    def recent(self, seconds: float) -> Dict[str, Any]:
+        """Percentiles de los últimos `seconds` segundos"""
+        return self.stats(since=self._clock() - seconds)
+
+    def now(self) -> float:
+        return self._clock()
+
+    # ================================
+    # DESCARTE DE CARGA
+    # ================================
+
+    def shed_load(self, seconds: float):
+        """Pide rechazar trabajo de API nuevo durante `seconds` segundos"""
+        self._shed_until = max(self._shed_until, self._clock() + seconds)
+        logger.warning(f"🚧 Descartando trabajo de API por {seconds:.1f}s (lag del event loop alto)")
+
+    def stop_shedding(self):
+        self._shed_until = 0.0
+
+    def shedding_remaining(self) -> float:
+        """Segundos de descarte restantes (0 si no se está descartando)"""
+        return max(0.0, self._shed_until - self._clock())
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "interval_ms": round(self.interval_seconds * 1000, 3),
+            "ultimo_minuto": self.recent(60),
+            "ultimos_5s": self.recent(5),
+            "descartando_carga_segundos": round(self.shedding_remaining(), 3)
+        }
+
+    # ================================
+    # MÉTODOS PRIVADOS
+    # ================================
+
+    async def _run(self):
+        while True:
+            expected = self._clock() + self.interval_seconds
+            await asyncio.sleep(self.interval_seconds)
+            now = self._clock()
+            self.record(max(0.0, (now - expected) * 1000), at=now)
+
+
+# Instancia compartida por el proceso
+loop_lag_monitor = LoopLagMonitor()
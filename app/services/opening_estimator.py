@@ -0,0 +1,122 @@
+"""
+Opening Estimator - Momento real de apertura de las reservas
+
+El botón "Reservar" no siempre se habilita exactamente a la hora_reserva
+nominal: según la clase y el día puede hacerlo unos cientos de milisegundos
+antes o después. En cada ejecución un MutationObserver en la página registra
+cuándo se habilitó el botón; aquí se guarda ese atraso respecto de T y se
+estima el de la próxima ejecución.
+
+Características principales:
+- Modelo por clase y día de la semana (con respaldo a todas las muestras de
+  la clase si el día tiene pocas)
+- Persistido en JSON (OPENING_MODEL_PATH): lo escribe el proceso del job y lo
+  lee el servidor (GET /api/metricas/apertura)
+- Estimación: ventana de observación [p10, p90] y momento de disparo
+  (p10, nunca antes de T)
+"""
+
+import os
+import statistics
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from .sample_history import JsonSampleHistory, percentile
+
+_DIAS = ["lunes", "martes", "miercoles", "jueves", "viernes", "sabado", "domingo"]
+
+
+class OpeningEstimator:
+    """Modelo estadístico del atraso de apertura por clase y día"""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_samples: Optional[int] = None,
+        min_samples: Optional[int] = None,
+        window_margin_ms: Optional[float] = None
+    ):
+        """
+        Args:
+            path: Archivo JSON del modelo (OPENING_MODEL_PATH)
+            max_samples: Muestras retenidas por clase y día (OPENING_MAX_SAMPLES, 50)
+            min_samples: Muestras necesarias para estimar (OPENING_MIN_SAMPLES, 3)
+            window_margin_ms: Margen a cada lado de la ventana de observación (OPENING_WINDOW_MARGIN_MS, 200)
+        """
+        self.history = JsonSampleHistory(
+            path or os.getenv("OPENING_MODEL_PATH", "/tmp/crossfit_reservas_apertura.json"),
+            max_samples or int(os.getenv("OPENING_MAX_SAMPLES", "50"))
+        )
+        self.min_samples = min_samples or int(os.getenv("OPENING_MIN_SAMPLES", "3"))
+        self.window_margin_ms = (
+            window_margin_ms if window_margin_ms is not None
+            else float(os.getenv("OPENING_WINDOW_MARGIN_MS", "200"))
+        )
+
+    @staticmethod
+    def key_for(nombre_clase: str, fecha_reserva: str) -> str:
+        """Clave del modelo: clase y día de la semana de la fecha de reserva"""
+        dia = _DIAS[datetime.strptime(fecha_reserva, "%Y-%m-%d").weekday()]
+        return f"{nombre_clase}|{dia}"
+
+    def record(self, nombre_clase: str, fecha_reserva: str, offset_ms: float):
+        """
+        Registra una apertura observada
+
+        Args:
+            offset_ms: Momento de habilitación del botón menos T (negativo = antes de T)
+        """
+        key = self.key_for(nombre_clase, fecha_reserva)
+        self.history.append(key, offset_ms)
+        logger.info(f"📈 Apertura observada para {key}: {offset_ms:+.0f}ms respecto de T")
+
+    def estimate(self, nombre_clase: str, fecha_reserva: str) -> Dict[str, Any]:
+        """
+        Estimación para la próxima ejecución
+
+        Returns:
+            {"key", "samples", "p10_ms", "p50_ms", "p90_ms", "window_start_ms",
+             "window_end_ms", "fire_offset_ms"}; con pocas muestras fire_offset_ms = 0
+        """
+        key = self.key_for(nombre_clase, fecha_reserva)
+        model = self.history.load()
+        samples = model.get(key, [])
+        if len(samples) < self.min_samples:
+            # Respaldo: todos los días de la clase
+            samples = [s for k, values in model.items() if k.split("|")[0] == nombre_clase for s in values]
+        return self._summary(key, samples)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Estimación de cada clase y día registrados"""
+        model = self.history.load()
+        return {key: self._summary(key, samples) for key, samples in sorted(model.items())}
+
+    # ================================
+    # MÉTODOS PRIVADOS
+    # ================================
+
+    def _summary(self, key: str, samples: List[float]) -> Dict[str, Any]:
+        if len(samples) < self.min_samples:
+            return {
+                "key": key, "samples": len(samples), "p10_ms": None, "p50_ms": None, "p90_ms": None,
+                "window_start_ms": None, "window_end_ms": None, "fire_offset_ms": 0.0
+            }
+        values = sorted(samples)
+        p10, p90 = percentile(values, 10), percentile(values, 90)
+        return {
+            "key": key,
+            "samples": len(values),
+            "p10_ms": p10,
+            "p50_ms": round(statistics.median(values), 3),
+            "p90_ms": p90,
+            "window_start_ms": round(p10 - self.window_margin_ms, 3),
+            "window_end_ms": round(p90 + self.window_margin_ms, 3),
+            # Disparar cuando la apertura empieza a ser probable; nunca antes de T
+            "fire_offset_ms": max(0.0, p10)
+        }
+
+
+# Instancia compartida por el proceso
+opening_estimator = OpeningEstimator()
@@ -0,0 +1,103 @@
+"""
+Preparation Lead - Adelanto de la preparación aprendido de ejecuciones anteriores
+
+La preparación (navegador, login, navegación hasta el botón) empezaba siempre
+en T-60s. Si el sitio está lento o un selector de respaldo consume 20s, el
+botón no está listo en T; si está rápido, la sesión queda esperando y puede
+expirar. Aquí se guarda la duración de cada preparación por clase y el
+adelanto se calcula como p99 + margen.
+
+Características principales:
+- Historial por clase persistido en JSON (PREP_LEAD_MODEL_PATH)
+- Margen por clase (margen_preparacion_segundos en config/clases.json) o
+  PREP_LEAD_MARGIN_SECONDS
+- Adelanto acotado a [PREP_LEAD_MIN_SECONDS, PREP_LEAD_MAX_SECONDS]
+- Con pocas muestras se mantiene el adelanto por defecto (60s)
+"""
+
+import os
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+from .direct_timing_controller import DEFAULT_PREP_LEAD_SECONDS
+from .sample_history import JsonSampleHistory, percentile
+
+
+class PreparationLeadModel:
+    """Duraciones de preparación por clase y adelanto resultante"""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_samples: Optional[int] = None,
+        min_samples: Optional[int] = None,
+        margin_seconds: Optional[float] = None,
+        min_lead_seconds: Optional[float] = None,
+        max_lead_seconds: Optional[float] = None
+    ):
+        """
+        Args:
+            path: Archivo JSON del historial (PREP_LEAD_MODEL_PATH)
+            max_samples: Duraciones retenidas por clase (PREP_LEAD_MAX_SAMPLES, 50)
+            min_samples: Duraciones necesarias para aprender el adelanto (PREP_LEAD_MIN_SAMPLES, 5)
+            margin_seconds: Margen sobre el p99 si la clase no define uno (PREP_LEAD_MARGIN_SECONDS, 15)
+            min_lead_seconds: Adelanto mínimo (PREP_LEAD_MIN_SECONDS, 20)
+            max_lead_seconds: Adelanto máximo, limita la espera de la sesión armada (PREP_LEAD_MAX_SECONDS, 300)
+        """
+        self.history = JsonSampleHistory(
+            path or os.getenv("PREP_LEAD_MODEL_PATH", "/tmp/crossfit_reservas_preparacion.json"),
+            max_samples or int(os.getenv("PREP_LEAD_MAX_SAMPLES", "50"))
+        )
+        self.min_samples = min_samples or int(os.getenv("PREP_LEAD_MIN_SAMPLES", "5"))
+        self.margin_seconds = (
+            margin_seconds if margin_seconds is not None
+            else float(os.getenv("PREP_LEAD_MARGIN_SECONDS", "15"))
+        )
+        self.min_lead_seconds = (
+            min_lead_seconds if min_lead_seconds is not None
+            else float(os.getenv("PREP_LEAD_MIN_SECONDS", "20"))
+        )
+        self.max_lead_seconds = (
+            max_lead_seconds if max_lead_seconds is not None
+            else float(os.getenv("PREP_LEAD_MAX_SECONDS", "300"))
+        )
+
+    def record(self, nombre_clase: str, duration_seconds: float):
+        """Registra la duración de una preparación completa (sin arranque en caliente)"""
+        self.history.append(nombre_clase, duration_seconds)
+        logger.info(f"📈 Preparación de {nombre_clase}: {duration_seconds:.2f}s")
+
+    def lead_for(self, nombre_clase: str, margin_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Adelanto de la preparación para la próxima ejecución
+
+        Args:
+            margin_seconds: Margen de la clase (None = margin_seconds del modelo)
+
+        Returns:
+            {"lead_seconds", "learned": bool, "samples", "p99_seconds", "margin_seconds"}
+        """
+        margin_seconds = self.margin_seconds if margin_seconds is None else margin_seconds
+        samples = sorted(self.history.load().get(nombre_clase, []))
+        if len(samples) < self.min_samples:
+            return {
+                "lead_seconds": DEFAULT_PREP_LEAD_SECONDS,
+                "learned": False,
+                "samples": len(samples),
+                "p99_seconds": None,
+                "margin_seconds": margin_seconds
+            }
+        p99 = percentile(samples, 99)
+        lead = min(max(p99 + margin_seconds, self.min_lead_seconds), self.max_lead_seconds)
+        return {
+            "lead_seconds": round(lead, 3),
+            "learned": True,
+            "samples": len(samples),
+            "p99_seconds": p99,
+            "margin_seconds": margin_seconds
+        }
+
+
+# Instancia compartida por el proceso
+preparation_lead_model = PreparationLeadModel()
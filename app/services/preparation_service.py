@@ -9,17 +9,109 @@ Características principales:
 - Navegación completa hasta el botón de reserva (sin hacer click)
 - Mantenimiento de sesión activa durante la espera
 - Detección y validación del botón de reserva
+- Puntos de control de la navegación: una revisión previa a T rehace solo
+  los pasos que dejaron de valer (ej: reabrir el modal en vez de re-login)
+- Páginas de respaldo sobre el mismo navegador (ver hot_standby)
+- Plan de click precompilado: el click de T va por CDP (Input.dispatchMouseEvent)
+  sin las esperas de accionabilidad de page.click
 - Ejecución del click final con máxima precisión
 """
 
 import asyncio
+import json
 import os
-from typing import Dict, Any, Optional
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
 from loguru import logger
 from playwright.async_api import async_playwright, Page, Browser, BrowserContext
 from datetime import datetime
 
 from .web_automation import WebAutomationService
+from .timeout_budget import UNLIMITED_BUDGET, TimeoutBudget
+
+# Registra cuándo se habilita el botón "Reservar" (hora de pared, ms desde epoch)
+_ENABLEMENT_OBSERVER_JS = """() => {
+    if (window.__apertura) return window.__apertura;
+    const ready = () => Array.from(document.querySelectorAll("button")).some(
+        b => /(Reservar|Book)/.test(b.textContent) && !b.disabled
+            && b.getAttribute("aria-disabled") !== "true" && b.offsetParent !== null
+    );
+    window.__apertura = {initially_enabled: ready(), enabled_at_ms: null};
+    if (!window.__apertura.initially_enabled) {
+        const observer = new MutationObserver(() => {
+            if (ready()) {
+                window.__apertura.enabled_at_ms = performance.timeOrigin + performance.now();
+                observer.disconnect();
+            }
+        });
+        observer.observe(document.body, {
+            subtree: true, childList: true, attributes: true,
+            attributeFilter: ["disabled", "aria-disabled", "class", "style"]
+        });
+    }
+    return window.__apertura;
+}"""
+
+
+# Puntos de control de la preparación, del más superficial al más profundo.
+# Cada paso de navegación completado deja self.checkpoint en su punto.
+PREPARATION_CHECKPOINTS = ("logged_in", "on_classes", "date_selected", "modal_open", "button_armed")
+
+
+def _step_timer() -> Tuple[Dict[str, float], Callable[[str], None]]:
+    """Duraciones por paso (segundos) y la función que cierra cada paso"""
+    timings: Dict[str, float] = {}
+    start = time.perf_counter()
+
+    def step_done(name: str):
+        nonlocal start
+        now = time.perf_counter()
+        timings[name] = round(now - start, 3)
+        start = now
+
+    return timings, step_done
+
+
+# Revalidación del plan de click en T, en una sola llamada CDP. Con el layout
+# intacto basta un hit-test en el punto planeado; si se movió, se recalcula el
+# centro del botón. Si está deshabilitado espera (MutationObserver) a que se
+# habilite o a timeoutMs. Devuelve {x, y, relaid, enabled} o null si el botón
+# ya no está en la página, quedó cubierto o ya no es el de reservar (el SPA
+# puede re-renderizar el mismo nodo como "Cancelar reserva" o "Lista de espera").
+_CLICK_PLAN_CHECK_JS = """(timeoutMs) => new Promise(resolve => {
+    const el = window.__clickTarget;
+    const hits = (x, y) => {
+        const hit = document.elementFromPoint(x, y);
+        return !!hit && (hit === el || el.contains(hit));
+    };
+    const locate = () => {
+        if (!el || !el.isConnected || !/(Reservar|Book)/.test(el.textContent)) return null;
+        const plan = window.__clickPlan;
+        if (hits(plan.x, plan.y)) return {x: plan.x, y: plan.y, relaid: false};
+        const r = el.getBoundingClientRect();
+        const point = {x: r.x + r.width / 2, y: r.y + r.height / 2};
+        if (!hits(point.x, point.y)) return null;
+        window.__clickPlan = point;
+        return {x: point.x, y: point.y, relaid: true};
+    };
+    const enabled = () => !el.disabled && el.getAttribute("aria-disabled") !== "true";
+    const settle = () => {
+        const at = locate();
+        return at ? Object.assign(at, {enabled: enabled()}) : null;
+    };
+    const first = settle();
+    if (!first || first.enabled || timeoutMs <= 0) return resolve(first);
+    const observer = new MutationObserver(() => {
+        const state = settle();
+        if (!state || state.enabled) { observer.disconnect(); clearTimeout(timer); resolve(state); }
+    });
+    const timer = setTimeout(() => { observer.disconnect(); resolve(settle()); }, timeoutMs);
+    // Todo el body: si el sitio re-renderiza el botón, el nodo viejo se desconecta
+    observer.observe(document.body, {
+        subtree: true, childList: true, attributes: true,
+        attributeFilter: ["disabled", "aria-disabled", "class", "style"]
+    });
+})"""
 
 
 class PreparationService:
@@ -37,6 +129,9 @@ class PreparationService:
         self.username = os.getenv("USERNAME")
         self.password = os.getenv("PASSWORD")
         self.headless = os.getenv("BROWSER_HEADLESS", "true").lower() == "true"
+        # URL (prefijo) del request que dispara el botón de reserva; sin configurar se
+        # reconoce como el primer request de escritura (XHR/fetch) tras el click
+        self.booking_endpoint = os.getenv("BOOKING_ENDPOINT_URL")
         
         if not all([self.crossfit_url, self.username, self.password]):
             raise ValueError("Faltan credenciales en las variables de entorno")
@@ -47,10 +142,29 @@ class PreparationService:
         self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
         self.button_selector: Optional[str] = None
+        # True cuando la página ya tiene sesión iniciada (arranque en caliente)
+        self.authenticated = False
+        # Punto de control más profundo alcanzado (PREPARATION_CHECKPOINTS) y
+        # clase/fecha preparadas, para reparar sin repetir toda la navegación
+        self.checkpoint: Optional[str] = None
+        self.target: Optional[Tuple[str, str]] = None
+        # Armar el botón aunque siga deshabilitado (solo la preparación previa a T)
+        self.arm_disabled = False
+        # False en páginas de respaldo: el navegador (o el contexto) es de la sesión primaria
+        self.owns_browser = True
+        self.owns_context = True
+        # Plan de click precompilado (build_click_plan): punto, caja, sesión CDP y página
+        self._click_plan: Optional[Dict[str, Any]] = None
         
         logger.info("🔧 PreparationService inicializado para reservas programadas")
     
-    async def prepare_reservation(self, nombre_clase: str, fecha_clase: str) -> Dict[str, Any]:
+    async def prepare_reservation(
+        self,
+        nombre_clase: str,
+        fecha_clase: str,
+        budget: TimeoutBudget = UNLIMITED_BUDGET,
+        arm_disabled: bool = False
+    ) -> Dict[str, Any]:
         """
         Prepara la navegación web hasta el botón de reserva específico
         
@@ -60,6 +174,9 @@ class PreparationService:
         Args:
             nombre_clase: Nombre exacto de la clase (ej: "18:00 CrossFit 18:00-19:00")
             fecha_clase: Fecha de la clase en formato "XX ##" (ej: "LU 21")
+            budget: Tiempo restante hasta el plazo; cada espera usa min(tope, restante)
+            arm_disabled: Armar el botón visible aunque siga deshabilitado (la
+                reserva abre en T); solo para la preparación programada
             
         Returns:
             Dict con resultado de preparación:
@@ -70,73 +187,39 @@ class PreparationService:
                 "session_active": bool,
                 "page_context": dict,
                 "preparation_time": float,
+                "step_timings": Dict[str, float],   # Segundos por fase completada
                 "error_type": Optional[str]
             }
         """
         logger.info(f"🚀 Iniciando preparación para clase: {nombre_clase} en fecha: {fecha_clase}")
         preparation_start = datetime.now()
+        step_timings, step_done = _step_timer()
+        self.target = (nombre_clase, fecha_clase)
+        self.arm_disabled = arm_disabled
         
         try:
-            # Importar async_playwright directamente (sin async with para mantener sesión)
-            from playwright.async_api import async_playwright
-            
-            # Inicializar Playwright manualmente para control total de la sesión
-            self.playwright = await async_playwright().start()
-            
-            # Configuración del browser (similar a WebAutomationService)
-            browser_args = [
-                '--disable-blink-features=AutomationControlled',
-                '--disable-dev-shm-usage',
-                '--disable-gpu',
-                '--no-sandbox'
-            ] if self.headless else []
-            
-            self.browser = await self.playwright.chromium.launch(
-                headless=self.headless,
-                args=browser_args,
-                slow_mo=50 if self.headless else 0
-            )
-            
-            # Crear contexto
-            self.context = await self.browser.new_context(
-                user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                viewport={'width': 1920, 'height': 1080}
-            )
-            
-            # Script anti-detección
-            if self.headless:
-                await self.context.add_init_script("""
-                    Object.defineProperty(navigator, 'webdriver', {
-                        get: () => false,
-                    });
-                """)
-            
-            self.page = await self.context.new_page()
-            
-            # FASE 1: Navegación y Login
-            logger.info("📱 Fase 1: Navegando al sitio web...")
-            await self.page.goto(self.crossfit_url, wait_until='networkidle')
-            await self.page.wait_for_timeout(2000)
-            
-            # Login (reutilizando lógica de WebAutomationService)
-            logger.info("🔐 Fase 2: Realizando login...")
-            await self._perform_login()
-            
-            # FASE 2: Navegación a Clases
-            logger.info("📅 Fase 3: Navegando a la sección Clases...")
-            await self._navigate_to_classes()
-            
-            # FASE 3: Selección de Fecha
-            logger.info(f"📆 Fase 4: Seleccionando fecha: {fecha_clase}")
-            await self._select_date(fecha_clase)
-            
-            # FASE 4: Encontrar Clase
-            logger.info(f"🔍 Fase 5: Localizando clase '{nombre_clase}'...")
-            await self._locate_class(nombre_clase)
+            if self.has_authenticated_session():
+                # Arranque en caliente: navegador y login ya hechos
+                logger.info("♨️ Sesión precalentada: se omiten lanzamiento y login")
+            else:
+                # Lanzar navegador, contexto y página (sin async with para mantener sesión)
+                await self._launch_browser()
+                step_done("browser_launch")
+
+                # FASE 1: Navegación y Login
+                logger.info("📱 Fase 1: Navegando al sitio web...")
+                await self.page.goto(self.crossfit_url, wait_until='networkidle', timeout=budget.timeout(30000))
+                await self.page.wait_for_timeout(budget.pause(2000))
+                
+                # Login (reutilizando lógica de WebAutomationService)
+                logger.info("🔐 Fase 2: Realizando login...")
+                await self._perform_login(budget)
+                self.authenticated = True
+                step_done("login")
+            self.checkpoint = "logged_in"
             
-            # FASE 5: Preparar Botón de Reserva (SIN HACER CLICK)
-            logger.info("🎯 Fase 6: Preparando botón de reserva...")
-            button_result = await self._prepare_reservation_button()
+            # FASES 3-6: Clases, fecha, clase y botón (SIN HACER CLICK)
+            button_result = await self._advance_to_button(nombre_clase, fecha_clase, budget, step_done)
             
             if not button_result["success"]:
                 return {
@@ -146,7 +229,11 @@ class PreparationService:
                     "session_active": False,
                     "page_context": None,
                     "preparation_time": (datetime.now() - preparation_start).total_seconds(),
-                    "error_type": button_result.get("error_type", "BUTTON_PREPARATION_FAILED")
+                    "step_timings": step_timings,
+                    "error_type": (
+                        "PREPARATION_BUDGET_EXHAUSTED" if budget.exhausted()
+                        else button_result.get("error_type", "BUTTON_PREPARATION_FAILED")
+                    )
                 }
             
             # ÉXITO: Preparación completada
@@ -165,11 +252,14 @@ class PreparationService:
                     "modal_open": True
                 },
                 "preparation_time": preparation_time,
+                "step_timings": step_timings,
                 "error_type": None
             }
                 
         except Exception as e:
             logger.error(f"❌ Error durante preparación: {str(e)}")
+            # Con el presupuesto agotado se falla ya, antes de pasar T
+            error_type = "PREPARATION_BUDGET_EXHAUSTED" if budget.exhausted() else "PREPARATION_FAILED"
             
             # Cleanup en caso de error
             await self._cleanup_browser()
@@ -181,16 +271,199 @@ class PreparationService:
                 "session_active": False,
                 "page_context": None,
                 "preparation_time": (datetime.now() - preparation_start).total_seconds(),
-                "error_type": "PREPARATION_FAILED"
+                "step_timings": step_timings,
+                "error_type": error_type
+            }
+    
+    async def repair_preparation(self, budget: TimeoutBudget = UNLIMITED_BUDGET) -> Dict[str, Any]:
+        """
+        Revisión previa a T: valida desde el punto de control más profundo y
+        rehace solo los pasos que dejaron de valer
+        
+        Si el modal se cerró basta con volver a abrir la clase (~1s); si la
+        sesión expiró o la página se cerró se repite la preparación completa.
+        
+        Args:
+            budget: Tiempo restante hasta T
+            
+        Returns:
+            Dict con resultado:
+            {
+                "success": bool,
+                "message": str,
+                "valid_checkpoint": Optional[str],   # Punto que seguía valiendo
+                "redone_steps": List[str],
+                "step_timings": Dict[str, float],
+                "repair_time": float,
+                "error_type": Optional[str]
+            }
+        """
+        start = time.perf_counter()
+        valid = await self._probe_checkpoint()
+        
+        if valid == "button_armed":
+            logger.info("🩺 Preparación intacta: botón armado")
+            result = {"success": True, "message": "Preparación intacta", "step_timings": {}, "error_type": None}
+        elif self.target is None:
+            result = {
+                "success": False,
+                "message": "No hay preparación que reparar",
+                "step_timings": {},
+                "error_type": "NOT_PREPARED"
+            }
+        elif valid is None:
+            logger.warning("🩺 Sesión perdida: se repite la preparación completa")
+            await self._cleanup_browser()
+            result = await self.prepare_reservation(*self.target, budget=budget, arm_disabled=self.arm_disabled)
+        else:
+            logger.warning(f"🩺 Preparación válida hasta '{valid}' (se había llegado a '{self.checkpoint}'): rehaciendo el resto")
+            self.checkpoint = valid
+            step_timings, step_done = _step_timer()
+            try:
+                result = await self._advance_to_button(*self.target, budget, step_done)
+            except Exception as e:
+                logger.error(f"❌ Error reparando preparación: {str(e)}")
+                result = {"success": False, "message": f"Error reparando preparación: {str(e)}", "error_type": "REPAIR_FAILED"}
+            result["step_timings"] = step_timings
+            if not result["success"] and budget.exhausted():
+                result["error_type"] = "PREPARATION_BUDGET_EXHAUSTED"
+        
+        repair_time = time.perf_counter() - start
+        if result["success"] and valid != "button_armed":
+            logger.success(f"🩺 Preparación reparada en {repair_time:.2f}s")
+        return {
+            "success": result["success"],
+            "message": result["message"],
+            "valid_checkpoint": valid,
+            "redone_steps": list(result.get("step_timings", {})),
+            "step_timings": result.get("step_timings", {}),
+            "repair_time": round(repair_time, 3),
+            "error_type": result.get("error_type")
+        }
+    
+    async def spawn_standby(
+        self,
+        isolated: bool = False,
+        budget: TimeoutBudget = UNLIMITED_BUDGET
+    ) -> "PreparationService":
+        """
+        Abre una página de respaldo con sesión iniciada sobre este navegador
+        
+        Args:
+            isolated: False = mismo contexto (cookies compartidas, una pestaña más);
+                True = contexto propio con login aparte
+            budget: Tiempo disponible para abrir la página e iniciar sesión
+            
+        Returns:
+            PreparationService de la página de respaldo, listo para prepare_reservation
+            (su cleanup cierra solo la página y, si es aislado, su contexto)
+        """
+        standby = PreparationService()
+        standby.playwright, standby.browser = self.playwright, self.browser
+        standby.owns_browser = False
+        standby.owns_context = isolated
+        try:
+            standby.context = await self._new_context() if isolated else self.context
+            standby.page = await standby.context.new_page()
+            await standby.page.goto(self.crossfit_url, wait_until='networkidle', timeout=budget.timeout(30000))
+            # En el contexto compartido la sesión suele venir en las cookies
+            if await standby._is_visible('input[type="password"]'):
+                await standby._perform_login(budget)
+            standby.authenticated = True
+            return standby
+        except Exception:
+            await standby._cleanup_browser()
+            raise
+    
+    def adopt_standby(self, standby: "PreparationService"):
+        """
+        Promueve una página de respaldo armada: pasa a ser la página principal
+        
+        Solo intercambia referencias (sin I/O). La página anterior queda
+        abierta hasta que _cleanup_browser cierra el navegador.
+        """
+        self.page, self.context = standby.page, standby.context
+        self.button_selector = standby.button_selector
+        self.checkpoint = standby.checkpoint
+        self.authenticated = standby.authenticated
+        self._click_plan = None
+        standby.page = None
+        standby.context = None
+        standby.button_selector = None
+        standby.checkpoint = None
+        logger.warning(f"🔁 Página de respaldo promovida a principal ({self.button_selector})")
+    
+    async def page_memory_mb(self) -> Optional[float]:
+        """Heap JS usado por la página en MB (None si no hay página o Chromium no lo expone)"""
+        try:
+            if not self.page or self.page.is_closed():
+                return None
+            used = await self.page.evaluate("() => performance.memory ? performance.memory.usedJSHeapSize : null")
+            return round(used / 2**20, 1) if used is not None else None
+        except Exception as e:
+            logger.debug(f"⚠️ No se pudo medir la memoria de la página: {str(e)}")
+            return None
+    
+    async def warm_start(self) -> Dict[str, Any]:
+        """
+        Arranque en caliente: lanza el navegador e inicia sesión por adelantado
+        
+        Deja la página autenticada para que prepare_reservation solo tenga que
+        navegar hasta la clase. Si falla, libera el navegador y la preparación
+        normal vuelve a empezar desde cero.
+        
+        Returns:
+            Dict con resultado:
+            {
+                "success": bool,
+                "message": str,
+                "timings": {"browser_launch": float, "login": float},
+                "duration": float
             }
+        """
+        logger.info("♨️ Arranque en caliente: lanzando navegador y login por adelantado...")
+        start = time.perf_counter()
+        timings: Dict[str, float] = {}
+        
+        try:
+            await self._launch_browser()
+            timings["browser_launch"] = time.perf_counter() - start
+            
+            login_start = time.perf_counter()
+            await self.page.goto(self.crossfit_url, wait_until='networkidle')
+            await self._perform_login()
+            timings["login"] = time.perf_counter() - login_start
+            self.authenticated = True
+            
+            duration = time.perf_counter() - start
+            logger.success(f"♨️ Sesión precalentada en {duration:.2f}s")
+            return {"success": True, "message": "Sesión precalentada", "timings": timings, "duration": duration}
+            
+        except Exception as e:
+            logger.warning(f"⚠️ Arranque en caliente falló, se preparará en frío: {str(e)}")
+            await self._cleanup_browser()
+            return {
+                "success": False,
+                "message": f"Error en arranque en caliente: {str(e)}",
+                "timings": timings,
+                "duration": time.perf_counter() - start
+            }
+    
+    def has_authenticated_session(self) -> bool:
+        """Indica si hay una página abierta con sesión iniciada"""
+        return bool(self.authenticated and self.page and not self.page.is_closed())
     
-    async def execute_final_click(self) -> Dict[str, Any]:
+    async def execute_final_click(self, click_timeout_ms: float = 2000) -> Dict[str, Any]:
         """
         Ejecuta el click final en el botón de reserva preparado
         
         Esta función debe ser llamada en el momento exacto de ejecución.
         Utiliza el contexto del navegador preparado previamente.
         
+        Args:
+            click_timeout_ms: Espera máxima a que el botón sea accionable (se
+                habilita en la apertura)
+        
         Returns:
             Dict con resultado de ejecución:
             {
@@ -199,11 +472,20 @@ class PreparationService:
                 "execution_time": float,
                 "click_successful": bool,
                 "reservation_confirmed": bool,
-                "error_type": Optional[str]
+                "error_type": Optional[str],
+                "server_date": Optional[str],  # Header Date de la respuesta del request de reserva
+                "enablement": Optional[Dict],  # Habilitación observada del botón (observe_enablement)
+                "click_method": str            # "cdp" (plan de click) o "playwright"
             }
         """
         logger.info("⚡ Ejecutando click final en botón de reserva...")
         execution_start = datetime.now()
+        server_dates = []
+        listening = False
+
+        def capture_server_date(response):
+            if not server_dates and self._is_booking_response(response):
+                server_dates.append(response.headers.get("date"))
         
         try:
             if not self.page or not self.button_selector:
@@ -220,14 +502,22 @@ class PreparationService:
             click_timestamp = datetime.now()
             logger.info(f"⚡ CLICK EJECUTADO A LAS: {click_timestamp.strftime('%H:%M:%S.%f')[:-3]}")
             
-            # Click con timeout muy corto para máxima velocidad
-            await self.page.click(self.button_selector, timeout=2000)
+            # Plan de click por CDP; page.click (re-resuelve y espera accionabilidad) si no sirve
+            self.page.on("response", capture_server_date)
+            listening = True
+            click_method = "cdp" if await self._fire_click_plan(click_timeout_ms) else "playwright"
+            if click_method == "playwright":
+                await self.page.click(self.button_selector, timeout=click_timeout_ms)
             
             # Registrar tiempo del click únicamente
             click_execution_time = (datetime.now() - click_timestamp).total_seconds()
-            logger.info(f"🚀 Click completado en: {click_execution_time:.3f} segundos")
+            logger.info(f"🚀 Click ({click_method}) completado en: {click_execution_time:.3f} segundos")
+            enablement = await self._read_enablement()
             
             await self.page.wait_for_timeout(1500)  # Espera breve para procesamiento
+            self.page.remove_listener("response", capture_server_date)
+            listening = False
+            server_date = server_dates[0] if server_dates else None
             
             # Verificar éxito de la reserva
             verification_result = await self._verify_reservation_success()
@@ -246,7 +536,10 @@ class PreparationService:
                     "execution_time": execution_time,
                     "click_successful": True,
                     "reservation_confirmed": True,
-                    "error_type": None
+                    "error_type": None,
+                    "server_date": server_date,
+                    "enablement": enablement,
+                    "click_method": click_method
                 }
             else:
                 logger.warning(f"⚠️ Click ejecutado pero verificación falló: {verification_result['message']}")
@@ -258,11 +551,16 @@ class PreparationService:
                     "execution_time": execution_time,
                     "click_successful": True,
                     "reservation_confirmed": False,
-                    "error_type": verification_result.get("error_type", "VERIFICATION_FAILED")
+                    "error_type": verification_result.get("error_type", "VERIFICATION_FAILED"),
+                    "server_date": server_date,
+                    "enablement": enablement,
+                    "click_method": click_method
                 }
                 
         except Exception as e:
             logger.error(f"❌ Error durante ejecución: {str(e)}")
+            if listening:
+                self.page.remove_listener("response", capture_server_date)
             
             execution_time = (datetime.now() - execution_start).total_seconds()
             
@@ -275,9 +573,166 @@ class PreparationService:
                 "execution_time": execution_time,
                 "click_successful": False,
                 "reservation_confirmed": False,
-                "error_type": "EXECUTION_FAILED"
+                "error_type": "EXECUTION_FAILED",
+                "server_date": server_dates[0] if server_dates else None,
+                "enablement": None
             }
     
+    async def warm_click_path(self) -> Dict[str, Any]:
+        """
+        Recorre el camino del click sin hacer click (trial=True)
+
+        Playwright resuelve el selector, espera que el botón sea accionable y
+        posiciona el mouse, pero no dispara el evento: los costos de primera
+        llamada (selector engine, round-trip CDP, código Python del click)
+        se pagan antes de T.
+
+        Después arma el plan de click (build_click_plan) y lo recorre en seco
+        (mouseMoved en vez de press/release): con plan válido duration_ms es
+        el despacho del click de T por CDP.
+
+        Returns:
+            Dict con {"success": bool, "duration_ms": float, "message": str,
+            "click_plan": Optional[Dict]}
+        """
+        started = time.perf_counter()
+        try:
+            if not self.page or not self.button_selector or self.page.is_closed():
+                return {"success": False, "duration_ms": 0.0, "message": "Sesión no preparada"}
+
+            # Antes de la apertura el botón puede estar deshabilitado: recorrer el camino sin esperarlo
+            enabled = await self.page.is_enabled(self.button_selector)
+            await self.page.click(self.button_selector, timeout=2000, trial=True, force=not enabled)
+            duration_ms = (time.perf_counter() - started) * 1000
+            message = "Click de prueba completado"
+            
+            plan = await self.build_click_plan()
+            if plan["valid"]:
+                dry_started = time.perf_counter()
+                if await self._fire_click_plan(0, dry_run=True):
+                    duration_ms = (time.perf_counter() - dry_started) * 1000
+                    message = "Plan de click CDP precalentado"
+            logger.info(f"🔥 Camino del click precalentado en {duration_ms:.1f}ms ({message})")
+            return {"success": True, "duration_ms": round(duration_ms, 3), "message": message, "click_plan": plan}
+
+        except Exception as e:
+            duration_ms = (time.perf_counter() - started) * 1000
+            logger.warning(f"⚠️ Click de prueba falló: {str(e)}")
+            return {"success": False, "duration_ms": round(duration_ms, 3), "message": str(e)}
+
+    async def build_click_plan(self) -> Dict[str, Any]:
+        """
+        Precompila el click de T: elemento, caja, hit-test verificado y sesión CDP abierta
+        
+        En T el click se despacha con Input.dispatchMouseEvent en el punto
+        planeado, sin re-resolver el selector ni las esperas de
+        accionabilidad de page.click (ni slow_mo). Se desactiva con
+        CLICK_PLAN_ENABLED=false.
+        
+        Returns:
+            Dict con {"valid": bool, "message": str, "x": float, "y": float, "box": Dict}
+        """
+        self._click_plan = None
+        if os.getenv("CLICK_PLAN_ENABLED", "true").lower() != "true":
+            return {"valid": False, "message": "Plan de click desactivado"}
+        try:
+            if not self.page or not self.button_selector or self.page.is_closed():
+                return {"valid": False, "message": "Sesión no preparada"}
+            handle = await self.page.query_selector(self.button_selector)
+            if handle is None:
+                return {"valid": False, "message": f"Botón no encontrado: {self.button_selector}"}
+            await handle.scroll_into_view_if_needed()
+            box = await handle.bounding_box()
+            if box is None:
+                return {"valid": False, "message": "Botón sin caja (no visible)"}
+            point = {"x": box["x"] + box["width"] / 2, "y": box["y"] + box["height"] / 2}
+            hit = await handle.evaluate(
+                """(el, point) => {
+                    window.__clickTarget = el;
+                    window.__clickPlan = point;
+                    const hit = document.elementFromPoint(point.x, point.y);
+                    return !!hit && (hit === el || el.contains(hit));
+                }""",
+                point
+            )
+            if not hit:
+                return {"valid": False, "message": "Hit-test falló: otro elemento cubre el botón"}
+            
+            cdp = await self.context.new_cdp_session(self.page)
+            self._click_plan = {"cdp": cdp, "page": self.page, **point}
+            logger.info(f"🎯 Plan de click armado en ({point['x']:.0f}, {point['y']:.0f})")
+            return {"valid": True, "message": "Plan de click armado", **point, "box": box}
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo armar el plan de click: {str(e)}")
+            return {"valid": False, "message": str(e)}
+    
+    async def observe_enablement(self) -> Dict[str, Any]:
+        """
+        Instala el observer que registra cuándo se habilita el botón de reserva
+
+        Returns:
+            Dict con {"success": bool, "initially_enabled": bool, "message": str}
+        """
+        try:
+            if not self.page or self.page.is_closed():
+                return {"success": False, "initially_enabled": False, "message": "Sesión no preparada"}
+            state = await self.page.evaluate(_ENABLEMENT_OBSERVER_JS)
+            logger.info(f"👀 Observando habilitación del botón (habilitado ya: {state['initially_enabled']})")
+            return {"success": True, "initially_enabled": state["initially_enabled"], "message": "Observer instalado"}
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo instalar el observer de apertura: {str(e)}")
+            return {"success": False, "initially_enabled": False, "message": str(e)}
+
+    async def measure_round_trip(self, samples: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Mide el RTT al endpoint de reserva desde la página preparada
+
+        Los HEAD salen del navegador (fetch), por la misma conexión que usará
+        el request del click: a BOOKING_ENDPOINT_URL si está configurado, o a
+        la raíz del sitio (location.origin). Nunca a una URL de la API tomada
+        de los XHR de la página: sería un endpoint autenticado arbitrario y el
+        HEAD podría tener efectos.
+
+        Args:
+            samples: Cantidad de mediciones (por defecto FIRING_RTT_SAMPLES, 5)
+
+        Returns:
+            Dict con {"success": bool, "rtt_ms": List[float], "target": Optional[str], "message": str}
+        """
+        samples = samples or int(os.getenv("FIRING_RTT_SAMPLES", "5"))
+        try:
+            if not self.page or self.page.is_closed():
+                return {"success": False, "rtt_ms": [], "target": None, "message": "Sesión no preparada"}
+
+            measured = await self.page.evaluate(
+                """async ([samples, endpoint]) => {
+                    const target = endpoint || location.origin + "/";
+                    const rtts = [];
+                    for (let i = 0; i < samples; i++) {
+                        const started = performance.now();
+                        // no-cors: la API puede estar en otro origen; solo importa el tiempo
+                        await fetch(target, {method: "HEAD", mode: "no-cors", cache: "no-store", credentials: "include"});
+                        rtts.push(performance.now() - started);
+                    }
+                    return {target, rtts};
+                }""",
+                [samples, self.booking_endpoint]
+            )
+            rtt_ms = [round(value, 3) for value in measured["rtts"]]
+            logger.info(f"📶 RTT a {measured['target']}: {rtt_ms} ms")
+            return {"success": True, "rtt_ms": rtt_ms, "target": measured["target"], "message": "RTT medido"}
+
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo medir el RTT: {str(e)}")
+            return {"success": False, "rtt_ms": [], "target": None, "message": str(e)}
+
+    def _is_booking_response(self, response) -> bool:
+        """Respuesta del request de reserva (no de recursos ni lecturas de la SPA)"""
+        if self.booking_endpoint:
+            return response.url.startswith(self.booking_endpoint)
+        request = response.request
+        return request.resource_type in ("xhr", "fetch") and request.method not in ("GET", "HEAD", "OPTIONS")
+
     async def validate_button_ready(self) -> Dict[str, Any]:
         """
         Valida que el botón de reserva esté listo para ejecución
@@ -305,7 +760,7 @@ class PreparationService:
                     "selector_valid": False
                 }
             
-            page_available = not await self.page.is_closed()
+            page_available = not self.page.is_closed()
             modal_open = await self.page.is_visible('[role="dialog"]') if page_available else False
             selector_valid = await self.page.is_visible(self.button_selector) if page_available else False
             
@@ -334,8 +789,49 @@ class PreparationService:
     # ================================
     # MÉTODOS PRIVADOS DE NAVEGACIÓN
     # ================================
-    
-    async def _perform_login(self):
+
+    async def _launch_browser(self):
+        """Lanza Playwright, el navegador y una página con la configuración estándar"""
+        # async_playwright se importa al cargar el módulo: el primer lanzamiento no paga el import
+        # Inicializar Playwright manualmente para control total de la sesión
+        self.playwright = await async_playwright().start()
+
+        # Configuración del browser (similar a WebAutomationService)
+        browser_args = [
+            '--disable-blink-features=AutomationControlled',
+            '--disable-dev-shm-usage',
+            '--disable-gpu',
+            '--no-sandbox'
+        ] if self.headless else []
+
+        # Sin slow_mo por defecto: lo pagaría cada acción en T (fallback de
+        # page.click y verificación posterior al click)
+        self.browser = await self.playwright.chromium.launch(
+            headless=self.headless,
+            args=browser_args,
+            slow_mo=float(os.getenv("BROWSER_SLOW_MO_MS", "0")) if self.headless else 0
+        )
+
+        self.context = await self._new_context()
+        self.page = await self.context.new_page()
+
+    async def _new_context(self) -> BrowserContext:
+        """Contexto del navegador con user agent, viewport y script anti-detección estándar"""
+        context = await self.browser.new_context(
+            user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            viewport={'width': 1920, 'height': 1080}
+        )
+
+        # Script anti-detección
+        if self.headless:
+            await context.add_init_script("""
+                Object.defineProperty(navigator, 'webdriver', {
+                    get: () => false,
+                });
+            """)
+        return context
+
+    async def _perform_login(self, budget: TimeoutBudget = UNLIMITED_BUDGET):
         """Realiza el login reutilizando lógica de WebAutomationService"""
         # Buscar campos de email
         email_selectors = [
@@ -350,7 +846,7 @@ class PreparationService:
         email_filled = False
         for selector in email_selectors:
             try:
-                await self.page.wait_for_selector(selector, timeout=5000)
+                await self.page.wait_for_selector(selector, timeout=budget.timeout(5000))
                 await self.page.fill(selector, self.username)
                 email_filled = True
                 logger.info(f"✅ Email llenado con selector: {selector}")
@@ -373,7 +869,7 @@ class PreparationService:
         password_filled = False
         for selector in password_selectors:
             try:
-                await self.page.wait_for_selector(selector, timeout=5000)
+                await self.page.wait_for_selector(selector, timeout=budget.timeout(5000))
                 await self.page.fill(selector, self.password)
                 password_filled = True
                 logger.info(f"✅ Contraseña llenada con selector: {selector}")
@@ -396,7 +892,7 @@ class PreparationService:
         login_clicked = False
         for selector in login_selectors:
             try:
-                await self.page.wait_for_selector(selector, timeout=5000)
+                await self.page.wait_for_selector(selector, timeout=budget.timeout(5000))
                 await self.page.click(selector)
                 login_clicked = True
                 logger.info(f"✅ Login clickeado con selector: {selector}")
@@ -407,7 +903,7 @@ class PreparationService:
         if not login_clicked:
             raise Exception("No se pudo encontrar el botón de login")
         
-        await self.page.wait_for_timeout(5000)
+        await self.page.wait_for_timeout(budget.pause(5000))
         
         # Verificar login exitoso
         if "home" not in self.page.url:
@@ -415,9 +911,9 @@ class PreparationService:
         
         logger.info("🎉 Login exitoso confirmado")
     
-    async def _navigate_to_classes(self):
+    async def _navigate_to_classes(self, budget: TimeoutBudget = UNLIMITED_BUDGET):
         """Navega a la sección de clases"""
-        await self.page.wait_for_timeout(2000)
+        await self.page.wait_for_timeout(budget.pause(2000))
         
         clases_selectors = [
             'a:has-text("Clases")',
@@ -433,7 +929,7 @@ class PreparationService:
         clases_clicked = False
         for selector in clases_selectors:
             try:
-                await self.page.wait_for_selector(selector, timeout=3000)
+                await self.page.wait_for_selector(selector, timeout=budget.timeout(3000))
                 await self.page.click(selector)
                 clases_clicked = True
                 logger.info(f"✅ Navegación a Clases exitosa con selector: {selector}")
@@ -444,9 +940,9 @@ class PreparationService:
         if not clases_clicked:
             raise Exception("No se pudo encontrar el enlace de Clases")
         
-        await self.page.wait_for_timeout(2000)
+        await self.page.wait_for_timeout(budget.pause(2000))
     
-    async def _select_date(self, fecha_clase: str):
+    async def _select_date(self, fecha_clase: str, budget: TimeoutBudget = UNLIMITED_BUDGET):
         """Selecciona la fecha de la clase"""
         partes_fecha = fecha_clase.split()
         if len(partes_fecha) != 2:
@@ -457,18 +953,18 @@ class PreparationService:
         
         # Intentar con número del día primero
         try:
-            await self.page.click(f'text="{numero_dia}"', timeout=5000)
+            await self.page.click(f'text="{numero_dia}"', timeout=budget.timeout(5000))
             logger.info(f"✅ Fecha seleccionada: {fecha_clase} (usando día {numero_dia})")
         except:
             # Fallback con formato combinado
             try:
                 fecha_selector = f'text="{dia_semana}{numero_dia}"'
-                await self.page.click(fecha_selector, timeout=3000)
+                await self.page.click(fecha_selector, timeout=budget.timeout(3000))
                 logger.info(f"✅ Fecha seleccionada con método alternativo: {fecha_clase}")
             except Exception as e:
                 raise Exception(f"No se pudo seleccionar la fecha {fecha_clase}: {str(e)}")
         
-        await self.page.wait_for_timeout(500)
+        await self.page.wait_for_timeout(budget.pause(500))
         
         # Esperar a que se carguen las clases
         logger.info(f"⏳ Esperando a que se carguen las clases para {fecha_clase}...")
@@ -481,33 +977,43 @@ class PreparationService:
             
             for selector in clases_loaded_selectors:
                 try:
-                    await self.page.wait_for_selector(selector, timeout=2000)
+                    await self.page.wait_for_selector(selector, timeout=budget.timeout(2000))
                     logger.info(f"✅ Clases cargadas para {fecha_clase}")
                     break
                 except:
                     continue
             
-            await self.page.wait_for_timeout(500)
+            await self.page.wait_for_timeout(budget.pause(500))
             
         except Exception as e:
             logger.debug(f"⚠️ Error detectando clases cargadas: {str(e)}, continuando...")
-            await self.page.wait_for_timeout(500)
+            await self.page.wait_for_timeout(budget.pause(500))
     
-    async def _locate_class(self, nombre_clase: str):
+    async def _locate_class(self, nombre_clase: str, budget: TimeoutBudget = UNLIMITED_BUDGET):
         """Localiza y selecciona la clase específica"""
         logger.info(f"🔍 Buscando clase '{nombre_clase}'...")
         
         clase_selector = f'text="{nombre_clase}"'
-        await self.page.wait_for_selector(clase_selector, timeout=8000)
+        await self.page.wait_for_selector(clase_selector, timeout=budget.timeout(8000))
         await self.page.click(clase_selector)
-        await self.page.wait_for_timeout(800)
+        await self.page.wait_for_timeout(budget.pause(800))
         
         logger.info(f"✅ Clase '{nombre_clase}' seleccionada")
     
-    async def _prepare_reservation_button(self) -> Dict[str, Any]:
+    async def _prepare_reservation_button(
+        self,
+        budget: TimeoutBudget = UNLIMITED_BUDGET,
+        arm_disabled: bool = False
+    ) -> Dict[str, Any]:
         """
         Prepara el botón de reserva sin hacer click
         
+        Args:
+            budget: Tiempo restante hasta el plazo
+            arm_disabled: Aceptar un botón visible pero deshabilitado (preparación
+                previa a T; el click espera a que se habilite). Lote e inmediata
+                necesitan un botón que se pueda accionar ya
+        
         Returns:
             Dict con resultado de preparación del botón
         """
@@ -517,12 +1023,12 @@ class PreparationService:
             modal_found = False
             
             try:
-                await self.page.wait_for_selector('dialog', timeout=6000)
+                await self.page.wait_for_selector('dialog', timeout=budget.timeout(6000))
                 logger.info("✅ Modal (dialog) detectado")
                 modal_found = True
             except:
                 try:
-                    await self.page.wait_for_selector('[role="dialog"]', timeout=3000)
+                    await self.page.wait_for_selector('[role="dialog"]', timeout=budget.timeout(3000))
                     logger.info("✅ Modal (role=dialog) detectado")
                     modal_found = True
                 except:
@@ -540,7 +1046,7 @@ class PreparationService:
             button_found = False
             for selector in button_selectors:
                 try:
-                    await self.page.wait_for_selector(selector, timeout=5000)
+                    await self.page.wait_for_selector(selector, timeout=budget.timeout(5000))
                     
                     # Verificar que el botón esté visible y habilitado
                     is_visible = await self.page.is_visible(selector)
@@ -557,6 +1063,19 @@ class PreparationService:
                 except:
                     continue
             
+            if not button_found and arm_disabled:
+                # Botón visible pero aún deshabilitado: la reserva no abrió todavía.
+                # Se arma igual; el click en T espera a que se habilite
+                for selector in button_selectors:
+                    try:
+                        if await self.page.is_visible(selector):
+                            self.button_selector = selector
+                            button_found = True
+                            logger.info(f"⏳ Botón de reserva armado, aún deshabilitado: {selector}")
+                            break
+                    except:
+                        continue
+            
             if not button_found:
                 # Verificar si no quedan cupos
                 try:
@@ -607,6 +1126,143 @@ class PreparationService:
                 "error_type": "BUTTON_PREPARATION_ERROR"
             }
     
+    async def _advance_to_button(
+        self,
+        nombre_clase: str,
+        fecha_clase: str,
+        budget: TimeoutBudget,
+        step_done: Callable[[str], None]
+    ) -> Dict[str, Any]:
+        """
+        Ejecuta los pasos pendientes desde self.checkpoint hasta armar el botón
+        
+        Returns:
+            Resultado de _prepare_reservation_button (o éxito si ya estaba armado)
+        """
+        if not self._reached("on_classes"):
+            logger.info("📅 Fase 3: Navegando a la sección Clases...")
+            await self._navigate_to_classes(budget)
+            step_done("navigate_classes")
+            self.checkpoint = "on_classes"
+        
+        if not self._reached("date_selected"):
+            logger.info(f"📆 Fase 4: Seleccionando fecha: {fecha_clase}")
+            await self._select_date(fecha_clase, budget)
+            step_done("select_date")
+            self.checkpoint = "date_selected"
+        
+        if not self._reached("modal_open"):
+            logger.info(f"🔍 Fase 5: Localizando clase '{nombre_clase}'...")
+            await self._locate_class(nombre_clase, budget)
+            step_done("locate_class")
+            self.checkpoint = "modal_open"
+        
+        if self._reached("button_armed"):
+            return {"success": True, "message": f"Botón de reserva preparado: {self.button_selector}", "error_type": None}
+        
+        logger.info("🎯 Fase 6: Preparando botón de reserva...")
+        button_result = await self._prepare_reservation_button(budget, arm_disabled=self.arm_disabled)
+        step_done("prepare_button")
+        if button_result["success"]:
+            self.checkpoint = "button_armed"
+        return button_result
+    
+    def _reached(self, checkpoint: str) -> bool:
+        """True si la preparación ya pasó por el punto de control indicado"""
+        if self.checkpoint is None:
+            return False
+        return PREPARATION_CHECKPOINTS.index(self.checkpoint) >= PREPARATION_CHECKPOINTS.index(checkpoint)
+    
+    async def _probe_checkpoint(self) -> Optional[str]:
+        """
+        Punto de control más profundo que la página todavía cumple
+        
+        Se revisa del más profundo al más superficial, sin pasar de
+        self.checkpoint. "on_classes" no se distingue en el DOM de una fecha
+        sin la clase a la vista: en ese caso se vuelve a "logged_in".
+        
+        Returns:
+            Nombre del punto de control, o None si no hay página o la sesión expiró
+        """
+        if self.checkpoint is None or not self.page or self.page.is_closed():
+            return None
+        
+        validation = await self.validate_button_ready()
+        if validation["button_ready"] and self._reached("button_armed"):
+            return "button_armed"
+        if validation["modal_open"] and self._reached("modal_open"):
+            return "modal_open"
+        
+        if self.target and self._reached("date_selected"):
+            if await self._is_visible(f'text="{self.target[0]}"'):
+                return "date_selected"
+        
+        # Formulario de login a la vista: la sesión expiró
+        if await self._is_visible('input[type="password"]'):
+            return None
+        return "logged_in"
+    
+    async def _is_visible(self, selector: str) -> bool:
+        try:
+            return await self.page.is_visible(selector)
+        except Exception:
+            return False
+    
+    async def _fire_click_plan(self, timeout_ms: float, dry_run: bool = False) -> bool:
+        """
+        Despacha el click del plan por CDP: una revalidación en la página y press/release
+        
+        Args:
+            timeout_ms: Espera máxima a que el botón se habilite
+            dry_run: Recorrer el camino con mouseMoved (sin click)
+            
+        Returns:
+            True si se despachó; False si no hay plan o el botón se movió fuera
+            del hit-test, salió de la página o cambió de etiqueta (el llamador
+            usa page.click)
+            
+        Raises:
+            Exception: Si el botón no se habilitó dentro de timeout_ms
+        """
+        plan = self._click_plan
+        if plan is None or plan["page"] is not self.page:
+            return False
+        cdp = plan["cdp"]
+        try:
+            checked = await cdp.send("Runtime.evaluate", {
+                "expression": f"({_CLICK_PLAN_CHECK_JS})({json.dumps(0 if dry_run else timeout_ms)})",
+                "awaitPromise": True,
+                "returnByValue": True
+            })
+        except Exception as e:
+            logger.warning(f"⚠️ Plan de click no disponible: {str(e)}")
+            return False
+        at = checked.get("result", {}).get("value")
+        if not at:
+            logger.warning("⚠️ Plan de click inválido (botón fuera de la página, cubierto o con otra etiqueta)")
+            return False
+        if at["relaid"]:
+            logger.info(f"📐 Layout cambió: punto del click recalculado a ({at['x']:.0f}, {at['y']:.0f})")
+        if dry_run:
+            for _ in range(2):
+                await cdp.send("Input.dispatchMouseEvent", {"type": "mouseMoved", "x": at["x"], "y": at["y"]})
+            return True
+        if not at["enabled"]:
+            raise Exception(f"El botón no se habilitó en {timeout_ms:.0f}ms")
+        for event in ("mousePressed", "mouseReleased"):
+            await cdp.send("Input.dispatchMouseEvent", {
+                "type": event, "x": at["x"], "y": at["y"], "button": "left", "clickCount": 1
+            })
+        return True
+    
+    async def _read_enablement(self) -> Optional[Dict[str, Any]]:
+        """Estado del observer de apertura ({"initially_enabled", "enabled_at_ms"}) o None"""
+        try:
+            return await self.page.evaluate("() => window.__apertura || null")
+        except Exception as e:
+            logger.debug(f"⚠️ No se pudo leer el observer de apertura: {str(e)}")
+            return None
+    
     async def _verify_reservation_success(self) -> Dict[str, Any]:
         """
         Verifica que la reserva fue exitosa después del click
@@ -691,12 +1347,13 @@ class PreparationService:
         try:
             if self.page and not self.page.is_closed():
                 await self.page.close()
-            if self.context:
+            if self.context and self.owns_context:
                 await self.context.close()
-            if self.browser:
-                await self.browser.close()
-            if self.playwright:
-                await self.playwright.stop()
+            if self.owns_browser:
+                if self.browser:
+                    await self.browser.close()
+                if self.playwright:
+                    await self.playwright.stop()
         except Exception as e:
             logger.debug(f"⚠️ Error en cleanup: {str(e)}")
         finally:
@@ -705,4 +1362,7 @@ class PreparationService:
             self.context = None
             self.page = None
             self.button_selector = None
+            self.authenticated = False
+            self.checkpoint = None
+            self._click_plan = None
             logger.info("🧹 Cleanup del navegador completado")
@@ -0,0 +1,226 @@
+"""
+Process Executor - Ejecución de reservas programadas en un proceso dedicado
+
+Con JOB_EXECUTOR=process cada job programado corre en un proceso hijo con su
+propio event loop (uvloop si está instalado). El proceso de la API queda libre
+para atender requests y escribir logs sin retrasar la corrutina del click, y
+los jobs se reparten entre los núcleos disponibles.
+
+Protocolo por Pipe (tuplas (tipo, payload)):
+- hijo -> padre: ("state", {"estado", "info"}), ("result", response_dict), ("cancelled", None)
+- padre -> hijo: ("cancel", None)
+
+El padre refleja los cambios de estado en el registro de idempotencia, por lo
+que la API (consulta, cancelación, reprogramación) funciona igual que con jobs
+en el mismo proceso. La sesión web vive en el hijo y no se puede traspasar al
+reprogramar.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+from loguru import logger
+
+from ..models.reserva import (
+    EstadoJob,
+    EstadoReservaProgramada,
+    ReservaProgramadaRequest,
+    ReservaProgramadaResponse
+)
+from .idempotency_registry import IdempotencyRegistry, idempotency_registry
+
+
+def process_isolation_enabled() -> bool:
+    """JOB_EXECUTOR=process activa un proceso por job (por defecto: inline)"""
+    return os.getenv("JOB_EXECUTOR", "inline").lower() == "process"
+
+
+def install_event_loop_policy() -> str:
+    """Usa uvloop si está disponible; devuelve el nombre del loop elegido"""
+    try:
+        import uvloop
+    except ImportError:
+        return "asyncio"
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return "uvloop"
+
+
+class _PipeStateReporter:
+    """Reemplaza al registro dentro del hijo: reenvía los cambios de estado al padre"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def update_state(self, key, estado: EstadoJob, job_id: Optional[str] = None, **info):
+        self._conn.send(("state", {"estado": estado.value, "info": info}))
+
+
+def _worker_main(conn, request_data: dict, reservation_id: str, warm_start: bool):
+    """Punto de entrada del proceso hijo"""
+    from ..logging_config import configure_logging
+
+    configure_logging()
+    loop_impl = install_event_loop_policy()
+    asyncio.run(_worker_async(conn, request_data, reservation_id, warm_start, loop_impl))
+
+
+async def _worker_async(conn, request_data: dict, reservation_id: str, warm_start: bool, loop_impl: str):
+    from .scheduled_reservation_manager import ScheduledReservationManager
+
+    logger.info(f"🧵 Worker {os.getpid()} ({loop_impl}) ejecutando job {reservation_id}")
+    manager = ScheduledReservationManager()
+    manager.registry = _PipeStateReporter(conn)
+
+    task = asyncio.create_task(manager.execute_scheduled_reservation(
+        ReservaProgramadaRequest(**request_data),
+        reservation_id=reservation_id,
+        warm_start=warm_start
+    ))
+
+    loop = asyncio.get_running_loop()
+
+    def _on_command():
+        try:
+            kind, _ = conn.recv()
+        except (EOFError, OSError):
+            # El padre murió: no tiene sentido seguir esperando hasta T
+            kind = "cancel"
+            loop.remove_reader(conn.fileno())
+        if kind == "cancel":
+            task.cancel()
+
+    loop.add_reader(conn.fileno(), _on_command)
+    try:
+        response = await task
+        conn.send(("result", response.model_dump(mode="json")))
+    except asyncio.CancelledError:
+        conn.send(("cancelled", None))
+    finally:
+        loop.remove_reader(conn.fileno())
+        conn.close()
+
+
+class ProcessJobExecutor:
+    """
+    Ejecuta un job programado en un proceso hijo
+
+    Expone la misma interfaz que scheduled_jobs usa de ScheduledReservationManager
+    (execute_scheduled_reservation, keep_session_on_cancel, rescheduling,
+    _has_live_session).
+    """
+
+    def __init__(
+        self,
+        registry: Optional[IdempotencyRegistry] = None,
+        worker: Callable[..., Any] = _worker_main,
+        start_method: Optional[str] = None,
+        cancel_timeout: Optional[float] = None
+    ):
+        """
+        Args:
+            registry: Registro donde reflejar los estados del hijo
+            worker: Función del proceso hijo (inyectable para tests)
+            start_method: spawn (por defecto) evita heredar el loop y los hilos del padre
+            cancel_timeout: Segundos para que el hijo limpie antes de terminarlo
+        """
+        self.registry = registry or idempotency_registry
+        self.preparation_service = None
+        self.keep_session_on_cancel = False
+        self.rescheduling = False
+        self.process: Optional[multiprocessing.process.BaseProcess] = None
+        self._worker = worker
+        self._ctx = multiprocessing.get_context(start_method or os.getenv("JOB_PROCESS_START_METHOD", "spawn"))
+        self.cancel_timeout = (
+            cancel_timeout if cancel_timeout is not None
+            else float(os.getenv("JOB_PROCESS_CANCEL_TIMEOUT", "5"))
+        )
+
+    def _has_live_session(self) -> bool:
+        # La sesión web vive en el hijo: no se puede heredar al reprogramar
+        return False
+
+    async def execute_scheduled_reservation(
+        self,
+        request: ReservaProgramadaRequest,
+        reservation_id: Optional[str] = None,
+        reuse_session: bool = False,
+        warm_start: bool = False
+    ) -> ReservaProgramadaResponse:
+        reservation_id = reservation_id or str(uuid.uuid4())
+        key = IdempotencyRegistry.key_for(request)
+        loop = asyncio.get_running_loop()
+
+        parent_conn, child_conn = self._ctx.Pipe()
+        self.process = self._ctx.Process(
+            target=self._worker,
+            args=(child_conn, request.model_dump(), reservation_id, warm_start),
+            name=f"job-{reservation_id[:8]}",
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        logger.info(f"🧵 Job {reservation_id} delegado al proceso {self.process.pid}")
+
+        messages: asyncio.Queue = asyncio.Queue()
+
+        def _on_message():
+            try:
+                messages.put_nowait(parent_conn.recv())
+            except (EOFError, OSError):
+                loop.remove_reader(parent_conn.fileno())
+                messages.put_nowait(("exited", None))
+
+        loop.add_reader(parent_conn.fileno(), _on_message)
+        try:
+            while True:
+                kind, payload = await messages.get()
+                if kind == "state":
+                    if self.rescheduling:
+                        continue
+                    self.registry.update_state(key, EstadoJob(payload["estado"]), job_id=reservation_id, **payload["info"])
+                elif kind == "result":
+                    return ReservaProgramadaResponse(**payload)
+                elif kind in ("cancelled", "exited"):
+                    logger.error(f"💥 El proceso del job {reservation_id} terminó sin resultado")
+                    return self._worker_died_response(reservation_id, request, key)
+
+        except asyncio.CancelledError:
+            await self._stop_child(parent_conn)
+            raise
+
+        finally:
+            loop.remove_reader(parent_conn.fileno())
+            parent_conn.close()
+
+    async def _stop_child(self, conn):
+        """Pide al hijo que cancele (cleanup del navegador incluido); si no responde, lo termina"""
+        try:
+            conn.send(("cancel", None))
+        except (BrokenPipeError, OSError):
+            pass
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.process.join, self.cancel_timeout)
+        if self.process.is_alive():
+            logger.warning(f"⚠️ Proceso {self.process.pid} no terminó en {self.cancel_timeout}s - forzando cierre")
+            self.process.terminate()
+
+    def _worker_died_response(self, reservation_id: str, request: ReservaProgramadaRequest, key) -> ReservaProgramadaResponse:
+        self.registry.update_state(key, EstadoJob.FAILED, job_id=reservation_id, error_type="WORKER_DIED")
+        return ReservaProgramadaResponse(
+            id=reservation_id,
+            clase_nombre=request.nombre_clase,
+            fecha_clase=request.fecha_clase,
+            fecha_reserva=request.fecha_reserva,
+            hora_reserva=request.hora_reserva,
+            estado=EstadoReservaProgramada.FALLIDA,
+            fecha_creacion=datetime.now(),
+            fecha_ejecucion_programada=datetime.now(),
+            fecha_ejecucion_real=None,
+            mensaje="El proceso del job terminó inesperadamente",
+            tiempo_espera_segundos=0,
+            error_type="WORKER_DIED"
+        )
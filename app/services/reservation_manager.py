@@ -1,11 +1,12 @@
 from datetime import datetime
 import uuid
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 from loguru import logger
 
 from app.models import ClaseConfig, EstadoReserva
 from app.services.config_manager import ConfigManager
 from app.services.web_automation import WebAutomationService
+from app.services.batch_reservation_service import BatchReservationService
 
 
 class ReservationManager:
@@ -16,6 +17,7 @@ class ReservationManager:
     def __init__(self):
         self.config_manager = ConfigManager()
         self.web_automation = WebAutomationService()
+        self.batch_service = BatchReservationService()
     
     async def execute_immediate_reservation(self, nombre_clase: str, fecha: str) -> Dict[str, Any]:
         """
@@ -77,6 +79,61 @@ class ReservationManager:
                 "error_type": "UNEXPECTED_ERROR"
             }
     
+    async def execute_batch_reservation(
+        self,
+        reservas: List[Tuple[str, str]],
+        max_tabs: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Ejecuta un lote de reservas inmediatas con un solo login
+
+        Args:
+            reservas: Lista de tuplas (nombre_clase, fecha) con fecha "XX ##"
+            max_tabs: Límite de pestañas en paralelo (opcional)
+
+        Returns:
+            Dict con "success", "results" (uno por reserva) y "duration"
+        """
+        logger.info(f"📦 Iniciando lote de {len(reservas)} reservas inmediatas")
+
+        if not self.web_automation.validate_credentials():
+            logger.error("❌ Credenciales no configuradas correctamente")
+            return {
+                "success": False,
+                "results": [
+                    {
+                        "nombre_clase": nombre_clase,
+                        "fecha": fecha,
+                        "success": False,
+                        "message": "Credenciales no configuradas",
+                        "error_type": "CREDENTIALS_ERROR"
+                    }
+                    for nombre_clase, fecha in reservas
+                ],
+                "login_time": 0.0,
+                "duration": 0.0
+            }
+
+        try:
+            return await self.batch_service.execute_batch(reservas, max_tabs=max_tabs)
+        except Exception as e:
+            logger.error(f"🚨 Error inesperado en lote de reservas: {str(e)}")
+            return {
+                "success": False,
+                "results": [
+                    {
+                        "nombre_clase": nombre_clase,
+                        "fecha": fecha,
+                        "success": False,
+                        "message": f"Error inesperado: {str(e)}",
+                        "error_type": "UNEXPECTED_ERROR"
+                    }
+                    for nombre_clase, fecha in reservas
+                ],
+                "login_time": 0.0,
+                "duration": 0.0
+            }
+
     def get_available_classes(self):
         """Obtiene todas las clases disponibles"""
         return self.config_manager.get_clases_activas()
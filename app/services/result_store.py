@@ -0,0 +1,158 @@
+"""
+Result Store - Resultados de reservas inmediatas asíncronas (modo 202)
+
+POST /reservas/inmediata?asincrono=true devuelve 202 con un id y la reserva
+sigue en background; GET /reservas/{id} consulta este almacén.
+
+Características principales:
+- Un registro por id con evento de finalización (long-polling sin sondeo activo)
+- Resultados finalizados cacheados con TTL: las consultas repetidas no hacen trabajo
+- Registros pendientes con TTL propio (protege contra tareas huérfanas)
+- Tamaño acotado: se expulsan los finalizados más antiguos; si todos siguen
+  pendientes se rechaza el alta (ResultStoreFullError) en vez de perder una
+  reserva en curso
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Optional
+from loguru import logger
+
+from ..models.reserva import ReservaResponse
+
+
+class ResultStoreFullError(Exception):
+    """El almacén está lleno de reservas pendientes: no admite otra"""
+
+    def __init__(self, max_entries: int):
+        super().__init__(f"Almacén lleno: {max_entries} reservas en curso")
+        self.max_entries = max_entries
+
+
+@dataclass
+class StoredResult:
+    """Reserva inmediata asíncrona y su resultado (cuando termina)"""
+    job_id: str
+    nombre_clase: str
+    fecha: str
+    created_at: float
+    fecha_creacion: datetime = field(default_factory=datetime.now)
+    response: Optional[ReservaResponse] = None
+    completed_at: Optional[float] = None
+    done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+    task: Optional[Any] = None            # asyncio.Task que completa el registro
+
+    @property
+    def is_done(self) -> bool:
+        return self.response is not None
+
+
+class ReservationResultStore:
+    """Almacén acotado con TTL de resultados de reservas inmediatas"""
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = None,
+        pending_ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            ttl_seconds: Vida de un resultado desde que terminó
+            pending_ttl_seconds: Vida máxima de un registro sin resultado
+            max_entries: Cantidad máxima de registros
+            clock: Reloj monotónico (inyectable para tests)
+        """
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("RESULT_TTL_SECONDS", "600"))
+        self.pending_ttl_seconds = (
+            pending_ttl_seconds if pending_ttl_seconds is not None
+            else float(os.getenv("RESULT_PENDING_TTL_SECONDS", "3600"))
+        )
+        self.max_entries = max_entries or int(os.getenv("RESULT_STORE_MAX_ENTRIES", "256"))
+        self._clock = clock
+        self._entries: "OrderedDict[str, StoredResult]" = OrderedDict()
+
+    def create(self, nombre_clase: str, fecha: str) -> StoredResult:
+        """
+        Raises:
+            ResultStoreFullError: si no cabe y todos los registros siguen pendientes
+        """
+        self._evict_expired()
+        self._make_room()
+        entry = StoredResult(
+            job_id=str(uuid.uuid4()),
+            nombre_clase=nombre_clase,
+            fecha=fecha,
+            created_at=self._clock()
+        )
+        self._entries[entry.job_id] = entry
+        return entry
+
+    def discard(self, job_id: str) -> Optional[StoredResult]:
+        """Quita un registro que no llegó a tener tarea (p. ej. la cola lo rechazó)"""
+        return self._entries.pop(job_id, None)
+
+    def complete(self, job_id: str, response: ReservaResponse) -> Optional[StoredResult]:
+        entry = self._entries.get(job_id)
+        if entry is None:
+            logger.warning(f"⚠️ Resultado de reserva {job_id} descartado: el registro ya expiró")
+            return None
+        entry.response = response
+        entry.completed_at = self._clock()
+        entry.task = None
+        entry.done.set()
+        return entry
+
+    def get(self, job_id: str) -> Optional[StoredResult]:
+        self._evict_expired()
+        return self._entries.get(job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[StoredResult]:
+        """Long-polling: espera hasta timeout segundos a que el registro termine"""
+        entry = self.get(job_id)
+        if entry is None or entry.is_done or timeout <= 0:
+            return entry
+        try:
+            await asyncio.wait_for(entry.done.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        return entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ================================
+    # MÉTODOS PRIVADOS
+    # ================================
+
+    def _is_expired(self, entry: StoredResult, now: float) -> bool:
+        if entry.is_done:
+            return now - entry.completed_at > self.ttl_seconds
+        return now - entry.created_at > self.pending_ttl_seconds
+
+    def _evict_expired(self):
+        now = self._clock()
+        expired = [job_id for job_id, entry in self._entries.items() if self._is_expired(entry, now)]
+        for job_id in expired:
+            self._entries.pop(job_id)
+            logger.debug(f"🧹 Resultado expirado: {job_id}")
+
+    def _make_room(self):
+        """Deja lugar para un registro nuevo expulsando solo finalizados"""
+        while len(self._entries) >= self.max_entries:
+            victim = next((job_id for job_id, entry in self._entries.items() if entry.is_done), None)
+            if victim is None:
+                # Una pendiente expulsada daría 404 mientras su reserva sigue en curso
+                logger.warning(f"⚠️ Almacén lleno de reservas pendientes ({self.max_entries}) - rechazando alta")
+                raise ResultStoreFullError(self.max_entries)
+            self._entries.pop(victim)
+
+
+# Instancia compartida por los endpoints de reservas inmediatas
+result_store = ReservationResultStore()
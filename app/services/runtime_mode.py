@@ -0,0 +1,170 @@
+"""
+Runtime Mode - Modo de ejecución crítico alrededor del click
+
+Durante la ventana crítica (T-2s hasta terminar la verificación) el proceso:
+- Congela y desactiva el GC (gc.freeze + gc.disable): ninguna pausa de
+  recolección puede caer entre el timer y el click
+- Sube su prioridad de planificación (nice) si el sistema lo permite
+- Se fija a las CPUs indicadas en CRITICAL_CPU_AFFINITY si el sistema lo permite
+
+Al salir se restaura todo. Cada medida es opcional: si no hay permisos
+(contenedor sin CAP_SYS_NICE, plataforma sin sched_setaffinity) se registra y
+se sigue sin ella.
+
+Admite anidamiento: con dos jobs en ventana, el estado original se restaura
+cuando sale el último.
+"""
+
+import gc
+import os
+from typing import Any, Dict, Optional, Set
+
+from loguru import logger
+
+
+def _parse_cpus(value: str) -> Set[int]:
+    """"0,2-3" -> {0, 2, 3}"""
+    cpus: Set[int] = set()
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            cpus.update(range(int(start), int(end) + 1))
+        else:
+            cpus.add(int(part))
+    return cpus
+
+
+class CriticalRuntimeMode:
+    """GC congelado, prioridad alta y afinidad de CPU mientras dura la ventana crítica"""
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        niceness: Optional[int] = None,
+        cpu_affinity: Optional[str] = None
+    ):
+        """
+        Args:
+            enabled: Activar el modo (por defecto CRITICAL_RUNTIME_MODE, activado)
+            niceness: Valor nice deseado (por defecto CRITICAL_NICENESS, -10)
+            cpu_affinity: CPUs a fijar, p.ej. "0" o "0-1" (por defecto CRITICAL_CPU_AFFINITY, sin fijar)
+        """
+        self.enabled = (
+            enabled if enabled is not None
+            else os.getenv("CRITICAL_RUNTIME_MODE", "true").lower() == "true"
+        )
+        self.niceness = niceness if niceness is not None else int(os.getenv("CRITICAL_NICENESS", "-10"))
+        affinity = cpu_affinity if cpu_affinity is not None else os.getenv("CRITICAL_CPU_AFFINITY", "")
+        self.cpu_affinity = _parse_cpus(affinity) if affinity else set()
+
+        self._depth = 0
+        self._gc_was_enabled = True
+        self._previous_niceness: Optional[int] = None
+        self._previous_affinity: Optional[Set[int]] = None
+        self.applied: Dict[str, Any] = {}
+
+    @property
+    def active(self) -> bool:
+        return self._depth > 0
+
+    def enter(self) -> Dict[str, Any]:
+        """Entra al modo crítico. Devuelve las medidas aplicadas"""
+        self._depth += 1
+        if self._depth > 1 or not self.enabled:
+            return self.applied
+
+        self.applied = {
+            "gc_frozen": self._freeze_gc(),
+            "niceness": self._raise_priority(),
+            "cpu_affinity": self._pin_cpus()
+        }
+        return self.applied
+
+    def exit(self):
+        """Sale del modo crítico; el último en salir restaura el estado original"""
+        if self._depth == 0:
+            return
+        self._depth -= 1
+        if self._depth > 0 or not self.enabled:
+            return
+
+        self._restore_cpus()
+        self._restore_priority()
+        self._restore_gc()
+        logger.debug(f"🔓 Modo crítico terminado: {self.applied}")
+        self.applied = {}
+
+    def __enter__(self):
+        self.enter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.exit()
+        return False
+
+    # ================================
+    # MÉTODOS PRIVADOS
+    # ================================
+
+    def _freeze_gc(self) -> bool:
+        self._gc_was_enabled = gc.isenabled()
+        # Recolectar ahora y mover lo que sobrevive a la generación permanente
+        gc.collect()
+        gc.freeze()
+        gc.disable()
+        return True
+
+    def _restore_gc(self):
+        gc.unfreeze()
+        if self._gc_was_enabled:
+            gc.enable()
+
+    def _raise_priority(self) -> Optional[int]:
+        if not hasattr(os, "setpriority"):
+            return None
+        try:
+            self._previous_niceness = os.getpriority(os.PRIO_PROCESS, 0)
+            if self.niceness >= self._previous_niceness:
+                return self._previous_niceness
+            os.setpriority(os.PRIO_PROCESS, 0, self.niceness)
+            return self.niceness
+        except OSError as e:
+            logger.debug(f"⚠️ Sin permiso para subir la prioridad: {e}")
+            return None
+
+    def _restore_priority(self):
+        if self._previous_niceness is None:
+            return
+        try:
+            os.setpriority(os.PRIO_PROCESS, 0, self._previous_niceness)
+        except OSError as e:
+            logger.warning(f"⚠️ No se pudo restaurar la prioridad: {e}")
+        self._previous_niceness = None
+
+    def _pin_cpus(self) -> Optional[list]:
+        if not self.cpu_affinity or not hasattr(os, "sched_setaffinity"):
+            return None
+        try:
+            self._previous_affinity = os.sched_getaffinity(0)
+            os.sched_setaffinity(0, self.cpu_affinity)
+            return sorted(self.cpu_affinity)
+        except OSError as e:
+            logger.debug(f"⚠️ No se pudo fijar la afinidad de CPU: {e}")
+            self._previous_affinity = None
+            return None
+
+    def _restore_cpus(self):
+        if self._previous_affinity is None:
+            return
+        try:
+            os.sched_setaffinity(0, self._previous_affinity)
+        except OSError as e:
+            logger.warning(f"⚠️ No se pudo restaurar la afinidad de CPU: {e}")
+        self._previous_affinity = None
+
+
+# Instancia compartida por los jobs del proceso
+critical_runtime = CriticalRuntimeMode()
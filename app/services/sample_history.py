@@ -0,0 +1,57 @@
+"""
+Sample History - Muestras históricas por clave persistidas en JSON
+
+Base de los modelos que aprenden de ejecuciones anteriores (apertura real,
+duración de la preparación). El archivo lo escribe el proceso del job y lo
+leen el servidor y los jobs siguientes; cada escritura es atómica
+(archivo temporal + os.replace).
+"""
+
+import json
+import os
+import threading
+from typing import Dict, List
+
+from loguru import logger
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Percentil por rango más cercano de una lista ya ordenada"""
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class JsonSampleHistory:
+    """Últimas `max_samples` muestras de cada clave"""
+
+    def __init__(self, path: str, max_samples: int):
+        self.path = path
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+
+    def append(self, key: str, value: float):
+        with self._lock:
+            history = self.load()
+            samples = history.setdefault(key, [])
+            samples.append(round(value, 3))
+            del samples[:-self.max_samples]
+            self._save(history)
+
+    def load(self) -> Dict[str, List[float]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Historial ilegible ({self.path}): {e}")
+            return {}
+
+    def _save(self, history: Dict[str, List[float]]):
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(history, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"⚠️ No se pudo guardar el historial ({self.path}): {e}")
@@ -0,0 +1,250 @@
+"""
+Scheduled Jobs - Punto único para lanzar reservas programadas en background
+
+Centraliza lo que antes se repetía en cada punto de entrada
+(/reservas/programada, /ejecutar-reservas-hoy y el arranque del servidor):
+- Registrar el job en el registro de idempotencia
+- Devolver el estado del job existente ante solicitudes duplicadas
+- Lanzar la tarea en background con su propio ScheduledReservationManager
+- Cancelar y reprogramar jobs por id (liberando el navegador de inmediato)
+- Opcionalmente, ejecutar cada job en un proceso dedicado (JOB_EXECUTOR=process)
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import Optional, Tuple
+from loguru import logger
+from pydantic import ValidationError
+
+from ..models.reserva import (
+    EstadoJob,
+    ReprogramarReservaRequest,
+    ReservaProgramadaRequest,
+    ReservaProgramadaResponse
+)
+from .direct_timing_controller import DirectTimingController, santiago_datetime, santiago_now
+from .idempotency_registry import IdempotencyRegistry, RegistryEntry, idempotency_registry
+from .job_events import ESTADO_JOB_A_RESERVA
+from .process_executor import ProcessJobExecutor, process_isolation_enabled
+from .scheduled_reservation_manager import ScheduledReservationManager
+
+
+class JobNotFoundError(Exception):
+    """No existe un job vigente con ese id"""
+
+
+class JobConflictError(Exception):
+    """El job no admite la operación en su estado actual"""
+
+
+class JobValidationError(ValueError):
+    """Los nuevos datos del job no son válidos (formato o fecha pasada)"""
+
+
+def schedule_reservation(
+    request: ReservaProgramadaRequest,
+    registry: IdempotencyRegistry = idempotency_registry,
+    warm_start: bool = False
+) -> Tuple[ReservaProgramadaResponse, bool]:
+    """
+    Registra y lanza una reserva programada en background
+
+    Debe llamarse desde un event loop en ejecución. Con warm_start=True el job
+    lanza navegador y login de inmediato si T cae dentro del horizonte
+    (WARM_START_HORIZON_SECONDS), en paralelo con el arranque del servidor.
+
+    Returns:
+        (response, created): created=False si ya había un job vigente para la
+        misma clave; en ese caso response refleja el estado de ese job
+    """
+    key = IdempotencyRegistry.key_for(request)
+    entry, created = registry.register(key, str(uuid.uuid4()), request)
+
+    if not created:
+        return build_job_response(
+            entry,
+            f"Ya existe una reserva programada para este horario (estado: {entry.estado.value})."
+        ), False
+
+    _start_job(entry, request, _new_manager(), warm_start=warm_start)
+    logger.info(f"📌 Job {entry.job_id} registrado para {key}")
+
+    return build_job_response(
+        entry,
+        "Reserva programada iniciada correctamente. El proceso se ejecutará en background."
+    ), True
+
+
+async def cancel_job(
+    job_id: str,
+    registry: IdempotencyRegistry = idempotency_registry
+) -> Tuple[RegistryEntry, float]:
+    """
+    Cancela un job: interrumpe su espera, cierra el navegador y libera el lease
+
+    Returns:
+        (entry, elapsed_ms): registro cancelado y tiempo hasta liberar recursos
+
+    Raises:
+        JobNotFoundError: si el id no existe
+        JobConflictError: si el job ya terminó
+    """
+    entry = registry.get_by_job_id(job_id)
+    if entry is None:
+        raise JobNotFoundError(job_id)
+    if entry.is_terminal:
+        raise JobConflictError(f"El job ya finalizó (estado: {entry.estado.value})")
+
+    start = time.perf_counter()
+    await _stop_task(entry)
+    registry.update_state(entry.key, EstadoJob.CANCELLED, job_id=entry.job_id)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    logger.info(f"🛑 Job {job_id} cancelado; recursos liberados en {elapsed_ms:.1f} ms")
+    return entry, elapsed_ms
+
+
+async def reschedule_job(
+    job_id: str,
+    cambios: ReprogramarReservaRequest,
+    registry: IdempotencyRegistry = idempotency_registry
+) -> Tuple[RegistryEntry, bool]:
+    """
+    Reprograma un job conservando su id
+
+    Si el job ya tiene el botón armado y la clase (nombre + fecha_clase) no
+    cambia, la sesión web se traspasa al nuevo job en vez de cerrarse, siempre
+    que la nueva ejecución caiga dentro de RESCHEDULE_REUSE_MAX_SECONDS.
+
+    La cancelación de la tarea anterior no publica CANCELLED: el id sigue
+    vivo en el job nuevo y los suscriptores SSE no deben ver su fin.
+
+    Returns:
+        (entry, session_reused)
+
+    Raises:
+        JobNotFoundError: si el id no existe
+        JobConflictError: si el job ya terminó o el nuevo horario está ocupado
+        JobValidationError: si la nueva fecha/hora no es válida o ya pasó
+    """
+    entry = registry.get_by_job_id(job_id)
+    if entry is None or entry.request is None:
+        raise JobNotFoundError(job_id)
+    if entry.is_terminal:
+        raise JobConflictError(f"El job ya finalizó (estado: {entry.estado.value})")
+
+    old_request = entry.request
+    try:
+        new_request = ReservaProgramadaRequest.model_validate({
+            **old_request.model_dump(),
+            "fecha_reserva": cambios.fecha_reserva,
+            "hora_reserva": cambios.hora_reserva,
+            "fecha_clase": cambios.fecha_clase or old_request.fecha_clase,
+        })
+    except ValidationError as e:
+        raise JobValidationError(str(e))
+    validation = DirectTimingController().validate_fecha_hora(new_request.fecha_reserva, new_request.hora_reserva)
+    if not validation["is_valid"]:
+        raise JobValidationError(validation["message"])
+    new_key = IdempotencyRegistry.key_for(new_request)
+
+    conflicting = registry.get(new_key)
+    if conflicting and conflicting.job_id != job_id and not conflicting.is_terminal:
+        raise JobConflictError(f"Ya existe el job {conflicting.job_id} para el nuevo horario")
+
+    old_manager = entry.manager
+    reuse = (
+        entry.estado == EstadoJob.ARMED
+        and new_request.fecha_clase == old_request.fecha_clase
+        and old_manager is not None
+        and old_manager._has_live_session()
+        and _seconds_until(new_request) <= float(os.getenv("RESCHEDULE_REUSE_MAX_SECONDS", "300"))
+    )
+
+    if old_manager is not None:
+        old_manager.keep_session_on_cancel = reuse
+        old_manager.rescheduling = True
+    await _stop_task(entry)
+    registry.remove(entry.key)
+
+    new_entry, _ = registry.register(new_key, job_id, new_request)
+    manager = _new_manager(preparation_service=old_manager.preparation_service if reuse else None)
+    _start_job(new_entry, new_request, manager, reuse_session=reuse)
+
+    logger.info(f"🔁 Job {job_id} reprogramado a {new_request.fecha_reserva} {new_request.hora_reserva} (sesión reutilizada: {reuse})")
+    return new_entry, reuse
+
+
+def get_job(job_id: str, registry: IdempotencyRegistry = idempotency_registry) -> Optional[RegistryEntry]:
+    return registry.get_by_job_id(job_id)
+
+
+def _new_manager(preparation_service=None):
+    """Ejecutor del job: proceso dedicado si está activado, salvo que herede una sesión"""
+    if preparation_service is None and process_isolation_enabled():
+        return ProcessJobExecutor()
+    return ScheduledReservationManager(preparation_service=preparation_service)
+
+
+def _start_job(
+    entry: RegistryEntry,
+    request: ReservaProgramadaRequest,
+    manager,
+    reuse_session: bool = False,
+    warm_start: bool = False
+):
+    entry.manager = manager
+    entry.task = asyncio.create_task(
+        manager.execute_scheduled_reservation(
+            request,
+            reservation_id=entry.job_id,
+            reuse_session=reuse_session,
+            warm_start=warm_start
+        )
+    )
+
+
+async def _stop_task(entry: RegistryEntry):
+    """Cancela la tarea del job y espera su cleanup (interrumpe sleep_until)"""
+    task = entry.task
+    if task is None or task.done():
+        return
+    task.cancel()
+    try:
+        await asyncio.wait_for(task, timeout=10)
+    except (asyncio.CancelledError, asyncio.TimeoutError):
+        pass
+    except Exception as e:
+        logger.warning(f"⚠️ Error al detener job {entry.job_id}: {str(e)}")
+
+
+def _execution_target(fecha_reserva: str, hora_reserva: str) -> datetime:
+    return santiago_datetime(fecha_reserva, hora_reserva)
+
+
+def _seconds_until(request: ReservaProgramadaRequest) -> float:
+    return (_execution_target(request.fecha_reserva, request.hora_reserva) - santiago_now()).total_seconds()
+
+
+def build_job_response(entry: RegistryEntry, mensaje: str) -> ReservaProgramadaResponse:
+    """Construye la respuesta de la API a partir de un registro"""
+    nombre_clase, fecha_reserva, hora_reserva = entry.key
+    target = _execution_target(fecha_reserva, hora_reserva)
+    click_at = entry.info.get("click_at")
+    return ReservaProgramadaResponse(
+        id=entry.job_id,
+        clase_nombre=nombre_clase,
+        fecha_clase=entry.request.fecha_clase if entry.request else "",
+        fecha_reserva=fecha_reserva,
+        hora_reserva=hora_reserva,
+        estado=ESTADO_JOB_A_RESERVA[entry.estado],
+        fecha_creacion=entry.fecha_creacion,
+        fecha_ejecucion_programada=target,
+        fecha_ejecucion_real=datetime.fromisoformat(click_at) if click_at else None,
+        mensaje=mensaje,
+        tiempo_espera_segundos=max(0, int((target - santiago_now()).total_seconds())),
+        error_type=entry.info.get("error_type")
+    )
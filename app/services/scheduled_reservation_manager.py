@@ -6,25 +6,49 @@ de reserva programada desde la recepción del request hasta la ejecución final.
 
 Flujo simplificado:
 1. Validar request y calcular tiempos
-2. Espera directa hasta preparación (T-1 min)
-3. Ejecutar preparación web (60 segundos)
-4. Espera directa hasta ejecución (T+1 ms)
+   (y obtener el lease de ejecución: un solo worker por job)
+   Arranque en caliente opcional: navegador + login en background si T está cerca
+   Ensayo opcional en T-10 min: preparación completa sin click (alerta y
+   preparación adelantada si falla)
+2. Espera directa hasta preparación (T - p99 de preparaciones anteriores + margen; T-1 min sin historial)
+3. Ejecutar preparación web
+   Página de respaldo opcional armada en paralelo (heartbeat durante la espera)
+4. Revisión previa a T (T-8s): se valida desde el punto de control más profundo
+   y se rehacen solo los pasos caídos (ej: reabrir el modal); si hay respaldo
+   listo y la página primaria falla, se promueve el respaldo
+   Espera directa hasta ejecución (T+1 ms); desde T-2s modo crítico
+   (logs retenidos en memoria, GC congelado, prioridad alta)
 5. Click inmediato y respuesta final
 """
 
 import asyncio
+import os
+import time
 import uuid
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from loguru import logger
 
 from ..models.reserva import (
     ReservaProgramadaRequest,
     ReservaProgramadaResponse,
-    EstadoReservaProgramada
+    EstadoReservaProgramada,
+    EstadoJob
 )
-from .direct_timing_controller import DirectTimingController
+from .direct_timing_controller import Deadline, DirectTimingController
 from .preparation_service import PreparationService
+from .idempotency_registry import IdempotencyRegistry, idempotency_registry
+from .execution_lease import ExecutionLeaseManager, get_execution_lease_manager
+from .runtime_mode import critical_runtime
+from .loop_monitor import loop_lag_monitor
+from .drift_watchdog import DriftWatchdog, ServerTimeProbe, TimingDriftError
+from .timeout_budget import UNLIMITED_BUDGET, TimeoutBudget
+from .hot_standby import HotStandby
+from .firing_policy import firing_policy
+from .opening_estimator import opening_estimator
+from .preparation_lead import preparation_lead_model
+from .alerts import send_alert
+from ..logging_config import critical_window
 
 
 class ScheduledReservationManager:
@@ -38,30 +62,71 @@ class ScheduledReservationManager:
     - Ejecución inmediata del click
     """
     
-    def __init__(self):
+    def __init__(self, preparation_service: Optional[PreparationService] = None):
+        """
+        Args:
+            preparation_service: Sesión web ya preparada a reutilizar (reprogramación)
+        """
         self.timing_controller = DirectTimingController()
-        self.preparation_service = PreparationService()
+        self.preparation_service = preparation_service or PreparationService()
+        self.registry = idempotency_registry
+        self.lease_manager = get_execution_lease_manager()
+        self._job_key = None
+        self._job_id: Optional[str] = None
+        self._lease = None
+        self._lease_heartbeat: Optional[asyncio.Task] = None
+        self._base_lease_key: Optional[str] = None
+        self._slot_keys: list = []
+        self._redundant = False
+        self._warm_task: Optional[asyncio.Task] = None
+        self._drift: Optional[DriftWatchdog] = None
+        self._standby: Optional[HotStandby] = None
+        self._standby_task: Optional[asyncio.Task] = None
+        self._estado = EstadoJob.PENDING
+        # Si es True, una cancelación NO cierra el navegador (lo hereda otro job)
+        self.keep_session_on_cancel = False
+        # Si es True, la cancelación viene de una reprogramación: el id sigue vivo
+        # en el job nuevo y no se publica el estado terminal CANCELLED
+        self.rescheduling = False
+        self._in_critical_window = False
+        self._shedding = False
     
-    async def execute_scheduled_reservation(self, request: ReservaProgramadaRequest) -> ReservaProgramadaResponse:
+    async def execute_scheduled_reservation(
+        self,
+        request: ReservaProgramadaRequest,
+        reservation_id: Optional[str] = None,
+        reuse_session: bool = False,
+        warm_start: bool = False
+    ) -> ReservaProgramadaResponse:
         """
         FLUJO PRINCIPAL - Máxima simplicidad para MVP
         
         Args:
             request: Datos de la reserva programada
+            reservation_id: Id del job en el registro de idempotencia (opcional)
+            reuse_session: Omitir la preparación si preparation_service ya tiene
+                           el botón armado (reprogramación sobre la misma clase)
+            warm_start: Lanzar navegador y login de inmediato si la ejecución cae
+                        dentro de WARM_START_HORIZON_SECONDS (arranque del servidor)
             
         Returns:
             ReservaProgramadaResponse: Resultado de la operación
         """
-        reservation_id = str(uuid.uuid4())
+        reservation_id = reservation_id or str(uuid.uuid4())
+        self._job_key = IdempotencyRegistry.key_for(request)
+        self._job_id = reservation_id
         logger.info(f"🎯 Iniciando reserva programada: {reservation_id}")
         logger.info(f"📅 Clase: {request.nombre_clase}")
         logger.info(f"⏰ Ejecución programada: {request.fecha_reserva} {request.hora_reserva}")
+        lease_completed = False
         
         try:
-            # 1. CALCULAR tiempos exactos (sin ciclos)
+            # 1. CALCULAR tiempos exactos (sin ciclos); adelanto de preparación aprendido por clase
+            prep_lead = preparation_lead_model.lead_for(request.nombre_clase, request.margen_preparacion_segundos)
             timing = self.timing_controller.calculate_execution_times(
                 request.fecha_reserva, 
-                request.hora_reserva
+                request.hora_reserva,
+                prep_lead_seconds=prep_lead["lead_seconds"]
             )
             
             if not timing["is_valid"]:
@@ -78,13 +143,69 @@ class ScheduledReservationManager:
             # 2. Crear respuesta inicial (se devuelve inmediatamente)
             response = self._create_initial_response(reservation_id, request, timing)
             
-            # 3. ESPERA DIRECTA hasta momento de preparación
-            logger.info(f"😴 Durmiendo hasta preparación: {timing['preparation_datetime']}")
-            await self.timing_controller.sleep_until(timing["preparation_datetime"])
+            # 3. LEASE DE EJECUCIÓN: un solo worker/máquina prepara y hace click
+            if not await self._acquire_execution_lease(request, timing):
+                return self._create_error_response(
+                    reservation_id,
+                    request,
+                    "EXECUTED_ELSEWHERE",
+                    "La reserva fue ejecutada por otro worker o no se obtuvo el lease a tiempo"
+                )
             
-            # 4. PREPARACIÓN (60 segundos exactos)
-            logger.info("🔧 Iniciando preparación web...")
-            prep_result = await self._prepare_web_navigation(request)
+            loop_lag_monitor.ensure_started()
+            self._start_drift_watchdog(timing)
+            self._record_timing(prep_lead={**prep_lead, "lead_seconds": round(timing["preparation_lead_seconds"], 3)})
+            
+            if warm_start and not reuse_session:
+                self._start_warm_start(timing)
+            
+            if reuse_session and self._has_live_session():
+                # Reprogramación: la sesión heredada ya tiene el botón armado
+                logger.info("♻️ Reutilizando sesión web ya preparada")
+                prep_result = {
+                    "success": True,
+                    "message": "Sesión reutilizada desde job reprogramado",
+                    "preparation_time": 0.0
+                }
+            else:
+                # 3.1 ENSAYO antes de la preparación (si cabe)
+                if self._rehearsal_due(timing):
+                    await self._rehearse(request)
+                
+                # 3.2 ESPERA DIRECTA hasta momento de preparación
+                logger.info(f"😴 Durmiendo hasta preparación: {self._drift.deadline('preparation').wall}")
+                prep_wake = await self.timing_controller.sleep_until(
+                    self._drift.source("preparation"), wakeup=self._drift.wakeup
+                )
+                self._record_timing(prep_wake_lateness_ms=prep_wake["precision_ms"])
+                await self._check_redundant_peers()
+                
+                # 4. PREPARACIÓN (o revalidación de la sesión que dejó armada el ensayo)
+                logger.info("🔧 Iniciando preparación web...")
+                self._set_job_state(EstadoJob.PREPARING)
+                warm_report = await self._finish_warm_start()
+                prep_result = await self._revalidate_rehearsed_session()
+                cold = prep_result is None and not self.preparation_service.has_authenticated_session()
+                if prep_result is None:
+                    # Las esperas de la navegación no pueden pasar de T
+                    prep_result = await self._prepare_web_navigation(request, self._budget_until("execution"))
+                if warm_report:
+                    self._report_warm_start(warm_report, prep_result)
+                elif cold and prep_result["success"] and prep_result.get("preparation_time") is not None:
+                    # Solo preparaciones completas (sin sesión previa de arranque en caliente o ensayo)
+                    preparation_lead_model.record(request.nombre_clase, prep_result["preparation_time"])
+                # Holgura: cuánto sobró entre el fin de la preparación y T
+                self._record_timing(prep_slack_seconds=round(
+                    self.timing_controller.seconds_until(self._drift.deadline("execution")), 3
+                ))
+            
+            if not prep_result["success"] and self._redundant and prep_result.get("error_type") == "ALREADY_RESERVED":
+                # Modo redundante: otro ejecutor ya reservó, cuenta como éxito
+                lease_completed = True
+                logger.success("✅ Clase ya reservada por ejecutor redundante")
+                return self._create_success_response(reservation_id, request, {
+                    "message": "La clase ya fue reservada por un ejecutor redundante"
+                })
             
             if not prep_result["success"]:
                 logger.error(f"❌ Preparación falló: {prep_result['message']}")
@@ -95,20 +216,135 @@ class ScheduledReservationManager:
                     prep_result["message"]
                 )
             
+            self._set_job_state(EstadoJob.ARMED, preparation_time=prep_result.get("preparation_time"))
+            
+            # Fencing: confirmar que seguimos siendo dueños antes de la espera final
+            if not await self._lease_still_valid():
+                await self.preparation_service._cleanup_browser()
+                return self._create_error_response(
+                    reservation_id,
+                    request,
+                    "LEASE_LOST",
+                    "Se perdió el lease de ejecución; otro worker tomó el control"
+                )
+            
+            # Página de respaldo en paralelo (STANDBY_ENABLED), lista antes de la revisión previa a T
+            health_lead = float(os.getenv("HEALTH_CHECK_LEAD_SECONDS", "8"))
+            self._start_standby(health_lead)
+            
+            # Apertura: observar cuándo se habilita el botón y usar el historial de la clase
+            await self.preparation_service.observe_enablement()
+            opening = opening_estimator.estimate(request.nombre_clase, request.fecha_reserva)
+            self._record_timing(opening_estimate=opening)
+            
+            # Precalentar el camino del click (sin click) mientras falta tiempo
+            warmup = await self.preparation_service.warm_click_path()
+            self._record_timing(
+                click_warmup_ms=warmup["duration_ms"],
+                click_warmup_ok=warmup["success"],
+                click_plan=warmup.get("click_plan")
+            )
+            
+            # Compensación de latencia: disparar antes de T en RTT/2 + despacho - margen,
+            # con T en la hora del servidor (offset confirmado por el watchdog)
+            round_trip = await self.preparation_service.measure_round_trip()
+            firing_plan = firing_policy.plan(
+                round_trip["rtt_ms"],
+                warmup["duration_ms"] if warmup["success"] else None,
+                request.margen_seguridad_ms,
+                server_offset_ms=self._drift.server_offset_ms()
+            )
+            logger.info(f"📡 Plan de disparo: {firing_plan}")
+            self._record_timing(firing_plan=firing_plan)
+            
+            # Revisión previa a T: el modal pudo cerrarse o la sesión expirar durante la espera
+            health_source = self._drift.source("execution", -health_lead)
+            if self.timing_controller.seconds_until(health_source()) > 0:
+                await self.timing_controller.sleep_until(health_source, wakeup=self._drift.wakeup)
+            health = await self._health_check()
+            if not health["success"]:
+                await self.preparation_service._cleanup_browser()
+                return self._create_error_response(
+                    reservation_id,
+                    request,
+                    "PREPARATION_LOST",
+                    f"La preparación se perdió antes de T y no se pudo reparar: {health['message']}"
+                )
+            
+            # Modo redundante: si otro ejecutor ya ganó, retirarse sin hacer click
+            # (consulta al backend fuera de la ventana crítica: desde T-2s no hay I/O)
+            winner = await self._redundant_winner()
+            if winner:
+                lease_completed = True
+                await self.preparation_service._cleanup_browser()
+                logger.info(f"🏁 Ejecutor redundante {winner} ya reservó - cancelando click")
+                return self._redundant_success_response(reservation_id, request, winner)
+            
             # 5. ESPERA DIRECTA hasta momento exacto
+            #    (desde T-2s: logs en memoria, GC congelado y prioridad alta hasta verificar el click)
             logger.info(f"😴 Durmiendo hasta ejecución: {timing['execution_datetime']}")
-            await self.timing_controller.sleep_until(timing["execution_datetime"])
+            window_source = self._drift.source(
+                "execution", -float(os.getenv("CRITICAL_WINDOW_LEAD_SECONDS", "2"))
+            )
+            if self.timing_controller.seconds_until(window_source()) > 0:
+                await self.timing_controller.sleep_until(window_source, wakeup=self._drift.wakeup)
+            # Última revisión de relojes; el plazo queda fijo desde aquí hasta el click
+            await self._drift.check(probe_server=False)
+            await self._drift.stop()
+            fire_deadline = firing_policy.fire_deadline(
+                self._drift.deadline("execution").shifted(opening["fire_offset_ms"] / 1000), firing_plan
+            )
+            loop_gate = self._check_loop_lag(fire_deadline)
+            self._enter_critical_window()
+            window_started = loop_lag_monitor.now()
+            if loop_gate["degraded"]:
+                await self.timing_controller.precise_sleep_until(
+                    fire_deadline, spin_seconds=loop_gate["spin_seconds"]
+                )
+            else:
+                await self.timing_controller.sleep_until(fire_deadline)
+            
+            # Fencing sin I/O: el heartbeat termina solo si el lease se perdió
+            if self._lease_lost():
+                await self.preparation_service._cleanup_browser()
+                return self._create_error_response(
+                    reservation_id,
+                    request,
+                    "LEASE_LOST",
+                    "Se perdió el lease de ejecución justo antes del click"
+                )
             
             # 6. EJECUCIÓN INMEDIATA (milisegundos)
-            execution_moment = datetime.now()
-            target_time = timing["execution_datetime"]
-            timing_difference = (execution_moment - target_time).total_seconds()
+            # Diferencia medida con el reloj monotónico (inmune a saltos del reloj de pared)
+            timing_difference = -self.timing_controller.seconds_until(fire_deadline)
+            execution_moment = self.timing_controller.now()
+            target_time = fire_deadline.wall
             
             logger.info(f"⚡ EJECUTANDO CLICK EN: {execution_moment.strftime('%H:%M:%S.%f')[:-3]}")
             logger.info(f"🎯 Objetivo era: {target_time.strftime('%H:%M:%S.%f')[:-3]}")
             logger.info(f"📊 Diferencia: {timing_difference:+.3f} segundos")
             
-            exec_result = await self._execute_immediate_click(prep_result)
+            exec_result = await self._execute_immediate_click(prep_result, self._click_timeout_ms(opening))
+            click_latency = (self.timing_controller.now() - execution_moment).total_seconds()
+            self._record_timing(
+                click_at=execution_moment.isoformat(),
+                timing_difference_ms=round(timing_difference * 1000, 3),
+                click_latency_ms=round(click_latency * 1000, 3),
+                click_method=exec_result.get("click_method"),
+                loop_lag_click=loop_lag_monitor.stats(since=window_started)
+            )
+            self._exit_critical_window()
+            if exec_result["success"] and self._redundant:
+                # Registrar el triunfo antes del cleanup: el otro ejecutor lo consulta si su click falla
+                winner = await self.lease_manager.claim_win(self._base_lease_key)
+                logger.info(f"🏁 Ganador del job redundante: {winner}")
+            arrival = firing_policy.arrival_report(execution_moment, firing_plan, exec_result.get("server_date"))
+            logger.info(
+                f"📡 Llegada prevista {arrival['predicted_arrival']} vs Date del servidor "
+                f"{arrival['server_date']} (consistente: {arrival['consistent']})"
+            )
+            self._record_timing(firing_arrival=arrival)
+            self._record_opening(request, timing, exec_result.get("enablement"))
             
             # 7. CLEANUP MANUAL (siempre al final)
             try:
@@ -118,9 +354,18 @@ class ScheduledReservationManager:
                 logger.warning(f"⚠️ Error en cleanup manual: {str(cleanup_error)}")
             
             if exec_result["success"]:
+                lease_completed = True
                 logger.success("✅ Reserva programada exitosa!")
                 return self._create_success_response(reservation_id, request, exec_result)
             else:
+                # Modo redundante: el click pudo fallar porque otro ejecutor ya reservó
+                winner = await self._redundant_winner(
+                    wait_seconds=float(os.getenv("REDUNDANT_WINNER_WAIT_SECONDS", "5"))
+                )
+                if winner:
+                    lease_completed = True
+                    logger.info(f"🏁 Click fallido, pero el ejecutor redundante {winner} ya reservó")
+                    return self._redundant_success_response(reservation_id, request, winner)
                 logger.error(f"❌ Ejecución falló: {exec_result['message']}")
                 return self._create_error_response(
                     reservation_id,
@@ -129,6 +374,25 @@ class ScheduledReservationManager:
                     exec_result["message"]
                 )
                 
+        except asyncio.CancelledError:
+            logger.warning(f"🛑 Reserva programada cancelada: {reservation_id}")
+            self._set_job_state(EstadoJob.CANCELLED)
+            if self._warm_task and not self._warm_task.done():
+                self._warm_task.cancel()
+            if not self.keep_session_on_cancel:
+                await self.preparation_service._cleanup_browser()
+            raise
+        
+        except TimingDriftError as e:
+            # La hora dejó de ser confiable: fallar antes de hacer click en un momento equivocado
+            await self.preparation_service._cleanup_browser()
+            return self._create_error_response(
+                reservation_id,
+                request,
+                "TIMING_DRIFT",
+                str(e)
+            )
+                
         except Exception as e:
             logger.error(f"💥 Error inesperado en reserva programada: {str(e)}")
             
@@ -145,15 +409,417 @@ class ScheduledReservationManager:
                 "UNEXPECTED_ERROR", 
                 f"Error inesperado: {str(e)}"
             )
+        finally:
+            self._exit_critical_window()
+            if self._drift is not None:
+                await self._drift.stop()
+            await self._release_standby()
+            await self._release_execution_lease(completed=lease_completed)
+    
+    def _check_loop_lag(self, execution_deadline: Deadline) -> Dict[str, Any]:
+        """
+        Revisa el lag del event loop antes de T
+
+        Si el p99 reciente supera LOOP_LAG_THRESHOLD_MS: se usa la espera de
+        precisión (tramo final activo) y se descarta trabajo de API nuevo hasta
+        después del click. El resultado queda en el registro del job.
+        """
+        threshold = float(os.getenv("LOOP_LAG_THRESHOLD_MS", "20"))
+        lag = loop_lag_monitor.recent(float(os.getenv("LOOP_LAG_GATE_WINDOW_SECONDS", "10")))
+        degraded = lag["p99_ms"] is not None and lag["p99_ms"] > threshold
+        # Tramo activo: al menos el doble del peor lag observado (entre 50ms y 500ms)
+        spin_seconds = min(0.5, max(0.05, 2 * (lag["max_ms"] or 0) / 1000))
+        
+        if degraded:
+            logger.warning(f"🐢 Lag del event loop alto antes de T: p99 {lag['p99_ms']:.1f}ms > {threshold:.0f}ms")
+            until_exec = max(0.0, self.timing_controller.seconds_until(execution_deadline))
+            loop_lag_monitor.shed_load(until_exec + float(os.getenv("LOOP_LAG_SHED_GRACE_SECONDS", "10")))
+            self._shedding = True
+        
+        gate = {**lag, "threshold_ms": threshold, "degraded": degraded, "spin_seconds": spin_seconds}
+        self._record_timing(loop_lag_pre_t=gate)
+        return gate
     
-    async def _prepare_web_navigation(self, request: ReservaProgramadaRequest) -> Dict[str, Any]:
+    def _rehearsal_due(self, timing: Dict[str, Any]) -> bool:
+        """El ensayo corre si está activado y su momento queda entre ahora y la preparación"""
+        if os.getenv("REHEARSAL_ENABLED", "true").lower() != "true":
+            return False
+        offset = float(os.getenv("REHEARSAL_OFFSET_SECONDS", "600"))
+        rehearsal_at = self._drift.deadline("execution").shifted(-offset)
+        return (
+            self.timing_controller.seconds_until(rehearsal_at) > 0
+            and offset > timing["preparation_lead_seconds"]
+        )
+    
+    async def _rehearse(self, request: ReservaProgramadaRequest) -> Dict[str, Any]:
+        """
+        Ensayo completo: preparación hasta el botón armado, sin click
+        
+        Precalienta DNS, caché HTTP, sesión y selectores, y mide cada fase.
+        Según REHEARSAL_SESSION_POLICY la sesión queda armada ("keep", se
+        revalida en la preparación) o se libera ("release"). Si falla, alerta
+        y adelanta la preparación a T - REHEARSAL_FALLBACK_LEAD_SECONDS para
+        tener tiempo de recuperarse.
+        """
+        offset = float(os.getenv("REHEARSAL_OFFSET_SECONDS", "600"))
+        policy = os.getenv("REHEARSAL_SESSION_POLICY", "keep").lower()
+        await self.timing_controller.sleep_until(
+            self._drift.source("execution", -offset), wakeup=self._drift.wakeup
+        )
+        
+        logger.info(f"🎭 Ensayo de preparación (T-{offset:.0f}s)")
+        warm_report = await self._finish_warm_start()
+        # El ensayo no puede comerse el inicio de la preparación real
+        result = await self._prepare_web_navigation(request, self._budget_until("preparation"))
+        if warm_report:
+            self._report_warm_start(warm_report, result)
+        report = {
+            "success": result["success"],
+            "message": result["message"],
+            "error_type": result.get("error_type"),
+            "preparation_time": result.get("preparation_time"),
+            "step_timings": result.get("step_timings", {}),
+            "policy": policy,
+            "session_kept": False
+        }
+        
+        if result["success"] and policy == "keep":
+            report["session_kept"] = True
+        else:
+            await self.preparation_service._cleanup_browser()
+        
+        if not result["success"]:
+            fallback = self._drift.deadline("execution").shifted(
+                -float(os.getenv("REHEARSAL_FALLBACK_LEAD_SECONDS", "180"))
+            )
+            if fallback.mono_ns < self._drift.deadline("preparation").mono_ns:
+                self._drift.reschedule("preparation", fallback)
+                report["preparation_moved_to"] = fallback.wall.isoformat()
+            await send_alert("REHEARSAL_FAILED", f"Ensayo de {request.nombre_clase} falló: {result['message']}", report)
+        
+        self._record_timing(rehearsal=report)
+        return report
+    
+    async def _revalidate_rehearsed_session(self) -> Optional[Dict[str, Any]]:
+        """
+        Sesión armada por el ensayo: se revalida y se rehacen solo los pasos
+        caídos; si no se puede reparar, se libera y la preparación se hace
+        completa (None)
+        """
+        if not self._has_live_session():
+            return None
+        repair = await self.preparation_service.repair_preparation(self._budget_until("execution"))
+        if repair["success"]:
+            logger.info(f"🎭 Sesión del ensayo reutilizada (pasos rehechos: {repair['redone_steps'] or 'ninguno'})")
+            return {
+                "success": True,
+                "message": "Sesión armada por el ensayo revalidada",
+                "preparation_time": repair["repair_time"],
+                "step_timings": repair["step_timings"]
+            }
+        logger.warning(f"⚠️ La sesión del ensayo no se pudo reparar ({repair['message']}) - preparación completa")
+        await self.preparation_service._cleanup_browser()
+        return None
+    
+    def _start_standby(self, health_lead: float):
+        """Arma la página de respaldo en segundo plano (termina antes de la revisión previa a T)"""
+        if os.getenv("STANDBY_ENABLED", "false").lower() != "true":
+            return
+        budget = TimeoutBudget.for_deadline(
+            self._drift.deadline("execution").shifted(-health_lead), clock=self.timing_controller.mono_ns
+        )
+        self._standby = HotStandby(
+            self.preparation_service,
+            on_sample=lambda sample: self._record_timing(standby_heartbeat=sample)
+        )
+        
+        async def arm():
+            self._record_timing(standby=await self._standby.arm(budget))
+        
+        self._standby_task = asyncio.create_task(arm())
+    
+    async def _release_standby(self):
+        if self._standby_task is not None:
+            self._standby_task.cancel()
+            await asyncio.gather(self._standby_task, return_exceptions=True)
+            self._standby_task = None
+        if self._standby is not None:
+            await self._standby.release()
+            self._standby = None
+    
+    async def _promote_standby(self) -> Optional[Dict[str, Any]]:
+        """Promueve la página de respaldo si la primaria no está lista (None si no se promovió)"""
+        if self._standby is None:
+            return None
+        if self._standby_task is not None and not self._standby_task.done():
+            # Respaldo a medio armar en la revisión: no sirve para esta ejecución
+            self._standby_task.cancel()
+        standby_check = await self._standby.check_and_promote()
+        self._record_timing(standby_check=standby_check)
+        if not standby_check["promoted"]:
+            return None
+        return {
+            "success": True,
+            "message": "Página de respaldo promovida",
+            "valid_checkpoint": self.preparation_service.checkpoint,
+            "redone_steps": [],
+            "step_timings": {},
+            "repair_time": 0.0,
+            "error_type": None,
+            "promoted": True
+        }
+    
+    async def _health_check(self) -> Dict[str, Any]:
+        """
+        Revisión previa a T: promueve el respaldo si la página primaria falla;
+        si no, repara la preparación desde el punto de control más profundo
+        que siga válido, sin pasar de T
+        """
+        promoted = await self._promote_standby()
+        if promoted is not None:
+            await self.preparation_service.observe_enablement()
+            await self.preparation_service.warm_click_path()
+            return promoted
+        repair = await self.preparation_service.repair_preparation(self._budget_until("execution"))
+        self._record_timing(health_check={
+            key: repair[key] for key in ("success", "valid_checkpoint", "redone_steps", "repair_time", "error_type")
+        })
+        if repair["success"] and repair["redone_steps"]:
+            # Botón nuevo en el DOM: volver a observarlo y precalentar su camino
+            await self.preparation_service.observe_enablement()
+            await self.preparation_service.warm_click_path()
+        return repair
+    
+    @staticmethod
+    def _click_timeout_ms(opening: Dict[str, Any]) -> float:
+        """El click espera la habilitación hasta el final de la ventana de apertura estimada"""
+        if opening["window_end_ms"] is None:
+            return 2000
+        return max(2000, opening["window_end_ms"] - opening["fire_offset_ms"] + 1000)
+    
+    def _record_opening(self, request: ReservaProgramadaRequest, timing: Dict[str, Any], enablement: Optional[Dict[str, Any]]):
+        """Guarda la apertura observada (habilitación del botón respecto de T) en el modelo de la clase"""
+        if not enablement or enablement.get("enabled_at_ms") is None:
+            # Ya estaba habilitado al preparar (o no se observó): no informa el momento de apertura
+            return
+        offset_ms = enablement["enabled_at_ms"] - timing["target_time"].timestamp() * 1000
+        self._record_timing(opening_observed_ms=round(offset_ms, 3))
+        opening_estimator.record(request.nombre_clase, request.fecha_reserva, offset_ms)
+    
+    def _start_drift_watchdog(self, timing: Dict[str, Any]):
+        """Vigila los relojes durante las esperas y re-ancla los plazos si la hora salta"""
+        probe = ServerTimeProbe() if os.getenv("DRIFT_SERVER_PROBE", "true").lower() == "true" else None
+        self._drift = DriftWatchdog(
+            self.timing_controller,
+            {
+                "preparation": timing["preparation_deadline"],
+                "execution": timing["execution_deadline"]
+            },
+            on_sample=lambda sample: self._record_timing(drift=sample),
+            probe=probe
+        )
+        self._drift.start()
+    
+    def _enter_critical_window(self):
+        if not self._in_critical_window:
+            applied = critical_runtime.enter()
+            logger.info(f"🔒 Modo crítico: {applied}")
+            critical_window.enter()
+            self._in_critical_window = True
+    
+    def _exit_critical_window(self):
+        """Sale de la ventana crítica, restaura el runtime y escribe los logs retenidos (idempotente)"""
+        if self._in_critical_window:
+            self._in_critical_window = False
+            critical_runtime.exit()
+            critical_window.exit()
+        if self._shedding:
+            self._shedding = False
+            loop_lag_monitor.stop_shedding()
+    
+    def _start_warm_start(self, timing: Dict[str, Any]):
+        """
+        Lanza navegador y login en background si la ejecución está dentro del
+        horizonte, para que esos costos en frío no caigan en el último minuto
+        """
+        horizon = float(os.getenv("WARM_START_HORIZON_SECONDS", "900"))
+        if timing["wait_until_exec_seconds"] > horizon:
+            logger.info(f"⏭️ Ejecución fuera del horizonte de arranque en caliente ({horizon:.0f}s)")
+            return
+        
+        started_ns = self.timing_controller.mono_ns()
+        
+        async def _run() -> Dict[str, Any]:
+            result = await self.preparation_service.warm_start()
+            result["started_ns"] = started_ns
+            result["finished_ns"] = self.timing_controller.mono_ns()
+            return result
+        
+        self._warm_task = asyncio.create_task(_run())
+    
+    async def _finish_warm_start(self) -> Optional[Dict[str, Any]]:
+        """Espera el arranque en caliente (si sigue en curso, su trabajo no se repite)"""
+        if self._warm_task is None:
+            return None
+        try:
+            return await self._warm_task
+        except Exception as e:
+            logger.warning(f"⚠️ Error en arranque en caliente: {str(e)}")
+            return None
+        finally:
+            self._warm_task = None
+    
+    def _report_warm_start(self, warm_result: Dict[str, Any], prep_result: Dict[str, Any]):
+        """
+        Reporta cuánto trabajo de preparación se hizo antes de la hora de
+        preparación vigente (aprendida por clase, re-anclada por deriva o
+        adelantada tras un ensayo fallido)
+        """
+        prep_deadline = self._drift.deadline("preparation")
+        lead = (self._drift.deadline("execution").mono_ns - prep_deadline.mono_ns) / 1e9
+        warm_work = warm_result["duration"] if warm_result["success"] else 0.0
+        before_prep_ns = min(warm_result["finished_ns"], prep_deadline.mono_ns) - warm_result["started_ns"]
+        before_prep = min(max(0.0, before_prep_ns / 1e9), warm_work)
+        total_work = warm_work + (prep_result.get("preparation_time") or 0.0)
+        ratio = before_prep / total_work if total_work > 0 else 0.0
+        
+        logger.info(
+            f"♨️ Trabajo de preparación antes de T-{lead:.0f}s: {before_prep:.2f}s de {total_work:.2f}s ({ratio:.0%})"
+        )
+        self._set_job_state(EstadoJob.PREPARING, warm_start={
+            "success": warm_result["success"],
+            "timings": warm_result.get("timings", {}),
+            "work_before_prep_seconds": round(before_prep, 3),
+            "total_prep_work_seconds": round(total_work, 3),
+            "work_before_prep_ratio": round(ratio, 3),
+            "prep_lead_seconds": round(lead, 3)
+        })
+    
+    def _has_live_session(self) -> bool:
+        page = self.preparation_service.page
+        return bool(page and self.preparation_service.button_selector and not page.is_closed())
+    
+    async def _acquire_execution_lease(self, request: ReservaProgramadaRequest, timing: Dict[str, Any]) -> bool:
+        """
+        Obtiene el lease del job; si otro worker lo tiene, espera en standby
+        hasta la hora de preparación por si el dueño muere (después ya no
+        alcanzaría a preparar el navegador antes de T).
+        En modo redundante (request.redundante) hay un slot por ejecutor.
+
+        Returns:
+            True si este worker es el dueño (o si no hay backend de lease configurado)
+        """
+        if self.lease_manager is None:
+            return True
+        
+        base_key = ExecutionLeaseManager.job_key(request.nombre_clase, request.fecha_reserva, request.hora_reserva)
+        executors = int(os.getenv("REDUNDANCY_EXECUTORS", "2")) if request.redundante else 1
+        self._base_lease_key = base_key
+        self._redundant = executors > 1
+        
+        # Modo redundante: cada ejecutor toma un slot distinto y todos disparan en T
+        slot_keys = ExecutionLeaseManager.slot_keys(base_key, executors)
+        self._slot_keys = slot_keys
+        lease = await self.lease_manager.acquire_any(slot_keys)
+        if lease is None:
+            lease = await self.lease_manager.wait_for_any_lease(
+                slot_keys,
+                until=timing["preparation_deadline"],
+                base_key=base_key if self._redundant else None
+            )
+        if lease is None:
+            return False
+        
+        self._lease = lease
+        self._lease_heartbeat = self.lease_manager.start_heartbeat(lease)
+        self._set_job_state(EstadoJob.PENDING, lease_owner=lease.owner, lease_token=lease.token)
+        return True
+    
+    async def _lease_still_valid(self) -> bool:
+        """Verificación de fencing contra el backend"""
+        if self._lease is None:
+            return True
+        return not self._lease_lost() and await self.lease_manager.validate(self._lease)
+    
+    def _lease_lost(self) -> bool:
+        return self._lease_heartbeat is not None and self._lease_heartbeat.done()
+    
+    async def _check_redundant_peers(self):
+        """
+        Modo redundante: a la hora de preparar los demás ejecutores ya deberían
+        tener su slot. Si no hay ninguno, el job corre con un solo ejecutor
+        (p. ej. un único worker de uvicorn: el duplicado lo rechaza el registro)
+        """
+        if not self._redundant:
+            return
+        try:
+            peers = await self.lease_manager.peer_holders(self._slot_keys)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo consultar los ejecutores redundantes: {str(e)}")
+            return
+        self._record_timing(redundant_peers=len(peers))
+        if not peers:
+            logger.warning(
+                "⚠️ Modo redundante sin otro ejecutor: ningún otro worker tomó slot de "
+                f"{self._base_lease_key} - se necesitan ≥2 workers/máquinas con el mismo job"
+            )
+        else:
+            logger.info(f"👥 Ejecutores redundantes activos: {', '.join(peers)}")
+
+    async def _redundant_winner(self, wait_seconds: float = 0.0) -> Optional[str]:
+        """
+        Ganador registrado por algún ejecutor del job redundante (None fuera de ese modo)
+
+        Args:
+            wait_seconds: Espera máxima a que el otro ejecutor registre su triunfo
+                          (su click puede responder después del nuestro)
+        """
+        if not self._redundant:
+            return None
+        deadline = time.monotonic() + wait_seconds
+        while True:
+            winner = await self.lease_manager.get_winner(self._base_lease_key)
+            if winner or time.monotonic() >= deadline:
+                return winner
+            await asyncio.sleep(min(0.25, max(0.0, deadline - time.monotonic())))
+    
+    def _redundant_success_response(
+        self,
+        reservation_id: str,
+        request: ReservaProgramadaRequest,
+        winner: str
+    ) -> ReservaProgramadaResponse:
+        return self._create_success_response(reservation_id, request, {
+            "message": f"Reserva completada por ejecutor redundante {winner}"
+        })
+    
+    async def _release_execution_lease(self, completed: bool):
+        if self._lease_heartbeat is not None:
+            self._lease_heartbeat.cancel()
+            self._lease_heartbeat = None
+        if self._lease is not None:
+            await self.lease_manager.release(self._lease, completed=completed)
+            self._lease = None
+    
+    def _budget_until(self, name: str) -> TimeoutBudget:
+        """Presupuesto de esperas hasta un plazo vigente del watchdog ("execution", "preparation")"""
+        return TimeoutBudget.for_deadline(self._drift.deadline(name), clock=self.timing_controller.mono_ns)
+    
+    async def _prepare_web_navigation(
+        self,
+        request: ReservaProgramadaRequest,
+        budget: TimeoutBudget = UNLIMITED_BUDGET
+    ) -> Dict[str, Any]:
         """
         Preparación completa de navegación web usando PreparationService
         """
         try:
             result = await self.preparation_service.prepare_reservation(
                 nombre_clase=request.nombre_clase,
-                fecha_clase=request.fecha_clase
+                fecha_clase=request.fecha_clase,
+                budget=budget,
+                # Antes de T el botón puede seguir deshabilitado: se arma igual
+                arm_disabled=True
             )
             
             if result["success"]:
@@ -171,7 +837,9 @@ class ScheduledReservationManager:
                 "page_context": None
             }
     
-    async def _execute_immediate_click(self, prep_result: Dict[str, Any]) -> Dict[str, Any]:
+    async def _execute_immediate_click(
+        self, prep_result: Dict[str, Any], click_timeout_ms: float = 2000
+    ) -> Dict[str, Any]:
         """
         Ejecuta el click inmediato en el botón de reserva
         """
@@ -183,7 +851,7 @@ class ScheduledReservationManager:
                 }
             
             # El PreparationService ya tiene el contexto interno
-            result = await self.preparation_service.execute_final_click()
+            result = await self.preparation_service.execute_final_click(click_timeout_ms=click_timeout_ms)
             
             return result
             
@@ -194,6 +862,18 @@ class ScheduledReservationManager:
                 "message": f"Error en ejecución: {str(e)}"
             }
     
+    def _set_job_state(self, estado: EstadoJob, **info):
+        """Actualiza el estado del job en el registro compartido (si está registrado)"""
+        self._estado = estado
+        if self.rescheduling:
+            return
+        if self._job_key is not None:
+            self.registry.update_state(self._job_key, estado, job_id=self._job_id, **info)
+    
+    def _record_timing(self, **samples):
+        """Publica muestras de tiempo sin cambiar de fase (stream de eventos del job)"""
+        self._set_job_state(self._estado, **samples)
+    
     def _create_initial_response(
         self, 
         reservation_id: str, 
@@ -223,6 +903,7 @@ class ScheduledReservationManager:
         exec_result: Dict[str, Any]
     ) -> ReservaProgramadaResponse:
         """Crea respuesta de éxito"""
+        self._set_job_state(EstadoJob.DONE)
         return ReservaProgramadaResponse(
             id=reservation_id,
             clase_nombre=request.nombre_clase,
@@ -246,6 +927,7 @@ class ScheduledReservationManager:
         message: str
     ) -> ReservaProgramadaResponse:
         """Crea respuesta de error"""
+        self._set_job_state(EstadoJob.FAILED, error_type=error_type)
         return ReservaProgramadaResponse(
             id=reservation_id,
             clase_nombre=request.nombre_clase,
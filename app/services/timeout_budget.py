@@ -0,0 +1,102 @@
+"""
+Timeout Budget - Presupuesto de tiempo para las esperas de la navegación
+
+Cada espera de Playwright tiene un tope propio (5000ms campos de login, 3000ms
+Clases, 8000ms la clase, 6000 + 3000ms el modal, ...). En el peor caso la suma
+supera la ventana de preparación. El presupuesto lleva el tiempo restante
+hasta un plazo (T, o el inicio de la preparación en el ensayo) a través de
+todos los pasos:
+
+    timeout de cada espera = min(tope del paso, restante - reserva)
+
+Sin plazo (reservas inmediatas) el presupuesto es ilimitado y cada espera usa
+su tope de siempre.
+"""
+
+import os
+import time
+from typing import Callable, Optional
+
+from .direct_timing_controller import Deadline
+
+
+class BudgetExhaustedError(Exception):
+    """No queda presupuesto para la siguiente espera"""
+
+
+class TimeoutBudget:
+    """Tiempo restante hasta un plazo del reloj monotónico, menos una reserva"""
+
+    def __init__(
+        self,
+        deadline_ns: Optional[int] = None,
+        reserve_seconds: Optional[float] = None,
+        clock: Callable[[], int] = time.monotonic_ns
+    ):
+        """
+        Args:
+            deadline_ns: Plazo en el reloj monotónico (None = ilimitado)
+            reserve_seconds: Tiempo que se guarda para después de la navegación
+                (TIMEOUT_BUDGET_RESERVE_SECONDS, 3)
+            clock: Reloj monotónico en ns (inyectable para tests)
+        """
+        self.deadline_ns = deadline_ns
+        self.reserve_seconds = (
+            reserve_seconds if reserve_seconds is not None
+            else float(os.getenv("TIMEOUT_BUDGET_RESERVE_SECONDS", "3"))
+        )
+        self._clock = clock
+
+    @classmethod
+    def unlimited(cls) -> "TimeoutBudget":
+        return cls(None, reserve_seconds=0.0)
+
+    @classmethod
+    def for_deadline(
+        cls,
+        deadline: Deadline,
+        reserve_seconds: Optional[float] = None,
+        clock: Callable[[], int] = time.monotonic_ns
+    ) -> "TimeoutBudget":
+        return cls(deadline.mono_ns, reserve_seconds, clock)
+
+    @property
+    def limited(self) -> bool:
+        return self.deadline_ns is not None
+
+    def remaining_ms(self) -> Optional[float]:
+        """Milisegundos disponibles para esperas (None si es ilimitado)"""
+        if self.deadline_ns is None:
+            return None
+        return (self.deadline_ns - self._clock()) / 1e6 - self.reserve_seconds * 1000
+
+    def exhausted(self) -> bool:
+        remaining = self.remaining_ms()
+        return remaining is not None and remaining <= 0
+
+    def timeout(self, ceiling_ms: float) -> float:
+        """
+        Timeout para una espera de Playwright: min(tope, restante)
+
+        Nunca devuelve 0 (para Playwright 0 significa sin límite).
+
+        Raises:
+            BudgetExhaustedError: Si ya no queda presupuesto
+        """
+        remaining = self.remaining_ms()
+        if remaining is None:
+            return ceiling_ms
+        if remaining <= 0:
+            raise BudgetExhaustedError(f"Presupuesto de tiempo agotado (faltaban {-remaining:.0f}ms)")
+        return max(1.0, min(ceiling_ms, remaining))
+
+    def pause(self, ms: float) -> float:
+        """Pausa fija de asentamiento, recortada al presupuesto (0 si no queda)"""
+        remaining = self.remaining_ms()
+        if remaining is None:
+            return ms
+        return max(0.0, min(ms, remaining))
+
+
+# Presupuesto sin plazo: cada espera usa su tope (valor por defecto de los pasos)
+UNLIMITED_BUDGET = TimeoutBudget.unlimited()
@@ -4,6 +4,8 @@ from typing import Dict, Any
 from loguru import logger
 from playwright.async_api import async_playwright
 
+from .timeout_budget import UNLIMITED_BUDGET, TimeoutBudget
+
 
 class WebAutomationService:
     """
@@ -20,13 +22,20 @@ class WebAutomationService:
         if not all([self.crossfit_url, self.username, self.password]):
             raise ValueError("Faltan credenciales en las variables de entorno")
     
-    async def realizar_reserva(self, clase_nombre: str, fecha: str) -> dict:
+    async def realizar_reserva(
+        self,
+        clase_nombre: str,
+        fecha: str,
+        budget: TimeoutBudget = UNLIMITED_BUDGET
+    ) -> dict:
         """
         Realiza una reserva automatizada usando Playwright
         
         Args:
             clase_nombre: Nombre de la clase a reservar (ej: "17:00 CrossFit 17:00-18:00")
             fecha: Día a seleccionar en formato "XX ##" (ej: "JU 17", "VI 18")
+            budget: Tiempo restante hasta el plazo (por defecto sin plazo: cada
+                espera usa su tope)
             
         Returns:
             Dict con el resultado de la operación
@@ -68,8 +77,8 @@ class WebAutomationService:
                 
                 # Paso 1: Navegar al sitio
                 logger.info("📱 Paso 1: Navegando al sitio web...")
-                await page.goto(self.crossfit_url, wait_until='networkidle')
-                await page.wait_for_timeout(2000)
+                await page.goto(self.crossfit_url, wait_until='networkidle', timeout=budget.timeout(30000))
+                await page.wait_for_timeout(budget.pause(2000))
                 
                 # Paso 2: Realizar login con mejor manejo de elementos
                 logger.info("🔐 Paso 2: Realizando login...")
@@ -87,7 +96,7 @@ class WebAutomationService:
                 email_filled = False
                 for selector in email_selectors:
                     try:
-                        await page.wait_for_selector(selector, timeout=5000)
+                        await page.wait_for_selector(selector, timeout=budget.timeout(5000))
                         await page.fill(selector, self.username)
                         email_filled = True
                         logger.info(f"✅ Email llenado con selector: {selector}")
@@ -110,7 +119,7 @@ class WebAutomationService:
                 password_filled = False
                 for selector in password_selectors:
                     try:
-                        await page.wait_for_selector(selector, timeout=5000)
+                        await page.wait_for_selector(selector, timeout=budget.timeout(5000))
                         await page.fill(selector, self.password)
                         password_filled = True
                         logger.info(f"✅ Contraseña llenada con selector: {selector}")
@@ -133,7 +142,7 @@ class WebAutomationService:
                 login_clicked = False
                 for selector in login_selectors:
                     try:
-                        await page.wait_for_selector(selector, timeout=5000)
+                        await page.wait_for_selector(selector, timeout=budget.timeout(5000))
                         await page.click(selector)
                         login_clicked = True
                         logger.info(f"✅ Login clickeado con selector: {selector}")
@@ -144,7 +153,7 @@ class WebAutomationService:
                 if not login_clicked:
                     raise Exception("No se pudo encontrar el botón de login")
                 
-                await page.wait_for_timeout(5000)
+                await page.wait_for_timeout(budget.pause(5000))
                 
                 # Verificar que el login fue exitoso
                 if "home" not in page.url:
@@ -154,7 +163,7 @@ class WebAutomationService:
                 
                 # Paso 3: Ir a la sección de clases con múltiples estrategias
                 logger.info("📅 Paso 3: Navegando a la sección Clases...")
-                await page.wait_for_timeout(2000)
+                await page.wait_for_timeout(budget.pause(2000))
                 
                 # Múltiples selectores para encontrar el enlace de clases (español e inglés)
                 clases_selectors = [
@@ -171,7 +180,7 @@ class WebAutomationService:
                 clases_clicked = False
                 for selector in clases_selectors:
                     try:
-                        await page.wait_for_selector(selector, timeout=3000)
+                        await page.wait_for_selector(selector, timeout=budget.timeout(3000))
                         await page.click(selector)
                         clases_clicked = True
                         logger.info(f"✅ Navegación a Clases exitosa con selector: {selector}")
@@ -182,7 +191,7 @@ class WebAutomationService:
                 if not clases_clicked:
                     raise Exception("No se pudo encontrar el enlace de Clases")
                 
-                await page.wait_for_timeout(2000)
+                await page.wait_for_timeout(budget.pause(2000))
                 
                 # Paso 4: Seleccionar el día dinámicamente basado en la fecha
                 logger.info(f"📆 Paso 4: Seleccionando fecha: {fecha}")
@@ -198,20 +207,20 @@ class WebAutomationService:
                 # Método optimizado: usar solo el número del día (método que funciona)
                 try:
                     # Usar el número del día que viene del endpoint dinámicamente
-                    await page.click(f'text="{numero_dia}"', timeout=5000)
+                    await page.click(f'text="{numero_dia}"', timeout=budget.timeout(5000))
                     logger.info(f"✅ Fecha seleccionada: {fecha} (usando día {numero_dia})")
                 except:
                     # Fallback: intentar con el formato combinado
                     logger.info(f"⚠️ Probando selector alternativo para {fecha}")
                     try:
                         fecha_selector = f'text="{dia_semana}{numero_dia}"'
-                        await page.click(fecha_selector, timeout=3000)
+                        await page.click(fecha_selector, timeout=budget.timeout(3000))
                         logger.info(f"✅ Fecha seleccionada con método alternativo: {fecha}")
                     except Exception as e:
                         raise Exception(f"No se pudo seleccionar la fecha {fecha}: {str(e)}")
                 
                 # Reducir espera después de seleccionar fecha
-                await page.wait_for_timeout(500)  # Reducido de 1500ms a 500ms
+                await page.wait_for_timeout(budget.pause(500))  # Reducido de 1500ms a 500ms
                 
                 
                 # Verificar que las clases se cargaron (optimizado para multi-idioma)
@@ -229,7 +238,7 @@ class WebAutomationService:
                     classes_loaded = False
                     for selector in clases_loaded_selectors:
                         try:
-                            await page.wait_for_selector(selector, timeout=2000)  # Reducido a 2s
+                            await page.wait_for_selector(selector, timeout=budget.timeout(2000))  # Reducido a 2s
                             logger.info(f"✅ Clases cargadas para {fecha}")
                             classes_loaded = True
                             break
@@ -240,20 +249,20 @@ class WebAutomationService:
                         # Si no detectamos indicadores específicos, continuar sin warning molesto
                         logger.debug(f"🔍 No se detectaron indicadores específicos para {fecha}, continuando...")
                     
-                    await page.wait_for_timeout(500)  # Reducido de 1000-1500ms a 500ms
+                    await page.wait_for_timeout(budget.pause(500))  # Reducido de 1000-1500ms a 500ms
                     
                 except Exception as e:
                     logger.debug(f"⚠️ Error detectando clases cargadas: {str(e)}, continuando...")
-                    await page.wait_for_timeout(500)
+                    await page.wait_for_timeout(budget.pause(500))
                 
                 # Paso 5: Buscar y seleccionar la clase específica
                 logger.info(f"🔍 Paso 5: Buscando clase '{clase_nombre}'...")
                 clase_selector = f'text="{clase_nombre}"'
                 
                 # Reducir timeout de 10 a 8 segundos
-                await page.wait_for_selector(clase_selector, timeout=8000)
+                await page.wait_for_selector(clase_selector, timeout=budget.timeout(8000))
                 await page.click(clase_selector)
-                await page.wait_for_timeout(800)  # Reducido de 1500ms a 800ms
+                await page.wait_for_timeout(budget.pause(800))  # Reducido de 1500ms a 800ms
                 
                 # Paso 6: Confirmar la reserva
                 logger.info("💫 Paso 6: Ejecutando reserva...")
@@ -264,13 +273,13 @@ class WebAutomationService:
                 
                 try:
                     # Reducir timeout de 10 a 6 segundos
-                    await page.wait_for_selector('dialog', timeout=6000)
+                    await page.wait_for_selector('dialog', timeout=budget.timeout(6000))
                     logger.info("✅ Modal (dialog) detectado")
                     modal_found = True
                 except:
                     # Intentar detectar otros tipos de modal
                     try:
-                        await page.wait_for_selector('[role="dialog"]', timeout=3000)  # Reducido de 5 a 3 segundos
+                        await page.wait_for_selector('[role="dialog"]', timeout=budget.timeout(3000))  # Reducido de 5 a 3 segundos
                         logger.info("✅ Modal (role=dialog) detectado")
                         modal_found = True
                     except:
@@ -283,14 +292,14 @@ class WebAutomationService:
                 # En modo headless, probar primero "Book" ya que sabemos que aparece en inglés
                 if self.headless:
                     try:
-                        await page.wait_for_selector('button:has-text("Book")', timeout=5000)
+                        await page.wait_for_selector('button:has-text("Book")', timeout=budget.timeout(5000))
                         logger.info("✅ Botón 'Book' encontrado (modo headless)")
                         reservar_button_found = True
                     except:
                         # Si no encuentra "Book", intentar con "Reservar"
                         logger.info("🔍 No se encontró 'Book', probando con 'Reservar'...")
                         try:
-                            await page.wait_for_selector('button:has-text("Reservar")', timeout=3000)
+                            await page.wait_for_selector('button:has-text("Reservar")', timeout=budget.timeout(3000))
                             logger.info("✅ Botón 'Reservar' encontrado")
                             reservar_button_found = True
                         except:
@@ -298,14 +307,14 @@ class WebAutomationService:
                 else:
                     # En modo no-headless, probar primero "Reservar"
                     try:
-                        await page.wait_for_selector('button:has-text("Reservar")', timeout=5000)
+                        await page.wait_for_selector('button:has-text("Reservar")', timeout=budget.timeout(5000))
                         logger.info("✅ Botón 'Reservar' encontrado")
                         reservar_button_found = True
                     except:
                         # Si no encuentra "Reservar", intentar con "Book"
                         logger.info("🔍 No se encontró 'Reservar', probando con 'Book'...")
                         try:
-                            await page.wait_for_selector('button:has-text("Book")', timeout=3000)
+                            await page.wait_for_selector('button:has-text("Book")', timeout=budget.timeout(3000))
                             logger.info("✅ Botón 'Book' encontrado")
                             reservar_button_found = True
                         except:
@@ -335,7 +344,7 @@ class WebAutomationService:
                     # Verificar si la clase ya está reservada
                     logger.warning("⚠️ No se encontró botón de reserva, verificando si ya está reservada...")
                     try:
-                        await page.wait_for_selector('button:has-text("Cancelar reserva")', timeout=3000)
+                        await page.wait_for_selector('button:has-text("Cancelar reserva")', timeout=budget.timeout(3000))
                         logger.info("📝 La clase ya está reservada (botón 'Cancelar reserva' presente)")
                         return {
                             "success": True,
@@ -345,7 +354,7 @@ class WebAutomationService:
                     except:
                         # También verificar "Cancel booking" en inglés
                         try:
-                            await page.wait_for_selector('button:has-text("Cancel booking")', timeout=2000)
+                            await page.wait_for_selector('button:has-text("Cancel booking")', timeout=budget.timeout(2000))
                             logger.info("📝 La clase ya está reservada (botón 'Cancel booking' presente)")
                             return {
                                 "success": True,
@@ -361,7 +370,7 @@ class WebAutomationService:
                     # Determinar qué botón hacer click
                     try:
                         # Primero intentar con "Reservar"
-                        await page.wait_for_selector('button:has-text("Reservar")', timeout=2000)
+                        await page.wait_for_selector('button:has-text("Reservar")', timeout=budget.timeout(2000))
                         logger.info("🎯 Haciendo click en 'Reservar'...")
                         await page.click('button:has-text("Reservar")')
                     except:
@@ -369,7 +378,7 @@ class WebAutomationService:
                         logger.info("🎯 Haciendo click en 'Book'...")
                         await page.click('button:has-text("Book")')
                     
-                    await page.wait_for_timeout(2000)  # Reducido de 3000ms a 2000ms
+                    await page.wait_for_timeout(budget.pause(2000))  # Reducido de 3000ms a 2000ms
                 
                 # Verificar que la reserva fue exitosa
                 logger.info("🔍 Verificando éxito de la reserva...")
@@ -378,11 +387,11 @@ class WebAutomationService:
                 message = ""
                 
                 # Reducir tiempo de procesamiento
-                await page.wait_for_timeout(1000)  # Reducido de 2000 a 1000ms
+                await page.wait_for_timeout(budget.pause(1000))  # Reducido de 2000 a 1000ms
                 
                 try:
                     # Método 1: Buscar botón "Cancelar reserva" en el modal (indicador más confiable)
-                    await page.wait_for_selector('button:has-text("Cancelar reserva")', timeout=8000)
+                    await page.wait_for_selector('button:has-text("Cancelar reserva")', timeout=budget.timeout(8000))
                     logger.success(f"✅ Reserva completada exitosamente para: {clase_nombre}")
                     success = True
                     message = f"Reserva exitosa para {clase_nombre} - Confirmada con botón 'Cancelar reserva'"
@@ -390,7 +399,7 @@ class WebAutomationService:
                     # Si no encontramos "Cancelar reserva", probar con "Cancel booking" (inglés)
                     logger.info("⏳ No se encontró 'Cancelar reserva', probando con 'Cancel booking'...")
                     try:
-                        await page.wait_for_selector('button:has-text("Cancel booking")', timeout=5000)
+                        await page.wait_for_selector('button:has-text("Cancel booking")', timeout=budget.timeout(5000))
                         logger.success(f"✅ Reserva completada exitosamente para: {clase_nombre}")
                         success = True
                         message = f"Reserva exitosa para {clase_nombre} - Confirmada con botón 'Cancel booking'"
@@ -398,7 +407,7 @@ class WebAutomationService:
                         logger.info("⏳ No se encontró 'Cancel booking', buscando otros indicadores...")
                         try:
                             # Método 2: Buscar texto "Reservada" en el modal o página
-                            await page.wait_for_selector('text="Reservada"', timeout=5000)
+                            await page.wait_for_selector('text="Reservada"', timeout=budget.timeout(5000))
                             logger.success(f"✅ Reserva completada exitosamente para: {clase_nombre}")
                             success = True
                             message = f"Reserva exitosa para {clase_nombre} - Confirmada con estado 'Reservada'"
@@ -461,11 +470,14 @@ class WebAutomationService:
                 except:
                     pass
                 
-                return {
+                result = {
                     "success": False,
                     "message": f"Error: {str(e)}",
                     "steps_completed": 0
                 }
+                if budget.exhausted():
+                    result["error_type"] = "BUDGET_EXHAUSTED"
+                return result
     
     def validate_credentials(self) -> bool:
         """Valida que las credenciales estén configuradas"""
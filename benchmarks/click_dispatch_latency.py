@@ -0,0 +1,115 @@
+"""
+Benchmark - Latencia de despacho del click: page.click vs plan de click por CDP
+
+Lanza Chromium igual que PreparationService (_launch_browser, con el slow_mo
+de BROWSER_SLOW_MO_MS) sobre una página local con un botón "Reservar" cuyo
+handler registra performance.timeOrigin + performance.now(). La latencia es
+el tiempo entre la llamada en Python y la ejecución del handler en la página.
+
+Modos:
+- playwright: page.click(selector) - re-resuelve el selector y espera
+              visible/estable/habilitado, scroll y despacho
+- cdp:        plan de click (build_click_plan en el armado y _fire_click_plan
+              en T) - revalidación en la página + Input.dispatchMouseEvent
+
+Uso:
+    python benchmarks/click_dispatch_latency.py --trials 200 --slow-mo 0
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from loguru import logger  # noqa: E402
+
+from app.services.preparation_service import PreparationService  # noqa: E402
+
+PAGE = """
+<html><body style="height: 3000px">
+  <div role="dialog" style="margin-top: 400px">
+    <button id="reservar" onclick="window.__clicks.push(performance.timeOrigin + performance.now())">Reservar</button>
+  </div>
+  <script>window.__clicks = [];</script>
+</body></html>
+"""
+SELECTOR = 'button:has-text("Reservar")'
+
+
+async def _measure(service: PreparationService, mode: str, trials: int) -> Dict[str, List[float]]:
+    """Latencia hasta el handler (ms) y duración de la llamada (ms) por click"""
+    latency, call = [], []
+    for _ in range(trials):
+        await service.page.evaluate("() => { window.__clicks = []; }")
+        started_wall = time.time() * 1000
+        started = time.perf_counter()
+        if mode == "cdp":
+            fired = await service._fire_click_plan(2000)
+            if not fired:
+                raise RuntimeError("El plan de click no se pudo despachar")
+        else:
+            await service.page.click(SELECTOR, timeout=2000)
+        call.append((time.perf_counter() - started) * 1000)
+        clicks = await service.page.evaluate("() => window.__clicks")
+        latency.append(clicks[0] - started_wall)
+    return {"latency": latency, "call": call}
+
+
+async def run(args) -> Dict[str, Dict[str, List[float]]]:
+    os.environ["BROWSER_SLOW_MO_MS"] = str(args.slow_mo)
+    os.environ.setdefault("CROSSFIT_URL", "about:blank")
+    os.environ.setdefault("USERNAME", "benchmark")
+    os.environ.setdefault("PASSWORD", "benchmark")
+    service = PreparationService()
+    await service._launch_browser()
+    try:
+        await service.page.set_content(PAGE)
+        service.button_selector = SELECTOR
+        plan = await service.build_click_plan()
+        if not plan["valid"]:
+            raise RuntimeError(f"Plan de click inválido: {plan['message']}")
+        # Primera llamada de cada camino fuera de la medición (como warm_click_path)
+        await service._fire_click_plan(0, dry_run=True)
+        await service.page.click(SELECTOR, timeout=2000, trial=True)
+        return {mode: await _measure(service, mode, args.trials) for mode in ("playwright", "cdp")}
+    finally:
+        await service._cleanup_browser()
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _report(label: str, values: List[float]):
+    values = sorted(values)
+    print(
+        f"{label:>18} "
+        f"{percentile(values, 50):>8.2f} {percentile(values, 90):>8.2f} "
+        f"{percentile(values, 99):>8.2f} {values[-1]:>8.2f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia de despacho: page.click vs plan de click por CDP")
+    parser.add_argument("--trials", type=int, default=200)
+    parser.add_argument("--slow-mo", type=float, default=0.0, help="slow_mo del navegador (producción: 0)")
+    args = parser.parse_args()
+    logger.remove()
+
+    results = asyncio.run(run(args))
+
+    print(f"Clicks: {args.trials} por modo  slow_mo: {args.slow_mo:.0f}ms")
+    print(f"{'modo':>18} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for mode, samples in results.items():
+        _report(f"{mode} handler", samples["latency"])
+        _report(f"{mode} llamada", samples["call"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark - Jitter del disparo con y sin modo crítico (GC congelado, prioridad alta)
+
+Mide cuánto se atrasa una corrutina que duerme hasta un instante objetivo y
+luego ejecuta un "click" sintético, mientras el mismo proceso genera basura
+cíclica (dispara recolecciones del GC) sobre un heap grande de objetos vivos
+(recolecciones completas caras), como un servidor con sesiones y respuestas JSON.
+
+Modos:
+- off: sin modo crítico (situación anterior)
+- on:  CriticalRuntimeMode activo desde --lead-ms antes del objetivo hasta
+       después del click, igual que ScheduledReservationManager en T-2s
+       (la anticipación debe cubrir el gc.collect() inicial)
+
+Uso:
+    python benchmarks/critical_runtime_jitter.py --trials 100 --heap-objects 500000
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from loguru import logger  # noqa: E402
+
+from app.services.runtime_mode import CriticalRuntimeMode  # noqa: E402
+
+
+class _Node:
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.children = []
+        if parent is not None:
+            parent.children.append(self)
+
+
+async def _garbage_load(stop: asyncio.Event, burst: int):
+    """Ráfagas de estructuras cíclicas que solo el GC puede liberar"""
+    while not stop.is_set():
+        for _ in range(burst):
+            root = _Node()
+            _Node(_Node(root))
+        await asyncio.sleep(0)
+
+
+async def _synthetic_click():
+    """Camino del click: formatear timestamps y armar el dict de resultado"""
+    stamp = time.time()
+    return {"click_at": f"{stamp:.6f}", "success": True, "data": [str(i) for i in range(50)]}
+
+
+async def _measure(trials: int, interval_s: float, lead_s: float, mode) -> List[float]:
+    """Atraso (ms) entre el objetivo y el fin del click"""
+    lateness = []
+    for _ in range(trials):
+        target = time.perf_counter() + interval_s
+        await asyncio.sleep(max(0.0, target - lead_s - time.perf_counter()))
+        if mode:
+            mode.enter()
+        try:
+            await asyncio.sleep(max(0.0, target - time.perf_counter()))
+            await _synthetic_click()
+            lateness.append((time.perf_counter() - target) * 1000)
+        finally:
+            if mode:
+                mode.exit()
+    return lateness
+
+
+async def run(args, enabled: bool) -> List[float]:
+    mode = CriticalRuntimeMode(enabled=True, cpu_affinity=args.cpu_affinity) if enabled else None
+    stop = asyncio.Event()
+    load = [asyncio.create_task(_garbage_load(stop, args.burst)) for _ in range(args.load_tasks)]
+    try:
+        return await _measure(args.trials, args.interval_ms / 1000, args.lead_ms / 1000, mode)
+    finally:
+        stop.set()
+        await asyncio.gather(*load)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _report(label: str, values: List[float]):
+    values = sorted(values)
+    print(
+        f"{label:>6} "
+        f"{percentile(values, 50):>8.2f} {percentile(values, 90):>8.2f} "
+        f"{percentile(values, 99):>8.2f} {values[-1]:>8.2f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Jitter del disparo con y sin modo crítico")
+    parser.add_argument("--trials", type=int, default=200)
+    parser.add_argument("--interval-ms", type=float, default=400.0, help="Distancia entre objetivos")
+    parser.add_argument("--lead-ms", type=float, default=300.0, help="Anticipación con la que se entra al modo")
+    parser.add_argument("--load-tasks", type=int, default=4, help="Tareas que generan basura cíclica")
+    parser.add_argument("--burst", type=int, default=500, help="Estructuras cíclicas por ráfaga")
+    parser.add_argument("--heap-objects", type=int, default=300000, help="Objetos vivos de larga duración")
+    parser.add_argument("--cpu-affinity", default="", help="CPUs a fijar en modo on, p.ej. 0")
+    args = parser.parse_args()
+    logger.remove()
+
+    # Heap de larga vida (sesiones, caches): hace caras las recolecciones completas
+    heap = [{"id": i, "tags": [i]} for i in range(args.heap_objects)]
+
+    off = asyncio.run(run(args, enabled=False))
+    on = asyncio.run(run(args, enabled=True))
+
+    print(f"Objetivos: {args.trials}  heap: {len(heap)} objetos  carga: {args.load_tasks} x {args.burst}")
+    print(f"{'modo':>6} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    _report("off", off)
+    _report("on", on)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Benchmark - Jitter del disparo con y sin aislamiento de proceso
+
+Mide cuánto se atrasa una corrutina que duerme hasta un instante objetivo
+(como sleep_until antes del click) mientras el mismo proceso atiende carga
+sintética de API: handlers que serializan JSON y escriben logs en ráfagas.
+
+Modos:
+- inline:  el "click" comparte event loop con la carga (situación actual)
+- process: el "click" corre en un proceso hijo con su propio loop (uvloop si
+           está disponible), igual que con JOB_EXECUTOR=process; la carga sigue
+           en el proceso padre
+
+Uso:
+    python benchmarks/process_isolation_jitter.py --trials 200 --load-tasks 8
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import multiprocessing
+import time
+from typing import List
+
+
+def _install_uvloop() -> str:
+    try:
+        import uvloop
+    except ImportError:
+        return "asyncio"
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return "uvloop"
+
+
+async def _api_load(stop: asyncio.Event, payload_size: int, sink: io.StringIO):
+    """Un "request" tras otro: serializar una respuesta grande y loguear, sin ceder entre medio"""
+    payload = {"clases": [{"nombre": f"18:00 CrossFit {i}", "cupos": i % 20} for i in range(payload_size)]}
+    while not stop.is_set():
+        body = json.dumps(payload)
+        sink.write(body[:200] + "\n")
+        sink.seek(0)
+        sink.truncate()
+        await asyncio.sleep(0)
+
+
+async def _measure_lateness(trials: int, interval_s: float) -> List[float]:
+    """Duerme hasta objetivos sucesivos y mide el atraso (ms)"""
+    lateness = []
+    for _ in range(trials):
+        target = time.perf_counter() + interval_s
+        await asyncio.sleep(max(0.0, target - time.perf_counter()))
+        lateness.append((time.perf_counter() - target) * 1000)
+    return lateness
+
+
+def _child_main(conn, trials: int, interval_s: float):
+    loop_impl = _install_uvloop()
+    lateness = asyncio.run(_measure_lateness(trials, interval_s))
+    conn.send((loop_impl, lateness))
+    conn.close()
+
+
+async def run_inline(args) -> List[float]:
+    stop = asyncio.Event()
+    sink = io.StringIO()
+    load = [asyncio.create_task(_api_load(stop, args.payload_size, sink)) for _ in range(args.load_tasks)]
+    try:
+        return await _measure_lateness(args.trials, args.interval_ms / 1000)
+    finally:
+        stop.set()
+        await asyncio.gather(*load)
+
+
+async def run_process(args):
+    ctx = multiprocessing.get_context("spawn")
+    parent_conn, child_conn = ctx.Pipe()
+    process = ctx.Process(target=_child_main, args=(child_conn, args.trials, args.interval_ms / 1000))
+
+    stop = asyncio.Event()
+    sink = io.StringIO()
+    load = [asyncio.create_task(_api_load(stop, args.payload_size, sink)) for _ in range(args.load_tasks)]
+    process.start()
+    try:
+        # Esperar el resultado sin detener la carga del padre
+        while not parent_conn.poll():
+            await asyncio.sleep(0.01)
+        loop_impl, lateness = parent_conn.recv()
+    finally:
+        stop.set()
+        await asyncio.gather(*load)
+        process.join()
+    return loop_impl, lateness
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _report(label: str, values: List[float]):
+    values = sorted(values)
+    print(
+        f"{label:>18} "
+        f"{percentile(values, 50):>8.2f} {percentile(values, 90):>8.2f} "
+        f"{percentile(values, 99):>8.2f} {values[-1]:>8.2f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Jitter del disparo con y sin aislamiento de proceso")
+    parser.add_argument("--trials", type=int, default=200)
+    parser.add_argument("--interval-ms", type=float, default=20.0, help="Distancia entre objetivos")
+    parser.add_argument("--load-tasks", type=int, default=8, help="Handlers concurrentes de carga sintética")
+    parser.add_argument("--payload-size", type=int, default=2000, help="Elementos serializados por request")
+    args = parser.parse_args()
+
+    inline = asyncio.run(run_inline(args))
+    loop_impl, isolated = asyncio.run(run_process(args))
+
+    print(f"Objetivos: {args.trials}  carga: {args.load_tasks} handlers x {args.payload_size} elementos")
+    print(f"{'modo':>18} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    _report("inline", inline)
+    _report(f"process ({loop_impl})", isolated)
+
+
+if __name__ == "__main__":
+    main()
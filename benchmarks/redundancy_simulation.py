@@ -0,0 +1,81 @@
+"""
+Simulación - Latencia de cola con ejecutores redundantes (activo-activo)
+
+Modela el tiempo desde T hasta que la solicitud de reserva llega al servidor
+del gimnasio para un ejecutor único y para N ejecutores que disparan en paralelo
+(gana el primero). Cada ejecutor sufre de forma independiente:
+- Latencia base (red + click) con variación normal
+- Pausas de GC / vecino ruidoso en la vCPU compartida (probabilidad baja)
+- Cortes breves de red (probabilidad más baja, impacto mayor)
+Además hay un componente común (carga del servidor) que afecta a todos por igual,
+por lo que la redundancia no elimina toda la variación.
+
+Uso:
+    python benchmarks/redundancy_simulation.py --trials 200000 --executors 2
+"""
+
+import argparse
+import random
+from typing import Dict, List
+
+
+def _executor_latency_ms(rng: random.Random, args) -> float:
+    latency = max(1.0, rng.gauss(args.base_ms, args.base_jitter_ms))
+    if rng.random() < args.hiccup_prob:
+        latency += rng.uniform(50, args.hiccup_max_ms)
+    if rng.random() < args.blip_prob:
+        latency += rng.uniform(200, args.blip_max_ms)
+    return latency
+
+
+def simulate(args) -> Dict[int, List[float]]:
+    """Devuelve, por cantidad de ejecutores, la latencia ganadora de cada intento"""
+    rng = random.Random(args.seed)
+    results: Dict[int, List[float]] = {n: [] for n in range(1, args.executors + 1)}
+
+    for _ in range(args.trials):
+        shared = rng.expovariate(1 / args.shared_mean_ms) if args.shared_mean_ms > 0 else 0.0
+        latencies = [_executor_latency_ms(rng, args) for _ in range(args.executors)]
+        for n in results:
+            results[n].append(shared + min(latencies[:n]))
+
+    return results
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulación de latencia de cola con ejecutores redundantes")
+    parser.add_argument("--trials", type=int, default=200_000)
+    parser.add_argument("--executors", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--base-ms", type=float, default=45.0, help="Latencia base red + click")
+    parser.add_argument("--base-jitter-ms", type=float, default=8.0)
+    parser.add_argument("--shared-mean-ms", type=float, default=5.0, help="Componente común (servidor)")
+    parser.add_argument("--hiccup-prob", type=float, default=0.03, help="Probabilidad de pausa GC / vecino ruidoso")
+    parser.add_argument("--hiccup-max-ms", type=float, default=400.0)
+    parser.add_argument("--blip-prob", type=float, default=0.01, help="Probabilidad de corte de red")
+    parser.add_argument("--blip-max-ms", type=float, default=1500.0)
+    parser.add_argument("--deadline-ms", type=float, default=150.0, help="Momento en que se agotan los cupos")
+    args = parser.parse_args()
+
+    results = simulate(args)
+
+    print(f"Intentos: {args.trials}  (semilla {args.seed})")
+    print(f"{'ejecutores':>10} {'p50':>8} {'p90':>8} {'p99':>8} {'p99.9':>8} {'max':>8} {'> deadline':>11}")
+    for n, values in results.items():
+        values.sort()
+        missed = sum(1 for v in values if v > args.deadline_ms) / len(values)
+        print(
+            f"{n:>10} "
+            f"{percentile(values, 50):>8.1f} {percentile(values, 90):>8.1f} "
+            f"{percentile(values, 99):>8.1f} {percentile(values, 99.9):>8.1f} "
+            f"{values[-1]:>8.1f} {missed:>10.3%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""
+Fixtures compartidas por los tests
+"""
+
+import pytest
+
+
+class FakeClock:
+    """Reloj controlable (segundos o ns, según el reloj que reemplace)"""
+
+    def __init__(self, start: float):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def fake_clock(request):
+    """
+    Reloj falso que arranca en 1000.0; otro valor inicial con
+    @pytest.mark.parametrize("fake_clock", [valor], indirect=True)
+    """
+    return FakeClock(getattr(request, "param", 1000.0))
@@ -0,0 +1,146 @@
+"""
+Tests para BatchReservationService - Reservas múltiples con un solo login
+
+Estas pruebas validan:
+- Agrupación de reservas por fecha
+- Login único y una pestaña por fecha
+- Resultados individuales en el orden recibido
+- Límite de pestañas en paralelo
+"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services.batch_reservation_service import BatchReservationService
+
+
+ENV = {
+    'CROSSFIT_URL': 'https://test.crossfit.com',
+    'USERNAME': 'test@example.com',
+    'PASSWORD': 'testpass',
+    'BROWSER_HEADLESS': 'true'
+}
+
+
+def _mock_page():
+    page = AsyncMock()
+    page.url = 'https://test.crossfit.com/home'
+    page.keyboard = AsyncMock()
+    return page
+
+
+class TestBatchReservationService:
+    """Tests para el servicio de reservas en lote"""
+
+    def test_group_by_fecha_keeps_positions(self):
+        """Test agrupación por fecha conservando el índice original"""
+        groups = BatchReservationService._group_by_fecha([
+            ("17:00 CrossFit", "LU 21"),
+            ("18:00 CrossFit", "MA 22"),
+            ("19:00 CrossFit", "lu 21"),
+        ])
+
+        assert list(groups.keys()) == ["LU 21", "MA 22"]
+        assert groups["LU 21"] == [(0, "17:00 CrossFit"), (2, "19:00 CrossFit")]
+        assert groups["MA 22"] == [(1, "18:00 CrossFit")]
+
+    @pytest.mark.asyncio
+    async def test_execute_batch_single_login_and_ordered_results(self):
+        """Test un login, una pestaña por fecha y resultados en orden"""
+        with patch.dict('os.environ', ENV):
+            service = BatchReservationService(max_tabs=2)
+
+            context = MagicMock()
+            context.new_page = AsyncMock(side_effect=lambda: _mock_page())
+
+            async def fake_launch(self):
+                self.page = _mock_page()
+                self.context = context
+
+            async def fake_button(self):
+                self.button_selector = 'button:has-text("Reservar")'
+                if self._last_class == "18:00 CrossFit":
+                    return {"success": False, "message": "La clase ya está reservada", "error_type": "ALREADY_RESERVED"}
+                if self._last_class == "20:00 CrossFit":
+                    return {"success": False, "message": "Sin cupos", "error_type": "NO_CUPOS"}
+                return {"success": True, "message": "ok", "error_type": None}
+
+            async def fake_locate(self, nombre_clase):
+                self._last_class = nombre_clase
+
+            login = AsyncMock()
+            with patch('app.services.preparation_service.PreparationService._launch_browser', fake_launch), \
+                 patch('app.services.preparation_service.PreparationService._perform_login', login), \
+                 patch('app.services.preparation_service.PreparationService._navigate_to_classes', AsyncMock()), \
+                 patch('app.services.preparation_service.PreparationService._select_date', AsyncMock()), \
+                 patch('app.services.preparation_service.PreparationService._locate_class', fake_locate), \
+                 patch('app.services.preparation_service.PreparationService._prepare_reservation_button', fake_button), \
+                 patch('app.services.preparation_service.PreparationService._verify_reservation_success',
+                       AsyncMock(return_value={"success": True, "message": "Reserva exitosa", "error_type": None})), \
+                 patch('app.services.preparation_service.PreparationService._cleanup_browser', AsyncMock()):
+
+                result = await service.execute_batch([
+                    ("17:00 CrossFit", "LU 21"),
+                    ("18:00 CrossFit", "MA 22"),
+                    ("20:00 CrossFit", "LU 21"),
+                ])
+
+        # Login único (las pestañas reutilizan la sesión del contexto)
+        login.assert_called_once()
+        # Una pestaña por fecha
+        assert context.new_page.call_count == 2
+
+        results = result["results"]
+        assert [r["nombre_clase"] for r in results] == ["17:00 CrossFit", "18:00 CrossFit", "20:00 CrossFit"]
+        assert results[0]["success"] is True
+        assert results[1]["success"] is True  # Ya reservada cuenta como éxito
+        assert results[2]["success"] is False
+        assert results[2]["error_type"] == "NO_CUPOS"
+        assert result["success"] is False
+
+    @pytest.mark.asyncio
+    async def test_execute_batch_respects_tab_limit(self):
+        """Test que no se abren más pestañas en paralelo que el límite"""
+        with patch.dict('os.environ', ENV):
+            service = BatchReservationService(max_tabs=1)
+
+            active = 0
+            peak = 0
+
+            async def fake_select(self, fecha):
+                nonlocal active, peak
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+
+            context = MagicMock()
+            context.new_page = AsyncMock(side_effect=lambda: _mock_page())
+
+            async def fake_launch(self):
+                self.page = _mock_page()
+                self.context = context
+
+            async def fake_button(self):
+                self.button_selector = 'button:has-text("Reservar")'
+                return {"success": True, "message": "ok", "error_type": None}
+
+            with patch('app.services.preparation_service.PreparationService._launch_browser', fake_launch), \
+                 patch('app.services.preparation_service.PreparationService._perform_login', AsyncMock()), \
+                 patch('app.services.preparation_service.PreparationService._navigate_to_classes', AsyncMock()), \
+                 patch('app.services.preparation_service.PreparationService._select_date', fake_select), \
+                 patch('app.services.preparation_service.PreparationService._locate_class', AsyncMock()), \
+                 patch('app.services.preparation_service.PreparationService._prepare_reservation_button', fake_button), \
+                 patch('app.services.preparation_service.PreparationService._verify_reservation_success',
+                       AsyncMock(return_value={"success": True, "message": "ok", "error_type": None})), \
+                 patch('app.services.preparation_service.PreparationService._cleanup_browser', AsyncMock()):
+
+                result = await service.execute_batch([
+                    ("17:00 CrossFit", "LU 21"),
+                    ("17:00 CrossFit", "MA 22"),
+                    ("17:00 CrossFit", "MI 23"),
+                ])
+
+        assert peak == 1
+        assert result["success"] is True
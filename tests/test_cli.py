@@ -0,0 +1,85 @@
+"""
+Tests para app.cli - Ejecución de reservas sin servidor HTTP
+
+Estas pruebas validan:
+- Resultado JSON en stdout
+- Códigos de salida según el resultado
+- Que el CLI no importa FastAPI
+"""
+
+import json
+import subprocess
+import sys
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app import cli
+
+
+def _run(capsys, argv):
+    exit_code = cli.main(argv)
+    payload = json.loads(capsys.readouterr().out)
+    return exit_code, payload
+
+
+def test_inmediata_success(capsys):
+    """Test: reserva inmediata exitosa devuelve 0 y JSON"""
+    manager = MagicMock()
+    manager.execute_immediate_reservation = AsyncMock(return_value={"success": True, "message": "ok"})
+
+    with patch("app.services.reservation_manager.ReservationManager", return_value=manager):
+        exit_code, payload = _run(capsys, ["inmediata", "--clase", "18:00 CrossFit 18:00-19:00", "--fecha", "LU 21"])
+
+    assert exit_code == cli.EXIT_OK
+    assert payload["success"] is True
+    assert payload["exit_code"] == 0
+    manager.execute_immediate_reservation.assert_awaited_once_with("18:00 CrossFit 18:00-19:00", "LU 21")
+
+
+def test_inmediata_missing_credentials(capsys):
+    """Test: credenciales faltantes devuelven código de configuración"""
+    with patch("app.services.reservation_manager.ReservationManager", side_effect=ValueError("Faltan credenciales")):
+        exit_code, payload = _run(capsys, ["inmediata", "--clase", "x", "--fecha", "LU 21"])
+
+    assert exit_code == cli.EXIT_CONFIG_ERROR
+    assert payload["error_type"] == "CREDENTIALS_ERROR"
+
+
+def test_hoy_without_active_class(capsys):
+    """Test: sin clase activa para hoy no hay nada que hacer"""
+    with patch("app.services.config_manager.ConfigManager.detectar_clase_para_hoy", return_value=None):
+        exit_code, payload = _run(capsys, ["hoy"])
+
+    assert exit_code == cli.EXIT_NOTHING_TO_DO
+    assert payload["success"] is False
+
+
+@pytest.mark.parametrize("error_type, expected", [
+    (None, cli.EXIT_OK),
+    ("TOO_LATE", cli.EXIT_TOO_LATE),
+    ("PREPARATION_FAILED", cli.EXIT_FAILED),
+])
+def test_programada_exit_codes(capsys, error_type, expected):
+    """Test: el error_type de la respuesta programada define el código de salida"""
+    response = MagicMock()
+    response.error_type = error_type
+    response.model_dump.return_value = {"id": "job-1", "error_type": error_type}
+    manager = MagicMock()
+    manager.execute_scheduled_reservation = AsyncMock(return_value=response)
+
+    with patch("app.services.scheduled_reservation_manager.ScheduledReservationManager", return_value=manager):
+        exit_code, payload = _run(capsys, [
+            "programada", "--clase", "18:00 CrossFit 18:00-19:00", "--fecha-clase", "LU 21",
+            "--fecha-reserva", "2025-01-19", "--hora-reserva", "17:00:00"
+        ])
+
+    assert exit_code == expected
+    assert payload["id"] == "job-1"
+
+
+def test_cli_does_not_import_fastapi():
+    """Test: importar el CLI no arrastra FastAPI ni Playwright"""
+    code = "import sys, app.cli; print('fastapi' in sys.modules, 'playwright' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "False False"
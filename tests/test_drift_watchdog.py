@@ -0,0 +1,226 @@
+"""
+Tests para DriftWatchdog - Deriva de reloj durante las esperas
+
+Estas pruebas validan:
+- Un salto del reloj de pared confirmado por el servidor re-ancla los plazos
+- Un salto sin confirmación mantiene los plazos monotónicos
+- La espera en curso se re-arma con el plazo nuevo
+- Discrepancia con la hora del servidor: falla con TIMING_DRIFT
+- Demasiados saltos: falla en vez de seguir re-anclando
+- Offset del servidor: solo se corrige la parte confirmada por las estimaciones
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+
+from app.services.direct_timing_controller import DirectTimingController
+from app.services.drift_watchdog import DriftWatchdog, TimingDriftError
+
+SANTIAGO = pytz.timezone("America/Santiago")
+
+
+class SimulatedClocks:
+    """Relojes simulados; after_sleep corre al final de cada tramo (revisión del watchdog)"""
+
+    def __init__(self, start_wall: datetime):
+        self.mono_ns = 10_000_000_000
+        self.wall = start_wall
+        self.after_sleep = None
+
+    def mono(self) -> int:
+        return self.mono_ns
+
+    def wall_now(self) -> datetime:
+        return self.wall
+
+    async def sleep(self, seconds: float):
+        self.mono_ns += int(round(seconds * 1e9))
+        self.wall += timedelta(seconds=seconds)
+        if self.after_sleep:
+            await self.after_sleep()
+
+
+class FakeProbe:
+    def __init__(self, offset_ms: float, uncertainty_ms: float = 500):
+        self.offset_ms = offset_ms
+        self.uncertainty_ms = uncertainty_ms
+
+    async def estimate(self, controller):
+        return {"offset_ms": self.offset_ms, "uncertainty_ms": self.uncertainty_ms, "rtt_ms": 20.0}
+
+
+def _setup(probe=None, max_rearms=3):
+    clocks = SimulatedClocks(SANTIAGO.localize(datetime(2025, 3, 10, 16, 0, 0)))
+    controller = DirectTimingController(wall_clock=clocks.wall_now, mono_clock=clocks.mono, sleep=clocks.sleep)
+    timing = controller.calculate_execution_times("2025-03-10", "17:00:00")
+    samples = []
+    watchdog = DriftWatchdog(
+        controller,
+        {"preparation": timing["preparation_deadline"], "execution": timing["execution_deadline"]},
+        on_sample=samples.append,
+        probe=probe,
+        interval_seconds=30,
+        rearm_threshold_ms=250,
+        fail_threshold_ms=3000,
+        max_rearms=max_rearms
+    )
+    return clocks, controller, timing, watchdog, samples
+
+
+@pytest.mark.asyncio
+async def test_wall_step_rearms_deadlines():
+    """Test: un salto de +2s confirmado por el servidor acorta la espera real en 2s"""
+    clocks, controller, timing, watchdog, samples = _setup(probe=FakeProbe(offset_ms=40))
+    clocks.wall += timedelta(seconds=2)
+
+    sample = await watchdog.check()
+
+    assert sample["rearmed"] is True
+    assert sample["wall_step_ms"] == pytest.approx(2000)
+    assert watchdog.wakeup.is_set()
+    remaining = controller.seconds_until(watchdog.deadline("execution"))
+    assert remaining == pytest.approx(controller.seconds_until(timing["execution_deadline"]) - 2)
+    assert samples == [sample]
+
+
+@pytest.mark.parametrize("probe, probe_server", [
+    (None, True),                        # sin sonda
+    (FakeProbe(offset_ms=40), False),    # revisión sin sonda (T-2s)
+    (FakeProbe(offset_ms=-2000), True),  # el servidor ve el reloj local adelantado
+])
+@pytest.mark.asyncio
+async def test_unconfirmed_step_keeps_monotonic_deadlines(probe, probe_server):
+    """Test: un salto local que el servidor no confirma no mueve T"""
+    clocks, controller, timing, watchdog, samples = _setup(probe=probe)
+    clocks.wall += timedelta(seconds=2)
+
+    sample = await watchdog.check(probe_server=probe_server)
+
+    assert sample["rearmed"] is False
+    assert sample["failed"] is False
+    assert sample["rearms"] == 1
+    assert watchdog.deadline("execution") == timing["execution_deadline"]
+    assert not watchdog.wakeup.is_set()
+
+
+@pytest.mark.asyncio
+async def test_small_jitter_does_not_rearm():
+    """Test: diferencias bajo el umbral no tocan los plazos"""
+    clocks, controller, timing, watchdog, samples = _setup()
+    clocks.wall += timedelta(milliseconds=100)
+
+    sample = await watchdog.check()
+
+    assert sample["rearmed"] is False
+    assert watchdog.deadline("execution") == timing["execution_deadline"]
+
+
+@pytest.mark.asyncio
+async def test_sleep_follows_rearmed_deadline():
+    """Test: la espera en curso lee el plazo re-anclado en el tramo siguiente"""
+    clocks, controller, timing, watchdog, samples = _setup(probe=FakeProbe(offset_ms=0))
+    controller.segment_seconds = 30
+    start_ns = clocks.mono_ns
+    jumped = []
+
+    async def ntp_correction():
+        if not jumped and clocks.mono_ns - start_ns >= 600e9:
+            jumped.append(True)
+            clocks.wall += timedelta(minutes=1)
+        await watchdog.check()
+
+    clocks.after_sleep = ntp_correction
+    result = await controller.sleep_until(watchdog.source("execution"), wakeup=watchdog.wakeup)
+
+    slept = (clocks.mono_ns - start_ns) / 1e9
+    assert slept == pytest.approx(3600.001 - 60)
+    assert result["success"] is True
+    assert result["target_time"] == timing["execution_datetime"]
+    assert clocks.wall == timing["execution_datetime"]
+    assert watchdog.rearms == 1
+
+
+@pytest.mark.asyncio
+async def test_server_disagreement_fails_with_timing_drift():
+    """Test: el servidor difiere más que la tolerancia: TIMING_DRIFT en vez de click"""
+    clocks, controller, timing, watchdog, samples = _setup(probe=FakeProbe(offset_ms=-8000))
+
+    sample = await watchdog.check()
+
+    assert sample["failed"] is True
+    assert sample["server_offset_ms"] == -8000
+    with pytest.raises(TimingDriftError):
+        watchdog.deadline("execution")
+
+
+@pytest.mark.asyncio
+async def test_server_within_uncertainty_is_trusted():
+    """Test: discrepancia dentro de la incertidumbre del header Date no falla"""
+    clocks, controller, timing, watchdog, samples = _setup(probe=FakeProbe(offset_ms=3400, uncertainty_ms=520))
+
+    sample = await watchdog.check()
+
+    assert sample["failed"] is False
+    assert watchdog.deadline("execution") == timing["execution_deadline"]
+
+
+@pytest.mark.asyncio
+async def test_unstable_clock_fails_during_sleep():
+    """Test: más saltos que DRIFT_MAX_REARMS cortan la espera con TimingDriftError"""
+    clocks, controller, timing, watchdog, samples = _setup(max_rearms=2)
+    controller.segment_seconds = 30
+
+    async def flapping_clock():
+        clocks.wall += timedelta(seconds=5)
+        await watchdog.check(probe_server=False)
+
+    clocks.after_sleep = flapping_clock
+    with pytest.raises(TimingDriftError):
+        await controller.sleep_until(watchdog.source("execution"), wakeup=watchdog.wakeup)
+
+    assert watchdog.rearms == 3
+    assert [s["rearmed"] for s in samples] == [False, False, False]
+    assert samples[-1]["failed"] is True
+
+
+@pytest.mark.asyncio
+async def test_synced_clock_needs_no_server_correction():
+    """Test: un offset dentro de la incertidumbre del header Date no corrige el disparo"""
+    clocks, controller, timing, watchdog, samples = _setup(probe=FakeProbe(offset_ms=-320, uncertainty_ms=510))
+
+    await watchdog.check()
+
+    assert watchdog.server_offset_ms() == 0.0
+
+
+@pytest.mark.asyncio
+async def test_server_correction_intersects_estimates():
+    """Test: varias estimaciones acotan el offset; se aplica el mínimo confirmado"""
+    probe = FakeProbe(offset_ms=900, uncertainty_ms=510)
+    clocks, controller, timing, watchdog, samples = _setup(probe=probe)
+
+    await watchdog.check()
+    assert watchdog.server_offset_ms() == pytest.approx(390)
+
+    probe.offset_ms = 1300
+    await watchdog.check()
+    assert watchdog.server_offset_ms() == pytest.approx(790)
+    assert samples[-1]["server_correction_ms"] == pytest.approx(790)
+
+
+@pytest.mark.asyncio
+async def test_server_correction_follows_unconfirmed_wall_step():
+    """Test: si la pared salta sin re-anclar, el offset se mide contra el anclaje de los plazos"""
+    probe = FakeProbe(offset_ms=0, uncertainty_ms=510)
+    clocks, controller, timing, watchdog, samples = _setup(probe=probe)
+    await watchdog.check()
+
+    # La pared se adelanta 2s pero el servidor dice que ahora va 2s adelantada: no se re-ancla
+    clocks.wall += timedelta(seconds=2)
+    probe.offset_ms = -2000
+    sample = await watchdog.check()
+
+    assert sample["rearmed"] is False
+    assert watchdog.server_offset_ms() == 0.0
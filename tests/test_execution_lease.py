@@ -0,0 +1,249 @@
+"""
+Tests para ExecutionLease - Exclusión mutua entre workers para reservas programadas
+
+Estas pruebas validan (con ambos backends):
+- Un único dueño por job
+- Toma de control cuando el lease del dueño expira, con fencing token creciente
+- Standby que se retira al llegar al plazo monotónico
+- Rechazo del dueño anterior tras la toma de control (fencing)
+- Bloqueo de nuevas ejecuciones cuando el job se completó (solo durante la retención)
+- Modo redundante: el ejecutor cuyo click falla porque otro ya reservó cuenta como éxito
+- Modo redundante: detección de un ejecutor sin pares (un solo worker)
+"""
+
+import asyncio
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.models.reserva import EstadoReservaProgramada, ReservaProgramadaRequest
+from app.services.direct_timing_controller import Deadline
+from app.services.execution_lease import (
+    ExecutionLeaseManager,
+    InMemoryLeaseBackend,
+    SQLiteLeaseBackend
+)
+from app.services.scheduled_reservation_manager import ScheduledReservationManager
+
+
+def _deadline_in(seconds: float) -> Deadline:
+    return Deadline(datetime.now() + timedelta(seconds=seconds), time.monotonic_ns() + int(seconds * 1e9))
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend_and_clock(request, tmp_path, fake_clock):
+    clock = fake_clock
+    clock.now = 1_700_000_000.0  # Reloj de pared (epoch)
+    if request.param == "memory":
+        return InMemoryLeaseBackend(clock=clock), clock
+    return SQLiteLeaseBackend(str(tmp_path / "leases.db"), clock=clock), clock
+
+
+def test_single_owner(backend_and_clock):
+    """Test: solo un worker obtiene el lease vigente"""
+    backend, _ = backend_and_clock
+    lease_a = backend.try_acquire("job", "worker-a", ttl=15)
+    lease_b = backend.try_acquire("job", "worker-b", ttl=15)
+
+    assert lease_a is not None
+    assert lease_a.token == 1
+    assert lease_b is None
+    assert backend.is_valid(lease_a)
+
+
+def test_takeover_after_expiry_increments_token(backend_and_clock):
+    """Test: si el dueño deja de renovar, otro worker toma el control con token mayor"""
+    backend, clock = backend_and_clock
+    lease_a = backend.try_acquire("job", "worker-a", ttl=15)
+
+    clock.now += 16
+    lease_b = backend.try_acquire("job", "worker-b", ttl=15)
+
+    assert lease_b is not None
+    assert lease_b.token == lease_a.token + 1
+    # Fencing: el dueño anterior ya no puede actuar ni renovar
+    assert backend.is_valid(lease_a) is False
+    assert backend.renew(lease_a, ttl=15) is False
+    assert backend.is_valid(lease_b) is True
+
+
+def test_renew_keeps_ownership(backend_and_clock):
+    """Test: renovar evita la toma de control"""
+    backend, clock = backend_and_clock
+    lease_a = backend.try_acquire("job", "worker-a", ttl=15)
+
+    clock.now += 10
+    assert backend.renew(lease_a, ttl=15) is True
+    clock.now += 10
+
+    assert backend.try_acquire("job", "worker-b", ttl=15) is None
+
+
+def test_release_allows_immediate_takeover(backend_and_clock):
+    """Test: liberar sin completar permite a otro worker tomarlo de inmediato"""
+    backend, _ = backend_and_clock
+    lease_a = backend.try_acquire("job", "worker-a", ttl=15)
+    backend.release(lease_a, completed=False)
+
+    lease_b = backend.try_acquire("job", "worker-b", ttl=15)
+    assert lease_b is not None
+    assert lease_b.token == 2
+
+
+def test_completed_job_blocks_new_owners(backend_and_clock):
+    """Test: un job completado no se vuelve a ejecutar"""
+    backend, _ = backend_and_clock
+    lease_a = backend.try_acquire("job", "worker-a", ttl=15)
+    backend.release(lease_a, completed=True)
+
+    assert backend.is_completed("job") is True
+    assert backend.try_acquire("job", "worker-b", ttl=15) is None
+
+
+def test_completed_mark_and_winner_expire_after_retention(backend_and_clock):
+    """Test: pasada la retención, la misma clave se puede volver a ejecutar"""
+    backend, clock = backend_and_clock
+    lease_a = backend.try_acquire("job", "worker-a", ttl=15)
+    backend.claim_win("job", "worker-a")
+    backend.release(lease_a, completed=True)
+
+    clock.now += backend.completed_retention - 1
+    assert backend.try_acquire("job", "worker-b", ttl=15) is None
+    assert backend.get_winner("job") == "worker-a"
+
+    clock.now += 2
+    assert backend.is_completed("job") is False
+    assert backend.get_winner("job") is None
+    lease_b = backend.try_acquire("job", "worker-b", ttl=15)
+    assert lease_b is not None
+    assert backend.claim_win("job", "worker-b") == "worker-b"
+
+
+def test_sqlite_legacy_completed_rows_are_pruned(tmp_path):
+    """Test: un archivo sin completed_at se migra y sus completados dejan de bloquear"""
+    db_path = str(tmp_path / "legacy.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "CREATE TABLE execution_leases (job_key TEXT PRIMARY KEY, owner TEXT NOT NULL, "
+            "token INTEGER NOT NULL, expires_at REAL NOT NULL, completed INTEGER NOT NULL DEFAULT 0)"
+        )
+        conn.execute("INSERT INTO execution_leases VALUES ('job', 'worker-a', 3, 0, 1)")
+
+    backend = SQLiteLeaseBackend(db_path)
+
+    assert backend.is_completed("job") is False
+    assert backend.try_acquire("job", "worker-b", ttl=15) is not None
+
+
+@pytest.mark.asyncio
+async def test_wait_for_lease_takes_over_when_owner_releases():
+    """Test: un worker en standby toma el control cuando el dueño libera"""
+    backend = InMemoryLeaseBackend()
+    owner = ExecutionLeaseManager(backend, owner_id="owner", ttl_seconds=1.5)
+    standby = ExecutionLeaseManager(backend, owner_id="standby", ttl_seconds=1.5)
+
+    lease = await owner.acquire("job")
+    asyncio.get_running_loop().call_later(0.1, backend.release, lease, False)
+
+    taken = await standby.wait_for_lease("job", until=_deadline_in(3))
+
+    assert taken is not None
+    assert taken.owner == "standby"
+    assert taken.token == 2
+
+
+@pytest.mark.asyncio
+async def test_wait_for_lease_returns_none_when_completed():
+    """Test: el standby termina si el dueño completó el job"""
+    backend = InMemoryLeaseBackend()
+    owner = ExecutionLeaseManager(backend, owner_id="owner", ttl_seconds=1.5)
+    standby = ExecutionLeaseManager(backend, owner_id="standby", ttl_seconds=1.5)
+
+    lease = await owner.acquire("job")
+    await owner.release(lease, completed=True)
+
+    assert await standby.wait_for_lease("job", until=_deadline_in(3)) is None
+
+
+@pytest.mark.asyncio
+async def test_wait_for_lease_gives_up_at_deadline():
+    """Test: el standby se retira al llegar al plazo (la hora de preparación)"""
+    backend = InMemoryLeaseBackend()
+    owner = ExecutionLeaseManager(backend, owner_id="owner", ttl_seconds=1.5)
+    standby = ExecutionLeaseManager(backend, owner_id="standby", ttl_seconds=1.5)
+    await owner.acquire("job")
+
+    started = time.monotonic()
+    assert await standby.wait_for_lease("job", until=_deadline_in(0.2)) is None
+    assert time.monotonic() - started < 1.0
+
+
+def test_redundant_slots_give_each_executor_its_own_lease(backend_and_clock):
+    """Test: en modo redundante cada ejecutor toma un slot distinto"""
+    backend, _ = backend_and_clock
+    slots = ExecutionLeaseManager.slot_keys("job", 2)
+
+    lease_a = next(filter(None, (backend.try_acquire(k, "worker-a", ttl=15) for k in slots)))
+    lease_b = next(filter(None, (backend.try_acquire(k, "worker-b", ttl=15) for k in slots)))
+
+    assert ExecutionLeaseManager.slot_keys("job", 1) == ["job"]
+    assert lease_a.job_key != lease_b.job_key
+    assert all(backend.try_acquire(k, "worker-c", ttl=15) is None for k in slots)
+
+
+@pytest.mark.asyncio
+async def test_peer_holders_detects_lonely_redundant_executor(backend_and_clock):
+    """Test: sin otro worker con slot vigente, el ejecutor redundante se sabe solo"""
+    backend, clock = backend_and_clock
+    slots = ExecutionLeaseManager.slot_keys("job", 2)
+    manager = ExecutionLeaseManager(backend, owner_id="worker-a", ttl_seconds=15)
+
+    await manager.acquire_any(slots)
+    assert await manager.peer_holders(slots) == []
+
+    backend.try_acquire(slots[1], "worker-b", ttl=15)
+    assert await manager.peer_holders(slots) == ["worker-b"]
+
+    clock.now += 16
+    assert await manager.peer_holders(slots) == []
+
+
+def test_claim_win_first_executor_wins(backend_and_clock):
+    """Test: el registro de coordinación conserva al primer ganador"""
+    backend, _ = backend_and_clock
+
+    assert backend.get_winner("job") is None
+    assert backend.claim_win("job", "worker-a") == "worker-a"
+    assert backend.claim_win("job", "worker-b") == "worker-a"
+    assert backend.get_winner("job") == "worker-a"
+
+
+@pytest.mark.asyncio
+async def test_redundant_loser_with_failed_click_reports_success():
+    """Test: si el click falla pero otro ejecutor ya ganó, el job no queda FAILED"""
+    backend = InMemoryLeaseBackend()
+    manager = ScheduledReservationManager(preparation_service=MagicMock(_cleanup_browser=AsyncMock()))
+    manager.lease_manager = ExecutionLeaseManager(backend, owner_id="loser")
+    manager._redundant = True
+    manager._base_lease_key = "job"
+    request = ReservaProgramadaRequest(
+        nombre_clase="18:00 CrossFit 18:00-19:00", fecha_clase="LU 21",
+        fecha_reserva="2025-03-10", hora_reserva="17:00:00"
+    )
+
+    assert await manager._redundant_winner(wait_seconds=0) is None
+
+    # El ganador registra su triunfo mientras el perdedor espera
+    asyncio.get_running_loop().call_later(0.05, backend.claim_win, "job", "winner")
+    winner = await manager._redundant_winner(wait_seconds=2)
+    response = manager._redundant_success_response("id-1", request, winner)
+
+    assert winner == "winner"
+    assert response.estado == EstadoReservaProgramada.EXITOSA
+    assert "winner" in response.mensaje
+
+    manager._redundant = False
+    assert await manager._redundant_winner(wait_seconds=0) is None
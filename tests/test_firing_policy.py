@@ -0,0 +1,98 @@
+"""
+Tests para FiringPolicy - Disparo compensado por latencia
+
+Estas pruebas validan:
+- Adelanto = RTT/2 + despacho - margen, con la mediana del RTT
+- Sin medición o con la compensación desactivada se dispara en T+1ms
+- El adelanto se limita (ni negativo ni mayor que FIRING_MAX_LEAD_MS)
+- Llegada prevista vs header Date del servidor
+- El offset del reloj del servidor mueve el disparo y la llegada prevista
+"""
+
+from datetime import datetime
+
+import pytest
+import pytz
+
+from app.services.direct_timing_controller import Deadline
+from app.services.firing_policy import FiringPolicy
+
+SANTIAGO = pytz.timezone("America/Santiago")
+
+
+def test_lead_is_half_rtt_plus_dispatch_minus_margin():
+    """Test: 5 muestras de RTT, se usa la mediana (un outlier no mueve el disparo)"""
+    policy = FiringPolicy(enabled=True, default_margin_ms=5, max_lead_ms=250)
+
+    plan = policy.plan([40, 38, 300, 42, 41], dispatch_ms=12)
+
+    assert plan["compensated"] is True
+    assert plan["rtt_ms"] == 41
+    assert plan["one_way_ms"] == 20.5
+    assert plan["lead_ms"] == pytest.approx(20.5 + 12 - 5)
+
+
+def test_class_margin_overrides_default():
+    policy = FiringPolicy(enabled=True, default_margin_ms=5)
+
+    plan = policy.plan([40], dispatch_ms=10, margin_ms=25)
+
+    assert plan["margin_ms"] == 25
+    assert plan["lead_ms"] == pytest.approx(5)
+
+
+@pytest.mark.parametrize("rtt, dispatch, enabled", [([], 10, True), ([40], None, True), ([40], 10, False)])
+def test_no_compensation_fires_at_execution_time(rtt, dispatch, enabled):
+    """Test: sin RTT, sin despacho medido o desactivado: adelanto 0"""
+    plan = FiringPolicy(enabled=enabled).plan(rtt, dispatch)
+
+    assert plan["compensated"] is False
+    assert plan["lead_ms"] == 0
+
+
+def test_lead_is_clamped():
+    policy = FiringPolicy(enabled=True, default_margin_ms=5, max_lead_ms=100)
+
+    assert policy.plan([2], dispatch_ms=1)["lead_ms"] == 0
+    assert policy.plan([900], dispatch_ms=50)["lead_ms"] == 100
+
+
+def test_fire_deadline_moves_both_clocks():
+    execution = Deadline(SANTIAGO.localize(datetime(2025, 3, 10, 17, 0, 0, 1000)), 5_000_000_000)
+    plan = FiringPolicy(enabled=True, default_margin_ms=0).plan([40], dispatch_ms=10)
+
+    fire = FiringPolicy.fire_deadline(execution, plan)
+
+    assert fire.mono_ns == 5_000_000_000 - 30_000_000
+    assert (execution.wall - fire.wall).total_seconds() == pytest.approx(0.030)
+
+
+@pytest.mark.parametrize("server_date, consistent", [
+    ("Mon, 10 Mar 2025 20:00:00 GMT", True),   # 17:00:00 en Santiago (UTC-3)
+    ("Mon, 10 Mar 2025 19:59:59 GMT", False),  # el servidor vio la llegada un segundo antes
+    (None, None),
+])
+def test_arrival_report_against_server_date(server_date, consistent):
+    """Test: la llegada prevista debe caer dentro del segundo del header Date"""
+    plan = FiringPolicy(enabled=True, default_margin_ms=5).plan([40], dispatch_ms=10)
+    fired_at = SANTIAGO.localize(datetime(2025, 3, 10, 16, 59, 59, 976000))
+
+    report = FiringPolicy.arrival_report(fired_at, plan, server_date)
+
+    assert report["predicted_arrival"] == SANTIAGO.localize(datetime(2025, 3, 10, 17, 0, 0, 6000)).isoformat()
+    assert report["consistent"] is consistent
+
+
+def test_server_offset_moves_fire_and_predicted_arrival():
+    """Test: con el servidor 300ms adelantado, T del servidor ocurre 300ms antes en la hora local"""
+    execution = Deadline(SANTIAGO.localize(datetime(2025, 3, 10, 17, 0, 0, 1000)), 5_000_000_000)
+    plan = FiringPolicy(enabled=True, default_margin_ms=0).plan([40], dispatch_ms=10, server_offset_ms=300)
+
+    fire = FiringPolicy.fire_deadline(execution, plan)
+    report = FiringPolicy.arrival_report(fire.wall, plan, "Mon, 10 Mar 2025 20:00:00 GMT")
+
+    assert plan["server_offset_ms"] == 300
+    assert plan["lead_ms"] == 30
+    assert fire.mono_ns == 5_000_000_000 - 330_000_000
+    assert report["predicted_arrival"] == execution.wall.isoformat()
+    assert report["consistent"] is True
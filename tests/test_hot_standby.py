@@ -0,0 +1,136 @@
+"""
+Tests para HotStandby - Página de respaldo armada en paralelo
+
+Estas pruebas validan:
+- El respaldo se arma sobre el navegador de la primaria y reporta su memoria
+- Tope de memoria: el respaldo se descarta o se libera
+- Promoción solo si la primaria falla y el respaldo está listo
+- El cleanup del respaldo nunca cierra el navegador compartido
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services.hot_standby import HotStandby
+from app.services.preparation_service import PreparationService
+
+ENV = {
+    'CROSSFIT_URL': 'https://test.crossfit.com',
+    'USERNAME': 'test@example.com',
+    'PASSWORD': 'testpass',
+    'BROWSER_HEADLESS': 'true'
+}
+
+
+def _page_service(ready: bool, memory_mb: float = 40.0):
+    service = MagicMock()
+    service.validate_button_ready = AsyncMock(return_value={"button_ready": ready})
+    service.page_memory_mb = AsyncMock(return_value=memory_mb)
+    service.prepare_reservation = AsyncMock(return_value={"success": True, "message": "ok"})
+    service._cleanup_browser = AsyncMock()
+    return service
+
+
+def _standby(primary_ready: bool = True, standby_ready: bool = True, memory_mb: float = 40.0, **kwargs):
+    primary = _page_service(primary_ready)
+    primary.target = ("18:00 CrossFit 18:00-19:00", "LU 21")
+    standby_page = _page_service(standby_ready, memory_mb)
+    primary.spawn_standby = AsyncMock(return_value=standby_page)
+    hot = HotStandby(primary, isolated=False, heartbeat_seconds=3600, max_memory_mb=100, **kwargs)
+    return hot, primary, standby_page
+
+
+@pytest.mark.asyncio
+async def test_arm_prepares_standby_on_primary_browser():
+    hot, primary, standby_page = _standby()
+
+    report = await hot.arm()
+
+    assert report["success"] is True
+    assert report["memory_mb"] == 40.0
+    assert hot.armed is True
+    assert standby_page.prepare_reservation.await_args.args == ("18:00 CrossFit 18:00-19:00", "LU 21")
+    await hot.release()
+    standby_page._cleanup_browser.assert_awaited_once()
+    primary._cleanup_browser.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_standby_over_memory_bound_is_discarded():
+    hot, primary, standby_page = _standby(memory_mb=350.0)
+
+    report = await hot.arm()
+
+    assert report["success"] is False
+    assert hot.armed is False
+    standby_page._cleanup_browser.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_reports_both_pages_and_bounds_memory():
+    samples = []
+    hot, primary, standby_page = _standby(on_sample=samples.append)
+    await hot.arm()
+
+    standby_page.page_memory_mb.return_value = 120.0
+    sample = await hot.probe()
+
+    assert sample == {"primary_ready": True, "standby_ready": True, "standby_memory_mb": 120.0}
+    assert samples == [sample]
+    assert hot.armed is False
+    standby_page._cleanup_browser.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_failed_primary_promotes_ready_standby():
+    hot, primary, standby_page = _standby(primary_ready=False)
+    await hot.arm()
+
+    report = await hot.check_and_promote()
+
+    assert report == {"primary_ready": False, "standby_ready": True, "promoted": True}
+    primary.adopt_standby.assert_called_once_with(standby_page)
+    assert hot.standby is None
+
+
+@pytest.mark.asyncio
+async def test_healthy_primary_is_not_replaced():
+    hot, primary, standby_page = _standby(primary_ready=True)
+    await hot.arm()
+
+    report = await hot.check_and_promote()
+
+    assert report["promoted"] is False
+    primary.adopt_standby.assert_not_called()
+    await hot.release()
+
+
+@pytest.mark.asyncio
+async def test_standby_cleanup_keeps_shared_browser_and_adopt_swaps_page():
+    with patch.dict('os.environ', ENV):
+        primary = PreparationService()
+    primary.browser = AsyncMock()
+    primary.playwright = AsyncMock()
+    primary.context = AsyncMock()
+    primary.page = MagicMock()
+    # Contexto compartido: la página nueva llega con la sesión iniciada (sin formulario de login)
+    primary.context.new_page = AsyncMock(return_value=AsyncMock(
+        is_closed=MagicMock(return_value=False), is_visible=AsyncMock(return_value=False)
+    ))
+
+    with patch.dict('os.environ', ENV):
+        standby = await primary.spawn_standby(isolated=False)
+    assert standby.authenticated is True
+    assert standby.context is primary.context
+
+    standby.button_selector = 'button:has-text("Reservar")'
+    standby.checkpoint = "button_armed"
+    new_page = standby.page
+    primary.adopt_standby(standby)
+    assert primary.page is new_page
+    assert primary.checkpoint == "button_armed"
+
+    await standby._cleanup_browser()
+    primary.browser.close.assert_not_awaited()
+    primary.context.close.assert_not_awaited()
@@ -0,0 +1,128 @@
+"""
+Tests para IdempotencyRegistry - Registro de reservas programadas en curso
+
+Estas pruebas validan:
+- Detección de solicitudes duplicadas
+- Reintento permitido tras un fallo
+- Expiración por TTL de registros terminales y activos
+- Tamaño acotado: se expulsan terminales; lleno de activos se rechaza el alta
+"""
+
+from app.models.reserva import EstadoJob, ReservaProgramadaRequest
+import pytest
+
+from app.services.idempotency_registry import IdempotencyRegistry, RegistryFullError
+
+
+def _registry(clock, **kwargs):
+    params = {"ttl_seconds": 60, "active_ttl_seconds": 600, "max_entries": 10}
+    params.update(kwargs)
+    return IdempotencyRegistry(clock=clock, **params)
+
+
+KEY = ("18:00 CrossFit 18:00-19:00", "2025-01-19", "17:00:00")
+
+
+def test_key_for_request():
+    """Test: la clave usa clase, fecha y hora de reserva"""
+    request = ReservaProgramadaRequest(
+        nombre_clase=KEY[0], fecha_clase="LU 20", fecha_reserva=KEY[1], hora_reserva=KEY[2]
+    )
+    assert IdempotencyRegistry.key_for(request) == KEY
+
+
+def test_duplicate_returns_existing_entry(fake_clock):
+    """Test: una segunda solicitud devuelve el job existente"""
+    registry = _registry(fake_clock)
+    entry, created = registry.register(KEY, "job-1")
+    registry.update_state(KEY, EstadoJob.ARMED)
+
+    duplicate, created_again = registry.register(KEY, "job-2")
+
+    assert created is True
+    assert created_again is False
+    assert duplicate.job_id == "job-1"
+    assert duplicate.estado == EstadoJob.ARMED
+
+
+def test_retry_allowed_after_failure(fake_clock):
+    """Test: un job fallido libera la clave para reintentar"""
+    registry = _registry(fake_clock)
+    registry.register(KEY, "job-1")
+    registry.update_state(KEY, EstadoJob.FAILED, error_type="PREPARATION_FAILED")
+
+    entry, created = registry.register(KEY, "job-2")
+
+    assert created is True
+    assert entry.job_id == "job-2"
+    assert entry.estado == EstadoJob.PENDING
+
+
+def test_update_state_ignores_stale_job_id(fake_clock):
+    """Test: un job reemplazado no pisa el estado de su reintento"""
+    registry = _registry(fake_clock)
+    registry.register(KEY, "job-1")
+    registry.update_state(KEY, EstadoJob.FAILED)
+    registry.register(KEY, "job-2")
+
+    assert registry.update_state(KEY, EstadoJob.DONE, job_id="job-1") is None
+    assert registry.get(KEY).estado == EstadoJob.PENDING
+
+
+def test_terminal_entries_expire_after_ttl(fake_clock):
+    """Test: los registros terminales expiran tras el TTL"""
+    registry = _registry(fake_clock)
+    registry.register(KEY, "job-1")
+    registry.update_state(KEY, EstadoJob.DONE)
+
+    fake_clock.now += 59
+    assert registry.get(KEY) is not None
+
+    fake_clock.now += 2
+    assert registry.get(KEY) is None
+    assert len(registry) == 0
+
+
+def test_active_entries_use_longer_ttl(fake_clock):
+    """Test: los registros activos sobreviven al TTL terminal"""
+    registry = _registry(fake_clock)
+    registry.register(KEY, "job-1")
+
+    fake_clock.now += 300
+    assert registry.get(KEY) is not None
+
+    fake_clock.now += 301
+    assert registry.get(KEY) is None
+
+
+def test_bounded_size_evicts_terminal_first(fake_clock):
+    """Test: al superar el máximo se expulsa primero un terminal"""
+    registry = _registry(fake_clock, max_entries=2)
+    registry.register(("a", "d", "h"), "job-a")
+    registry.register(("b", "d", "h"), "job-b")
+    registry.update_state(("b", "d", "h"), EstadoJob.DONE)
+
+    registry.register(("c", "d", "h"), "job-c")
+
+    assert len(registry) == 2
+    assert registry.get(("a", "d", "h")) is not None
+    assert registry.get(("b", "d", "h")) is None
+    assert registry.get_by_job_id("job-c") is not None
+
+
+def test_full_of_active_jobs_rejects_new_entry(fake_clock):
+    """Test: un job activo nunca se expulsa (seguiría corriendo y se aceptaría su duplicado)"""
+    registry = _registry(fake_clock, max_entries=2)
+    registry.register(("a", "d", "h"), "job-a")
+    registry.register(("b", "d", "h"), "job-b")
+
+    with pytest.raises(RegistryFullError):
+        registry.register(("c", "d", "h"), "job-c")
+
+    assert registry.register(("a", "d", "h"), "job-a2") == (registry.get(("a", "d", "h")), False)
+    assert registry.get_by_job_id("job-c") is None
+
+    registry.update_state(("a", "d", "h"), EstadoJob.DONE)
+    entry, created = registry.register(("c", "d", "h"), "job-c")
+    assert created is True
+    assert registry.get(("a", "d", "h")) is None
@@ -0,0 +1,176 @@
+"""
+Tests para ImmediateReservationQueue - Cola acotada de reservas inmediatas
+
+Estas pruebas validan:
+- Límite de reservas en paralelo (workers)
+- Rechazo con QueueFullError cuando la cola está llena
+- Tiempo en cola y tiempo de servicio reportados por separado
+- Propagación de errores del handler
+- Al cerrar, ningún llamador queda esperando
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.immediate_queue import ImmediateReservationQueue, QueueFullError
+
+
+class SlowHandler:
+    """Handler que espera a que el test lo libere"""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.running = 0
+        self.max_running = 0
+
+    async def __call__(self, nombre_clase, fecha):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await self.release.wait()
+        self.running -= 1
+        return {"success": True, "message": f"ok {nombre_clase}"}
+
+
+@pytest.mark.asyncio
+async def test_workers_limit_parallel_reservations():
+    """Test: nunca hay más reservas en servicio que workers"""
+    handler = SlowHandler()
+    queue = ImmediateReservationQueue(handler, maxsize=5, workers=2)
+
+    tasks = [asyncio.create_task(queue.submit(f"clase {i}", "LU 21")) for i in range(4)]
+    await asyncio.sleep(0.01)
+    assert handler.running == 2
+
+    handler.release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert handler.max_running == 2
+    assert [r["queue_position"] for r in results] == [1, 2, 3, 4]
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_with_retry_after():
+    """Test: con la cola llena se rechaza indicando posición y Retry-After"""
+    handler = SlowHandler()
+    queue = ImmediateReservationQueue(handler, maxsize=1, workers=1)
+
+    in_service = asyncio.create_task(queue.submit("a", "LU 21"))
+    await asyncio.sleep(0.01)
+    waiting = asyncio.create_task(queue.submit("b", "LU 21"))
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(QueueFullError) as exc_info:
+        await queue.submit("c", "LU 21")
+
+    assert exc_info.value.position == 3
+    assert exc_info.value.retry_after >= 1
+
+    handler.release.set()
+    await asyncio.gather(in_service, waiting)
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_reports_queue_wait_and_service_time():
+    """Test: la espera en cola y el servicio se miden por separado"""
+    now = [0.0]
+
+    async def handler(nombre_clase, fecha):
+        now[0] += 12.0
+        return {"success": True, "message": "ok"}
+
+    queue = ImmediateReservationQueue(handler, maxsize=5, workers=1, clock=lambda: now[0])
+
+    first, second = await asyncio.gather(queue.submit("a", "LU 21"), queue.submit("b", "LU 21"))
+
+    assert first["queue_wait_seconds"] == 0.0
+    assert first["service_time_seconds"] == 12.0
+    assert second["queue_wait_seconds"] == 12.0
+    assert second["service_time_seconds"] == 12.0
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_handler_errors_propagate():
+    """Test: una excepción del handler llega a quien encoló"""
+    async def handler(nombre_clase, fecha):
+        raise RuntimeError("Chromium no inició")
+
+    queue = ImmediateReservationQueue(handler, maxsize=2, workers=1)
+
+    with pytest.raises(RuntimeError, match="Chromium"):
+        await queue.submit("a", "LU 21")
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_identical_requests_share_one_execution():
+    """Test: solicitudes idénticas en curso comparten una sola reserva"""
+    handler = SlowHandler()
+    calls = []
+
+    async def counting_handler(nombre_clase, fecha):
+        calls.append((nombre_clase, fecha))
+        return await handler(nombre_clase, fecha)
+
+    queue = ImmediateReservationQueue(counting_handler, maxsize=5, workers=2, account="test@example.com")
+
+    first = asyncio.create_task(queue.submit("18:00 CrossFit 18:00-19:00", "LU 21"))
+    await asyncio.sleep(0.01)
+    retry = asyncio.create_task(queue.submit("18:00 CrossFit 18:00-19:00", "lu 21"))
+    other = asyncio.create_task(queue.submit("19:00 CrossFit 19:00-20:00", "LU 21"))
+    await asyncio.sleep(0.01)
+
+    handler.release.set()
+    first_result, retry_result, other_result = await asyncio.gather(first, retry, other)
+
+    assert len(calls) == 2
+    assert retry_result["message"] == first_result["message"]
+    assert first_result["coalesced"] is False
+    assert retry_result["coalesced"] is True
+    assert other_result["coalesced"] is False
+    assert queue.stats()["coalesced_total"] == 1
+
+    # Terminada la ejecución, una nueva solicitud vuelve a ejecutar
+    await queue.submit("18:00 CrossFit 18:00-19:00", "LU 21")
+    assert len(calls) == 3
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_execution():
+    """Test: si un llamador se desconecta, los demás reciben el resultado"""
+    handler = SlowHandler()
+    queue = ImmediateReservationQueue(handler, maxsize=5, workers=1)
+
+    leaver = asyncio.create_task(queue.submit("a", "LU 21"))
+    stayer = asyncio.create_task(queue.submit("a", "LU 21"))
+    await asyncio.sleep(0.01)
+    leaver.cancel()
+    handler.release.set()
+
+    result = await stayer
+    assert result["success"] is True
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_close_resolves_in_service_and_queued_requests():
+    """Test: al cerrar, la reserva en servicio, sus seguidores y las encoladas no quedan colgadas"""
+    handler = SlowHandler()
+    queue = ImmediateReservationQueue(handler, maxsize=5, workers=1)
+
+    in_service = queue.enqueue("a", "LU 21")
+    follower = queue.enqueue("a", "LU 21")
+    queued = queue.enqueue("b", "LU 21")
+    await asyncio.sleep(0.01)
+    assert handler.running == 1
+
+    await queue.close()
+
+    results = await asyncio.wait_for(
+        asyncio.gather(in_service, follower, queued, return_exceptions=True), timeout=1
+    )
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
@@ -0,0 +1,110 @@
+"""
+Tests para JobEventBus - Eventos de fases y tiempos de reservas programadas
+
+Estas pruebas validan:
+- Transiciones del registro publicadas como "phase" y muestras como "timing"
+- Historial para suscriptores tardíos y fin del stream en fase terminal
+- Reanudación por número de secuencia
+- Clientes lentos no bloquean la publicación
+"""
+
+import asyncio
+
+import pytest
+
+from app.models.reserva import EstadoJob
+from app.services.idempotency_registry import IdempotencyRegistry
+from app.services.job_events import JobEventBus
+
+
+KEY = ("18:00 CrossFit 18:00-19:00", "2025-01-19", "17:00:00")
+
+
+def _bus_with_registry(**kwargs):
+    bus = JobEventBus(**kwargs)
+    registry = IdempotencyRegistry(ttl_seconds=60, active_ttl_seconds=600, max_entries=10)
+    bus.attach(registry)
+    return bus, registry
+
+
+def test_registry_changes_become_phase_and_timing_events():
+    """Test: cambio de estado -> phase, mismo estado con datos -> timing"""
+    bus, registry = _bus_with_registry()
+    registry.register(KEY, "job-1")
+    registry.update_state(KEY, EstadoJob.PREPARING)
+    registry.update_state(KEY, EstadoJob.PREPARING, prep_wake_lateness_ms=1.5)
+    registry.update_state(KEY, EstadoJob.ARMED, preparation_time=12.3)
+
+    events = bus.history("job-1")
+
+    assert [(e.tipo, e.fase) for e in events] == [
+        ("phase", "programada"),
+        ("phase", "preparando"),
+        ("timing", "preparando"),
+        ("phase", "ejecutando"),
+    ]
+    assert events[2].data == {"prep_wake_lateness_ms": 1.5}
+    assert events[3].data == {"preparation_time": 12.3}
+
+
+@pytest.mark.asyncio
+async def test_subscribe_replays_history_and_stops_at_terminal():
+    """Test: el suscriptor recibe historial, eventos en vivo y termina"""
+    bus, registry = _bus_with_registry()
+    registry.register(KEY, "job-1")
+
+    async def collect():
+        return [event.fase async for event in bus.subscribe("job-1")]
+
+    collector = asyncio.create_task(collect())
+    await asyncio.sleep(0)
+    registry.update_state(KEY, EstadoJob.ARMED)
+    registry.update_state(KEY, EstadoJob.DONE)
+
+    fases = await asyncio.wait_for(collector, timeout=1)
+    assert fases == ["programada", "ejecutando", "exitosa"]
+
+
+@pytest.mark.asyncio
+async def test_subscribe_resumes_after_sequence():
+    """Test: con after_seq solo llegan los eventos posteriores"""
+    bus, registry = _bus_with_registry()
+    registry.register(KEY, "job-1")
+    registry.update_state(KEY, EstadoJob.ARMED)
+    registry.update_state(KEY, EstadoJob.FAILED, error_type="EXECUTION_FAILED")
+    first_seq = bus.history("job-1")[0].seq
+
+    events = [event async for event in bus.subscribe("job-1", after_seq=first_seq)]
+
+    assert [e.fase for e in events] == ["ejecutando", "fallida"]
+    assert events[-1].data["error_type"] == "EXECUTION_FAILED"
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_does_not_block_publisher():
+    """Test: una cola llena descarta el evento más viejo"""
+    bus = JobEventBus(subscriber_queue_size=2)
+    events = bus.subscribe("job-1")
+    first = asyncio.ensure_future(events.__anext__())
+    await asyncio.sleep(0)
+
+    for i in range(5):
+        bus.publish("job-1", "timing", "ejecutando", sample=i)
+
+    # Solo quedan los dos más recientes para el cliente lento; el historial está completo
+    assert (await first).data == {"sample": 3}
+    assert len(bus.history("job-1")) == 5
+    await events.aclose()
+
+
+def test_history_is_bounded():
+    """Test: historial acotado por job y por cantidad de jobs"""
+    bus = JobEventBus(max_events_per_job=3, max_jobs=2)
+    for i in range(5):
+        bus.publish("job-1", "timing", "ejecutando", sample=i)
+    assert [e.data["sample"] for e in bus.history("job-1")] == [2, 3, 4]
+
+    bus.publish("job-2", "phase", "programada")
+    bus.publish("job-3", "phase", "programada")
+    assert not bus.has_job("job-1")
+    assert bus.has_job("job-2") and bus.has_job("job-3")
@@ -0,0 +1,94 @@
+"""
+Tests para logging_config - Logging no bloqueante y ventana crítica
+
+Estas pruebas validan:
+- Retención de mensajes dentro de la ventana crítica
+- Escritura posterior con hora y ubicación originales
+- Anidamiento de ventanas y buffer acotado
+- Salida JSON opcional
+"""
+
+import json
+
+import pytest
+from loguru import logger
+
+from app.logging_config import CriticalWindow, configure_logging, critical_window
+
+
+class ListSink:
+    """Sink que guarda cada línea escrita"""
+
+    def __init__(self):
+        self.lines = []
+
+    def write(self, message):
+        self.lines.append(str(message))
+
+
+@pytest.fixture
+def sink():
+    sink = ListSink()
+    configure_logging(sink, level="DEBUG", json_output=False, enqueue=False)
+    yield sink
+    logger.remove()
+    critical_window._buffer.clear()
+    critical_window._depth = 0
+
+
+def _log_from_hot_path():
+    logger.info("click {sin formato}")
+
+
+def test_messages_are_held_until_window_exits(sink):
+    """Test: dentro de la ventana no se escribe nada; al salir se escribe todo en orden"""
+    logger.info("antes")
+    with critical_window:
+        logger.info("durante 1")
+        _log_from_hot_path()
+        assert len(sink.lines) == 1
+
+    assert len(sink.lines) == 3
+    assert "durante 1" in sink.lines[1]
+    assert "click {sin formato}" in sink.lines[2]
+    assert "_log_from_hot_path" in sink.lines[2]
+
+
+def test_nested_windows_flush_on_last_exit(sink):
+    """Test: con dos jobs en ventana, se escribe al salir el último"""
+    critical_window.enter()
+    critical_window.enter()
+    logger.info("job A")
+
+    assert critical_window.exit() == 0
+    assert sink.lines == []
+    assert critical_window.exit() == 1
+    assert len(sink.lines) == 1
+
+
+def test_buffer_is_bounded(sink):
+    """Test: al llenarse el buffer se descartan mensajes y se avisa"""
+    window = CriticalWindow(max_records=2)
+    logger.remove()
+    logger.add(sink, level="DEBUG", filter=window.filter, format="{message}")
+
+    with window:
+        for i in range(5):
+            logger.info(f"m{i}")
+
+    assert [line.strip() for line in sink.lines] == ["m0", "m1", "⚠️ Ventana crítica: 3 mensajes descartados (buffer lleno)"]
+
+
+def test_json_output_keeps_original_time(sink):
+    """Test: en JSON el mensaje retenido conserva su hora y se marca como buffered"""
+    logger.remove()
+    configure_logging(sink, level="DEBUG", json_output=True, enqueue=False)
+
+    with critical_window:
+        logger.info("retenido")
+        held_at = critical_window._buffer[0]["time"]
+
+    record = json.loads(sink.lines[0])["record"]
+    assert record["message"] == "retenido"
+    assert record["extra"]["buffered"] is True
+    assert record["time"]["timestamp"] == pytest.approx(held_at.timestamp())
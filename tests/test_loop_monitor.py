@@ -0,0 +1,87 @@
+"""
+Tests para LoopLagMonitor - Lag del event loop y descarte de carga
+
+Estas pruebas validan:
+- Percentiles sobre todas las muestras y por ventana de tiempo
+- Detección de lag real cuando una tarea bloquea el loop
+- Descarte de carga con vencimiento
+- Rechazo de reservas inmediatas mientras se descarta carga
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.services.immediate_queue import ImmediateReservationQueue, QueueFullError
+from app.services.loop_monitor import LoopLagMonitor
+
+
+def test_percentiles_and_time_window(fake_clock):
+    """Test: los percentiles respetan la ventana pedida"""
+    monitor = LoopLagMonitor(interval_seconds=0.05, clock=fake_clock)
+
+    for lag in range(1, 101):
+        monitor.record(float(lag))
+    fake_clock.now += 30
+    monitor.record(500.0)
+
+    overall = monitor.stats()
+    assert overall["samples"] == 101
+    assert overall["p50_ms"] == 51.0
+    assert overall["max_ms"] == 500.0
+
+    recent = monitor.recent(5)
+    assert recent["samples"] == 1
+    assert recent["p99_ms"] == 500.0
+
+
+def test_empty_stats(fake_clock):
+    """Test: sin muestras no hay percentiles"""
+    monitor = LoopLagMonitor(clock=fake_clock)
+    assert monitor.stats() == {"samples": 0, "p50_ms": None, "p90_ms": None, "p99_ms": None, "max_ms": None}
+
+
+@pytest.mark.asyncio
+async def test_blocking_task_is_measured():
+    """Test: una tarea que bloquea el loop aparece como lag"""
+    monitor = LoopLagMonitor(interval_seconds=0.01)
+    monitor.ensure_started()
+    await asyncio.sleep(0.03)
+
+    time.sleep(0.08)  # bloquear el loop
+    await asyncio.sleep(0.03)
+    await monitor.stop()
+
+    assert monitor.stats()["max_ms"] >= 50
+
+
+def test_shedding_expires(fake_clock):
+    """Test: el descarte de carga vence solo"""
+    monitor = LoopLagMonitor(clock=fake_clock)
+
+    monitor.shed_load(3)
+    assert monitor.shedding_remaining() == 3
+    fake_clock.now += 3.5
+    assert monitor.shedding_remaining() == 0
+
+
+@pytest.mark.asyncio
+async def test_queue_rejects_new_work_while_shedding(fake_clock):
+    """Test: la cola de reservas inmediatas rechaza mientras se descarta carga"""
+    monitor = LoopLagMonitor(clock=fake_clock)
+
+    async def handler(nombre_clase, fecha):
+        return {"success": True, "message": "ok"}
+
+    queue = ImmediateReservationQueue(handler, maxsize=5, workers=1, load_monitor=monitor)
+    monitor.shed_load(4.2)
+
+    with pytest.raises(QueueFullError) as exc_info:
+        await queue.submit("a", "LU 21")
+    assert exc_info.value.retry_after == 5
+
+    monitor.stop_shedding()
+    result = await queue.submit("a", "LU 21")
+    assert result["success"] is True
+    await queue.close()
@@ -0,0 +1,122 @@
+"""
+Tests para plazos anclados al reloj monotónico - Saltos del reloj de pared
+
+Estas pruebas validan:
+- Un salto del reloj de pared (NTP) durante la espera no mueve el despertar
+- La espera se re-arma por tramos contra el reloj monotónico
+- Cambio de horario de verano de Santiago en medio de la espera
+- Un objetivo ya pasado no duerme
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+
+from app.services.direct_timing_controller import DirectTimingController
+
+SANTIAGO = pytz.timezone("America/Santiago")
+
+
+class SimulatedClocks:
+    """
+    Reloj monotónico y de pared simulados
+
+    sleep() avanza ambos relojes; jump() mueve solo el reloj de pared, como un
+    ajuste de NTP. Los saltos programados con jump_at ocurren a mitad de la espera.
+    """
+
+    def __init__(self, start_wall: datetime):
+        self.mono_ns = 10_000_000_000
+        self.wall = start_wall
+        self.scheduled_jumps = []  # (mono_ns en que ocurre, salto)
+        self.sleeps = []
+
+    def mono(self) -> int:
+        return self.mono_ns
+
+    def wall_now(self) -> datetime:
+        return self.wall
+
+    def jump(self, delta: timedelta):
+        self.wall += delta
+
+    def jump_at(self, after_seconds: float, delta: timedelta):
+        self.scheduled_jumps.append((self.mono_ns + int(after_seconds * 1e9), delta))
+
+    async def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        end = self.mono_ns + int(round(seconds * 1e9))
+        for at, delta in sorted(self.scheduled_jumps, key=lambda j: j[0]):
+            if self.mono_ns < at <= end:
+                self.wall += delta
+        self.scheduled_jumps = [(at, d) for at, d in self.scheduled_jumps if at > end]
+        self.wall += timedelta(seconds=seconds)
+        self.mono_ns = end
+
+
+def _controller(clocks: SimulatedClocks, segment_seconds: float = 30) -> DirectTimingController:
+    controller = DirectTimingController(wall_clock=clocks.wall_now, mono_clock=clocks.mono, sleep=clocks.sleep)
+    controller.segment_seconds = segment_seconds
+    return controller
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("jump", [timedelta(minutes=5), timedelta(minutes=-5), timedelta(hours=1)])
+async def test_wall_clock_jump_does_not_move_click(jump):
+    """Test: el despertar ocurre a la duración real calculada al programar, con o sin salto"""
+    clocks = SimulatedClocks(SANTIAGO.localize(datetime(2025, 3, 10, 16, 0, 0)))
+    controller = _controller(clocks)
+    timing = controller.calculate_execution_times("2025-03-10", "17:00:00")
+    start_ns = clocks.mono_ns
+
+    clocks.jump_at(1200, jump)  # salto a los 20 minutos de espera
+    result = await controller.sleep_until(timing["execution_deadline"])
+
+    slept = (clocks.mono_ns - start_ns) / 1e9
+    assert slept == pytest.approx(3600.001)
+    assert result["success"] is True
+    assert result["precision_ms"] == 0
+    # El reloj de pared quedó corrido exactamente lo que saltó
+    assert result["wall_offset_ms"] == pytest.approx(jump.total_seconds() * 1000)
+
+
+@pytest.mark.asyncio
+async def test_sleep_is_rearmed_in_segments():
+    """Test: la espera larga se divide en tramos y el último termina en el plazo"""
+    clocks = SimulatedClocks(SANTIAGO.localize(datetime(2025, 3, 10, 16, 58, 0)))
+    controller = _controller(clocks, segment_seconds=30)
+    timing = controller.calculate_execution_times("2025-03-10", "17:00:00")
+
+    result = await controller.sleep_until(timing["execution_deadline"])
+
+    assert result["segments"] == 5
+    assert clocks.sleeps[:4] == [30, 30, 30, 30]
+    assert clocks.sleeps[-1] == pytest.approx(0.001)
+
+
+def test_dst_transition_uses_real_elapsed_time():
+    """Test: al adelantar la hora en Santiago (sep 2025) la espera real es una hora menor"""
+    clocks = SimulatedClocks(SANTIAGO.localize(datetime(2025, 9, 6, 23, 0, 0)))
+    controller = _controller(clocks)
+
+    timing = controller.calculate_execution_times("2025-09-07", "02:00:00")
+
+    # 23:00 (-04) -> 02:00 (-03): dos horas reales, no tres
+    assert timing["wait_until_exec_seconds"] == pytest.approx(2 * 3600 + 0.001)
+    assert str(timing["execution_datetime"].tzinfo) == "America/Santiago"
+
+
+@pytest.mark.asyncio
+async def test_past_deadline_after_backward_jump_does_not_sleep():
+    """Test: un plazo vencido según el reloj monotónico no duerme aunque la pared retroceda"""
+    clocks = SimulatedClocks(SANTIAGO.localize(datetime(2025, 3, 10, 16, 59, 0)))
+    controller = _controller(clocks)
+    timing = controller.calculate_execution_times("2025-03-10", "17:00:00")
+
+    await clocks.sleep(61)
+    clocks.jump(timedelta(minutes=-10))  # la pared vuelve a 16:50
+    result = await controller.sleep_until(timing["execution_deadline"])
+
+    assert result["success"] is False
+    assert clocks.sleeps == [61]
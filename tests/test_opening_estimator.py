@@ -0,0 +1,92 @@
+"""
+Tests para OpeningEstimator - Momento real de apertura por clase
+
+Estas pruebas validan:
+- Con pocas muestras no se mueve el disparo
+- Percentiles, ventana de observación y disparo (nunca antes de T)
+- Modelo por clase y día, con respaldo a toda la clase
+- Persistencia en JSON entre instancias (proceso del job y servidor)
+"""
+
+import pytest
+
+from app.services.opening_estimator import OpeningEstimator
+
+CLASE = "Competitor 19:00-20:00"
+DOMINGO = "2025-03-09"
+LUNES = "2025-03-10"
+
+
+@pytest.fixture
+def estimator(tmp_path):
+    return OpeningEstimator(path=str(tmp_path / "apertura.json"), max_samples=5, min_samples=3, window_margin_ms=100)
+
+
+def test_no_estimate_without_enough_samples(estimator):
+    estimator.record(CLASE, DOMINGO, 150)
+
+    estimate = estimator.estimate(CLASE, DOMINGO)
+
+    assert estimate["samples"] == 1
+    assert estimate["fire_offset_ms"] == 0
+    assert estimate["window_end_ms"] is None
+
+
+def test_estimate_window_and_fire_offset(estimator):
+    for offset in [120, 80, 200, 150, 300]:
+        estimator.record(CLASE, DOMINGO, offset)
+
+    estimate = estimator.estimate(CLASE, DOMINGO)
+
+    assert estimate["key"] == f"{CLASE}|domingo"
+    assert estimate["samples"] == 5
+    assert estimate["p10_ms"] == 80
+    assert estimate["p50_ms"] == 150
+    assert estimate["p90_ms"] == 300
+    assert estimate["window_start_ms"] == -20
+    assert estimate["window_end_ms"] == 400
+    assert estimate["fire_offset_ms"] == 80
+
+
+def test_early_opening_never_fires_before_t(estimator):
+    for offset in [-300, -250, -200]:
+        estimator.record(CLASE, DOMINGO, offset)
+
+    assert estimator.estimate(CLASE, DOMINGO)["fire_offset_ms"] == 0
+
+
+def test_samples_are_bounded(estimator):
+    for offset in [900, 900, 10, 20, 30, 40, 50]:
+        estimator.record(CLASE, DOMINGO, offset)
+
+    assert estimator.estimate(CLASE, DOMINGO)["p90_ms"] == 50
+
+
+def test_day_falls_back_to_whole_class(estimator):
+    """Test: un día sin historial usa las muestras de la clase en otros días"""
+    for offset in [100, 110, 120]:
+        estimator.record(CLASE, DOMINGO, offset)
+    estimator.record(CLASE, LUNES, 500)
+
+    estimate = estimator.estimate(CLASE, LUNES)
+
+    assert estimate["key"] == f"{CLASE}|lunes"
+    assert estimate["samples"] == 4
+    assert estimator.estimate("Otra clase", LUNES)["samples"] == 0
+
+
+def test_model_is_shared_through_the_file(estimator, tmp_path):
+    for offset in [100, 110, 120]:
+        estimator.record(CLASE, DOMINGO, offset)
+
+    other = OpeningEstimator(path=str(tmp_path / "apertura.json"), min_samples=3)
+
+    assert list(other.snapshot()) == [f"{CLASE}|domingo"]
+    assert other.snapshot()[f"{CLASE}|domingo"]["p50_ms"] == 110
+
+
+def test_unreadable_model_starts_empty(tmp_path):
+    path = tmp_path / "apertura.json"
+    path.write_text("{no es json")
+
+    assert OpeningEstimator(path=str(path)).snapshot() == {}
@@ -0,0 +1,95 @@
+"""
+Tests para PreparationLeadModel - Adelanto de preparación aprendido
+
+Estas pruebas validan:
+- Sin historial suficiente se mantiene T-60s
+- Adelanto = p99 de las duraciones + margen (de la clase o por defecto), acotado
+- calculate_execution_times aplica el adelanto y lo recorta si ya no cabe
+"""
+
+from datetime import datetime
+
+import pytest
+import pytz
+
+from app.services.direct_timing_controller import DirectTimingController
+from app.services.preparation_lead import PreparationLeadModel
+
+SANTIAGO = pytz.timezone("America/Santiago")
+CLASE = "METCON 19:00-20:00"
+
+
+@pytest.fixture
+def model(tmp_path):
+    return PreparationLeadModel(
+        path=str(tmp_path / "preparacion.json"),
+        min_samples=3,
+        margin_seconds=10,
+        min_lead_seconds=20,
+        max_lead_seconds=120
+    )
+
+
+def _controller(now: datetime) -> DirectTimingController:
+    return DirectTimingController(wall_clock=lambda: now, mono_clock=lambda: 1_000_000_000)
+
+
+def test_default_lead_without_history(model):
+    model.record(CLASE, 30)
+
+    lead = model.lead_for(CLASE)
+
+    assert lead["learned"] is False
+    assert lead["lead_seconds"] == 60
+    assert lead["samples"] == 1
+
+
+def test_lead_is_p99_plus_margin(model):
+    for duration in [12.5, 14.0, 41.0, 13.2]:
+        model.record(CLASE, duration)
+
+    lead = model.lead_for(CLASE)
+
+    assert lead["learned"] is True
+    assert lead["p99_seconds"] == 41.0
+    assert lead["lead_seconds"] == 51.0
+    assert model.lead_for(CLASE, margin_seconds=30)["lead_seconds"] == 71.0
+
+
+def test_lead_is_clamped(model):
+    for duration in [2, 3, 4]:
+        model.record(CLASE, duration)
+    assert model.lead_for(CLASE)["lead_seconds"] == 20
+
+    for duration in [200, 200, 200]:
+        model.record("Lenta", duration)
+    assert model.lead_for("Lenta")["lead_seconds"] == 120
+
+
+def test_execution_times_use_lead():
+    controller = _controller(SANTIAGO.localize(datetime(2025, 3, 10, 16, 0, 0)))
+
+    timing = controller.calculate_execution_times("2025-03-10", "17:00:00", prep_lead_seconds=95)
+
+    assert timing["is_valid"] is True
+    assert timing["preparation_lead_seconds"] == 95
+    assert timing["preparation_datetime"] == SANTIAGO.localize(datetime(2025, 3, 10, 16, 58, 25))
+
+
+def test_lead_that_no_longer_fits_starts_now():
+    """Test: a T-80s con adelanto aprendido de 120s se prepara de inmediato (antes habría sido válido con 60s)"""
+    controller = _controller(SANTIAGO.localize(datetime(2025, 3, 10, 16, 58, 40)))
+
+    timing = controller.calculate_execution_times("2025-03-10", "17:00:00", prep_lead_seconds=120)
+
+    assert timing["is_valid"] is True
+    assert timing["wait_until_prep_seconds"] == pytest.approx(0.001)
+    assert timing["preparation_lead_seconds"] == pytest.approx(79.999)
+
+
+def test_inside_standard_lead_is_still_too_late():
+    controller = _controller(SANTIAGO.localize(datetime(2025, 3, 10, 16, 59, 30)))
+
+    timing = controller.calculate_execution_times("2025-03-10", "17:00:00", prep_lead_seconds=120)
+
+    assert timing["is_valid"] is False
@@ -313,7 +313,7 @@ class TestPreparationService:
     async def test_validate_button_ready_all_ok(self, preparation_service):
         """Test validación de botón cuando todo está listo"""
         mock_page = AsyncMock()
-        mock_page.is_closed = AsyncMock(return_value=False)
+        mock_page.is_closed = MagicMock(return_value=False)
         mock_page.is_visible = AsyncMock(side_effect=lambda selector: {
             '[role="dialog"]': True,
             'button:has-text("Reservar")': True
@@ -345,7 +345,7 @@ class TestPreparationService:
     async def test_validate_button_ready_page_closed(self, preparation_service):
         """Test validación con página cerrada"""
         mock_page = AsyncMock()
-        mock_page.is_closed = AsyncMock(return_value=True)
+        mock_page.is_closed = MagicMock(return_value=True)
         
         preparation_service.page = mock_page
         preparation_service.button_selector = 'button:has-text("Reservar")'
@@ -360,7 +360,7 @@ class TestPreparationService:
     async def test_validate_button_ready_modal_closed(self, preparation_service):
         """Test validación con modal cerrado"""
         mock_page = AsyncMock()
-        mock_page.is_closed = AsyncMock(return_value=False)
+        mock_page.is_closed = MagicMock(return_value=False)
         mock_page.is_visible = AsyncMock(side_effect=lambda selector: {
             '[role="dialog"]': False,  # Modal cerrado
             'button:has-text("Reservar")': True
@@ -506,6 +506,25 @@ class TestPreparationServicePrivateMethods:
         assert preparation_service.context is None
         assert preparation_service.page is None
         assert preparation_service.button_selector is None
+    
+    @pytest.mark.asyncio
+    async def test_disabled_button_is_armed_only_when_requested(self, preparation_service):
+        """Test: lote e inmediata no arman un botón deshabilitado; la preparación programada sí"""
+        mock_page = preparation_service.page
+        mock_page.wait_for_selector = AsyncMock()
+        mock_page.is_visible = AsyncMock(side_effect=lambda selector: selector == 'button:has-text("Reservar")')
+        mock_page.is_enabled = AsyncMock(return_value=False)
+        
+        result = await preparation_service._prepare_reservation_button()
+        
+        assert result["success"] is False
+        assert result["error_type"] == "BUTTON_NOT_FOUND"
+        assert preparation_service.button_selector is None
+        
+        result = await preparation_service._prepare_reservation_button(arm_disabled=True)
+        
+        assert result["success"] is True
+        assert preparation_service.button_selector == 'button:has-text("Reservar")'
 
 
 # Tests de integración simplificados
@@ -569,3 +588,362 @@ class TestPreparationServiceIntegration:
                 
                 assert execution_result["success"] is True
                 assert execution_result["click_successful"] is True
+
+
+class TestPreparationServiceWarmStart:
+    """Tests para el arranque en caliente (navegador + login por adelantado)"""
+    
+    @pytest.fixture
+    def preparation_service(self):
+        with patch.dict('os.environ', {
+            'CROSSFIT_URL': 'https://test.crossfit.com',
+            'USERNAME': 'test@example.com',
+            'PASSWORD': 'testpass',
+            'BROWSER_HEADLESS': 'true'
+        }):
+            service = PreparationService()
+        
+        async def fake_launch():
+            service.page = AsyncMock()
+            service.page.is_closed = MagicMock(return_value=False)
+        
+        service._launch_browser = AsyncMock(side_effect=fake_launch)
+        service._perform_login = AsyncMock()
+        return service
+    
+    @pytest.mark.asyncio
+    async def test_warm_start_then_prepare_skips_launch_and_login(self, preparation_service):
+        """Test: la preparación posterior solo navega hasta la clase"""
+        warm = await preparation_service.warm_start()
+        
+        assert warm["success"] is True
+        assert set(warm["timings"]) == {"browser_launch", "login"}
+        assert preparation_service.has_authenticated_session() is True
+        
+        preparation_service._navigate_to_classes = AsyncMock()
+        preparation_service._select_date = AsyncMock()
+        preparation_service._locate_class = AsyncMock()
+        preparation_service._prepare_reservation_button = AsyncMock(return_value={"success": True})
+        
+        result = await preparation_service.prepare_reservation("18:00 CrossFit 18:00-19:00", "LU 21")
+        
+        assert result["success"] is True
+        preparation_service._launch_browser.assert_awaited_once()
+        preparation_service._perform_login.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_warm_start_failure_releases_browser(self, preparation_service):
+        """Test: si el login falla se libera el navegador y se prepara en frío"""
+        preparation_service._perform_login = AsyncMock(side_effect=Exception("Login falló"))
+        preparation_service._cleanup_browser = AsyncMock()
+        
+        warm = await preparation_service.warm_start()
+        
+        assert warm["success"] is False
+        assert preparation_service.authenticated is False
+        preparation_service._cleanup_browser.assert_awaited_once()
+
+
+class TestPreparationRepair:
+    """Tests para la reparación desde el punto de control más profundo"""
+    
+    @pytest.fixture
+    def preparation_service(self):
+        with patch.dict('os.environ', {
+            'CROSSFIT_URL': 'https://test.crossfit.com',
+            'USERNAME': 'test@example.com',
+            'PASSWORD': 'testpass',
+            'BROWSER_HEADLESS': 'true'
+        }):
+            service = PreparationService()
+        
+        service.page = AsyncMock()
+        service.page.is_closed = MagicMock(return_value=False)
+        service.button_selector = 'button:has-text("Reservar")'
+        service.checkpoint = "button_armed"
+        service.target = ("18:00 CrossFit 18:00-19:00", "LU 21")
+        service._navigate_to_classes = AsyncMock()
+        service._select_date = AsyncMock()
+        service._locate_class = AsyncMock()
+        service._prepare_reservation_button = AsyncMock(return_value={"success": True, "message": "ok", "error_type": None})
+        return service
+    
+    def _visible(self, service, *selectors):
+        service.page.is_visible = AsyncMock(side_effect=lambda selector: selector in selectors)
+    
+    @pytest.mark.asyncio
+    async def test_intact_preparation_redoes_nothing(self, preparation_service):
+        self._visible(preparation_service, '[role="dialog"]', 'button:has-text("Reservar")')
+        
+        result = await preparation_service.repair_preparation()
+        
+        assert result["success"] is True
+        assert result["valid_checkpoint"] == "button_armed"
+        assert result["redone_steps"] == []
+        preparation_service._locate_class.assert_not_awaited()
+    
+    @pytest.mark.asyncio
+    async def test_closed_modal_only_reopens_class(self, preparation_service):
+        """Test: modal cerrado con la clase a la vista - solo se reabre el modal"""
+        self._visible(preparation_service, 'text="18:00 CrossFit 18:00-19:00"')
+        
+        result = await preparation_service.repair_preparation()
+        
+        assert result["success"] is True
+        assert result["valid_checkpoint"] == "date_selected"
+        assert result["redone_steps"] == ["locate_class", "prepare_button"]
+        preparation_service._navigate_to_classes.assert_not_awaited()
+        preparation_service._select_date.assert_not_awaited()
+        assert preparation_service.checkpoint == "button_armed"
+    
+    @pytest.mark.asyncio
+    async def test_lost_class_view_navigates_again_without_login(self, preparation_service):
+        self._visible(preparation_service)
+        
+        result = await preparation_service.repair_preparation()
+        
+        assert result["valid_checkpoint"] == "logged_in"
+        assert result["redone_steps"] == ["navigate_classes", "select_date", "locate_class", "prepare_button"]
+    
+    @pytest.mark.asyncio
+    async def test_expired_session_prepares_from_scratch(self, preparation_service):
+        self._visible(preparation_service, 'input[type="password"]')
+        preparation_service._cleanup_browser = AsyncMock()
+        preparation_service.prepare_reservation = AsyncMock(return_value={
+            "success": True, "message": "ok", "step_timings": {"browser_launch": 1.0, "login": 4.0}, "error_type": None
+        })
+        
+        result = await preparation_service.repair_preparation()
+        
+        assert result["valid_checkpoint"] is None
+        assert result["redone_steps"] == ["browser_launch", "login"]
+        preparation_service._cleanup_browser.assert_awaited_once()
+        preparation_service.prepare_reservation.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_failed_repair_reports_error(self, preparation_service):
+        self._visible(preparation_service, '[role="dialog"]')
+        preparation_service._prepare_reservation_button.return_value = {
+            "success": False, "message": "Sin cupos", "error_type": "NO_CUPOS"
+        }
+        
+        result = await preparation_service.repair_preparation()
+        
+        assert result["success"] is False
+        assert result["valid_checkpoint"] == "modal_open"
+        assert result["error_type"] == "NO_CUPOS"
+
+
+class TestClickPlan:
+    """Tests para el plan de click precompilado (despacho por CDP)"""
+    
+    @pytest.fixture
+    def preparation_service(self):
+        with patch.dict('os.environ', {
+            'CROSSFIT_URL': 'https://test.crossfit.com',
+            'USERNAME': 'test@example.com',
+            'PASSWORD': 'testpass',
+            'BROWSER_HEADLESS': 'true'
+        }):
+            service = PreparationService()
+        
+        handle = AsyncMock()
+        handle.bounding_box = AsyncMock(return_value={"x": 100, "y": 200, "width": 80, "height": 40})
+        handle.evaluate = AsyncMock(return_value=True)
+        service.page = AsyncMock()
+        service.page.is_closed = MagicMock(return_value=False)
+        service.page.query_selector = AsyncMock(return_value=handle)
+        service.context = AsyncMock()
+        service.cdp = AsyncMock()
+        service.context.new_cdp_session = AsyncMock(return_value=service.cdp)
+        service.button_selector = 'button:has-text("Reservar")'
+        return service
+    
+    def _page_check(self, service, value):
+        """Respuesta de la revalidación en la página; el resto de los envíos CDP devuelve {}"""
+        async def send(method, params):
+            return {"result": {"value": value}} if method == "Runtime.evaluate" else {}
+        service.cdp.send = AsyncMock(side_effect=send)
+    
+    def _dispatched(self, service):
+        return [call.args[1] for call in service.cdp.send.await_args_list if call.args[0] == "Input.dispatchMouseEvent"]
+    
+    @pytest.mark.asyncio
+    async def test_build_click_plan_targets_button_center(self, preparation_service):
+        plan = await preparation_service.build_click_plan()
+        
+        assert plan["valid"] is True
+        assert (plan["x"], plan["y"]) == (140, 220)
+        preparation_service.context.new_cdp_session.assert_awaited_once_with(preparation_service.page)
+    
+    @pytest.mark.asyncio
+    async def test_covered_button_has_no_plan(self, preparation_service):
+        handle = await preparation_service.page.query_selector()
+        handle.evaluate.return_value = False
+        
+        plan = await preparation_service.build_click_plan()
+        
+        assert plan["valid"] is False
+        assert await preparation_service._fire_click_plan(2000) is False
+    
+    @pytest.mark.asyncio
+    async def test_plan_disabled_by_env(self, preparation_service):
+        with patch.dict('os.environ', {'CLICK_PLAN_ENABLED': 'false'}):
+            plan = await preparation_service.build_click_plan()
+        
+        assert plan["valid"] is False
+        preparation_service.page.query_selector.assert_not_awaited()
+    
+    @pytest.mark.asyncio
+    async def test_fire_dispatches_press_and_release_at_revalidated_point(self, preparation_service):
+        await preparation_service.build_click_plan()
+        self._page_check(preparation_service, {"x": 150, "y": 260, "relaid": True, "enabled": True})
+        
+        assert await preparation_service._fire_click_plan(2000) is True
+        
+        events = self._dispatched(preparation_service)
+        assert [event["type"] for event in events] == ["mousePressed", "mouseReleased"]
+        assert all((event["x"], event["y"]) == (150, 260) for event in events)
+    
+    @pytest.mark.asyncio
+    async def test_dry_run_only_moves_the_mouse(self, preparation_service):
+        await preparation_service.build_click_plan()
+        self._page_check(preparation_service, {"x": 140, "y": 220, "relaid": False, "enabled": False})
+        
+        assert await preparation_service._fire_click_plan(0, dry_run=True) is True
+        
+        assert [event["type"] for event in self._dispatched(preparation_service)] == ["mouseMoved", "mouseMoved"]
+    
+    @pytest.mark.asyncio
+    async def test_button_never_enabled_raises(self, preparation_service):
+        await preparation_service.build_click_plan()
+        self._page_check(preparation_service, {"x": 140, "y": 220, "relaid": False, "enabled": False})
+        
+        with pytest.raises(Exception, match="no se habilitó"):
+            await preparation_service._fire_click_plan(1500)
+        assert self._dispatched(preparation_service) == []
+    
+    @pytest.mark.asyncio
+    async def test_invalid_plan_falls_back_to_page_click(self, preparation_service):
+        await preparation_service.build_click_plan()
+        self._page_check(preparation_service, None)
+        preparation_service.page.on = MagicMock()
+        preparation_service.page.remove_listener = MagicMock()
+        preparation_service._read_enablement = AsyncMock(return_value=None)
+        preparation_service._verify_reservation_success = AsyncMock(return_value={
+            "success": True, "message": "Reserva confirmada"
+        })
+        preparation_service._cleanup_browser = AsyncMock()
+        
+        result = await preparation_service.execute_final_click(click_timeout_ms=2000)
+        
+        assert result["success"] is True
+        assert result["click_method"] == "playwright"
+        preparation_service.page.click.assert_awaited_once_with('button:has-text("Reservar")', timeout=2000)
+    
+    @pytest.mark.asyncio
+    async def test_relabelled_button_is_not_clicked_by_plan(self, preparation_service):
+        """Test: el SPA re-renderiza el botón como "Cancelar reserva" después de armar el plan"""
+        await preparation_service.build_click_plan()
+        # La revalidación en la página exige la etiqueta de reservar; con otra devuelve null
+        self._page_check(preparation_service, None)
+        preparation_service.page.on = MagicMock()
+        preparation_service.page.remove_listener = MagicMock()
+        preparation_service.page.click = AsyncMock(side_effect=Exception("Timeout 2000ms exceeded"))
+        
+        result = await preparation_service.execute_final_click(click_timeout_ms=2000)
+        
+        check = preparation_service.cdp.send.await_args_list[0].args[1]["expression"]
+        assert "/(Reservar|Book)/.test(el.textContent)" in check
+        assert self._dispatched(preparation_service) == []
+        assert result["success"] is False
+        preparation_service.page.click.assert_awaited_once_with('button:has-text("Reservar")', timeout=2000)
+
+
+class TestBookingEndpoint:
+    """Tests para el request de reserva: RTT y header Date del servidor"""
+    
+    ENV = {
+        'CROSSFIT_URL': 'https://test.crossfit.com',
+        'USERNAME': 'test@example.com',
+        'PASSWORD': 'testpass',
+        'BROWSER_HEADLESS': 'true'
+    }
+    
+    def _service(self, **env):
+        with patch.dict('os.environ', {**self.ENV, **env}):
+            service = PreparationService()
+        service.page = AsyncMock()
+        service.page.is_closed = MagicMock(return_value=False)
+        return service
+    
+    @staticmethod
+    def _response(url, method="POST", resource_type="fetch"):
+        return MagicMock(url=url, request=MagicMock(method=method, resource_type=resource_type))
+    
+    def test_booking_response_without_configured_endpoint(self):
+        """Test: sin BOOKING_ENDPOINT_URL solo cuenta el primer XHR/fetch de escritura"""
+        service = self._service()
+        
+        assert service._is_booking_response(self._response("https://api.test.com/bookings")) is True
+        assert service._is_booking_response(self._response("https://api.test.com/classes", method="GET")) is False
+        assert service._is_booking_response(self._response("https://cdn.test.com/app.js", resource_type="script")) is False
+    
+    def test_booking_response_with_configured_endpoint(self):
+        service = self._service(BOOKING_ENDPOINT_URL="https://api.test.com/bookings")
+        
+        assert service._is_booking_response(self._response("https://api.test.com/bookings/123")) is True
+        assert service._is_booking_response(self._response("https://api.test.com/analytics")) is False
+    
+    @pytest.mark.asyncio
+    async def test_server_date_comes_from_booking_response(self):
+        """Test: el Date de una respuesta ajena al click (analytics, assets) no se registra"""
+        service = self._service()
+        service.button_selector = 'button:has-text("Reservar")'
+        listeners = []
+        service.page.on = MagicMock(side_effect=lambda event, fn: listeners.append(fn))
+        service.page.remove_listener = MagicMock()
+        service._read_enablement = AsyncMock(return_value=None)
+        service._verify_reservation_success = AsyncMock(return_value={"success": True, "message": "ok"})
+        service._cleanup_browser = AsyncMock()
+        
+        async def click(selector, timeout):
+            analytics = self._response("https://stats.test.com/collect", method="GET", resource_type="image")
+            analytics.headers = {"date": "Mon, 10 Mar 2025 19:59:58 GMT"}
+            booking = self._response("https://api.test.com/bookings")
+            booking.headers = {"date": "Mon, 10 Mar 2025 20:00:00 GMT"}
+            for response in (analytics, booking):
+                listeners[0](response)
+        service.page.click = AsyncMock(side_effect=click)
+        
+        result = await service.execute_final_click()
+        
+        assert result["server_date"] == "Mon, 10 Mar 2025 20:00:00 GMT"
+    
+    @pytest.mark.asyncio
+    async def test_round_trip_probes_booking_endpoint(self):
+        service = self._service(BOOKING_ENDPOINT_URL="https://api.test.com/bookings")
+        service.page.evaluate = AsyncMock(return_value={
+            "target": "https://api.test.com/bookings", "rtts": [40.1234, 41.0]
+        })
+        
+        result = await service.measure_round_trip(samples=2)
+        
+        assert result["success"] is True
+        assert result["rtt_ms"] == [40.123, 41.0]
+        assert result["target"] == "https://api.test.com/bookings"
+        assert service.page.evaluate.await_args.args[1] == [2, "https://api.test.com/bookings"]
+    
+    @pytest.mark.asyncio
+    async def test_round_trip_without_endpoint_probes_site_origin(self):
+        """Test: sin BOOKING_ENDPOINT_URL no se sondea ninguna URL de la API del sitio"""
+        service = self._service()
+        service.page.evaluate = AsyncMock(return_value={"target": "https://test.com/", "rtts": [30.0]})
+        
+        result = await service.measure_round_trip(samples=1)
+        
+        script, args = service.page.evaluate.await_args.args
+        assert result["target"] == "https://test.com/"
+        assert args == [1, None]
+        assert "location.origin" in script
+        assert "getEntriesByType" not in script
@@ -0,0 +1,113 @@
+"""
+Tests para ProcessJobExecutor - Jobs programados en un proceso dedicado
+
+Estas pruebas validan:
+- Los estados del hijo se reflejan en el registro del padre
+- El resultado del hijo llega como ReservaProgramadaResponse
+- La cancelación llega al hijo por el Pipe
+- Un hijo que muere sin resultado se reporta como WORKER_DIED
+"""
+
+import asyncio
+import os
+from datetime import datetime
+
+import pytest
+
+from app.models.reserva import EstadoJob, ReservaProgramadaRequest
+from app.services.idempotency_registry import IdempotencyRegistry
+from app.services.process_executor import ProcessJobExecutor
+
+
+REQUEST = ReservaProgramadaRequest(
+    nombre_clase="18:00 CrossFit 18:00-19:00",
+    fecha_clase="LU 21",
+    fecha_reserva="2025-01-19",
+    hora_reserva="17:00:00"
+)
+
+
+def _successful_worker(conn, request_data, reservation_id, warm_start):
+    conn.send(("state", {"estado": "armed", "info": {"pid": os.getpid()}}))
+    now = datetime.now().isoformat()
+    conn.send(("result", {
+        "id": reservation_id,
+        "clase_nombre": request_data["nombre_clase"],
+        "fecha_clase": request_data["fecha_clase"],
+        "fecha_reserva": request_data["fecha_reserva"],
+        "hora_reserva": request_data["hora_reserva"],
+        "estado": "exitosa",
+        "fecha_creacion": now,
+        "fecha_ejecucion_programada": now,
+        "fecha_ejecucion_real": now,
+        "mensaje": "ok",
+        "tiempo_espera_segundos": 0,
+        "error_type": None
+    }))
+    conn.close()
+
+
+def _waiting_worker(conn, request_data, reservation_id, warm_start):
+    conn.send(("state", {"estado": "armed", "info": {}}))
+    kind, _ = conn.recv()
+    conn.send(("cancelled", kind))
+    conn.close()
+
+
+def _crashing_worker(conn, request_data, reservation_id, warm_start):
+    os._exit(1)
+
+
+def _executor(registry, worker):
+    return ProcessJobExecutor(registry=registry, worker=worker, start_method="fork", cancel_timeout=2)
+
+
+@pytest.fixture
+def registry():
+    registry = IdempotencyRegistry(ttl_seconds=60, active_ttl_seconds=600, max_entries=10)
+    registry.register(IdempotencyRegistry.key_for(REQUEST), "job-1", REQUEST)
+    return registry
+
+
+@pytest.mark.asyncio
+async def test_result_and_states_flow_to_parent(registry):
+    """Test: el estado del hijo llega al registro y el resultado al padre"""
+    executor = _executor(registry, _successful_worker)
+
+    response = await executor.execute_scheduled_reservation(REQUEST, reservation_id="job-1")
+
+    assert response.id == "job-1"
+    assert response.error_type is None
+    entry = registry.get_by_job_id("job-1")
+    assert entry.estado == EstadoJob.ARMED
+    assert entry.info["pid"] == executor.process.pid
+    assert entry.info["pid"] != os.getpid()
+
+
+@pytest.mark.asyncio
+async def test_cancel_reaches_child(registry):
+    """Test: cancelar la tarea del padre detiene al hijo"""
+    executor = _executor(registry, _waiting_worker)
+    task = asyncio.create_task(executor.execute_scheduled_reservation(REQUEST, reservation_id="job-1"))
+
+    for _ in range(200):
+        if registry.get_by_job_id("job-1").estado == EstadoJob.ARMED:
+            break
+        await asyncio.sleep(0.01)
+    task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert executor.process.is_alive() is False
+    assert executor.process.exitcode == 0
+
+
+@pytest.mark.asyncio
+async def test_worker_crash_reported(registry):
+    """Test: un hijo que muere sin resultado se reporta como WORKER_DIED"""
+    executor = _executor(registry, _crashing_worker)
+
+    response = await executor.execute_scheduled_reservation(REQUEST, reservation_id="job-1")
+
+    assert response.error_type == "WORKER_DIED"
+    assert registry.get_by_job_id("job-1").estado == EstadoJob.FAILED
@@ -0,0 +1,178 @@
+"""
+Tests para el ensayo de preparación (T-10 min)
+
+Estas pruebas validan:
+- El ensayo espera hasta T-REHEARSAL_OFFSET_SECONDS y prepara sin click
+- Política "keep": la sesión queda armada y se revalida (o repara) en la preparación
+- Política "release": la sesión se libera
+- Falla: alerta y la preparación se adelanta a T-REHEARSAL_FALLBACK_LEAD_SECONDS
+- El reporte del arranque en caliente usa la hora de preparación vigente
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import pytz
+
+from app.models.reserva import ReservaProgramadaRequest
+from app.services.direct_timing_controller import DirectTimingController
+from app.services.drift_watchdog import DriftWatchdog
+from app.services.scheduled_reservation_manager import ScheduledReservationManager
+
+SANTIAGO = pytz.timezone("America/Santiago")
+
+REQUEST = ReservaProgramadaRequest(
+    nombre_clase="18:00 CrossFit 18:00-19:00",
+    fecha_clase="LU 21",
+    fecha_reserva="2025-03-10",
+    hora_reserva="17:00:00"
+)
+
+
+class SimulatedClocks:
+    def __init__(self, start_wall: datetime):
+        self.mono_ns = 10_000_000_000
+        self.wall = start_wall
+
+    def mono(self) -> int:
+        return self.mono_ns
+
+    def wall_now(self) -> datetime:
+        return self.wall
+
+    async def sleep(self, seconds: float):
+        self.mono_ns += int(round(seconds * 1e9))
+        self.wall += timedelta(seconds=seconds)
+
+
+def _preparation_service(prepare_result):
+    service = MagicMock()
+    service.page.is_closed.return_value = False
+    service.button_selector = 'button:has-text("Reservar")'
+    service.prepare_reservation = AsyncMock(return_value=prepare_result)
+    service.repair_preparation = AsyncMock(return_value={
+        "success": True, "message": "Preparación intacta", "valid_checkpoint": "button_armed",
+        "redone_steps": [], "step_timings": {}, "repair_time": 0.0, "error_type": None
+    })
+    service._cleanup_browser = AsyncMock()
+    return service
+
+
+def _manager(service, monkeypatch, **env):
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    clocks = SimulatedClocks(SANTIAGO.localize(datetime(2025, 3, 10, 16, 0, 0)))
+    manager = ScheduledReservationManager(preparation_service=service)
+    manager.timing_controller = DirectTimingController(
+        wall_clock=clocks.wall_now, mono_clock=clocks.mono, sleep=clocks.sleep
+    )
+    timing = manager.timing_controller.calculate_execution_times("2025-03-10", "17:00:00")
+    manager._drift = DriftWatchdog(manager.timing_controller, {
+        "preparation": timing["preparation_deadline"],
+        "execution": timing["execution_deadline"]
+    })
+    manager._record_timing = MagicMock()
+    return manager, clocks, timing
+
+
+@pytest.mark.asyncio
+async def test_rehearsal_keeps_armed_session(monkeypatch):
+    service = _preparation_service({"success": True, "message": "ok", "preparation_time": 14.2,
+                                    "step_timings": {"login": 4.1, "prepare_button": 1.2}})
+    manager, clocks, timing = _manager(service, monkeypatch, REHEARSAL_SESSION_POLICY="keep")
+
+    assert manager._rehearsal_due(timing) is True
+    report = await manager._rehearse(REQUEST)
+
+    assert clocks.wall == SANTIAGO.localize(datetime(2025, 3, 10, 16, 50, 0, 1000))
+    assert report["success"] is True
+    assert report["session_kept"] is True
+    assert report["step_timings"] == {"login": 4.1, "prepare_button": 1.2}
+    service._cleanup_browser.assert_not_awaited()
+    manager._record_timing.assert_called_once_with(rehearsal=report)
+
+    revalidated = await manager._revalidate_rehearsed_session()
+    assert revalidated["success"] is True
+    assert revalidated["preparation_time"] == 0.0
+
+
+@pytest.mark.asyncio
+async def test_rehearsed_session_repair_is_bounded_by_execution(monkeypatch):
+    service = _preparation_service({"success": True, "message": "ok", "preparation_time": 14.2})
+    manager, clocks, timing = _manager(service, monkeypatch, TIMEOUT_BUDGET_RESERVE_SECONDS="3")
+
+    await manager._revalidate_rehearsed_session()
+
+    budget = service.repair_preparation.await_args.args[0]
+    assert budget.remaining_ms() == pytest.approx(3600 * 1000 + 1 - 3000)
+
+
+@pytest.mark.asyncio
+async def test_unrepairable_rehearsed_session_is_prepared_again(monkeypatch):
+    service = _preparation_service({"success": True, "message": "ok", "preparation_time": 14.2})
+    service.repair_preparation.return_value = {
+        "success": False, "message": "Sin cupos", "valid_checkpoint": "modal_open",
+        "redone_steps": ["prepare_button"], "step_timings": {}, "repair_time": 0.4, "error_type": "NO_CUPOS"
+    }
+    manager, clocks, timing = _manager(service, monkeypatch)
+
+    assert await manager._revalidate_rehearsed_session() is None
+    service._cleanup_browser.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_release_policy_frees_the_session(monkeypatch):
+    service = _preparation_service({"success": True, "message": "ok", "preparation_time": 14.2})
+    manager, clocks, timing = _manager(service, monkeypatch, REHEARSAL_SESSION_POLICY="release")
+
+    report = await manager._rehearse(REQUEST)
+
+    assert report["session_kept"] is False
+    service._cleanup_browser.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_failed_rehearsal_alerts_and_moves_preparation(monkeypatch):
+    service = _preparation_service({"success": False, "message": "No se encontró botón",
+                                    "error_type": "BUTTON_NOT_FOUND", "preparation_time": 20.0})
+    manager, clocks, timing = _manager(service, monkeypatch, REHEARSAL_FALLBACK_LEAD_SECONDS="180")
+
+    with patch("app.services.scheduled_reservation_manager.send_alert", new=AsyncMock()) as alert:
+        report = await manager._rehearse(REQUEST)
+
+    alert.assert_awaited_once()
+    assert alert.await_args.args[0] == "REHEARSAL_FAILED"
+    service._cleanup_browser.assert_awaited_once()
+    moved = manager._drift.deadline("preparation")
+    assert moved.wall == timing["execution_datetime"] - timedelta(seconds=180)
+    assert report["preparation_moved_to"] == moved.wall.isoformat()
+
+
+def test_rehearsal_skipped_when_it_would_not_precede_preparation(monkeypatch):
+    service = _preparation_service({"success": True})
+    manager, clocks, timing = _manager(service, monkeypatch, REHEARSAL_OFFSET_SECONDS="45")
+    assert manager._rehearsal_due(timing) is False
+
+    monkeypatch.setenv("REHEARSAL_OFFSET_SECONDS", "600")
+    monkeypatch.setenv("REHEARSAL_ENABLED", "false")
+    assert manager._rehearsal_due(timing) is False
+
+
+def test_warm_start_report_follows_moved_preparation(monkeypatch):
+    """El reporte del arranque en caliente mide contra la preparación vigente (no la inicial)"""
+    service = _preparation_service({"success": True})
+    manager, clocks, timing = _manager(service, monkeypatch)
+    manager._set_job_state = MagicMock()
+    started = clocks.mono_ns
+    manager._drift.reschedule("preparation", timing["execution_deadline"].shifted(-180))
+
+    manager._report_warm_start(
+        {"success": True, "duration": 3500.0, "started_ns": started,
+         "finished_ns": started + int(3500 * 1e9)},
+        {"preparation_time": 0.0}
+    )
+
+    warm = manager._set_job_state.call_args.kwargs["warm_start"]
+    assert warm["work_before_prep_seconds"] == pytest.approx(3600 - 180)
+    assert warm["prep_lead_seconds"] == pytest.approx(180)
@@ -0,0 +1,115 @@
+"""
+Tests para ReservationResultStore - Resultados de reservas inmediatas asíncronas
+
+Estas pruebas validan:
+- Long-polling que despierta al completarse la reserva
+- Long-polling que respeta el timeout
+- Expiración por TTL de resultados y pendientes
+- Tamaño acotado con expulsión de finalizados primero y rechazo si todo está pendiente
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.models.reserva import ReservaResponse
+from app.services.result_store import ReservationResultStore, ResultStoreFullError
+
+
+def _response(job_id):
+    return ReservaResponse(
+        id=job_id,
+        nombre_clase="18:00 CrossFit 18:00-19:00",
+        fecha="LU 21",
+        estado="exitosa",
+        mensaje="ok",
+        fecha_hora_reserva=datetime.now()
+    )
+
+
+def _store(clock, **kwargs):
+    params = {"ttl_seconds": 60, "pending_ttl_seconds": 600, "max_entries": 10}
+    params.update(kwargs)
+    return ReservationResultStore(clock=clock, **params)
+
+
+@pytest.mark.asyncio
+async def test_long_poll_wakes_on_completion(fake_clock):
+    """Test: la espera termina apenas se guarda el resultado"""
+    store = _store(fake_clock)
+    entry = store.create("18:00 CrossFit 18:00-19:00", "LU 21")
+
+    waiter = asyncio.create_task(store.wait(entry.job_id, timeout=5))
+    await asyncio.sleep(0)
+    store.complete(entry.job_id, _response(entry.job_id))
+
+    result = await asyncio.wait_for(waiter, timeout=1)
+    assert result.is_done
+    assert result.response.id == entry.job_id
+
+
+@pytest.mark.asyncio
+async def test_long_poll_times_out_while_pending(fake_clock):
+    """Test: sin resultado, la espera devuelve el registro pendiente"""
+    store = _store(fake_clock)
+    entry = store.create("18:00 CrossFit 18:00-19:00", "LU 21")
+
+    result = await store.wait(entry.job_id, timeout=0.01)
+
+    assert result is entry
+    assert not result.is_done
+
+
+def test_completed_results_expire_after_ttl(fake_clock):
+    """Test: el resultado se sirve desde caché hasta que vence el TTL"""
+    store = _store(fake_clock)
+    entry = store.create("18:00 CrossFit 18:00-19:00", "LU 21")
+    store.complete(entry.job_id, _response(entry.job_id))
+
+    fake_clock.now += 59
+    assert store.get(entry.job_id).response.id == entry.job_id
+
+    fake_clock.now += 2
+    assert store.get(entry.job_id) is None
+
+
+def test_pending_entries_use_longer_ttl(fake_clock):
+    """Test: un pendiente sobrevive al TTL de resultados"""
+    store = _store(fake_clock)
+    entry = store.create("18:00 CrossFit 18:00-19:00", "LU 21")
+
+    fake_clock.now += 300
+    assert store.get(entry.job_id) is not None
+
+    fake_clock.now += 301
+    assert store.get(entry.job_id) is None
+
+
+def test_bounded_size_evicts_completed_first(fake_clock):
+    """Test: al superar el máximo se expulsa primero un finalizado"""
+    store = _store(fake_clock, max_entries=2)
+    pending = store.create("a", "LU 21")
+    done = store.create("b", "LU 21")
+    store.complete(done.job_id, _response(done.job_id))
+
+    newest = store.create("c", "LU 21")
+
+    assert len(store) == 2
+    assert store.get(pending.job_id) is not None
+    assert store.get(done.job_id) is None
+    assert store.get(newest.job_id) is not None
+
+
+def test_full_of_pending_rejects_new_entry(fake_clock):
+    """Test: lleno de pendientes no se expulsa ninguna, se rechaza el alta"""
+    store = _store(fake_clock, max_entries=2)
+    first = store.create("a", "LU 21")
+    second = store.create("b", "LU 21")
+
+    with pytest.raises(ResultStoreFullError):
+        store.create("c", "LU 21")
+
+    assert len(store) == 2
+    assert store.get(first.job_id) is not None
+    assert store.get(second.job_id) is not None
@@ -0,0 +1,79 @@
+"""
+Tests para CriticalRuntimeMode - Modo crítico alrededor del click
+
+Estas pruebas validan:
+- GC congelado y desactivado dentro del modo, restaurado al salir
+- Anidamiento: se restaura cuando sale el último job
+- Falta de permisos para prioridad/afinidad no impide entrar al modo
+- Modo desactivado por configuración
+"""
+
+import gc
+import os
+
+import pytest
+
+from app.services.runtime_mode import CriticalRuntimeMode, _parse_cpus
+
+
+@pytest.fixture(autouse=True)
+def restore_gc():
+    yield
+    gc.unfreeze()
+    gc.enable()
+
+
+def test_gc_frozen_and_restored():
+    """Test: dentro del modo el GC está desactivado; al salir vuelve a estar activo"""
+    mode = CriticalRuntimeMode(enabled=True, niceness=100, cpu_affinity="")
+
+    with mode:
+        assert not gc.isenabled()
+        assert gc.get_freeze_count() > 0
+        assert mode.applied["gc_frozen"] is True
+
+    assert gc.isenabled()
+    assert gc.get_freeze_count() == 0
+
+
+def test_nested_enter_restores_on_last_exit():
+    """Test: dos jobs en modo crítico; el GC vuelve al salir el último"""
+    mode = CriticalRuntimeMode(enabled=True, niceness=100, cpu_affinity="")
+
+    mode.enter()
+    mode.enter()
+    mode.exit()
+    assert not gc.isenabled()
+    mode.exit()
+    assert gc.isenabled()
+    assert not mode.active
+
+
+def test_priority_without_permission_is_skipped(monkeypatch):
+    """Test: sin permiso para subir la prioridad el modo se aplica igual"""
+    def deny(*args):
+        raise PermissionError("Operation not permitted")
+
+    monkeypatch.setattr(os, "setpriority", deny)
+    mode = CriticalRuntimeMode(enabled=True, niceness=-20, cpu_affinity="")
+
+    applied = mode.enter()
+    assert applied["niceness"] is None
+    assert applied["gc_frozen"] is True
+    mode.exit()
+    assert gc.isenabled()
+
+
+def test_disabled_mode_does_nothing():
+    """Test: con CRITICAL_RUNTIME_MODE=false no se toca el GC"""
+    mode = CriticalRuntimeMode(enabled=False)
+
+    with mode:
+        assert gc.isenabled()
+    assert gc.isenabled()
+
+
+def test_parse_cpu_list():
+    """Test: formato de CPUs estilo taskset"""
+    assert _parse_cpus("0") == {0}
+    assert _parse_cpus("0,2-3") == {0, 2, 3}
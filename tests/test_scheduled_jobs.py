@@ -0,0 +1,211 @@
+"""
+Tests para scheduled_jobs - Cancelación y reprogramación de jobs
+
+Estas pruebas validan:
+- La cancelación interrumpe la espera y cierra el navegador en milisegundos
+- Un job terminado no se puede cancelar
+- Reprogramar conserva el id y reutiliza la sesión si la clase no cambia
+- Reprogramar a otra clase cierra la sesión anterior
+- Reprogramar no publica CANCELLED y valida la nueva fecha/hora
+"""
+
+import asyncio
+from datetime import timedelta
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from app.models.reserva import EstadoJob, ReprogramarReservaRequest, ReservaProgramadaRequest
+from app.services import scheduled_jobs
+from app.services.direct_timing_controller import santiago_now
+from app.services.idempotency_registry import IdempotencyRegistry
+from app.services.scheduled_reservation_manager import ScheduledReservationManager
+
+
+class FakeManager:
+    """Simula ScheduledReservationManager: arma la sesión y espera hasta T"""
+
+    instances = []
+    registry = None
+    _set_job_state = ScheduledReservationManager._set_job_state
+
+    def __init__(self, preparation_service=None):
+        self.preparation_service = preparation_service or AsyncMock()
+        self.keep_session_on_cancel = False
+        self.rescheduling = False
+        self.reuse_session = None
+        self.cleaned = False
+        FakeManager.instances.append(self)
+
+    def _has_live_session(self):
+        return True
+
+    async def execute_scheduled_reservation(self, request, reservation_id=None, reuse_session=False, warm_start=False):
+        self.reuse_session = reuse_session
+        self._job_key = IdempotencyRegistry.key_for(request)
+        self._job_id = reservation_id
+        try:
+            await asyncio.sleep(3600)  # equivalente a sleep_until(T)
+        except asyncio.CancelledError:
+            self._set_job_state(EstadoJob.CANCELLED)
+            if not self.keep_session_on_cancel:
+                self.cleaned = True
+            raise
+
+
+def _request(hora: str = None, fecha_clase: str = "LU 21"):
+    hora = hora or (santiago_now() + timedelta(seconds=60)).strftime("%H:%M:%S")
+    return ReservaProgramadaRequest(
+        nombre_clase="18:00 CrossFit 18:00-19:00",
+        fecha_clase=fecha_clase,
+        fecha_reserva=santiago_now().strftime("%Y-%m-%d"),
+        hora_reserva=hora
+    )
+
+
+@pytest.fixture
+def registry():
+    FakeManager.instances = []
+    FakeManager.registry = IdempotencyRegistry(ttl_seconds=60, active_ttl_seconds=600, max_entries=10)
+    with patch.object(scheduled_jobs, "ScheduledReservationManager", FakeManager):
+        yield FakeManager.registry
+
+
+@pytest.mark.asyncio
+async def test_cancel_interrupts_wait_and_cleans_up(registry):
+    """Test: cancelar interrumpe sleep_until y cierra el navegador"""
+    response, _ = scheduled_jobs.schedule_reservation(_request(), registry=registry)
+    await asyncio.sleep(0)
+
+    entry, elapsed_ms = await scheduled_jobs.cancel_job(response.id, registry=registry)
+
+    assert entry.estado == EstadoJob.CANCELLED
+    assert entry.task.done()
+    assert FakeManager.instances[0].cleaned is True
+    assert elapsed_ms < 100
+
+
+@pytest.mark.asyncio
+async def test_cancel_unknown_and_terminal_jobs(registry):
+    """Test: ids desconocidos y jobs terminados se rechazan"""
+    with pytest.raises(scheduled_jobs.JobNotFoundError):
+        await scheduled_jobs.cancel_job("no-existe", registry=registry)
+
+    response, _ = scheduled_jobs.schedule_reservation(_request(), registry=registry)
+    await scheduled_jobs.cancel_job(response.id, registry=registry)
+
+    with pytest.raises(scheduled_jobs.JobConflictError):
+        await scheduled_jobs.cancel_job(response.id, registry=registry)
+
+
+@pytest.mark.asyncio
+async def test_reschedule_same_class_reuses_armed_session(registry):
+    """Test: reprogramar con el botón armado traspasa la sesión al nuevo job"""
+    response, _ = scheduled_jobs.schedule_reservation(_request(), registry=registry)
+    await asyncio.sleep(0)
+    registry.update_state(registry.get_by_job_id(response.id).key, EstadoJob.ARMED)
+    old_manager = FakeManager.instances[0]
+
+    new_hora = (santiago_now() + timedelta(seconds=90)).strftime("%H:%M:%S")
+    entry, reused = await scheduled_jobs.reschedule_job(
+        response.id,
+        ReprogramarReservaRequest(fecha_reserva=santiago_now().strftime("%Y-%m-%d"), hora_reserva=new_hora),
+        registry=registry
+    )
+    await asyncio.sleep(0)
+
+    assert reused is True
+    assert entry.job_id == response.id
+    assert entry.key[2] == new_hora
+    assert old_manager.cleaned is False
+    new_manager = FakeManager.instances[1]
+    assert new_manager.preparation_service is old_manager.preparation_service
+    assert new_manager.reuse_session is True
+
+    await scheduled_jobs.cancel_job(response.id, registry=registry)
+
+
+@pytest.mark.asyncio
+async def test_reschedule_other_class_page_closes_session(registry):
+    """Test: si cambia la fecha de la clase se cierra la sesión anterior"""
+    response, _ = scheduled_jobs.schedule_reservation(_request(), registry=registry)
+    await asyncio.sleep(0)
+    registry.update_state(registry.get_by_job_id(response.id).key, EstadoJob.ARMED)
+
+    entry, reused = await scheduled_jobs.reschedule_job(
+        response.id,
+        ReprogramarReservaRequest(
+            fecha_reserva=santiago_now().strftime("%Y-%m-%d"),
+            hora_reserva=(santiago_now() + timedelta(seconds=90)).strftime("%H:%M:%S"),
+            fecha_clase="MA 22"
+        ),
+        registry=registry
+    )
+
+    assert reused is False
+    assert FakeManager.instances[0].cleaned is True
+    assert entry.request.fecha_clase == "MA 22"
+
+    await scheduled_jobs.cancel_job(response.id, registry=registry)
+
+
+def test_job_response_reports_real_wait_time():
+    """Test: la respuesta informa la espera real hasta la ejecución"""
+    registry = IdempotencyRegistry(ttl_seconds=60, active_ttl_seconds=600, max_entries=10)
+    target = santiago_now() + timedelta(hours=1)
+    request = ReservaProgramadaRequest(
+        nombre_clase="18:00 CrossFit 18:00-19:00",
+        fecha_clase="LU 21",
+        fecha_reserva=target.strftime("%Y-%m-%d"),
+        hora_reserva=target.strftime("%H:%M:%S")
+    )
+    entry, _ = registry.register(IdempotencyRegistry.key_for(request), "job-1", request)
+
+    response = scheduled_jobs.build_job_response(entry, "ok")
+
+    assert 3590 <= response.tiempo_espera_segundos <= 3600
+    assert response.fecha_ejecucion_programada == target.replace(microsecond=0)
+
+
+@pytest.mark.asyncio
+async def test_reschedule_does_not_publish_cancelled(registry):
+    """Test: la cancelación interna de la reprogramación no cierra el stream del job"""
+    response, _ = scheduled_jobs.schedule_reservation(_request(), registry=registry)
+    await asyncio.sleep(0)
+    events = []
+    registry.add_listener(lambda entry, previous, info: events.append((entry.job_id, entry.estado)))
+
+    entry, _ = await scheduled_jobs.reschedule_job(
+        response.id,
+        ReprogramarReservaRequest(
+            fecha_reserva=santiago_now().strftime("%Y-%m-%d"),
+            hora_reserva=(santiago_now() + timedelta(seconds=90)).strftime("%H:%M:%S")
+        ),
+        registry=registry
+    )
+
+    assert FakeManager.instances[0].rescheduling is True
+    assert (response.id, EstadoJob.CANCELLED) not in events
+    assert entry.estado == EstadoJob.PENDING
+
+    await scheduled_jobs.cancel_job(response.id, registry=registry)
+    assert events[-1] == (response.id, EstadoJob.CANCELLED)
+
+
+@pytest.mark.asyncio
+async def test_reschedule_rejects_invalid_or_past_time(registry):
+    """Test: una nueva hora mal formada o pasada se rechaza sin tocar el job"""
+    response, _ = scheduled_jobs.schedule_reservation(_request(), registry=registry)
+    await asyncio.sleep(0)
+    ayer = santiago_now() - timedelta(days=1)
+
+    for fecha, hora in ((santiago_now().strftime("%Y-%m-%d"), "17h00"), (ayer.strftime("%Y-%m-%d"), ayer.strftime("%H:%M:%S"))):
+        with pytest.raises(scheduled_jobs.JobValidationError):
+            await scheduled_jobs.reschedule_job(
+                response.id,
+                ReprogramarReservaRequest(fecha_reserva=fecha, hora_reserva=hora),
+                registry=registry
+            )
+
+    assert not registry.get_by_job_id(response.id).task.done()
+    await scheduled_jobs.cancel_job(response.id, registry=registry)
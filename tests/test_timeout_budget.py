@@ -0,0 +1,71 @@
+"""
+Tests para TimeoutBudget - Presupuesto de tiempo de las esperas
+
+Estas pruebas validan:
+- Sin plazo cada espera usa su tope
+- Con plazo: min(tope, restante - reserva), nunca 0
+- Presupuesto agotado: BudgetExhaustedError y pausas recortadas a 0
+"""
+
+import pytest
+
+from app.services.direct_timing_controller import Deadline
+from app.services.timeout_budget import UNLIMITED_BUDGET, BudgetExhaustedError, TimeoutBudget
+
+
+# Reloj monotónico en ns
+MONO_CLOCK = pytest.mark.parametrize("fake_clock", [1_000_000_000], indirect=True)
+
+
+def _budget(clock, seconds_left: float, reserve_seconds: float = 3) -> TimeoutBudget:
+    return TimeoutBudget(clock() + int(seconds_left * 1e9), reserve_seconds=reserve_seconds, clock=clock)
+
+
+def test_unlimited_budget_uses_step_ceilings():
+    assert UNLIMITED_BUDGET.limited is False
+    assert UNLIMITED_BUDGET.timeout(8000) == 8000
+    assert UNLIMITED_BUDGET.pause(2000) == 2000
+    assert UNLIMITED_BUDGET.exhausted() is False
+
+
+@MONO_CLOCK
+def test_timeout_is_min_of_ceiling_and_remaining(fake_clock):
+    budget = _budget(fake_clock, seconds_left=10)
+
+    assert budget.remaining_ms() == pytest.approx(7000)
+    assert budget.timeout(5000) == 5000
+    assert budget.timeout(8000) == pytest.approx(7000)
+
+    fake_clock.now += 6_500_000_000
+    assert budget.timeout(5000) == pytest.approx(500)
+    assert budget.pause(2000) == pytest.approx(500)
+
+
+@MONO_CLOCK
+def test_exhausted_budget_raises_and_skips_pauses(fake_clock):
+    budget = _budget(fake_clock, seconds_left=4)
+
+    fake_clock.now += 1_000_000_000
+    assert budget.exhausted() is True
+    assert budget.pause(500) == 0
+    with pytest.raises(BudgetExhaustedError):
+        budget.timeout(3000)
+
+
+@MONO_CLOCK
+def test_timeout_never_returns_zero(fake_clock):
+    """Test: timeout=0 en Playwright es espera infinita"""
+    budget = _budget(fake_clock, seconds_left=3.0000001)
+
+    assert budget.timeout(5000) == 1.0
+
+
+@MONO_CLOCK
+def test_for_deadline_uses_monotonic_deadline(monkeypatch, fake_clock):
+    monkeypatch.setenv("TIMEOUT_BUDGET_RESERVE_SECONDS", "1")
+    deadline = Deadline(wall=None, mono_ns=fake_clock() + 20_000_000_000)
+
+    budget = TimeoutBudget.for_deadline(deadline, clock=fake_clock)
+
+    assert budget.reserve_seconds == 1
+    assert budget.remaining_ms() == pytest.approx(19000)
@@ -11,6 +11,7 @@ del DirectTimingController en diversos escenarios:
 
 import unittest
 import asyncio
+import time
 from datetime import datetime, timedelta
 from unittest.mock import patch, MagicMock
 import pytz
@@ -296,6 +297,22 @@ class TestDirectTimingControllerAsync(unittest.IsolatedAsyncioTestCase):
         wake_times = [result["actual_wake_time"] for result in results]
         self.assertEqual(wake_times, sorted(wake_times))
 
+    async def test_precise_sleep_until_absorbs_loop_lag(self):
+        """Test: con el loop bloqueado menos que el tramo activo, se llega a tiempo"""
+        target_time = datetime.now(self.timezone) + timedelta(milliseconds=150)
+
+        async def hog():
+            await asyncio.sleep(0.03)
+            time.sleep(0.04)  # bloquea el loop cuando vence el timer del tramo pasivo (50ms)
+
+        hog_task = asyncio.create_task(hog())
+        result = await self.controller.precise_sleep_until(target_time, spin_seconds=0.1)
+        await hog_task
+
+        self.assertTrue(result["success"])
+        self.assertGreaterEqual(result["precision_ms"], 0)
+        self.assertLess(result["precision_ms"], 5)
+
 
 def run_basic_tests():
     """Función auxiliar para ejecutar tests básicos sin asyncio"""